@@ -0,0 +1,256 @@
+"""
+Admission Control - Per-tenant fair scheduling and load shedding for expensive endpoints
+Each client may run a bounded number of heavy requests at once; waiting requests
+are dispatched in weighted fair order across clients (start-time fair queuing),
+so a client with a large backlog cannot starve the others. When requests have
+been waiting longer than the configured queue delay the controller sheds load
+with a fast 503 and Retry-After instead of letting them pile up into worker
+timeouts.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; the caller answers 503 with Retry-After"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("tenant", "start_tag", "finish_tag", "future", "enqueued_at")
+
+    def __init__(self, tenant: "_Tenant", start_tag: float, finish_tag: float, future: asyncio.Future):
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _Tenant:
+    __slots__ = ("client_id", "weight", "in_flight", "queue", "last_finish_tag", "admitted", "rejected")
+
+    def __init__(self, client_id: str, weight: float):
+        self.client_id = client_id
+        self.weight = weight
+        self.in_flight = 0
+        self.queue: Deque[_Waiter] = deque()
+        self.last_finish_tag = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+
+class AdmissionController:
+    """
+    Bounded global concurrency with per-client quotas and weighted fair queuing.
+    All state is touched from the event loop only, so no locks are needed.
+    """
+
+    def __init__(self, max_concurrency: int = 20, per_client_limit: int = 4,
+                 max_queue_delay: float = 10.0, max_queue_size: int = 200):
+        self.max_concurrency = max_concurrency
+        self.per_client_limit = per_client_limit
+        self.max_queue_delay = max_queue_delay
+        self.max_queue_size = max_queue_size
+        self.weights: Dict[str, float] = {}
+        self._tenants: Dict[str, _Tenant] = {}
+        self._active = 0
+        self._queued = 0
+        self._virtual_time = 0.0
+        # Smoothed time admitted requests spent queued - the load-shedding signal
+        self._queue_delay_ewma = 0.0
+        self.shed = 0
+
+    def set_weight(self, client_id: str, weight: float):
+        """Larger weights get a proportionally larger share when clients compete"""
+        self.weights[client_id] = max(weight, 0.01)
+        if client_id in self._tenants:
+            self._tenants[client_id].weight = self.weights[client_id]
+
+    def _tenant(self, client_id: str) -> _Tenant:
+        tenant = self._tenants.get(client_id)
+        if tenant is None:
+            tenant = _Tenant(client_id, self.weights.get(client_id, 1.0))
+            self._tenants[client_id] = tenant
+        return tenant
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(max(self._queue_delay_ewma, self.max_queue_delay / 2)))
+
+    def _observe_queue_delay(self, seconds: float):
+        self._queue_delay_ewma = 0.8 * self._queue_delay_ewma + 0.2 * seconds
+
+    def _can_run(self, tenant: _Tenant) -> bool:
+        return self._active < self.max_concurrency and tenant.in_flight < self.per_client_limit
+
+    def _start(self, tenant: _Tenant):
+        self._active += 1
+        tenant.in_flight += 1
+        tenant.admitted += 1
+
+    def _dispatch(self):
+        """Hand free slots to the queued request with the smallest finish tag among clients under quota"""
+        while self._active < self.max_concurrency and self._queued:
+            best: Optional[_Waiter] = None
+            for tenant in self._tenants.values():
+                if tenant.queue and tenant.in_flight < self.per_client_limit:
+                    head = tenant.queue[0]
+                    if best is None or head.finish_tag < best.finish_tag:
+                        best = head
+            if best is None:
+                return
+            best.tenant.queue.popleft()
+            self._queued -= 1
+            self._virtual_time = max(self._virtual_time, best.start_tag)
+            self._start(best.tenant)
+            self._observe_queue_delay(time.monotonic() - best.enqueued_at)
+            best.future.set_result(None)
+
+    def release(self, tenant: _Tenant):
+        """Give back a slot taken by acquire and start the next queued request"""
+        self._active -= 1
+        tenant.in_flight -= 1
+        if not tenant.in_flight and not tenant.queue:
+            # Idle clients start fresh; a stale tag would favour or penalise them later
+            del self._tenants[tenant.client_id]
+        self._dispatch()
+
+    async def acquire(self, client_id: str, cost: float = 1.0) -> _Tenant:
+        tenant = self._tenant(client_id)
+
+        if self._can_run(tenant) and not tenant.queue:
+            self._start(tenant)
+            self._observe_queue_delay(0.0)
+            return tenant
+
+        # Shed once queueing delay passes half the budget, but only for clients that
+        # already have work in the system - fair queuing puts a newcomer near the front
+        overloaded = self._queue_delay_ewma > self.max_queue_delay / 2 and (tenant.in_flight or tenant.queue)
+        if self._queued >= self.max_queue_size or overloaded:
+            tenant.rejected += 1
+            self.shed += 1
+            if not tenant.in_flight and not tenant.queue:
+                del self._tenants[client_id]
+            raise AdmissionRejected("Server is busy", self._retry_after())
+
+        start_tag = max(self._virtual_time, tenant.last_finish_tag)
+        finish_tag = start_tag + cost / tenant.weight
+        tenant.last_finish_tag = finish_tag
+        waiter = _Waiter(tenant, start_tag, finish_tag, asyncio.get_running_loop().create_future())
+        tenant.queue.append(waiter)
+        self._queued += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.max_queue_delay)
+            return tenant
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Admitted just as we gave up - hand the slot back
+                self.release(tenant)
+            else:
+                tenant.queue.remove(waiter)
+                self._queued -= 1
+                self._observe_queue_delay(time.monotonic() - waiter.enqueued_at)
+                if not tenant.in_flight and not tenant.queue:
+                    del self._tenants[client_id]
+                self._dispatch()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            tenant.rejected += 1
+            self.shed += 1
+            raise AdmissionRejected("Timed out waiting for capacity", self._retry_after())
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, cost: float = 1.0):
+        """Hold one of the client's slots for the duration of the block"""
+        tenant = await self.acquire(client_id, cost)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    def stats(self, include_clients: bool = False) -> Dict[str, Any]:
+        stats = {
+            "active": self._active,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "per_client_limit": self.per_client_limit,
+            "queue_delay_ewma_seconds": round(self._queue_delay_ewma, 3),
+            "shed": self.shed,
+            "busy_clients": len(self._tenants),
+        }
+        if include_clients:
+            stats["clients"] = {
+                client_id: {"in_flight": tenant.in_flight, "queued": len(tenant.queue), "weight": tenant.weight}
+                for client_id, tenant in self._tenants.items()
+            }
+        return stats
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware putting the controller in front of selected paths. The slot
+    is held until the response body has been sent, so streamed responses count
+    for their whole duration.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths: Iterable[str],
+                 tenant_resolver: Callable[[Dict[str, Any]], str]):
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths)
+        self.tenant_resolver = tenant_resolver
+
+    def _controlled(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS" or not self._controlled(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        client_id = self.tenant_resolver(scope)
+        try:
+            tenant = await self.controller.acquire(client_id)
+        except AdmissionRejected as e:
+            logger.warning(f" Shedding {scope['path']} for {client_id}: {e.reason} (retry after {e.retry_after}s)")
+            body = json.dumps({"detail": e.reason, "retry_after": e.retry_after}).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(e.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(tenant)
+
+
+# Global instance
+admission_controller = AdmissionController(
+    max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "20")),
+    per_client_limit=int(os.getenv("ADMISSION_PER_CLIENT_LIMIT", "4")),
+    max_queue_delay=float(os.getenv("ADMISSION_MAX_QUEUE_DELAY_SECONDS", "10")),
+    max_queue_size=int(os.getenv("ADMISSION_MAX_QUEUE_SIZE", "200")),
+)
@@ -8,22 +8,29 @@ import logging
 from datetime import datetime
 from database import get_admin_client, get_db_manager
 import uuid
-import asyncio
-import random
-from openai import OpenAI
+from llm_gateway import llm_gateway
+from request_deadline import DeadlineExceeded
+from prompt_budget import DATA_SLOT, prompt_builder
 
 # Import enhanced data parser
 from enhanced_data_parser import enhanced_parser
+from data_profiler import DataProfiler
 
 logger = logging.getLogger(__name__)
 
+# Token budgets for the upload insights call: prompt (instructions + data profile) and answer
+INSIGHT_PROMPT_TOKENS = 3000
+MAX_INSIGHT_TOKENS = 2000
+# Completions per insights call when the answer is not the expected JSON
+INSIGHT_JSON_ATTEMPTS = 2
+
 class AIDataAnalyzer:
     """AI-powered data analyzer with enhanced format support and comprehensive validation"""
     
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if self.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            # Completions go through the shared async gateway
             logger.info(" OpenAI API key configured")
         else:
             raise Exception(" OpenAI API key REQUIRED - no fallbacks allowed")
@@ -36,77 +43,66 @@ class AIDataAnalyzer:
         """
         Analyze raw data using enhanced parser with comprehensive validation
         """
-        max_retries = 10
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                logger.info(f" Enhanced analysis of {data_format} data for client {client_id} (attempt {retry_count + 1})")
-                
-                # Step 1: Use enhanced parser for parsing and validation
-                parsed_data, validation_result = await self.enhanced_parser.parse_data(
-                    raw_data=raw_data,
-                    data_format=data_format,
-                    file_name=file_name,
-                    **kwargs
-                )
-                
-                if not validation_result.is_valid:
-                    raise Exception(f"Data validation failed: {validation_result.error_message}")
+        try:
+            logger.info(f" Enhanced analysis of {data_format} data for client {client_id}")
+                
+            # Step 1: Use enhanced parser for parsing and validation
+            parsed_data, validation_result = await self.enhanced_parser.parse_data(
+                raw_data=raw_data,
+                data_format=data_format,
+                file_name=file_name,
+                **kwargs
+            )
                 
-                # Step 2: Generate data quality report
-                quality_report = await self.enhanced_parser.generate_data_quality_report(parsed_data)
+            if not validation_result.is_valid:
+                raise Exception(f"Data validation failed: {validation_result.error_message}")
                 
-                logger.info(f" Data quality score: {quality_report.quality_score:.2f}")
+            # Step 2: Generate data quality report
+            quality_report = await self.enhanced_parser.generate_data_quality_report(parsed_data)
                 
-                # Step 3: Analyze data structure for schema generation
-                columns = self._analyze_columns_enhanced(parsed_data, quality_report)
+            logger.info(f" Data quality score: {quality_report.quality_score:.2f}")
                 
-                # Step 4: Generate table name
-                clean_client_id = client_id.replace('-', '_')
-                table_name = f"client_{clean_client_id}_data"
+            # Step 3: Analyze data structure for schema generation
+            columns = self._analyze_columns_enhanced(parsed_data, quality_report)
                 
-                # Step 5: Create enhanced schema with validation info
-                schema = TableSchema(
-                    table_name=table_name,
-                    columns=columns,
-                    relationships=[],
-                    indexes=[],
-                    constraints=[]
-                )
+            # Step 4: Generate table name
+            clean_client_id = client_id.replace('-', '_')
+            table_name = f"client_{clean_client_id}_data"
                 
-                # Step 6: Generate AI insights with enhanced context
-                business_insights = await self._generate_enhanced_ai_insights(
-                    parsed_data, schema, data_format, validation_result, quality_report
-                )
-                
-                # Step 7: Create comprehensive AI result
-                result = AIAnalysisResult(
-                    data_type=self._detect_enhanced_data_type(parsed_data, business_insights),
-                    confidence=business_insights.get('confidence', 0.8),
-                    table_schema=schema,
-                    insights=business_insights.get('insights', []),
-                    recommended_visualizations=business_insights.get('visualizations', []),
-                    sample_queries=business_insights.get('queries', [])
-                )
+            # Step 5: Create enhanced schema with validation info
+            schema = TableSchema(
+                table_name=table_name,
+                columns=columns,
+                relationships=[],
+                indexes=[],
+                constraints=[]
+            )
                 
-                logger.info(f" Enhanced AI analysis completed for client {client_id}")
-                logger.info(f" Detected: {result.data_type} data with {quality_report.quality_score:.1%} quality")
+            # Step 6: Generate AI insights with enhanced context
+            business_insights = await self._generate_enhanced_ai_insights(
+                parsed_data, schema, data_format, validation_result, quality_report
+            )
                 
-                return result
+            # Step 7: Create comprehensive AI result
+            result = AIAnalysisResult(
+                data_type=self._detect_enhanced_data_type(parsed_data, business_insights),
+                confidence=business_insights.get('confidence', 0.8),
+                table_schema=schema,
+                insights=business_insights.get('insights', []),
+                recommended_visualizations=business_insights.get('visualizations', []),
+                sample_queries=business_insights.get('queries', [])
+            )
                 
-            except Exception as e:
-                retry_count += 1
-                logger.warning(f" Enhanced analysis attempt {retry_count} failed: {e}")
+            logger.info(f" Enhanced AI analysis completed for client {client_id}")
+            logger.info(f" Detected: {result.data_type} data with {quality_report.quality_score:.1%} quality")
                 
-                if retry_count >= max_retries:
-                    logger.error(f" Enhanced analysis failed after {max_retries} attempts")
-                    raise Exception(f"AI analysis failed after {max_retries} attempts: {str(e)}")
+            return result
                 
-                # Exponential backoff
-                wait_time = min(2 ** retry_count + (random.random() * 2), 30)
-                logger.info(f" Waiting {wait_time:.1f}s before retry...")
-                await asyncio.sleep(wait_time)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f" Enhanced analysis failed: {e}")
+            raise Exception(f"AI analysis failed: {str(e)}")
     
     async def create_table_and_insert_data(self, ai_result: AIAnalysisResult, parsed_data: pd.DataFrame, client_id: str):
         """High-performance table creation and data insertion using database manager"""
@@ -437,22 +433,35 @@ class AIDataAnalyzer:
         """Enhanced column analysis with data quality insights"""
         columns = []
         
+        # One profiling pass (null counts, distinct sketches, samples) shared by every check below
+        profile = DataProfiler(
+            mode=self.enhanced_parser.profiling_mode,
+            exact_limit=self.enhanced_parser.exact_profile_limit,
+            sample_size=100
+        ).observe_frame(df).profile
+        
         for col_name, col_data in df.items():
+            col_profile = profile.get(str(col_name))
+            
             # Get enhanced data type info
             sql_type = self._infer_sql_type_enhanced(col_data, quality_report.data_types_detected.get(col_name))
             
             # Advanced primary key detection
-            is_primary_key = self._detect_primary_key_enhanced(col_name, col_data)
+            is_primary_key = self._detect_primary_key_enhanced(col_name, col_data, col_profile)
             
             # Enhanced uniqueness check
-            is_unique = self._check_uniqueness_enhanced(col_data)
+            is_unique = self._check_uniqueness_enhanced(col_data, col_profile)
             
             # Null analysis
-            has_nulls = col_data.isnull().any()
-            null_percentage = (col_data.isnull().sum() / len(col_data)) * 100 if len(col_data) > 0 else 0
+            if col_profile is not None:
+                has_nulls = col_profile.null_count > 0
+                null_percentage = col_profile.null_percentage
+            else:
+                has_nulls = col_data.isnull().any()
+                null_percentage = (col_data.isnull().sum() / len(col_data)) * 100 if len(col_data) > 0 else 0
             
             # Enhanced sample values
-            sample_values = self._get_enhanced_sample_values(col_data)
+            sample_values = self._get_enhanced_sample_values(col_data, col_profile)
             
             # Generate enhanced description
             description = self._generate_column_description(col_name, col_data, sql_type, null_percentage)
@@ -510,20 +519,25 @@ class AIDataAnalyzer:
         # Fallback to original logic
         return self._infer_sql_type(series)
     
-    def _detect_primary_key_enhanced(self, col_name: str, col_data: pd.Series) -> bool:
+    def _detect_primary_key_enhanced(self, col_name: str, col_data: pd.Series, col_profile=None) -> bool:
         """Enhanced primary key detection"""
+        if col_profile is not None:
+            # Cheap rejection from the profile; exact uniqueness is only confirmed for candidates
+            if col_profile.null_count > 0 or col_profile.unique_ratio < 0.95:
+                return False
+        
         # Check naming patterns
         pk_patterns = ['id', 'uuid', 'pk', '_id', 'key']
         name_lower = col_name.lower()
         
         if any(pattern in name_lower for pattern in pk_patterns):
             # Check if values are unique and not null
-            if col_data.nunique() == len(col_data) and not col_data.isnull().any():
+            if col_data.is_unique and not col_data.isnull().any():
                 return True
         
         # Check for auto-incrementing integer patterns
         if pd.api.types.is_integer_dtype(col_data):
-            if col_data.nunique() == len(col_data):
+            if col_data.is_unique:
                 # Check if it looks like auto-increment
                 sorted_values = col_data.sort_values()
                 if len(sorted_values) > 1:
@@ -533,20 +547,29 @@ class AIDataAnalyzer:
         
         return False
     
-    def _check_uniqueness_enhanced(self, col_data: pd.Series) -> bool:
+    def _check_uniqueness_enhanced(self, col_data: pd.Series, col_profile=None) -> bool:
         """Enhanced uniqueness check with statistical analysis"""
         if len(col_data) == 0:
             return False
         
-        unique_count = col_data.nunique()
+        # The profile's distinct count is exact for small columns and a HyperLogLog estimate otherwise
+        unique_count = col_profile.distinct_count if col_profile is not None else col_data.nunique()
         total_count = len(col_data)
         
         # Consider unique if > 95% unique values
         uniqueness_ratio = unique_count / total_count
         return uniqueness_ratio > 0.95
     
-    def _get_enhanced_sample_values(self, col_data: pd.Series) -> List[Any]:
+    def _get_enhanced_sample_values(self, col_data: pd.Series, col_profile=None) -> List[Any]:
         """Get enhanced sample values with better representation"""
+        if col_profile is not None and not col_profile.non_null_count:
+            return ["NULL"]
+        
+        if col_profile is not None and not pd.api.types.is_numeric_dtype(col_data):
+            # Most frequent values within the reservoir sample instead of a full value_counts()
+            top_values = pd.Series(col_profile.sample_values).value_counts().head(3).index.tolist()
+            return [str(val) for val in top_values]
+        
         non_null_data = col_data.dropna()
         
         if len(non_null_data) == 0:
@@ -594,125 +617,128 @@ class AIDataAnalyzer:
                                            data_format: DataFormat, validation_result, 
                                            quality_report) -> Dict[str, Any]:
         """Generate enhanced AI insights with comprehensive context"""
-        max_retries = 15
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                # Prepare enhanced data summary
-                enhanced_summary = {
-                    "basic_info": {
-                        "row_count": len(df),
-                        "column_count": len(df.columns),
-                        "data_format": data_format.value,
-                        "file_size": validation_result.file_size,
-                        "encoding": validation_result.encoding
-                    },
-                    "data_quality": {
-                        "quality_score": quality_report.quality_score,
-                        "complete_rows": quality_report.complete_rows,
-                        "missing_values": quality_report.missing_values_count,
-                        "duplicate_rows": quality_report.duplicate_rows,
-                        "issues": quality_report.issues,
-                        "data_types": quality_report.data_types_detected
-                    },
-                    "column_analysis": [
-                        {
-                            "name": col.name,
-                            "type": col.data_type,
-                            "sample_values": col.sample_values[:3],
-                            "is_unique": col.unique,
-                            "description": col.description
-                        }
-                        for col in schema.columns[:10]  # Limit for AI processing
-                    ],
-                    "sample_data": df.head(3).to_dict('records') if not df.empty else []
-                }
-                
-                prompt = f"""
-                Analyze this enhanced dataset and provide comprehensive business insights:
-                
-                Dataset Summary:
-                {json.dumps(enhanced_summary, indent=2, default=str)}
-                
-                Based on this enhanced analysis, please provide:
-                
-                1. **data_type**: What type of business data is this? 
-                   Options: "ecommerce", "crm", "financial", "hr", "marketing", "analytics", 
-                   "iot", "inventory", "healthcare", "education", "logistics", "manufacturing", "other"
-                
-                2. **confidence**: Confidence in classification (0.0 to 1.0)
-                
-                3. **insights**: List of 5-7 key business insights about this data, including:
-                   - Data quality observations
-                   - Business value potential
-                   - Patterns or trends visible
-                   - Recommended use cases
-                
-                4. **visualizations**: List of 5-7 recommended chart types optimized for this data:
-                   Options: "line_chart", "bar_chart", "pie_chart", "scatter_plot", "heatmap", 
-                   "area_chart", "histogram", "box_plot", "treemap", "gauge", "funnel", "waterfall"
-                
-                5. **queries**: List of 5-7 useful SQL queries for business analysis
-                
-                6. **recommendations**: List of 3-5 strategic recommendations for this dataset
-                
-                7. **kpi_suggestions**: List of 4-6 key performance indicators that could be derived
-                
-                Respond in valid JSON format:
-                {{
-                    "data_type": "string",
-                    "confidence": 0.9,
-                    "insights": ["insight1", "insight2", ...],
-                    "visualizations": ["chart_type1", "chart_type2", ...],
-                    "queries": ["SELECT ...", "SELECT ...", ...],
-                    "recommendations": ["recommendation1", ...],
-                    "kpi_suggestions": ["kpi1", "kpi2", ...]
-                }}
-                """
-                
+        try:
+            # Prepare enhanced data summary
+            enhanced_summary = {
+                "basic_info": {
+                    "row_count": len(df),
+                    "column_count": len(df.columns),
+                    "data_format": data_format.value,
+                    "file_size": validation_result.file_size,
+                    "encoding": validation_result.encoding
+                },
+                "data_quality": {
+                    "quality_score": quality_report.quality_score,
+                    "complete_rows": quality_report.complete_rows,
+                    "missing_values": quality_report.missing_values_count,
+                    "duplicate_rows": quality_report.duplicate_rows,
+                    "issues": quality_report.issues,
+                    "data_types": quality_report.data_types_detected
+                },
+                "column_analysis": [
+                    {
+                        "name": col.name,
+                        "type": col.data_type,
+                        "sample_values": col.sample_values[:3],
+                        "is_unique": col.unique,
+                        "description": col.description
+                    }
+                    for col in schema.columns[:10]  # Limit for AI processing
+                ]
+            }
+            
+            prompt = f"""
+            Analyze this enhanced dataset and provide comprehensive business insights:
+            
+            Dataset Summary:
+            {json.dumps(enhanced_summary, indent=2, default=str)}
+            
+            Column Statistics (all rows) and Representative Rows:
+            {DATA_SLOT}
+            
+            Based on this enhanced analysis, please provide:
+            
+            1. **data_type**: What type of business data is this? 
+               Options: "ecommerce", "crm", "financial", "hr", "marketing", "analytics", 
+               "iot", "inventory", "healthcare", "education", "logistics", "manufacturing", "other"
+            
+            2. **confidence**: Confidence in classification (0.0 to 1.0)
+            
+            3. **insights**: List of 5-7 key business insights about this data, including:
+               - Data quality observations
+               - Business value potential
+               - Patterns or trends visible
+               - Recommended use cases
+            
+            4. **visualizations**: List of 5-7 recommended chart types optimized for this data:
+               Options: "line_chart", "bar_chart", "pie_chart", "scatter_plot", "heatmap", 
+               "area_chart", "histogram", "box_plot", "treemap", "gauge", "funnel", "waterfall"
+            
+            5. **queries**: List of 5-7 useful SQL queries for business analysis
+            
+            6. **recommendations**: List of 3-5 strategic recommendations for this dataset
+            
+            7. **kpi_suggestions**: List of 4-6 key performance indicators that could be derived
+            
+            Respond in valid JSON format:
+            {{
+                "data_type": "string",
+                "confidence": 0.9,
+                "insights": ["insight1", "insight2", ...],
+                "visualizations": ["chart_type1", "chart_type2", ...],
+                "queries": ["SELECT ...", "SELECT ...", ...],
+                "recommendations": ["recommendation1", ...],
+                "kpi_suggestions": ["kpi1", "kpi2", ...]
+            }}
+            """
+            
+            messages = [
+                {"role": "system", "content": "You are an expert data analyst and business intelligence consultant."},
+                {"role": "user", "content": prompt_builder.fill(prompt, df, token_budget=INSIGHT_PROMPT_TOKENS)}
+            ]
+            required_keys = ["data_type", "confidence", "insights", "visualizations", "queries", "recommendations"]
+            
+            # llm_gateway already retries transport errors; only an unusable answer is asked for again
+            for attempt in range(1, INSIGHT_JSON_ATTEMPTS + 1):
                 # Enhanced OpenAI call with better model
-                response = self.openai_client.chat.completions.create(
+                response = await llm_gateway.chat(
                     model="gpt-4o",  # Use GPT-4o for maximum token capacity and advanced analysis
-                    messages=[
-                        {"role": "system", "content": "You are an expert data analyst and business intelligence consultant."},
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=messages,
                     temperature=0.3,
-                    max_tokens=8192  # Optimized for faster response while maintaining quality
+                    max_tokens=MAX_INSIGHT_TOKENS  # Seven short lists of JSON; a bounded answer keeps latency predictable
                 )
                 
-                ai_response = json.loads(response.choices[0].message.content)
+                try:
+                    ai_response = json.loads(response.choices[0].message.content or "")
+                except json.JSONDecodeError as e:
+                    logger.warning(f" Enhanced AI insights attempt {attempt} returned invalid JSON: {e}")
+                    continue
                 
                 # Validate response structure
-                required_keys = ["data_type", "confidence", "insights", "visualizations", "queries", "recommendations"]
-                for key in required_keys:
-                    if key not in ai_response:
-                        raise Exception(f"Missing required key in AI response: {key}")
+                missing_keys = [key for key in required_keys if key not in ai_response] if isinstance(ai_response, dict) else required_keys
+                if missing_keys:
+                    logger.warning(f" Enhanced AI insights attempt {attempt} missing required keys: {missing_keys}")
+                    continue
                 
                 logger.info(f" Enhanced AI insights completed - detected {ai_response.get('data_type', 'unknown')} data")
                 return ai_response
-                
-            except Exception as e:
-                retry_count += 1
-                wait_time = min(retry_count * 3, 60)
-                logger.warning(f" Enhanced AI insights attempt {retry_count} failed: {e}")
-                
-                if retry_count >= max_retries:
-                    logger.error(f" Enhanced AI insights failed after {max_retries} attempts: {e}")
-                    # Return fallback response
-                    return {
-                        "data_type": "general",
-                        "confidence": 0.5,
-                        "insights": ["Data analysis completed with enhanced parser"],
-                        "visualizations": ["bar_chart", "line_chart"],
-                        "queries": ["SELECT * FROM data LIMIT 10"],
-                        "recommendations": ["Explore data patterns"],
-                        "kpi_suggestions": ["Total Records", "Data Quality Score"]
-                    }
-                
-                logger.info(f" Retrying enhanced AI call in {wait_time} seconds...")
-                await asyncio.sleep(wait_time)
+            
+            logger.error(f" Enhanced AI insights unusable after {INSIGHT_JSON_ATTEMPTS} attempts")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f" Enhanced AI insights failed: {e}")
+        
+        # Return fallback response
+        return {
+            "data_type": "general",
+            "confidence": 0.5,
+            "insights": ["Data analysis completed with enhanced parser"],
+            "visualizations": ["bar_chart", "line_chart"],
+            "queries": ["SELECT * FROM data LIMIT 10"],
+            "recommendations": ["Explore data patterns"],
+            "kpi_suggestions": ["Total Records", "Data Quality Score"]
+        }
     
     def _detect_enhanced_data_type(self, df: pd.DataFrame, business_insights: Dict[str, Any]) -> str:
         """Enhanced data type detection using AI insights and heuristics"""
@@ -18,9 +18,10 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 import logging
 import asyncio
-import concurrent.futures
 import time
 
+from analysis_pool import SharedInput, analysis_pool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -57,7 +58,6 @@ class HighPerformanceAIOrchestrator:
         self.data_cache = {}
         self.user_preferences = {}
         self.dashboard_templates = self._initialize_templates()
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=6)
         
         # Performance tracking
         self.performance_stats = {
@@ -102,18 +102,17 @@ class HighPerformanceAIOrchestrator:
         try:
             logger.info(f" High-performance analysis of {len(data)} records")
             
-            # Run analysis operations concurrently for maximum speed
-            tasks = [
-                asyncio.create_task(self._assess_data_quality_async(data)),
-                asyncio.create_task(self._detect_trends_async(data)),
-                asyncio.create_task(self._detect_anomalies_async(data)),
-                asyncio.create_task(self._find_correlations_async(data)),
-                asyncio.create_task(self._detect_seasonality_async(data)),
-                asyncio.create_task(self._calculate_growth_metrics_async(data))
-            ]
-            
-            # Wait for all analyses to complete concurrently
-            results = await asyncio.gather(*tasks)
+            # Encode the frame once into read-only shared memory and run the analyses
+            # in the process pool, so they use separate cores and leave the event loop alone
+            async with analysis_pool.share(data) as shared:
+                results = await asyncio.gather(
+                    self._assess_data_quality_async(shared),
+                    self._detect_trends_async(shared),
+                    self._detect_anomalies_async(shared),
+                    self._find_correlations_async(shared),
+                    self._detect_seasonality_async(shared),
+                    self._calculate_growth_metrics_async(shared)
+                )
             
             analysis = {
                 "data_quality": results[0],
@@ -126,7 +125,7 @@ class HighPerformanceAIOrchestrator:
             }
             
             # Generate AI recommendations based on analysis
-            analysis["recommendations"] = await self._generate_recommendations_async(analysis, data)
+            analysis["recommendations"] = self._generate_recommendations(analysis)
             
             analysis_time = time.time() - start_time
             self.performance_stats['total_analyses'] += 1
@@ -142,257 +141,69 @@ class HighPerformanceAIOrchestrator:
             logger.error(f" High-performance analysis failed: {e}")
             raise Exception(f"Data analysis failed: {str(e)}")
     
-    async def _assess_data_quality_async(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Async data quality assessment for concurrent processing"""
-        def assess_quality():
-            total_rows = len(data)
-            if total_rows == 0:
-                return {"score": 0, "issues": ["No data available"]}
-                
-            quality_score = 100
-            issues = []
-            
-            # Check for missing values
-            missing_ratio = data.isnull().sum().sum() / (len(data) * len(data.columns))
-            if missing_ratio > 0.1:
-                quality_score -= 20
-                issues.append(f"High missing data ratio: {missing_ratio:.2%}")
-            
-            # Check for duplicates
-            duplicate_ratio = data.duplicated().sum() / len(data)
-            if duplicate_ratio > 0.05:
-                quality_score -= 15
-                issues.append(f"High duplicate ratio: {duplicate_ratio:.2%}")
-            
-            return {
-                "score": max(0, quality_score),
-                "total_records": total_rows,
-                "missing_ratio": missing_ratio,
-                "duplicate_ratio": duplicate_ratio,
-                "issues": issues
-            }
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, assess_quality)
+    def analyze_data_pattern_sync(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """analyze_data_pattern for synchronous callers (no running event loop)"""
+        return asyncio.run(self.analyze_data_pattern(data))
+    
+    async def _assess_data_quality_async(self, shared: SharedInput) -> Dict[str, Any]:
+        """Data quality assessment in the analysis pool"""
+        return await analysis_pool.run("data_quality", shared)
 
-    async def _detect_trends_async(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Async trend detection for concurrent processing"""
-        def detect_trends():
-            trends = {}
-            numeric_columns = data.select_dtypes(include=[np.number]).columns
-            
-            for col in numeric_columns:
-                if len(data[col].dropna()) > 1:
-                    values = data[col].dropna()
-                    
-                    if len(values) >= 2:
-                        recent_avg = values.tail(min(len(values)//3, 10)).mean()
-                        early_avg = values.head(min(len(values)//3, 10)).mean()
-                        
-                        if recent_avg > early_avg * 1.05:
-                            trend = "increasing"
-                            strength = min((recent_avg - early_avg) / early_avg * 100, 100)
-                        elif recent_avg < early_avg * 0.95:
-                            trend = "decreasing"
-                            strength = min((early_avg - recent_avg) / early_avg * 100, 100)
-                        else:
-                            trend = "stable"
-                            strength = 0
-                        
-                        trends[col] = {
-                            "direction": trend,
-                            "strength": round(strength, 2),
-                            "current_value": float(values.iloc[-1]),
-                            "change_percentage": round((recent_avg - early_avg) / early_avg * 100, 2) if early_avg != 0 else 0
-                        }
-            
-            return trends
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, detect_trends)
+    async def _detect_trends_async(self, shared: SharedInput) -> Dict[str, Any]:
+        """Trend detection in the analysis pool"""
+        return await analysis_pool.run("trends", shared)
 
-    async def _detect_anomalies_async(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Async anomaly detection for concurrent processing"""
-        def detect_anomalies():
-            anomalies = {}
-            numeric_columns = data.select_dtypes(include=[np.number]).columns
-            
-            for col in numeric_columns:
-                values = data[col].dropna()
-                if len(values) > 3:
-                    Q1 = values.quantile(0.25)
-                    Q3 = values.quantile(0.75)
-                    IQR = Q3 - Q1
-                    lower_bound = Q1 - 1.5 * IQR
-                    upper_bound = Q3 + 1.5 * IQR
-                    
-                    outliers = values[(values < lower_bound) | (values > upper_bound)]
-                    
-                    if len(outliers) > 0:
-                        anomalies[col] = {
-                            "count": len(outliers),
-                            "percentage": round(len(outliers) / len(values) * 100, 2),
-                            "values": outliers.tolist()[:5],
-                            "bounds": {"lower": float(lower_bound), "upper": float(upper_bound)}
-                        }
-            
-            return anomalies
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, detect_anomalies)
+    async def _detect_anomalies_async(self, shared: SharedInput) -> Dict[str, Any]:
+        """Anomaly detection in the analysis pool"""
+        return await analysis_pool.run("anomalies", shared)
 
-    async def _find_correlations_async(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Async correlation analysis for concurrent processing"""
-        def find_correlations():
-            numeric_data = data.select_dtypes(include=[np.number])
-            if len(numeric_data.columns) < 2:
-                return {}
-            
-            corr_matrix = numeric_data.corr()
-            strong_correlations = []
-            
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    corr_value = corr_matrix.iloc[i, j]
-                    if abs(corr_value) > 0.5 and not np.isnan(corr_value):
-                        strong_correlations.append({
-                            "variable1": corr_matrix.columns[i],
-                            "variable2": corr_matrix.columns[j],
-                            "correlation": round(float(corr_value), 3),
-                            "strength": "strong" if abs(corr_value) > 0.8 else "moderate"
-                        })
-            
-            return {
-                "strong_correlations": strong_correlations,
-                "correlation_matrix": corr_matrix.round(3).to_dict()
-            }
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, find_correlations)
+    async def _find_correlations_async(self, shared: SharedInput) -> Dict[str, Any]:
+        """Correlation analysis in the analysis pool"""
+        return await analysis_pool.run("correlations", shared)
 
-    async def _detect_seasonality_async(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Async seasonality detection for concurrent processing"""
-        def detect_seasonality():
-            seasonality = {}
-            
-            # Look for date columns
-            for col in data.columns:
-                if 'date' in col.lower() or 'time' in col.lower():
-                    try:
-                        data[col] = pd.to_datetime(data[col])
-                        if len(data) > 12:
-                            data_sorted = data.sort_values(col)
-                            data_sorted['month'] = data_sorted[col].dt.month
-                            data_sorted['quarter'] = data_sorted[col].dt.quarter
-                            
-                            numeric_cols = data.select_dtypes(include=[np.number]).columns
-                            for num_col in numeric_cols:
-                                monthly_avg = data_sorted.groupby('month')[num_col].mean()
-                                quarterly_avg = data_sorted.groupby('quarter')[num_col].mean()
-                                
-                                monthly_cv = monthly_avg.std() / monthly_avg.mean() if monthly_avg.mean() != 0 else 0
-                                quarterly_cv = quarterly_avg.std() / quarterly_avg.mean() if quarterly_avg.mean() != 0 else 0
-                                
-                                if monthly_cv > 0.2:
-                                    seasonality[num_col] = {
-                                        "has_seasonality": True,
-                                        "type": "monthly",
-                                        "strength": round(float(monthly_cv), 3),
-                                        "peak_month": int(monthly_avg.idxmax()),
-                                        "low_month": int(monthly_avg.idxmin())
-                                    }
-                                elif quarterly_cv > 0.15:
-                                    seasonality[num_col] = {
-                                        "has_seasonality": True,
-                                        "type": "quarterly",
-                                        "strength": round(float(quarterly_cv), 3),
-                                        "peak_quarter": int(quarterly_avg.idxmax()),
-                                        "low_quarter": int(quarterly_avg.idxmin())
-                                    }
-                            break
-                    except:
-                        continue
-            
-            return seasonality
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, detect_seasonality)
+    async def _detect_seasonality_async(self, shared: SharedInput) -> Dict[str, Any]:
+        """Seasonality detection in the analysis pool (dates are parsed into the shared input, not the caller's frame)"""
+        return await analysis_pool.run("seasonality", shared)
 
-    async def _calculate_growth_metrics_async(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Async growth metrics calculation for concurrent processing"""
-        def calculate_growth():
-            growth_metrics = {}
-            numeric_columns = data.select_dtypes(include=[np.number]).columns
-            
-            for col in numeric_columns:
-                values = data[col].dropna()
-                if len(values) >= 2:
-                    current_value = float(values.iloc[-1])
-                    previous_value = float(values.iloc[-2])
-                    first_value = float(values.iloc[0])
-                    
-                    pop_growth = ((current_value - previous_value) / previous_value * 100) if previous_value != 0 else 0
-                    total_growth = ((current_value - first_value) / first_value * 100) if first_value != 0 else 0
-                    
-                    if len(values) > 2:
-                        periods = len(values) - 1
-                        cagr = (((current_value / first_value) ** (1/periods)) - 1) * 100 if first_value > 0 else 0
-                    else:
-                        cagr = pop_growth
-                    
-                    growth_metrics[col] = {
-                        "current_value": current_value,
-                        "previous_value": previous_value,
-                        "period_over_period": round(pop_growth, 2),
-                        "total_growth": round(total_growth, 2),
-                        "compound_annual_growth_rate": round(cagr, 2),
-                        "trend": "positive" if pop_growth > 0 else "negative" if pop_growth < 0 else "neutral"
-                    }
-            
-            return growth_metrics
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, calculate_growth)
+    async def _calculate_growth_metrics_async(self, shared: SharedInput) -> Dict[str, Any]:
+        """Growth metrics calculation in the analysis pool"""
+        return await analysis_pool.run("growth_metrics", shared)
 
-    async def _generate_recommendations_async(self, analysis: Dict[str, Any], data: pd.DataFrame) -> List[str]:
-        """Async AI-powered recommendations generation"""
-        def generate_recommendations():
-            recommendations = []
-            
-            # Data quality recommendations
-            if analysis["data_quality"]["score"] < 80:
-                recommendations.append(" Improve data quality by addressing missing values and duplicates")
-            
-            # Trend-based recommendations
-            trends = analysis.get("trends", {})
-            for col, trend_info in trends.items():
-                if trend_info["direction"] == "decreasing" and trend_info["strength"] > 10:
-                    recommendations.append(f" {col} shows declining trend ({trend_info['strength']:.1f}%) - investigate root causes")
-                elif trend_info["direction"] == "increasing" and trend_info["strength"] > 20:
-                    recommendations.append(f" {col} shows strong growth ({trend_info['strength']:.1f}%) - consider scaling strategies")
-            
-            # Anomaly recommendations
-            anomalies = analysis.get("anomalies", {})
-            for col, anomaly_info in anomalies.items():
-                if anomaly_info["percentage"] > 5:
-                    recommendations.append(f" {col} has {anomaly_info['percentage']:.1f}% outliers - review data collection process")
-            
-            # Correlation insights
-            correlations = analysis.get("correlations", {})
-            strong_corrs = correlations.get("strong_correlations", [])
-            for corr in strong_corrs[:3]:
-                recommendations.append(f" Strong correlation between {corr['variable1']} and {corr['variable2']} ({corr['correlation']}) - explore causality")
-            
-            # Seasonality recommendations
-            seasonality = analysis.get("seasonality", {})
-            for col, season_info in seasonality.items():
-                if season_info.get("has_seasonality"):
-                    recommendations.append(f" {col} shows seasonal patterns - plan for {season_info['type']} variations")
-            
-            return recommendations[:10]
+    def _generate_recommendations(self, analysis: Dict[str, Any]) -> List[str]:
+        """AI-powered recommendations from the analysis results (cheap, runs inline)"""
+        recommendations = []
+        
+        # Data quality recommendations
+        if analysis["data_quality"].get("score", 100) < 80:
+            recommendations.append(" Improve data quality by addressing missing values and duplicates")
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, generate_recommendations)
+        # Trend-based recommendations
+        trends = analysis.get("trends", {})
+        for col, trend_info in trends.items():
+            if trend_info["direction"] == "decreasing" and trend_info["strength"] > 10:
+                recommendations.append(f" {col} shows declining trend ({trend_info['strength']:.1f}%) - investigate root causes")
+            elif trend_info["direction"] == "increasing" and trend_info["strength"] > 20:
+                recommendations.append(f" {col} shows strong growth ({trend_info['strength']:.1f}%) - consider scaling strategies")
+        
+        # Anomaly recommendations
+        anomalies = analysis.get("anomalies", {})
+        for col, anomaly_info in anomalies.items():
+            if anomaly_info["percentage"] > 5:
+                recommendations.append(f" {col} has {anomaly_info['percentage']:.1f}% outliers - review data collection process")
+        
+        # Correlation insights
+        correlations = analysis.get("correlations", {})
+        strong_corrs = correlations.get("strong_correlations", [])
+        for corr in strong_corrs[:3]:
+            recommendations.append(f" Strong correlation between {corr['variable1']} and {corr['variable2']} ({corr['correlation']}) - explore causality")
+        
+        # Seasonality recommendations
+        seasonality = analysis.get("seasonality", {})
+        for col, season_info in seasonality.items():
+            if season_info.get("has_seasonality"):
+                recommendations.append(f" {col} shows seasonal patterns - plan for {season_info['type']} variations")
+        
+        return recommendations[:10]
 
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics"""
@@ -404,7 +215,8 @@ class HighPerformanceAIOrchestrator:
             "avg_analysis_time": round(self.performance_stats['avg_analysis_time'], 3),
             "cache_hit_rate": round(cache_hit_rate, 1),
             "cache_hits": self.performance_stats['cache_hits'],
-            "cache_misses": self.performance_stats['cache_misses']
+            "cache_misses": self.performance_stats['cache_misses'],
+            "analysis_pool": analysis_pool.stats()
         }
     
     def generate_dashboard_config(self, data: pd.DataFrame, user_preferences: Optional[Dict] = None, 
@@ -414,7 +226,7 @@ class HighPerformanceAIOrchestrator:
         """
         try:
             # Analyze the data first
-            analysis = self.analyze_data_pattern(data)
+            analysis = self.analyze_data_pattern_sync(data)
             
             # Determine dashboard type if auto
             if dashboard_type == "auto":
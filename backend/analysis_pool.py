@@ -0,0 +1,479 @@
+"""
+Analysis Pool - Pattern analyses in worker processes over shared memory
+The per-column loops behind the data-pattern analyses (quality, trends,
+anomalies, correlations, seasonality, growth) hold the GIL, so a thread pool
+runs them one after another and competes with the event loop. Here the frame
+is encoded once into a read-only shared-memory segment (one NumPy array per
+numeric/date column, a null mask and row hashes), every analysis runs in a
+process of a persistent pool attaching to that segment without copying or
+pickling the frame, and each analysis has its own timeout.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from request_deadline import call_timeout
+
+logger = logging.getLogger(__name__)
+
+# 0 runs the analyses in threads in this process (no pool), e.g. on single-core hosts
+ANALYSIS_PROCESSES = int(os.getenv("ANALYSIS_PROCESSES", str(min(6, os.cpu_count() or 1))))
+
+# Per-analysis budget; a slow analysis yields an empty result instead of holding up the others
+ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "30"))
+
+_ALIGN = 64
+
+
+@dataclass
+class SharedFrameSpec:
+    """Everything a worker needs to rebuild the frame from the segment; small and picklable"""
+    shm_name: Optional[str]
+    row_count: int
+    column_count: int
+    # (name, dtype, byte offset) per numeric column, in frame order
+    numeric: List[Tuple[str, str, int]] = field(default_factory=list)
+    # (name, byte offset) per date/time column parsed to datetime64[ns]
+    dates: List[Tuple[str, int]] = field(default_factory=list)
+    # uint8 (rows x columns) null flags of the non-numeric columns, and uint64 row hashes
+    null_mask: Optional[Tuple[int, int]] = None
+    row_hashes: Optional[int] = None
+
+
+class SharedFrame:
+    """Read-only view of an encoded frame, backed by shared memory or (inline mode) plain arrays"""
+
+    def __init__(self, spec: SharedFrameSpec, buffer):
+        self.spec = spec
+        rows = spec.row_count
+
+        def array(dtype, offset, shape):
+            values = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            values.flags.writeable = False
+            return values
+
+        self.numeric = pd.DataFrame(
+            {name: array(np.dtype(dtype), offset, (rows,)) for name, dtype, offset in spec.numeric},
+            copy=False,
+        ) if spec.numeric else pd.DataFrame(index=pd.RangeIndex(rows))
+        self.dates = {
+            name: pd.Series(array(np.dtype("datetime64[ns]"), offset, (rows,)), name=name, copy=False)
+            for name, offset in spec.dates
+        }
+        self.null_mask = array(np.uint8, spec.null_mask[0], (rows, spec.null_mask[1])) if spec.null_mask else None
+        self.row_hashes = array(np.uint64, spec.row_hashes, (rows,)) if spec.row_hashes is not None else None
+
+
+def _parse_dates(data: pd.DataFrame) -> Dict[str, pd.Series]:
+    """Date/time-named columns as datetime64[ns]; the caller's frame is left untouched"""
+    dates = {}
+    for col in data.columns:
+        if 'date' in str(col).lower() or 'time' in str(col).lower():
+            try:
+                parsed = pd.to_datetime(data[col])
+                if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+                    parsed = parsed.dt.tz_convert(None)
+                dates[str(col)] = parsed.astype("datetime64[ns]")
+            except Exception:
+                continue
+    return dates
+
+
+def _row_hashes(data: pd.DataFrame) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(data, index=False).to_numpy(dtype=np.uint64)
+    except TypeError:
+        # Lists/dicts in cells are compared by their text
+        return pd.util.hash_pandas_object(data.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+def encode_frame(data: pd.DataFrame) -> Tuple[SharedFrameSpec, List[Tuple[int, np.ndarray]], int]:
+    """One vectorized pass: the arrays the analyses read, their byte offsets, and the segment size"""
+    rows = len(data)
+    spec = SharedFrameSpec(shm_name=None, row_count=rows, column_count=len(data.columns))
+    arrays: List[Tuple[int, np.ndarray]] = []
+    size = 0
+
+    def place(values: np.ndarray) -> int:
+        nonlocal size
+        start = size
+        arrays.append((start, np.ascontiguousarray(values)))
+        size = start + values.nbytes + (-(start + values.nbytes)) % _ALIGN
+        return start
+
+    numeric = data.select_dtypes(include=[np.number])
+    for col in numeric.columns:
+        values = numeric[col].to_numpy()
+        if values.dtype == object:
+            # Nullable extension dtypes (Int64, Float64) come out as objects
+            values = numeric[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        spec.numeric.append((str(col), values.dtype.str, place(values)))
+    for name, parsed in _parse_dates(data).items():
+        spec.dates.append((name, place(parsed.to_numpy())))
+    others = data.drop(columns=numeric.columns)
+    if len(others.columns):
+        spec.null_mask = (place(others.isnull().to_numpy(dtype=np.uint8)), len(others.columns))
+    if rows:
+        spec.row_hashes = place(_row_hashes(data))
+    return spec, arrays, size
+
+
+# Analyses: pure functions of a SharedFrame, run in the workers
+
+def assess_quality(frame: SharedFrame) -> Dict[str, Any]:
+    total_rows = frame.spec.row_count
+    if total_rows == 0:
+        return {"score": 0, "issues": ["No data available"]}
+
+    quality_score = 100
+    issues = []
+
+    # Check for missing values
+    missing = int(frame.numeric.isnull().to_numpy().sum())
+    if frame.null_mask is not None:
+        missing += int(frame.null_mask.sum())
+    missing_ratio = missing / (total_rows * frame.spec.column_count)
+    if missing_ratio > 0.1:
+        quality_score -= 20
+        issues.append(f"High missing data ratio: {missing_ratio:.2%}")
+
+    # Check for duplicates
+    duplicate_ratio = int(pd.Series(frame.row_hashes).duplicated().sum()) / total_rows
+    if duplicate_ratio > 0.05:
+        quality_score -= 15
+        issues.append(f"High duplicate ratio: {duplicate_ratio:.2%}")
+
+    return {
+        "score": max(0, quality_score),
+        "total_records": total_rows,
+        "missing_ratio": missing_ratio,
+        "duplicate_ratio": duplicate_ratio,
+        "issues": issues
+    }
+
+
+def detect_trends(frame: SharedFrame) -> Dict[str, Any]:
+    trends = {}
+    data = frame.numeric
+
+    for col in data.columns:
+        values = data[col].dropna()
+        if len(values) >= 2:
+            recent_avg = values.tail(min(len(values)//3, 10)).mean()
+            early_avg = values.head(min(len(values)//3, 10)).mean()
+
+            if recent_avg > early_avg * 1.05:
+                trend = "increasing"
+                strength = min((recent_avg - early_avg) / early_avg * 100, 100)
+            elif recent_avg < early_avg * 0.95:
+                trend = "decreasing"
+                strength = min((early_avg - recent_avg) / early_avg * 100, 100)
+            else:
+                trend = "stable"
+                strength = 0
+
+            trends[col] = {
+                "direction": trend,
+                "strength": round(strength, 2),
+                "current_value": float(values.iloc[-1]),
+                "change_percentage": round((recent_avg - early_avg) / early_avg * 100, 2) if early_avg != 0 else 0
+            }
+
+    return trends
+
+
+def detect_anomalies(frame: SharedFrame) -> Dict[str, Any]:
+    anomalies = {}
+    data = frame.numeric
+    if data.empty:
+        return anomalies
+
+    # Quartiles of every column in one call instead of two per column
+    quartiles = data.quantile([0.25, 0.75])
+    counts = data.count()
+    for col in data.columns:
+        if counts[col] > 3:
+            Q1 = quartiles.at[0.25, col]
+            Q3 = quartiles.at[0.75, col]
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
+
+            values = data[col].dropna()
+            outliers = values[(values < lower_bound) | (values > upper_bound)]
+
+            if len(outliers) > 0:
+                anomalies[col] = {
+                    "count": len(outliers),
+                    "percentage": round(len(outliers) / len(values) * 100, 2),
+                    "values": outliers.tolist()[:5],
+                    "bounds": {"lower": float(lower_bound), "upper": float(upper_bound)}
+                }
+
+    return anomalies
+
+
+def find_correlations(frame: SharedFrame) -> Dict[str, Any]:
+    numeric_data = frame.numeric
+    if len(numeric_data.columns) < 2:
+        return {}
+
+    corr_matrix = numeric_data.corr()
+    columns = corr_matrix.columns
+    values = corr_matrix.to_numpy()
+    # Upper-triangle pairs above the threshold, found vectorized instead of an O(n^2) Python walk
+    rows, cols = np.triu_indices(len(columns), k=1)
+    pair_values = values[rows, cols]
+    strong = np.flatnonzero(np.abs(np.nan_to_num(pair_values)) > 0.5)
+    strong_correlations = [
+        {
+            "variable1": columns[rows[k]],
+            "variable2": columns[cols[k]],
+            "correlation": round(float(pair_values[k]), 3),
+            "strength": "strong" if abs(pair_values[k]) > 0.8 else "moderate"
+        }
+        for k in strong
+    ]
+
+    return {
+        "strong_correlations": strong_correlations,
+        "correlation_matrix": corr_matrix.round(3).to_dict()
+    }
+
+
+def detect_seasonality(frame: SharedFrame) -> Dict[str, Any]:
+    seasonality = {}
+    if frame.spec.row_count <= 12 or not frame.dates or frame.numeric.empty:
+        return seasonality
+
+    # First date/time column that parsed, as before
+    dates = next(iter(frame.dates.values()))
+    month = dates.dt.month.to_numpy()
+    quarter = dates.dt.quarter.to_numpy()
+    numeric = frame.numeric
+    # All numeric columns grouped at once per period
+    monthly = numeric.groupby(month).mean()
+    quarterly = numeric.groupby(quarter).mean()
+    monthly_mean, monthly_std = monthly.mean(), monthly.std()
+    quarterly_mean, quarterly_std = quarterly.mean(), quarterly.std()
+
+    for num_col in numeric.columns:
+        monthly_cv = monthly_std[num_col] / monthly_mean[num_col] if monthly_mean[num_col] != 0 else 0
+        quarterly_cv = quarterly_std[num_col] / quarterly_mean[num_col] if quarterly_mean[num_col] != 0 else 0
+
+        if monthly_cv > 0.2:
+            seasonality[num_col] = {
+                "has_seasonality": True,
+                "type": "monthly",
+                "strength": round(float(monthly_cv), 3),
+                "peak_month": int(monthly[num_col].idxmax()),
+                "low_month": int(monthly[num_col].idxmin())
+            }
+        elif quarterly_cv > 0.15:
+            seasonality[num_col] = {
+                "has_seasonality": True,
+                "type": "quarterly",
+                "strength": round(float(quarterly_cv), 3),
+                "peak_quarter": int(quarterly[num_col].idxmax()),
+                "low_quarter": int(quarterly[num_col].idxmin())
+            }
+
+    return seasonality
+
+
+def calculate_growth(frame: SharedFrame) -> Dict[str, Any]:
+    growth_metrics = {}
+    data = frame.numeric
+
+    for col in data.columns:
+        values = data[col].dropna()
+        if len(values) >= 2:
+            current_value = float(values.iloc[-1])
+            previous_value = float(values.iloc[-2])
+            first_value = float(values.iloc[0])
+
+            pop_growth = ((current_value - previous_value) / previous_value * 100) if previous_value != 0 else 0
+            total_growth = ((current_value - first_value) / first_value * 100) if first_value != 0 else 0
+
+            if len(values) > 2:
+                periods = len(values) - 1
+                # A sign change has no real-valued CAGR (the power would be complex)
+                cagr = (((current_value / first_value) ** (1/periods)) - 1) * 100 if first_value > 0 and current_value >= 0 else 0
+            else:
+                cagr = pop_growth
+
+            growth_metrics[col] = {
+                "current_value": current_value,
+                "previous_value": previous_value,
+                "period_over_period": round(pop_growth, 2),
+                "total_growth": round(total_growth, 2),
+                "compound_annual_growth_rate": round(cagr, 2),
+                "trend": "positive" if pop_growth > 0 else "negative" if pop_growth < 0 else "neutral"
+            }
+
+    return growth_metrics
+
+
+ANALYSES: Dict[str, Callable[[SharedFrame], Dict[str, Any]]] = {
+    "data_quality": assess_quality,
+    "trends": detect_trends,
+    "anomalies": detect_anomalies,
+    "correlations": find_correlations,
+    "seasonality": detect_seasonality,
+    "growth_metrics": calculate_growth,
+}
+
+
+def run_shared(name: str, spec: SharedFrameSpec) -> Dict[str, Any]:
+    """Worker entry point: attach to the segment, run one analysis, detach"""
+    # Spawned workers share the parent's resource tracker, so attaching does not hand them ownership;
+    # the parent unlinks the segment
+    shm = SharedMemory(name=spec.shm_name)
+    try:
+        frame = SharedFrame(spec, shm.buf)
+        try:
+            return ANALYSES[name](frame)
+        finally:
+            # Views must be gone before the buffer can be closed
+            del frame
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # A view outlived the analysis (pandas caches); the mapping goes with the worker
+            pass
+
+
+def _terminate_workers(executor: concurrent.futures.ProcessPoolExecutor, processes: List[Any], grace: float = 1.0):
+    """Kill a shut-down pool's workers once its manager thread has dropped the cancelled work items
+    (terminating while they are still queued trips the manager's bookkeeping)"""
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline and any(
+        item.future.cancelled() for item in list(getattr(executor, "_pending_work_items", {}).values())
+    ):
+        time.sleep(0.01)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class SharedInput:
+    """An encoded frame, in a shared-memory segment (pool) or a local buffer (inline)"""
+
+    def __init__(self, spec: SharedFrameSpec, shm: Optional[SharedMemory], local: Optional[SharedFrame]):
+        self.spec = spec
+        self.shm = shm
+        self.local = local
+
+
+class AnalysisPool:
+    """Persistent process pool (spawned, so no forked event-loop state) plus per-analysis timeouts"""
+
+    def __init__(self, processes: int = ANALYSIS_PROCESSES, timeout: float = ANALYSIS_TIMEOUT_SECONDS):
+        self.processes = processes
+        self.timeout = timeout
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.timeouts = 0
+        self.failures = 0
+
+    def _pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f" Analysis pool started with {self.processes} worker processes")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _recycle(self, executor: concurrent.futures.ProcessPoolExecutor):
+        """Drop a pool whose worker is stuck or dead; cancelling a running future does not free its process"""
+        if self._executor is executor:
+            self._executor = None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        threading.Thread(target=_terminate_workers, args=(executor, processes), daemon=True).start()
+        logger.info(f" Analysis pool recycled, terminating {len(processes)} worker processes")
+
+    @asynccontextmanager
+    async def share(self, data: pd.DataFrame):
+        """Encode the frame once; the segment is unlinked when the block exits"""
+        spec, arrays, size = encode_frame(data)
+        if self.processes <= 0:
+            buffer = bytearray(max(size, 1))
+            for start, values in arrays:
+                buffer[start:start + values.nbytes] = values.tobytes()
+            yield SharedInput(spec, None, SharedFrame(spec, buffer))
+            return
+
+        shm = SharedMemory(create=True, size=max(size, 1))
+        try:
+            for start, values in arrays:
+                shm.buf[start:start + values.nbytes] = values.view(np.uint8).reshape(-1)
+            spec.shm_name = shm.name
+            yield SharedInput(spec, shm, None)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def run(self, name: str, shared: SharedInput) -> Dict[str, Any]:
+        """One analysis within its timeout (and the request's deadline); {} if it fails or runs out"""
+        timeout = call_timeout(self.timeout)
+        try:
+            if shared.local is not None:
+                return await asyncio.wait_for(asyncio.to_thread(ANALYSES[name], shared.local), timeout)
+            executor = self._pool()
+            future = executor.submit(run_shared, name, shared.spec)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                # The worker is still running the analysis; replace the pool so it does not hold a slot
+                self._recycle(executor)
+                raise
+            except concurrent.futures.process.BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool for the next request
+                self._recycle(executor)
+                raise
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # Still queued when another analysis's timeout recycled the pool
+                self.failures += 1
+                logger.warning(f" Analysis '{name}' was dropped with a recycled pool, returning no result")
+                return {}
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f" Analysis '{name}' exceeded {timeout:.1f}s, returning no result")
+            return {}
+        except Exception as e:
+            self.failures += 1
+            logger.error(f" Analysis '{name}' failed: {e}")
+            return {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "timeout_seconds": self.timeout,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+# Global instance
+analysis_pool = AnalysisPool()
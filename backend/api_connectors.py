@@ -5,7 +5,7 @@ import logging
 import time
 import re
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urljoin, unquote
 import hashlib
 import hmac
@@ -21,6 +21,27 @@ class APIConnectorError(Exception):
     """Custom exception for API connector errors"""
     pass
 
+class FetchMemo:
+    """Per-run memo of upstream fetches (catalog, FBA inventory) shared by every step of one sync run"""
+    
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+    
+    async def get(self, name: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Start `fetch` the first time `name` is asked for; concurrent and later callers await the same result"""
+        task = self.tasks.get(name)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self.tasks[name] = task
+        return await asyncio.shield(task)
+
+async def memoized(connector, name: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Fetch through the connector's run memo when a sync run is in progress, directly otherwise"""
+    memo = getattr(connector, 'fetch_memo', None)
+    if memo is None:
+        return await fetch()
+    return await memo.get(name, fetch)
+
 class ShopifyConnector:
     """Shopify Admin API Connector - Real-time e-commerce data fetching"""
     
@@ -570,7 +591,7 @@ class ShopifyConnector:
         """Create a mapping of inventory_item_id to SKU and product info"""
         try:
             logger.info("📦 Building inventory_item_id → SKU mapping...")
-            products = await self.fetch_products()
+            products = await memoized(self, 'products', self.fetch_products)
             
             mapping = {}
             for product in products:
@@ -707,7 +728,7 @@ class ShopifyConnector:
         try:
             logger.info("📦 Extracting inventory from product variants as fallback (enhanced)...")
             
-            products = await self.fetch_products()
+            products = await memoized(self, 'products', self.fetch_products)
             inventory_data = []
             
             for product in products:
@@ -785,7 +806,7 @@ class ShopifyConnector:
                 else:
                     # If no specific IDs provided, we need to get inventory items from products first
                     logger.info("🏷️ No specific inventory item IDs provided, fetching from product variants...")
-                    products = await self.fetch_products()
+                    products = await memoized(self, 'products', self.fetch_products)
                     inventory_item_ids_from_products = []
                     
                     for product in products:
@@ -921,7 +942,7 @@ class ShopifyConnector:
             # If no specific inventory item IDs provided, get them from products
             if not inventory_item_ids:
                 logger.info("🚛 Getting inventory item IDs from products for incoming inventory query...")
-                products = await self.fetch_products()
+                products = await memoized(self, 'products', self.fetch_products)
                 inventory_item_ids = []
                 
                 for product in products:
@@ -1109,13 +1130,30 @@ class AmazonConnector:
         self.base_url = "https://sellingpartnerapi-na.amazon.com"  # North America endpoint
         self.access_token = None
         self.token_expires_at = None
+        # Sync plan steps run concurrently; one of them refreshes the token, the others wait for it
+        self._token_lock = asyncio.Lock()
+    
+    def _cached_token(self) -> Optional[str]:
+        if self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at:
+            return self.access_token
+        return None
     
     async def _get_access_token(self) -> str:
         """Get or refresh Amazon SP-API access token"""
-        if self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at:
+        token = self._cached_token()
+        if token:
             logger.info(f"[CACHED_TOKEN] Using cached token (expires: {self.token_expires_at})")
-            return self.access_token
-        elif self.access_token and self.token_expires_at:
+            return token
+        async with self._token_lock:
+            # Refreshed by another caller while this one waited
+            token = self._cached_token()
+            if token:
+                return token
+            return await self._refresh_access_token()
+    
+    async def _refresh_access_token(self) -> str:
+        """Exchange the refresh token for a new SP-API access token"""
+        if self.access_token and self.token_expires_at:
             logger.info(f"[EXPIRED_TOKEN] Cached token expired at {self.token_expires_at}, refreshing...")
         else:
             logger.info("[NEW_TOKEN] No cached token, requesting new one...")
@@ -1249,7 +1287,7 @@ class AmazonConnector:
 
     async def fetch_inventory(self) -> List[Dict]:
         """Fetch FBA inventory summaries from Amazon SP-API - Legacy method redirects to fetch_fba_inventory"""
-        return await self.fetch_fba_inventory()
+        return await memoized(self, 'fba_inventory', self.fetch_fba_inventory)
     
     async def fetch_fba_inventory(self) -> List[Dict]:
         """Fetch FBA on-hand inventory per SKU - Available, Reserved, Inbound quantities"""
@@ -1906,7 +1944,7 @@ class AmazonConnector:
         try:
             # ✅ SOLUTION: Use FBA inventory as the source of YOUR products
             logger.info("📦 Fetching YOUR seller products from FBA inventory...")
-            inventory_data = await self.fetch_inventory()
+            inventory_data = await memoized(self, 'fba_inventory', self.fetch_fba_inventory)
             
             if not inventory_data:
                 logger.warning("📦 No FBA inventory found - cannot build product list")
@@ -2286,7 +2324,7 @@ class AmazonConnector:
 
     async def fetch_fba_inbound_shipments(self) -> List[Dict]:
         """Fetch detailed FBA inbound shipments with SKU-level item data - Enhanced version"""
-        return await self.fetch_incoming_inventory()  # Redirect to existing method for now
+        return await memoized(self, 'incoming_inventory', self.fetch_incoming_inventory)  # Redirect to existing method for now
 
     async def fetch_listings_pricing(self) -> List[Dict]:
         """Fetch product listings with pricing data per SKU"""
@@ -2532,7 +2570,7 @@ class AmazonConnector:
         # If no ASINs provided, get them from inventory
         if not asins:
             logger.info("Getting ASINs from inventory data...")
-            inventory_data = await self.fetch_fba_inventory()
+            inventory_data = await memoized(self, 'fba_inventory', self.fetch_fba_inventory)
             asins = [item.get('asin') for item in inventory_data if item.get('asin')]
             asins = list(set(asins))  # Remove duplicates
             
@@ -2717,12 +2755,63 @@ class APIConnectorFactory:
         else:
             raise APIConnectorError(f"Unsupported platform type: {platform_type}")
 
+# Sync plan: (data type, connector method, data types it reads). Steps whose inputs are
+# ready run concurrently; upstream results reach their dependents through the run memo.
+SYNC_PLAN = [
+    ('orders', 'fetch_orders', ()),                          # Now includes line items with SKUs/quantities
+    ('products', 'fetch_products', ('fba_inventory',)),      # Amazon builds its products from FBA inventory
+    ('incoming_inventory', 'fetch_incoming_inventory', ('products',)),  # Amazon FBA / Shopify GraphQL
+    ('inventory_levels', 'fetch_inventory_levels', ('products',)),      # Shopify
+    ('inventory', 'fetch_inventory', ('fba_inventory',)),    # Amazon FBA
+    ('fba_inventory', 'fetch_fba_inventory', ()),            # Amazon
+    ('listings_pricing', 'fetch_listings_pricing', ()),      # Amazon
+    ('inventory_items', 'fetch_inventory_items', ('products',)),        # Shopify
+    ('fulfillment_orders', 'fetch_fulfillment_orders', ()),  # Shopify
+    ('customers', 'fetch_customers', ()),
+]
+
+# Plan steps in flight at once per platform. Shopify's REST bucket is shared by the whole
+# shop, so it gets two; Amazon's SP-API throttles each API (orders, inventory, inbound,
+# listings) separately, so independent steps can overlap more.
+SYNC_CONCURRENCY = {
+    PlatformType.SHOPIFY: 2,
+    PlatformType.AMAZON: 3,
+}
+DEFAULT_SYNC_CONCURRENCY = 2
+
 class APIDataFetcher:
     """High-level API data fetcher that orchestrates different connectors"""
     
     def __init__(self):
         self.connectors = {}
     
+    async def _run_sync_plan(self, connector, platform_type: PlatformType) -> Dict[str, List[Dict]]:
+        """Run the SYNC_PLAN steps the connector supports, each after its inputs, within the platform's concurrency"""
+        steps = [(name, method, deps) for name, method, deps in SYNC_PLAN if hasattr(connector, method)]
+        planned = {name for name, _, _ in steps}
+        limit = asyncio.Semaphore(SYNC_CONCURRENCY.get(platform_type, DEFAULT_SYNC_CONCURRENCY))
+        done: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in planned}
+        all_data: Dict[str, List[Dict]] = {}
+        
+        async def run_step(name: str, method: str, deps: Tuple[str, ...]):
+            # Wait for inputs before taking a slot, so a blocked step never holds one
+            for dep in deps:
+                if dep in planned:
+                    await done[dep].wait()
+            try:
+                async with limit:
+                    all_data[name] = await memoized(connector, name, getattr(connector, method))
+                logger.info(f" ✅ Fetched {len(all_data[name])} {name.replace('_', ' ')} from {platform_type}")
+            except Exception as e:
+                logger.warning(f" Failed to fetch {name.replace('_', ' ')} from {platform_type}: {e}")
+                all_data[name] = []
+            finally:
+                done[name].set()
+        
+        await asyncio.gather(*(run_step(name, method, deps) for name, method, deps in steps))
+        # Keep the plan's key order for callers and the summary log
+        return {name: all_data[name] for name, _, _ in steps}
+    
     async def test_connection(self, platform_type: PlatformType, credentials: Dict[str, Any]) -> Tuple[bool, str]:
         """Test connection for any platform"""
         try:
@@ -2737,111 +2826,12 @@ class APIDataFetcher:
         try:
             connector = APIConnectorFactory.create_connector(platform_type, credentials)
             
-            all_data = {}
-            
-            # Fetch different data types based on platform capabilities
-            if hasattr(connector, 'fetch_orders'):
-                try:
-                    orders = await connector.fetch_orders()  # Now includes line items with SKUs/quantities
-                    all_data['orders'] = orders
-                    
-                    # Count total line items for logging
-                    total_line_items = sum(len(order.get('line_items', [])) for order in orders)
-                    logger.info(f" ✅ Fetched {len(orders)} orders with {total_line_items} line items from {platform_type}")
-                except Exception as e:
-                    logger.warning(f" Failed to fetch orders from {platform_type}: {e}")
-                    all_data['orders'] = []
-            
-            if hasattr(connector, 'fetch_products'):
-                try:
-                    products = await connector.fetch_products()  # Now enhanced for Amazon
-                    all_data['products'] = products
-                    logger.info(f"️ ✅ Fetched {len(products)} products from {platform_type}")
-                except Exception as e:
-                    logger.warning(f" Failed to fetch products from {platform_type}: {e}")
-                    all_data['products'] = []
-            
-            # NEW: Fetch incoming inventory (Amazon FBA / Shopify GraphQL)
-            if hasattr(connector, 'fetch_incoming_inventory'):
-                try:
-                    incoming_inventory = await connector.fetch_incoming_inventory()
-                    all_data['incoming_inventory'] = incoming_inventory
-                    if platform_type.value == 'shopify':
-                        logger.info(f"🚛 ✅ Fetched {len(incoming_inventory)} incoming inventory items via GraphQL from {platform_type}")
-                    else:
-                        logger.info(f" ✅ Fetched {len(incoming_inventory)} incoming inventory items from {platform_type}")
-                except Exception as e:
-                    logger.warning(f" Failed to fetch incoming inventory from {platform_type}: {e}")
-                    all_data['incoming_inventory'] = []
-            
-            # NEW: Fetch inventory levels (Shopify)
-            if hasattr(connector, 'fetch_inventory_levels'):
-                try:
-                    inventory_levels = await connector.fetch_inventory_levels()
-                    all_data['inventory_levels'] = inventory_levels
-                    logger.info(f"📦 ✅ Fetched {len(inventory_levels)} inventory levels from {platform_type}")
-                except Exception as e:
-                    logger.warning(f"📦 Failed to fetch inventory levels from {platform_type}: {e}")
-                    all_data['inventory_levels'] = []
-            
-            # NEW: Fetch inventory (Amazon FBA)
-            if hasattr(connector, 'fetch_inventory'):
-                try:
-                    inventory = await connector.fetch_inventory()
-                    all_data['inventory'] = inventory
-                    logger.info(f"📦 ✅ Fetched {len(inventory)} inventory items from {platform_type}")
-                except Exception as e:
-                    logger.warning(f"📦 Failed to fetch inventory from {platform_type}: {e}")
-                    all_data['inventory'] = []
-            
-            # NEW: Fetch enhanced FBA inventory (Amazon)
-            if hasattr(connector, 'fetch_fba_inventory'):
-                try:
-                    fba_inventory = await connector.fetch_fba_inventory()
-                    all_data['fba_inventory'] = fba_inventory
-                    logger.info(f"📦 ✅ Fetched {len(fba_inventory)} FBA inventory items from {platform_type}")
-                except Exception as e:
-                    logger.warning(f"📦 Failed to fetch FBA inventory from {platform_type}: {e}")
-                    all_data['fba_inventory'] = []
-            
-            # NEW: Fetch listings pricing (Amazon)
-            if hasattr(connector, 'fetch_listings_pricing'):
-                try:
-                    listings = await connector.fetch_listings_pricing()
-                    all_data['listings_pricing'] = listings
-                    logger.info(f"💰 ✅ Fetched {len(listings)} product listings with pricing from {platform_type}")
-                except Exception as e:
-                    logger.warning(f"💰 Failed to fetch listings pricing from {platform_type}: {e}")
-                    all_data['listings_pricing'] = []
-            
-            # NEW: Fetch inventory items metadata (Shopify)
-            if hasattr(connector, 'fetch_inventory_items'):
-                try:
-                    inventory_items = await connector.fetch_inventory_items()
-                    all_data['inventory_items'] = inventory_items
-                    logger.info(f"🏷️ ✅ Fetched {len(inventory_items)} inventory items from {platform_type}")
-                except Exception as e:
-                    logger.warning(f"🏷️ Failed to fetch inventory items from {platform_type}: {e}")
-                    all_data['inventory_items'] = []
-            
-            # NEW: Fetch fulfillment orders (Shopify)
-            if hasattr(connector, 'fetch_fulfillment_orders'):
-                try:
-                    fulfillment_orders = await connector.fetch_fulfillment_orders()
-                    all_data['fulfillment_orders'] = fulfillment_orders
-                    logger.info(f"🚚 ✅ Fetched {len(fulfillment_orders)} fulfillment orders from {platform_type}")
-                except Exception as e:
-                    logger.warning(f"🚚 Failed to fetch fulfillment orders from {platform_type}: {e}")
-                    all_data['fulfillment_orders'] = []
-            
-            if hasattr(connector, 'fetch_customers'):
-                try:
-                    customers = await connector.fetch_customers()
-                    all_data['customers'] = customers
-                    logger.info(f" Fetched {len(customers)} customers from {platform_type}")
-                except Exception as e:
-                    logger.warning(f" Failed to fetch customers from {platform_type}: {e}")
-                    all_data['customers'] = []
+            # One memo per run: every step that needs the catalog / FBA inventory awaits the same fetch
+            connector.fetch_memo = FetchMemo()
+            try:
+                all_data = await self._run_sync_plan(connector, platform_type)
+            finally:
+                connector.fetch_memo = None
             
             # Log summary of what was fetched
             summary = []
@@ -365,6 +365,10 @@ class APISyncCronJob:
             
             # Trigger SKU calculations if new data was synced (NO AI/LLM)
             if total_records > 0:
+                # Cached LLM analyses were computed from the old data
+                from llm_cache_manager import llm_cache_manager
+                await llm_cache_manager.notify_data_changed(client_id)
+                
                 logger.info(f"New data synced - triggering SKU calculations for client {client_id}")
                 try:
                     # Trigger SKU cache refresh for this client and platform
@@ -6,14 +6,31 @@ from fastapi import (
     UploadFile,
     File,
     BackgroundTasks,
+    Request,
 )
 
 from fastapi.middleware.cors import CORSMiddleware
 
+from fastapi.responses import StreamingResponse
+
 from fastapi.middleware.gzip import GZipMiddleware
 
 from fastapi.security import HTTPBearer
 
+from fast_response import fast_json, make_etag
+
+from admission_control import AdmissionMiddleware, admission_controller
+
+from request_deadline import DeadlineMiddleware, call_timeout
+
+from job_queue import PRIORITY_LOW, PRIORITY_NORMAL, job_queue
+
+from llm_gateway import llm_gateway
+
+from data_fingerprint import fingerprint_store
+
+from instant_insights import TIER_LLM, instant_insights
+
 import os
 import sys
 
@@ -25,8 +42,6 @@ import json
 
 import asyncio
 
-from concurrent.futures import ThreadPoolExecutor
-
 import threading
 
 from dotenv import load_dotenv
@@ -52,8 +67,6 @@ import traceback
 # Internal scheduler for cron jobs
 from internal_scheduler import start_internal_scheduler, stop_internal_scheduler, get_scheduler_status
 
-import hashlib
-
 
 # Import our custom modules
 
@@ -61,12 +74,19 @@ from models import *
 
 from database import get_db_client, get_admin_client
 
-from ai_analyzer import ai_analyzer
+# Heavy AI subsystems are imported on first use (or warmed once the worker serves),
+# so boots and respawns are not paid for by health checks and SKU pages
+
+from lazy_modules import lazy_instance, start_warm_up
+
+from lazy_modules import stats as lazy_module_stats
 
-from inventory_analyzer import inventory_analyzer
+ai_analyzer = lazy_instance("ai_analyzer")
 
+inventory_analyzer = lazy_instance("inventory_analyzer")
 
-from dashboard_orchestrator import dashboard_orchestrator
+
+dashboard_orchestrator = lazy_instance("dashboard_orchestrator")
 
 
 # Import enhanced components
@@ -82,6 +102,13 @@ from api_key_auth import (
 
 from enhanced_data_parser import enhanced_parser
 
+from response_cache import (
+    get_cached_response,
+    has_organized_inventory_tables,
+    organized_inventory_analytics_response,
+    save_cached_response,
+)
+
 from models import (
     APIKeyCreate,
     APIKeyResponse,
@@ -106,10 +133,6 @@ logger = logging.getLogger(__name__)
 
 #  ASYNC REQUEST HANDLING SYSTEM - NO MORE WAITING!
 
-executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="analytics_worker")
-
-request_queue = asyncio.Queue(maxsize=100)
-
 active_calculations = {}  # Track ongoing calculations
 
 calculation_lock = threading.Lock()
@@ -121,137 +144,180 @@ calculation_cache = {}  # Short-term cache for identical requests
 
 #  BACKGROUND CALCULATION SYSTEM - INSTANT RESPONSES!
 
+# Cache hits queue a refresh; the queue runs it at most once per client and key per window
+
+REFRESH_DEBOUNCE_SECONDS = float(os.getenv("REFRESH_DEBOUNCE_SECONDS", "300"))
+
+# Unchanged data is not rebuilt until the last build is this old (relative date windows still move)
+
+REFRESH_MAX_AGE_SECONDS = float(os.getenv("REFRESH_MAX_AGE_SECONDS", "3600"))
 
-async def refresh_analytics_background(
+
+async def queue_analytics_refresh(
     client_id: str,
     platform: str,
     fast_mode: bool = True,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-):
-    """Run analytics calculations in background - doesn't block responses"""
+    priority: int = PRIORITY_LOW,
+) -> bool:
+    """Queue a background analytics refresh - deduplicated and debounced per client"""
 
-    try:
+    date_key = f"{start_date or 'no_start'}_{end_date or 'no_end'}"
 
-        date_info = (
-            f" (dates: {start_date} to {end_date})" if start_date or end_date else ""
-        )
+    return await job_queue.enqueue(
+        "analytics_refresh",
+        client_id,
+        key=f"analytics_refresh:{client_id}:{platform}:{date_key}",
+        payload={
+            "platform": platform,
+            "fast_mode": fast_mode,
+            "start_date": start_date,
+            "end_date": end_date,
+        },
+        priority=priority,
+        debounce=REFRESH_DEBOUNCE_SECONDS,
+    )
+
+
+async def queue_sku_refresh(
+    client_id: str, platform: str, priority: int = PRIORITY_LOW
+) -> bool:
+    """Queue a background SKU cache rebuild - one per client and platform, whatever page was viewed"""
+
+    return await job_queue.enqueue(
+        "sku_refresh",
+        client_id,
+        key=f"sku_refresh:{client_id}:{platform}",
+        payload={"platform": platform},
+        priority=priority,
+        debounce=REFRESH_DEBOUNCE_SECONDS,
+    )
+
+
+async def refresh_analytics_job(job):
+    """Rebuild cached analytics for one client, platform and date range if the data changed"""
+
+    client_id = job.tenant
+
+    platform = job.payload["platform"]
+
+    start_date = job.payload.get("start_date")
+
+    end_date = job.payload.get("end_date")
+
+    from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+
+    data_version = await dashboard_inventory_analyzer.get_data_version(
+        client_id, platform
+    )
+
+    if data_version and data_version == await job_queue.get_marker(job.key):
 
         logger.info(
-            f" Background refresh started for {client_id} ({platform}){date_info}"
+            f" Analytics for {client_id} ({platform}) unchanged since last refresh, skipping"
         )
 
-        # Use dashboard inventory analyzer for fresh calculations
+        return
 
-        from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+    logger.info(f" Background refresh started for {client_id} ({platform})")
 
-        # Run calculation in thread pool to avoid blocking
+    analytics = await dashboard_inventory_analyzer.get_dashboard_inventory_analytics(
+        client_id, platform, start_date, end_date
+    )
 
-        loop = asyncio.get_event_loop()
+    if analytics.get("success") is False:
 
-        analytics = await loop.run_in_executor(
-            executor,
-            lambda: asyncio.run(
-                dashboard_inventory_analyzer.get_dashboard_inventory_analytics(
-                    client_id, platform, start_date, end_date
-                )
-            ),
-        )
+        # Raise so the queue retries instead of caching the failure
 
-        # Cache the results using existing LLM cache infrastructure with date range
+        raise RuntimeError(analytics.get("error", "Analytics calculation failed"))
 
-        from llm_cache_manager import LLMCacheManager
+    # Cache the results using existing LLM cache infrastructure with date range
 
-        cache_manager = LLMCacheManager()
+    from llm_cache_manager import LLMCacheManager
 
-        cache_params = {"platform": platform}
+    cache_manager = LLMCacheManager()
 
-        if start_date:
+    cache_params = {"platform": platform}
 
-            cache_params["start_date"] = start_date
+    if start_date:
 
-        if end_date:
+        cache_params["start_date"] = start_date
 
-            cache_params["end_date"] = end_date
+    if end_date:
 
-        date_key = f"{start_date or 'no_start'}_{end_date or 'no_end'}"
+        cache_params["end_date"] = end_date
 
-        cache_key = f"analytics_{platform}_{date_key}"
+    date_key = f"{start_date or 'no_start'}_{end_date or 'no_end'}"
 
-        await cache_manager.store_cached_llm_response(
-            client_id, cache_params, analytics, cache_key
-        )
+    cache_key = f"analytics_{platform}_{date_key}"
 
-        logger.info(
-            f" Background refresh completed for {client_id} ({platform}){date_info}"
-        )
+    await cache_manager.store_cached_llm_response(
+        client_id, cache_params, analytics, cache_key
+    )
 
-    except Exception as e:
+    if data_version:
 
-        logger.error(f" Background refresh failed for {client_id}: {e}")
+        await job_queue.set_marker(job.key, data_version, REFRESH_MAX_AGE_SECONDS)
 
+    logger.info(f" Background refresh completed for {client_id} ({platform})")
 
-async def refresh_sku_background(
-    client_id: str, platform: str, page: int = 1, page_size: int = 50
-):
-    """Run SKU list generation in background - doesn't block responses"""
 
-    try:
+async def refresh_sku_job(job):
+    """Rebuild a client's SKU cache for one platform if the data changed"""
 
-        logger.info(f" Background SKU refresh started for {client_id} ({platform})")
+    client_id = job.tenant
 
-        from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+    platform = job.payload["platform"]
 
-        # Run calculation in thread pool to avoid blocking
+    from dashboard_inventory_analyzer import dashboard_inventory_analyzer
 
-        loop = asyncio.get_event_loop()
+    data_version = await dashboard_inventory_analyzer.get_data_version(
+        client_id, platform
+    )
 
-        sku_data = await loop.run_in_executor(
-            executor,
-            lambda: asyncio.run(
-                dashboard_inventory_analyzer.get_sku_list(
-                    client_id, page, page_size, False, platform
-                )
-            ),
+    if data_version and data_version == await job_queue.get_marker(job.key):
+
+        logger.info(
+            f" SKUs for {client_id} ({platform}) unchanged since last refresh, skipping"
         )
 
-        logger.info(f" Background SKU refresh completed for {client_id} ({platform})")
+        return
 
-    except Exception as e:
+    # Same per-client rebuild the SKU cron runs
 
-        logger.error(f" Background SKU refresh failed for {client_id}: {e}")
+    from sku_analysis_cron import sku_cron_job
 
+    result = await sku_cron_job.refresh_client_sku_analysis(client_id, platform)
 
-async def pre_calculate_dashboard_data(client_id: str):
-    """Pre-calculate all dashboard data after login - user doesn't wait!"""
+    if not result.get("success"):
 
-    try:
+        raise RuntimeError(result.get("error", "SKU refresh failed"))
 
-        logger.info(f" PRE-CALCULATING all data for {client_id} in background")
+    if data_version:
 
-        # Pre-calculate for both platforms in parallel
+        await job_queue.set_marker(job.key, data_version, REFRESH_MAX_AGE_SECONDS)
 
-        tasks = [
-            refresh_analytics_background(client_id, "shopify"),
-            refresh_analytics_background(client_id, "amazon"),
-            refresh_sku_background(client_id, "shopify", 1, 50),
-            refresh_sku_background(client_id, "amazon", 1, 50),
-        ]
+    logger.info(f" Background SKU refresh completed for {client_id} ({platform})")
 
-        # Wait for all background tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Log any exceptions
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                task_name = ["shopify analytics", "amazon analytics", "shopify sku", "amazon sku"][i]
-                logger.error(f"PRE-CALCULATION failed for {client_id}: {task_name} - {result}")
 
-        logger.info(f" PRE-CALCULATION completed for {client_id}")
+job_queue.register("analytics_refresh", refresh_analytics_job)
 
-    except Exception as e:
+job_queue.register("sku_refresh", refresh_sku_job)
+
+
+async def pre_calculate_dashboard_data(client_id: str):
+    """Pre-calculate all dashboard data after login - user doesn't wait!"""
+
+    logger.info(f" PRE-CALCULATING all data for {client_id} in background")
+
+    # Ahead of refreshes triggered by cache hits, deduplicated against them
+
+    for platform in ("shopify", "amazon"):
+
+        await queue_analytics_refresh(client_id, platform, priority=PRIORITY_NORMAL)
 
-        logger.error(f" PRE-CALCULATION failed for {client_id}: {e}")
+        await queue_sku_refresh(client_id, platform, priority=PRIORITY_NORMAL)
 
 
 async def get_or_create_calculation_task(
@@ -336,48 +402,6 @@ async def get_or_create_calculation_task(
         return await task
 
 
-#  CONCURRENT REQUEST HANDLER - HANDLE MULTIPLE ACTIONS SIMULTANEOUSLY
-
-
-class ConcurrentRequestHandler:
-
-    def __init__(self):
-
-        self.semaphore = asyncio.Semaphore(20)  # Allow 20 concurrent requests
-
-        self.request_count = 0
-
-    async def handle_request(self, request_func, *args, **kwargs):
-        """Handle requests concurrently without blocking"""
-
-        async with self.semaphore:
-
-            self.request_count += 1
-
-            request_id = self.request_count
-
-            logger.info(f" Processing request #{request_id} concurrently")
-
-            try:
-
-                result = await request_func(*args, **kwargs)
-
-                logger.info(f" Request #{request_id} completed")
-
-                return result
-
-            except Exception as e:
-
-                logger.error(f" Request #{request_id} failed: {e}")
-
-                raise
-
-
-# Global request handler
-
-request_handler = ConcurrentRequestHandler()
-
-
 # ==================== TEMPLATE PRE-GENERATION ====================
 
 
@@ -492,6 +516,12 @@ async def lifespan(app: FastAPI):
         logger.error(f"Full traceback: {traceback.format_exc()}")
         # Don't raise - let the app start anyway
     
+    # Background refresh jobs run on this event loop
+    job_queue.start()
+    
+    # Optionally import the lazy AI subsystems now that the worker is serving
+    start_warm_up()
+    
     yield  # App is running
     
     # Shutdown: Stop the internal scheduler
@@ -500,6 +530,9 @@ async def lifespan(app: FastAPI):
         logger.info("Internal scheduler stopped gracefully")
     except Exception as e:
         logger.error(f"Error stopping scheduler: {e}")
+    
+    # Unfinished durable jobs are picked up again once their lease expires
+    await job_queue.stop()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -510,6 +543,64 @@ app = FastAPI(
 )
 
 
+# Per-client fair admission control in front of the expensive dashboard endpoints
+# (innermost middleware, so shed 503s still get CORS headers)
+
+ADMISSION_CONTROLLED_PATHS = [
+    "/api/dashboard/generate",
+    "/api/dashboard/generate-template",
+    "/api/dashboard/generate-now",
+    "/api/dashboard/generate-custom",
+    "/api/dashboard/fast-generate",
+    "/api/dashboard/refresh-metrics",
+    "/api/dashboard/component-data",
+    "/api/dashboard/metrics",
+    "/api/dashboard/sku-inventory",
+    "/api/dashboard/inventory-analytics",
+    "/api/dashboard/business-insights",
+    "/api/dashboard/performance",
+    "/api/dashboard/business-intelligence",
+    "/api/dashboard/template-ecosystem",
+    "/api/dashboard/organized-inventory-analytics",
+]
+
+
+def admission_tenant(scope: Dict[str, Any]) -> str:
+    """Client id from the bearer token; unauthenticated callers are grouped by address"""
+
+    authorization = dict(scope.get("headers") or []).get(b"authorization", b"")
+
+    scheme, _, credentials = authorization.decode("latin-1").partition(" ")
+
+    if scheme.lower() == "bearer" and credentials:
+
+        try:
+
+            return str(verify_token(credentials).client_id)
+
+        except Exception:
+
+            pass
+
+    client = scope.get("client")
+
+    return f"anonymous:{client[0] if client else 'unknown'}"
+
+
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission_controller,
+    paths=ADMISSION_CONTROLLED_PATHS,
+    tenant_resolver=admission_tenant,
+)
+
+
+# Request deadline for the same endpoints, outside admission control so time spent
+# queued counts against it; cancels the request when it expires or the client leaves
+
+app.add_middleware(DeadlineMiddleware, paths=ADMISSION_CONTROLLED_PATHS)
+
+
 # Add GZip middleware for response compression to reduce payload size and improve speed
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
@@ -672,189 +763,6 @@ DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 logger.info(f" Starting Analytics AI Dashboard API in {ENVIRONMENT} mode")
 
 
-# ==================== CACHING FUNCTIONS ====================
-
-
-async def create_client_cache_table(client_id: str):
-    """Check if cache table exists - assume tables are pre-created via SQL"""
-
-    try:
-
-        # Clean client_id for table name
-
-        clean_client_id = client_id.replace("-", "_")
-
-        table_name = f"{clean_client_id}_cached_responses"
-
-        db_client = get_admin_client()
-
-        if not db_client:
-
-            logger.error(" Database not configured for cache table access")
-
-            return False
-
-        # Try to access the table to verify it exists
-
-        try:
-            # Simple test query to check if table exists
-            db_client.table(table_name).select("id").limit(1).execute()
-            logger.info(f" Cache table verified: {table_name}")
-            return True
-
-        except Exception as e:
-
-            logger.warning(f" Cache table {table_name} may not exist: {e}")
-            logger.warning(f" Please create the table manually using SQL: CREATE TABLE IF NOT EXISTS \"{table_name}\" (id uuid DEFAULT gen_random_uuid() PRIMARY KEY, client_id uuid NOT NULL, endpoint_url text NOT NULL, cache_key text NOT NULL, response_data jsonb NOT NULL, created_at timestamptz DEFAULT now(), expires_at timestamptz, UNIQUE(cache_key));")
-            return False
-
-    except Exception as e:
-
-        logger.error(f" Failed to verify cache table for client {client_id}: {e}")
-
-        return False
-
-
-async def get_cached_response(
-    client_id: str, endpoint_url: str, params: Dict[str, Any] = None
-) -> Optional[Dict[str, Any]]:
-    """Get cached response if it exists (no expiration)"""
-
-    try:
-
-        # Generate cache key
-
-        params_str = json.dumps(params or {}, sort_keys=True)
-
-        cache_key_data = f"{endpoint_url}_{params_str}"
-
-        cache_key = hashlib.md5(cache_key_data.encode()).hexdigest()
-
-        # Clean client_id for table name
-
-        clean_client_id = client_id.replace("-", "_")
-
-        table_name = f"{clean_client_id}_cached_responses"
-
-        db_client = get_admin_client()
-
-        if not db_client:
-
-            return None
-
-        try:
-
-            # Query cached response (no expiration check)
-
-            response = (
-                db_client.table(table_name)
-                .select("*")
-                .eq("cache_key", cache_key)
-                .limit(1)
-                .execute()
-            )
-
-            if response.data and len(response.data) > 0:
-
-                cached_data = response.data[0]
-
-                logger.info(f" Found cached response for client {client_id}")
-
-                return cached_data["response_data"]
-
-        except Exception as e:
-
-            # Table might not exist yet
-
-            logger.info(
-                f" Cache table not found for client {client_id}, will create on save"
-            )
-
-        return None
-
-    except Exception as e:
-
-        logger.error(f" Failed to get cached response for client {client_id}: {e}")
-
-        return None
-
-
-async def save_cached_response(
-    client_id: str,
-    endpoint_url: str,
-    response_data: Dict[str, Any],
-    params: Dict[str, Any] = None,
-):
-    """Save response to cache (persistent until manually cleared)"""
-
-    try:
-
-        # Generate cache key
-
-        params_str = json.dumps(params or {}, sort_keys=True)
-
-        cache_key_data = f"{endpoint_url}_{params_str}"
-
-        cache_key = hashlib.md5(cache_key_data.encode()).hexdigest()
-
-        # Clean client_id for table name
-
-        clean_client_id = client_id.replace("-", "_")
-
-        table_name = f"{clean_client_id}_cached_responses"
-
-        db_client = get_admin_client()
-
-        if not db_client:
-
-            logger.error(" Database not configured for cache saving")
-
-            return False
-
-        # Check if cache table exists
-
-        table_exists = await create_client_cache_table(client_id)
-        
-        if not table_exists:
-            logger.warning(f" Cache table doesn't exist for client {client_id}, skipping cache save")
-            return False
-
-        try:
-
-            # Insert or update cached response (no expiration)
-
-            cache_record = {
-                "client_id": client_id,
-                "endpoint_url": endpoint_url,
-                "cache_key": cache_key,
-                "response_data": response_data,
-                "expires_at": None,  # No expiration
-            }
-
-            # Try to upsert (insert or update if exists)
-
-            db_client.table(table_name).upsert(
-                cache_record, on_conflict="cache_key"
-            ).execute()
-
-            logger.info(f" Saved cached response for client {client_id} (persistent)")
-
-            return True
-
-        except Exception as e:
-
-            logger.error(f" Failed to save cached response: {e}")
-            logger.warning(f" This may be due to missing cache table: {table_name}")
-
-            return False
-
-    except Exception as e:
-
-        logger.error(f" Failed to save cached response for client {client_id}: {e}")
-
-        return False
-
-
 # ==================== BASIC ENDPOINTS ====================
 
 
@@ -932,6 +840,10 @@ async def api_health_check():
             "/api/dashboard/fast-generate",
             "/api/debug/auth",
         ],
+        "admission": admission_controller.stats(),
+        "jobs": await job_queue.stats(),
+        "llm": llm_gateway.stats(),
+        "lazy_modules": lazy_module_stats(),
     }
 
 
@@ -1558,17 +1470,34 @@ async def create_client_superadmin(
 
                             try:
 
-                                # NO LIMITS - READ THE ENTIRE FILE
+                                if file.filename.lower().endswith(".bak"):
+
+                                    # Backups can be multi-GB: leave them in the upload
+                                    # spool file, the BAK scanner memory-maps it
+
+                                    file.file.seek(0, 2)
+
+                                    file_size = file.file.tell()
 
-                                file_content = await file.read()
+                                    file.file.seek(0)
+
+                                    file_content = None
+
+                                else:
+
+                                    # NO LIMITS - READ THE ENTIRE FILE
+
+                                    file_content = await file.read()
+
+                                    file_size = len(file_content)
 
                                 logger.info(
-                                    f" Read entire file {file.filename}: {len(file_content)} bytes ({len(file_content) / 1024 / 1024:.2f} MB)"
+                                    f" Read entire file {file.filename}: {file_size} bytes ({file_size / 1024 / 1024:.2f} MB)"
                                 )
 
                                 # Basic validation
 
-                                if not file_content:
+                                if not file_size:
 
                                     logger.error(
                                         f" File {file.filename} is empty or could not be read"
@@ -1780,21 +1709,39 @@ async def create_client_superadmin(
 
                                     continue
 
-                            else:
+                            elif file_content is None:
 
-                                # For text-based files and binary files that need special handling
+                                # Spooled .bak upload: single-pass mmap scan, no decoding
 
-                                try:
+                                parsed_records = universal_parser.parse_bak_file(file.file)
 
-                                    # Try to decode as UTF-8 first
+                                for record in parsed_records:
 
-                                    raw_data = file_content.decode("utf-8")
+                                    if isinstance(record, dict):
 
-                                    parsed_records = universal_parser.parse_to_json(
-                                        raw_data, file_format
-                                    )
+                                        record["_source_file"] = file.filename
 
-                                    if parsed_records:
+                                logger.info(
+                                    f" File '{file.filename}' parsed: {len(parsed_records)} records"
+                                )
+
+                                all_parsed_records.extend(parsed_records)
+
+                            else:
+
+                                # For text-based files and binary files that need special handling
+
+                                try:
+
+                                    # Try to decode as UTF-8 first
+
+                                    raw_data = file_content.decode("utf-8")
+
+                                    parsed_records = universal_parser.parse_to_json(
+                                        raw_data, file_format
+                                    )
+
+                                    if parsed_records:
 
                                         # Add file metadata
 
@@ -2136,7 +2083,7 @@ async def create_client_superadmin(
 
                 if fallback_data:
 
-                    db_client.table("client_data").insert(
+                    response = db_client.table("client_data").insert(
                         {
                             "client_id": client_id,
                             "table_name": f"client_{client_id.replace('-', '_')}_data",
@@ -2144,6 +2091,8 @@ async def create_client_superadmin(
                         }
                     ).execute()
 
+                    fingerprint_store.record_inserts(response.data or [])
+
                     logger.info(f" Fallback data stored for {input_method} method")
 
             logger.info(f" Data stored DIRECTLY for {email} - NOW TRIGGER AI!")
@@ -3650,107 +3599,130 @@ async def create_client_with_sftp_integration(
 
         if files_to_download:
 
-            # Download files
+            # Stream files to the local spool over concurrent SFTP channels and
+            # parse each one as soon as it lands; unchanged files are skipped
 
-            download_result = sftp_manager.download_multiple_files(
-                credentials, files_to_download
-            )
+            from universal_data_parser import universal_parser
 
-            if download_result["downloaded_count"] > 0:
+            for ingested in sftp_manager.ingest_files(credentials, files_to_download, client_id):
 
-                # Process each downloaded file
+                filename = ingested.filename
 
-                from universal_data_parser import universal_parser
+                if ingested.status != "downloaded":
 
-                for filename, file_content in download_result["files"].items():
+                    logger.info(
+                        f" SFTP file {filename} {ingested.status}, nothing to parse"
+                    )
 
-                    try:
+                    continue
 
-                        # Detect file format
+                try:
 
-                        if filename.lower().endswith(".csv"):
+                    # Detect file format
 
-                            data_format = "csv"
+                    if filename.lower().endswith(".csv"):
 
-                        elif filename.lower().endswith((".xlsx", ".xls")):
+                        data_format = "csv"
 
-                            data_format = "excel"
+                    elif filename.lower().endswith((".xlsx", ".xls")):
 
-                        elif filename.lower().endswith(".json"):
+                        data_format = "excel"
 
-                            data_format = "json"
+                    elif filename.lower().endswith(".json"):
 
-                        elif filename.lower().endswith(".xml"):
+                        data_format = "json"
 
-                            data_format = "xml"
+                    elif filename.lower().endswith(".xml"):
 
-                        else:
+                        data_format = "xml"
+
+                    elif filename.lower().endswith(".bak"):
+
+                        data_format = "bak"
+
+                    else:
+
+                        data_format = "csv"  # Default to CSV
 
-                            data_format = "csv"  # Default to CSV
+                    # Parse file content to JSON
 
-                        # Parse file content to JSON
+                    if data_format == "bak":
 
-                        file_str = (
-                            file_content.decode("utf-8")
-                            if isinstance(file_content, bytes)
-                            else file_content
+                        parsed_records = universal_parser.parse_bak_file(
+                            ingested.local_path
                         )
 
+                    else:
+
+                        with open(ingested.local_path, "rb") as spooled_file:
+
+                            file_content = spooled_file.read()
+
+                        file_str = file_content.decode("utf-8")
+
                         parsed_records = universal_parser.parse_to_json(
                             file_str, data_format
                         )
 
-                        if parsed_records:
+                    if parsed_records:
 
-                            logger.info(
-                                f" SFTP file {filename} parsed to {len(parsed_records)} JSON records"
-                            )
+                        logger.info(
+                            f" SFTP file {filename} parsed to {len(parsed_records)} JSON records"
+                        )
 
-                            # Store records in database
+                        # Store records in database
 
-                            batch_rows = []
+                        batch_rows = []
 
-                            for record in parsed_records:
+                        for record in parsed_records:
 
-                                # Remove metadata fields before storing
+                            # Remove metadata fields before storing
 
-                                clean_record = {
-                                    k: v
-                                    for k, v in record.items()
-                                    if not k.startswith("_")
+                            clean_record = {
+                                k: v
+                                for k, v in record.items()
+                                if not k.startswith("_")
+                            }
+
+                            batch_rows.append(
+                                {
+                                    "client_id": client_id,
+                                    "table_name": f"client_{client_id.replace('-', '_')}_data",
+                                    "data": clean_record,
+                                    "source_file": filename,
+                                    "source_type": "sftp",
                                 }
+                            )
 
-                                batch_rows.append(
-                                    {
-                                        "client_id": client_id,
-                                        "table_name": f"client_{client_id.replace('-', '_')}_data",
-                                        "data": clean_record,
-                                        "source_file": filename,
-                                        "source_type": "sftp",
-                                    }
-                                )
+                        if batch_rows:
 
-                            if batch_rows:
+                            response = db_client.table("client_data").insert(
+                                batch_rows
+                            ).execute()
 
-                                db_client.table("client_data").insert(
-                                    batch_rows
-                                ).execute()
+                            fingerprint_store.record_inserts(response.data or [])
 
-                                total_records += len(batch_rows)
+                            total_records += len(batch_rows)
 
-                                files_processed += 1
+                            files_processed += 1
 
-                                logger.info(
-                                    f" Stored {len(batch_rows)} records from {filename}"
-                                )
+                            logger.info(
+                                f" Stored {len(batch_rows)} records from {filename}"
+                            )
 
-                    except Exception as file_error:
+                except Exception as file_error:
 
-                        logger.error(
-                            f" Failed to process SFTP file {filename}: {file_error}"
-                        )
+                    logger.error(
+                        f" Failed to process SFTP file {filename}: {file_error}"
+                    )
 
-                        continue
+                    # Leave it out of the manifest so the next sync retries it
+
+                    ingested.status = "failed"
+
+                    continue
+
+            if files_processed > 0:
 
                 # Create schema entry
 
@@ -4087,6 +4059,8 @@ async def upload_client_data(upload_data: CreateSchemaRequest):
 
         rows_inserted = 0
 
+        inserted_records = []
+
         for index, json_record in enumerate(standardized_data):
 
             try:
@@ -4102,6 +4076,8 @@ async def upload_client_data(upload_data: CreateSchemaRequest):
 
                 db_client.table("client_data").insert(client_data_record).execute()
 
+                inserted_records.append(client_data_record)
+
                 rows_inserted += 1
 
                 # Progress logging
@@ -4122,10 +4098,18 @@ async def upload_client_data(upload_data: CreateSchemaRequest):
             f" Successfully stored {rows_inserted}/{len(standardized_data)} standardized JSON records!"
         )
 
+        fingerprint_store.record_inserts(inserted_records)
+
         logger.info(
             f" Schema created AND DATA STORED for client {upload_data.client_id}: {ai_result.data_type} with {rows_inserted} rows"
         )
 
+        # New data: cached analyses for this client no longer apply
+
+        from llm_cache_manager import llm_cache_manager
+
+        await llm_cache_manager.notify_data_changed(upload_data.client_id)
+
         #  PRE-GENERATE TEMPLATES AFTER DATA UPLOAD
 
         try:
@@ -5138,8 +5122,223 @@ async def get_dashboard_config(token: str = Depends(security)):
         )
 
 
+VALID_COMPONENT_TYPES = [
+    "total_sales",
+    "inventory_turnover",
+    "days_of_stock",
+    "inventory_levels",
+    "units_sold",
+    "historical_comparison",
+    "low_stock_alerts",
+    "overstock_alerts",
+    "sales_performance",
+]
+
+VALID_COMPONENT_PLATFORMS = ["shopify", "amazon", "combined"]
+
+
+def component_from_cached_analytics(
+    cached_main_response: Dict[str, Any], component_type: str, platform: str
+) -> Any:
+    """Cut one component out of a cached /api/dashboard/inventory-analytics response"""
+
+    inventory_analytics = cached_main_response.get("inventory_analytics", {})
+
+    platforms_data = inventory_analytics.get("platforms", {})
+
+    if component_type == "total_sales":
+
+        if platform == "combined":
+
+            shopify_sales = platforms_data.get("shopify", {}).get("sales_kpis", {})
+
+            amazon_sales = platforms_data.get("amazon", {}).get("sales_kpis", {})
+
+            component_data = {
+                "shopify": shopify_sales,
+                "amazon": amazon_sales,
+                "combined": {
+                    "total_revenue": (
+                        shopify_sales.get("total_sales_30_days", {}).get("revenue", 0)
+                        + amazon_sales.get("total_sales_30_days", {}).get("revenue", 0)
+                    ),
+                    "total_orders": (
+                        shopify_sales.get("total_sales_30_days", {}).get("orders", 0)
+                        + amazon_sales.get("total_sales_30_days", {}).get("orders", 0)
+                    ),
+                },
+            }
+
+        else:
+
+            component_data = platforms_data.get(platform, {}).get("sales_kpis", {})
+
+    else:
+
+        # For other component types, extract accordingly
+
+        platform_data = platforms_data.get(
+            platform if platform != "combined" else "shopify", {}
+        )
+
+        component_data = platform_data
+
+    return component_data
+
+
+async def compute_component_data(
+    client_id: str,
+    component_type: str,
+    platform: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+) -> Any:
+    """Query and compute one dashboard component from the organized tables"""
+
+    from component_data_functions import component_data_manager
+
+    component_data = {}
+
+    if component_type == "total_sales":
+
+        component_data = await component_data_manager.get_total_sales_data(
+            client_id, platform, start_date, end_date
+        )
+
+    elif component_type == "inventory_turnover":
+
+        component_data = await component_data_manager.get_inventory_turnover_data(
+            client_id, platform, start_date, end_date
+        )
+
+    elif component_type == "days_of_stock":
+
+        component_data = await component_data_manager.get_days_of_stock_data(
+            client_id, platform, start_date, end_date
+        )
+
+    elif component_type == "inventory_levels":
+
+        component_data = await component_data_manager.get_inventory_levels_data(
+            client_id, platform, start_date, end_date
+        )
+
+    elif component_type == "units_sold":
+
+        # Use the dedicated units sold function for proper chart data
+
+        units_data = await component_data_manager.get_units_sold_data(
+            client_id, platform, start_date, end_date
+        )
+
+        # Format the response to match frontend expectations
+
+        if platform == "combined":
+
+            combined_data = units_data.get("combined", {})
+
+            component_data = {
+                "total_units_sold": combined_data.get("total_units_sold", 0),
+                "units_sold_chart": combined_data.get("units_sold_chart", []),
+                "sales_data": units_data,
+                "period_info": {"start_date": start_date, "end_date": end_date},
+            }
+
+        else:
+
+            platform_data = units_data.get(platform, {})
+
+            component_data = {
+                "total_units_sold": platform_data.get("total_units_sold", 0),
+                "units_sold_chart": platform_data.get("units_sold_chart", []),
+                "sales_data": {platform: platform_data},
+                "period_info": {"start_date": start_date, "end_date": end_date},
+            }
+
+    elif component_type == "historical_comparison":
+
+        # Historical comparison with real period-over-period analysis
+
+        component_data = await component_data_manager.get_historical_comparison_data(
+            client_id, platform, start_date, end_date
+        )
+
+    elif component_type in [
+        "low_stock_alerts",
+        "overstock_alerts",
+        "sales_performance",
+    ]:
+
+        # For alerts, use days of stock data to determine alert conditions
+
+        stock_data = await component_data_manager.get_days_of_stock_data(
+            client_id, platform, start_date, end_date
+        )
+
+        alerts = []
+
+        if (
+            component_type == "low_stock_alerts"
+            and stock_data.get("low_stock_count", 0) > 0
+        ):
+
+            alerts.append(
+                {
+                    "type": "low_stock",
+                    "severity": "warning",
+                    "message": f"Low stock detected - {stock_data.get('avg_days_of_stock', 0)} days remaining",
+                    "affected_items": stock_data.get("low_stock_count", 0),
+                }
+            )
+
+        elif (
+            component_type == "overstock_alerts"
+            and stock_data.get("overstock_count", 0) > 0
+        ):
+
+            alerts.append(
+                {
+                    "type": "overstock",
+                    "severity": "info",
+                    "message": f"Overstock detected - {stock_data.get('avg_days_of_stock', 0)} days of inventory",
+                    "affected_items": stock_data.get("overstock_count", 0),
+                }
+            )
+
+        elif component_type == "sales_performance":
+
+            # Get sales data for performance alerts
+
+            sales_data = await component_data_manager.get_total_sales_data(
+                client_id, platform, start_date, end_date
+            )
+
+            if platform != "combined":
+
+                growth_rate = (
+                    sales_data.get(platform, {})
+                    .get("sales_comparison", {})
+                    .get("growth_rate", 0)
+                )
+
+                if growth_rate < -10:  # Declining sales
+                    alerts.append(
+                        {
+                            "type": "sales_performance",
+                            "severity": "warning",
+                            "message": f"Sales declining by {abs(growth_rate):.1f}%",
+                            "growth_rate": growth_rate,
+                        }
+                    )
+
+        component_data = {"alerts": alerts}
+
+    return component_data
+
+
 @app.get("/api/dashboard/component-data")
 async def get_component_filtered_data(
+    request: Request,
     component_type: str,
     platform: str = "combined",
     start_date: Optional[str] = None,
@@ -5162,40 +5361,22 @@ async def get_component_filtered_data(
 
         # Validate component type
 
-        valid_components = [
-            "total_sales",
-            "inventory_turnover",
-            "days_of_stock",
-            "inventory_levels",
-            "units_sold",
-            "historical_comparison",
-            "low_stock_alerts",
-            "overstock_alerts",
-            "sales_performance",
-        ]
-
-        if component_type not in valid_components:
+        if component_type not in VALID_COMPONENT_TYPES:
 
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid component type. Must be one of: {', '.join(valid_components)}",
+                detail=f"Invalid component type. Must be one of: {', '.join(VALID_COMPONENT_TYPES)}",
             )
 
         # Validate platform
 
-        valid_platforms = ["shopify", "amazon", "combined"]
-
-        if platform not in valid_platforms:
+        if platform not in VALID_COMPONENT_PLATFORMS:
 
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid platform. Must be one of: {', '.join(valid_platforms)}",
+                detail=f"Invalid platform. Must be one of: {', '.join(VALID_COMPONENT_PLATFORMS)}",
             )
 
-        # Import component data manager
-
-        from component_data_functions import component_data_manager
-
         # ️ CHECK FOR CACHED DATA ONLY IF NO DATE FILTERING
 
         if not start_date and not end_date:
@@ -5223,64 +5404,31 @@ async def get_component_filtered_data(
                     f"️ Using cached inventory-analytics data (no date filtering needed)"
                 )
 
-                # Extract component data from cached inventory analytics
-
-                inventory_analytics = cached_main_response.get(
-                    "inventory_analytics", {}
-                )
-
-                platforms_data = inventory_analytics.get("platforms", {})
+                # The cached analytics' timestamp versions every component cut from it
 
-                if component_type == "total_sales":
+                etag = None
 
-                    if platform == "combined":
-
-                        shopify_sales = platforms_data.get("shopify", {}).get(
-                            "sales_kpis", {}
-                        )
-
-                        amazon_sales = platforms_data.get("amazon", {}).get(
-                            "sales_kpis", {}
-                        )
-
-                        component_data = {
-                            "shopify": shopify_sales,
-                            "amazon": amazon_sales,
-                            "combined": {
-                                "total_revenue": (
-                                    shopify_sales.get("total_sales_30_days", {}).get(
-                                        "revenue", 0
-                                    )
-                                    + amazon_sales.get("total_sales_30_days", {}).get(
-                                        "revenue", 0
-                                    )
-                                ),
-                                "total_orders": (
-                                    shopify_sales.get("total_sales_30_days", {}).get(
-                                        "orders", 0
-                                    )
-                                    + amazon_sales.get("total_sales_30_days", {}).get(
-                                        "orders", 0
-                                    )
-                                ),
-                            },
-                        }
+                if cached_main_response.get("timestamp"):
 
-                    else:
+                    etag = make_etag(
+                        "/api/dashboard/component-data",
+                        client_id,
+                        component_type,
+                        platform,
+                        cached_main_response["timestamp"],
+                    )
 
-                        component_data = platforms_data.get(platform, {}).get(
-                            "sales_kpis", {}
-                        )
+                    cached_response = fast_json.cached(request, etag)
 
-                else:
+                    if cached_response is not None:
 
-                    # For other component types, extract accordingly
+                        return cached_response
 
-                    platform_data = platforms_data.get(
-                        platform if platform != "combined" else "shopify", {}
-                    )
+                # Extract component data from cached inventory analytics
 
-                    component_data = platform_data
+                component_data = component_from_cached_analytics(
+                    cached_main_response, component_type, platform
+                )
 
                 response_data = {
                     "success": True,
@@ -5298,7 +5446,7 @@ async def get_component_filtered_data(
                     f" Component data from cached inventory-analytics for {component_type} - {platform}"
                 )
 
-                return response_data
+                return fast_json.respond(request, response_data, etag)
 
         #  DATE FILTERING OR NO CACHE: Use component-specific database queries
 
@@ -5306,171 +5454,211 @@ async def get_component_filtered_data(
             f" Date filtering requested OR no cache - using component-specific database queries"
         )
 
-        component_data = {}
+        component_data = await compute_component_data(
+            client_id, component_type, platform, start_date, end_date
+        )
+
+        # Check for errors in component data
 
-        if component_type == "total_sales":
+        if isinstance(component_data, dict) and component_data.get("error"):
 
-            component_data = await component_data_manager.get_total_sales_data(
-                client_id, platform, start_date, end_date
+            raise HTTPException(
+                status_code=500,
+                detail=f"Component query failed: {component_data['error']}",
             )
 
-        elif component_type == "inventory_turnover":
+        response_data = {
+            "success": True,
+            "client_id": client_id,
+            "component_type": component_type,
+            "platform": platform,
+            "date_range": {"start_date": start_date, "end_date": end_date},
+            "data": component_data,
+            "timestamp": datetime.now().isoformat(),
+            "cached": False,
+            "cache_source": "component_specific_database_query",
+        }
 
-            component_data = await component_data_manager.get_inventory_turnover_data(
-                client_id, platform, start_date, end_date
-            )
+        logger.info(
+            f" Component data retrieved with component-specific database queries for {component_type} - {platform} (date filtering: {start_date} to {end_date})"
+        )
 
-        elif component_type == "days_of_stock":
+        return fast_json.respond(request, response_data)
 
-            component_data = await component_data_manager.get_days_of_stock_data(
-                client_id, platform, start_date, end_date
-            )
+    except HTTPException:
 
-        elif component_type == "inventory_levels":
+        raise
 
-            component_data = await component_data_manager.get_inventory_levels_data(
-                client_id, platform, start_date, end_date
-            )
+    except Exception as e:
 
-        elif component_type == "units_sold":
+        logger.error(f" Error in component data endpoint: {str(e)}")
 
-            # Use the dedicated units sold function for proper chart data
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get component data: {str(e)}"
+        )
 
-            units_data = await component_data_manager.get_units_sold_data(
-                client_id, platform, start_date, end_date
-            )
 
-            # Format the response to match frontend expectations
+@app.get("/api/dashboard/component-data/batch")
+async def get_component_data_batch(
+    request: Request,
+    components: str,
+    platform: str = "combined",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    token: str = Depends(security),
+):
+    """Get several dashboard components in one request
+
+    `components` is a comma-separated list of component types. The token is
+    verified once, and the platform-level queries and shared intermediates
+    (orders in range, daily units, inventory levels, available inventory) are
+    computed once for all requested components instead of once per component.
+    Components that fail are reported under "errors" next to the ones that
+    succeeded.
+    """
 
-            if platform == "combined":
+    try:
 
-                combined_data = units_data.get("combined", {})
+        # Verify client token once for the whole batch
 
-                component_data = {
-                    "total_units_sold": combined_data.get("total_units_sold", 0),
-                    "units_sold_chart": combined_data.get("units_sold_chart", []),
-                    "sales_data": units_data,
-                    "period_info": {"start_date": start_date, "end_date": end_date},
-                }
+        token_data = verify_token(token.credentials)
 
-            else:
+        client_id = str(token_data.client_id)
 
-                platform_data = units_data.get(platform, {})
+        component_types = list(
+            dict.fromkeys(c.strip() for c in components.split(",") if c.strip())
+        )
 
-                component_data = {
-                    "total_units_sold": platform_data.get("total_units_sold", 0),
-                    "units_sold_chart": platform_data.get("units_sold_chart", []),
-                    "sales_data": {platform: platform_data},
-                    "period_info": {"start_date": start_date, "end_date": end_date},
-                }
+        invalid_components = [
+            c for c in component_types if c not in VALID_COMPONENT_TYPES
+        ]
 
-        elif component_type == "historical_comparison":
+        if not component_types or invalid_components:
+
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid component types {invalid_components}. Must be one of: {', '.join(VALID_COMPONENT_TYPES)}",
+            )
 
-            # Historical comparison with real period-over-period analysis
+        if platform not in VALID_COMPONENT_PLATFORMS:
 
-            component_data = (
-                await component_data_manager.get_historical_comparison_data(
-                    client_id, platform, start_date, end_date
-                )
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid platform. Must be one of: {', '.join(VALID_COMPONENT_PLATFORMS)}",
             )
 
-        elif component_type in [
-            "low_stock_alerts",
-            "overstock_alerts",
-            "sales_performance",
-        ]:
+        logger.info(
+            f" Component batch request: {component_types} for client {client_id} (platform: {platform}, dates: {start_date} to {end_date})"
+        )
 
-            # For alerts, use days of stock data to determine alert conditions
+        # Without date filtering every component is cut from the cached analytics
 
-            stock_data = await component_data_manager.get_days_of_stock_data(
-                client_id, platform, start_date, end_date
+        if not start_date and not end_date:
+
+            cached_main_response = await get_cached_response(
+                client_id,
+                "/api/dashboard/inventory-analytics",
+                {
+                    "fast_mode": True,
+                    "platform": platform if platform != "combined" else "shopify",
+                },
             )
 
-            alerts = []
+            if cached_main_response:
 
-            if (
-                component_type == "low_stock_alerts"
-                and stock_data.get("low_stock_count", 0) > 0
-            ):
+                etag = None
 
-                alerts.append(
-                    {
-                        "type": "low_stock",
-                        "severity": "warning",
-                        "message": f"Low stock detected - {stock_data.get('avg_days_of_stock', 0)} days remaining",
-                        "affected_items": stock_data.get("low_stock_count", 0),
-                    }
-                )
+                if cached_main_response.get("timestamp"):
 
-            elif (
-                component_type == "overstock_alerts"
-                and stock_data.get("overstock_count", 0) > 0
-            ):
+                    etag = make_etag(
+                        "/api/dashboard/component-data/batch",
+                        client_id,
+                        ",".join(component_types),
+                        platform,
+                        cached_main_response["timestamp"],
+                    )
 
-                alerts.append(
-                    {
-                        "type": "overstock",
-                        "severity": "info",
-                        "message": f"Overstock detected - {stock_data.get('avg_days_of_stock', 0)} days of inventory",
-                        "affected_items": stock_data.get("overstock_count", 0),
-                    }
-                )
+                    cached_response = fast_json.cached(request, etag)
 
-            elif component_type == "sales_performance":
+                    if cached_response is not None:
 
-                # Get sales data for performance alerts
+                        return cached_response
 
-                sales_data = await component_data_manager.get_total_sales_data(
-                    client_id, platform, start_date, end_date
-                )
+                response_data = {
+                    "success": True,
+                    "client_id": client_id,
+                    "platform": platform,
+                    "date_range": {"start_date": start_date, "end_date": end_date},
+                    "components": {
+                        component_type: component_from_cached_analytics(
+                            cached_main_response, component_type, platform
+                        )
+                        for component_type in component_types
+                    },
+                    "errors": {},
+                    "timestamp": datetime.now().isoformat(),
+                    "cached": True,
+                    "cache_source": "inventory_analytics",
+                }
+
+                return fast_json.respond(request, response_data, etag)
+
+        from component_data_functions import component_data_manager
 
-                if platform != "combined":
+        async with component_data_manager.batch():
 
-                    growth_rate = (
-                        sales_data.get(platform, {})
-                        .get("sales_comparison", {})
-                        .get("growth_rate", 0)
+            results = await asyncio.gather(
+                *(
+                    compute_component_data(
+                        client_id, component_type, platform, start_date, end_date
                     )
+                    for component_type in component_types
+                ),
+                return_exceptions=True,
+            )
 
-                    if growth_rate < -10:  # Declining sales
+        component_results = {}
 
-                        alerts.append(
-                            {
-                                "type": "sales_performance",
-                                "severity": "warning",
-                                "message": f"Sales declining by {abs(growth_rate):.1f}%",
-                                "growth_rate": growth_rate,
-                            }
-                        )
+        errors = {}
 
-            component_data = {"alerts": alerts}
+        for component_type, component_data in zip(component_types, results):
 
-        # Check for errors in component data
+            if isinstance(component_data, Exception):
 
-        if isinstance(component_data, dict) and component_data.get("error"):
+                errors[component_type] = str(component_data)
+
+            elif isinstance(component_data, dict) and component_data.get("error"):
+
+                errors[component_type] = component_data["error"]
+
+            else:
+
+                component_results[component_type] = component_data
+
+        if errors:
+
+            logger.warning(f" Component batch errors for client {client_id}: {errors}")
+
+        if not component_results:
 
             raise HTTPException(
                 status_code=500,
-                detail=f"Component query failed: {component_data['error']}",
+                detail=f"Component queries failed: {errors}",
             )
 
         response_data = {
             "success": True,
             "client_id": client_id,
-            "component_type": component_type,
             "platform": platform,
             "date_range": {"start_date": start_date, "end_date": end_date},
-            "data": component_data,
+            "components": component_results,
+            "errors": errors,
             "timestamp": datetime.now().isoformat(),
             "cached": False,
             "cache_source": "component_specific_database_query",
         }
 
-        logger.info(
-            f" Component data retrieved with component-specific database queries for {component_type} - {platform} (date filtering: {start_date} to {end_date})"
-        )
-
-        return response_data
+        return fast_json.respond(request, response_data)
 
     except HTTPException:
 
@@ -5478,7 +5666,7 @@ async def get_component_filtered_data(
 
     except Exception as e:
 
-        logger.error(f" Error in component data endpoint: {str(e)}")
+        logger.error(f" Error in component batch endpoint: {str(e)}")
 
         raise HTTPException(
             status_code=500, detail=f"Failed to get component data: {str(e)}"
@@ -5578,6 +5766,7 @@ def get_client_data_update_date(client_data: Dict[str, Any]) -> str:
 
 @app.get("/api/dashboard/metrics")
 async def get_dashboard_metrics(
+    request: Request,
     token: str = Depends(security),
     fast_mode: bool = True,  # DEFAULT TO FAST MODE TO PREVENT TIMEOUTS
     force_llm: bool = False,  # Only use LLM if explicitly requested
@@ -5587,7 +5776,11 @@ async def get_dashboard_metrics(
         str
     ] = None,  # Presets: today, yesterday, last_7_days, last_30_days, this_month, last_month
 ):
-    """Get dashboard metrics - OPTIMIZED for speed, uses cache by default"""
+    """Get dashboard metrics - OPTIMIZED for speed, uses cache by default
+
+    Cache lookups are keyed by a cheap data-version probe (row count plus newest
+    created_at) and run first; client data is only downloaded on a cache miss.
+    """
 
     try:
 
@@ -5597,9 +5790,7 @@ async def get_dashboard_metrics(
 
         client_id = str(token_data.client_id)
 
-        # Get client data - NO LIMIT for complete data processing and extract LLM insights directly
-
-        from ai_analyzer import ai_analyzer
+        from database import LazyClientData
 
         from dashboard_orchestrator import dashboard_orchestrator
 
@@ -5655,16 +5846,21 @@ async def get_dashboard_metrics(
 
                 end_date = last_month_end.isoformat()
 
-        # Get client data with optional date range for full, correct analysis
+        # Lazy handle on the client data for the range - probe the version now,
+        # download the rows only if no cached analysis matches it
 
-        client_data = await ai_analyzer.get_client_data_optimized(
+        client_data_handle = LazyClientData(
             client_id, start_date=start_date, end_date=end_date
         )
 
-        if not client_data:
+        data_version = await client_data_handle.probe()
+
+        if not data_version["row_count"]:
 
             raise HTTPException(status_code=404, detail="No data found for this client")
 
+        total_records = data_version["row_count"]
+
         # If range requested, attempt to serve from daily cache
 
         if start_date and end_date:
@@ -5695,11 +5891,9 @@ async def get_dashboard_metrics(
 
                         return {
                             "client_id": client_id,
-                            "data_type": client_data.get("data_type", "unknown"),
-                            "schema_type": client_data.get("schema", {}).get(
-                                "type", "unknown"
-                            ),
-                            "total_records": len(client_data.get("data", [])),
+                            "data_type": data_version["data_type"],
+                            "schema_type": data_version["data_type"],
+                            "total_records": total_records,
                             "llm_analysis": analysis,
                             "cached": True,
                             "response_time": "instant",
@@ -5737,11 +5931,9 @@ async def get_dashboard_metrics(
 
                     return {
                         "client_id": client_id,
-                        "data_type": client_data.get("data_type", "unknown"),
-                        "schema_type": client_data.get("schema", {}).get(
-                            "type", "unknown"
-                        ),
-                        "total_records": len(client_data.get("data", [])),
+                        "data_type": data_version["data_type"],
+                        "schema_type": data_version["data_type"],
+                        "total_records": total_records,
                         "llm_analysis": {"timeline": timeline},
                         "cached": True,
                         "response_time": "instant",
@@ -5755,25 +5947,55 @@ async def get_dashboard_metrics(
 
         if not force_llm:
 
-            cached_insights = await llm_cache_manager.get_cached_llm_response(
-                client_id, client_data, "metrics"
+            # The cached row's created_at pins the representation, so a client that
+            # already has it gets a 304 before the analysis payload is read
+
+            cache_stamp = await llm_cache_manager.get_cached_version_stamp(
+                client_id, data_version["version"], "metrics"
+            )
+
+            etag = None
+
+            if cache_stamp:
+
+                etag = make_etag(
+                    "/api/dashboard/metrics",
+                    client_id,
+                    data_version["version"],
+                    cache_stamp,
+                    fast_mode,
+                )
+
+                cached_response = fast_json.cached(request, etag)
+
+                if cached_response is not None:
+
+                    return cached_response
+
+            cached_insights = (
+                await llm_cache_manager.get_cached_llm_response_for_version(
+                    client_id, data_version["version"], "metrics"
+                )
             )
 
             if cached_insights:
 
                 logger.info(f" CACHE HIT: Instant response for client {client_id}")
 
-                return {
+                payload = {
                     "client_id": client_id,
-                    "data_type": client_data.get("data_type", "unknown"),
-                    "schema_type": client_data.get("schema", {}).get("type", "unknown"),
-                    "total_records": len(client_data.get("data", [])),
+                    "data_type": data_version["data_type"],
+                    "schema_type": data_version["data_type"],
+                    "total_records": total_records,
                     "llm_analysis": cached_insights,
+                    "insight_tier": TIER_LLM,
                     "cached": True,
                     "response_time": "instant",
                     "fast_mode": fast_mode,
                 }
 
+                return fast_json.respond(request, payload, etag)
+
         # Only clear cache if explicitly requested to regenerate
 
         if force_llm:
@@ -5782,54 +6004,88 @@ async def get_dashboard_metrics(
 
             logger.info(f"️ Cleared cache for fresh analysis - client {client_id}")
 
-        # ALWAYS use LLM analysis for main dashboard - no fallbacks
+        # Cache miss - materialize the client data now
+
+        client_data = await client_data_handle.load()
+
+        # The LLM analysis for the main dashboard runs in the background and stores
+        # itself in the cache; until it lands the deterministic instant tier answers
+        # (force_llm waits for the LLM as before)
 
         logger.info(
             f" Generating MAIN dashboard with LLM analysis for client {client_id}"
         )
 
-        try:
+        import asyncio
 
-            # Add timeout to prevent hanging for more than 55 seconds
+        analysis_key = f"metrics:{client_id}:{data_version['version']}"
 
-            import asyncio
+        async def analyze_and_store():
 
-            insights = await asyncio.wait_for(
-                dashboard_orchestrator._extract_main_dashboard_insights(client_data),
-                timeout=355.0,  # 55 second timeout to stay under 60s frontend timeout
+            insights = await dashboard_orchestrator._extract_main_dashboard_insights(
+                client_data
             )
 
-            logger.info(
-                f" Main dashboard LLM analysis successful for client {client_id}"
-            )
+            if isinstance(insights, dict) and "error" not in insights:
 
-            #  CRITICAL: Store in cache for future requests with data snapshot date
-
-            data_snapshot_date = get_client_data_update_date(client_data)
+                logger.info(
+                    f" Main dashboard LLM analysis successful for client {client_id}"
+                )
 
-            try:
+                #  CRITICAL: Store in cache for future requests with data snapshot date
 
-                cache_success = await llm_cache_manager.store_cached_llm_response(
-                    client_id, client_data, insights, "metrics", data_snapshot_date
-                )
+                data_snapshot_date = get_client_data_update_date(client_data)
 
-                if cache_success:
+                try:
 
-                    logger.info(
-                        f" Cached MAIN dashboard response for client {client_id}"
+                    cache_success = await llm_cache_manager.store_cached_llm_response(
+                        client_id,
+                        client_data,
+                        insights,
+                        "metrics",
+                        data_snapshot_date,
+                        data_version=data_version["version"],
                     )
 
-                else:
+                    if cache_success:
 
-                    logger.warning(
-                        f" Failed to cache MAIN dashboard response for client {client_id}"
-                    )
+                        logger.info(
+                            f" Cached MAIN dashboard response for client {client_id}"
+                        )
 
-            except Exception as cache_error:
+                    else:
 
-                logger.error(f" Cache storage error (non-blocking): {cache_error}")
+                        logger.warning(
+                            f" Failed to cache MAIN dashboard response for client {client_id}"
+                        )
+
+                except Exception as cache_error:
+
+                    logger.error(f" Cache storage error (non-blocking): {cache_error}")
+
+                    # Continue with response even if cache fails
+
+            return insights
 
-                # Continue with response even if cache fails
+        try:
+
+            # Concurrent requests for the same data version share one analysis,
+            # which never runs past its timeout (or the deadline of a force_llm request)
+
+            insights, insight_tier = await instant_insights.race(
+                analysis_key,
+                lambda: llm_cache_manager.single_flight(
+                    analysis_key,
+                    lambda: asyncio.wait_for(
+                        analyze_and_store(), timeout=call_timeout(355.0)
+                    ),
+                ),
+                lambda: dashboard_orchestrator._extract_business_entities_for_llm(
+                    client_data.get("data", [])
+                ),
+                "metrics",
+                wait_for_llm=force_llm,
+            )
 
         except asyncio.TimeoutError:
 
@@ -5855,15 +6111,20 @@ async def get_dashboard_metrics(
 
         # Return the exact same format as /api/test-llm-analysis
 
-        return {
-            "client_id": client_id,
-            "data_type": client_data.get("data_type", "unknown"),
-            "schema_type": client_data.get("schema", {}).get("type", "unknown"),
-            "total_records": len(client_data.get("data", [])),
-            "llm_analysis": insights,
-            "cached": False,
-            "fast_mode": fast_mode,
-        }
+        return fast_json.respond(
+            request,
+            {
+                "client_id": client_id,
+                "data_type": client_data.get("data_type", "unknown"),
+                "schema_type": client_data.get("schema", {}).get("type", "unknown"),
+                "total_records": len(client_data.get("data", [])),
+                "llm_analysis": insights,
+                "insight_tier": insight_tier,
+                "llm_pending": instant_insights.pending(analysis_key),
+                "cached": False,
+                "fast_mode": fast_mode,
+            },
+        )
 
     except HTTPException:
 
@@ -5888,15 +6149,23 @@ async def test_simple():
 
 @app.get("/api/dashboard/sku-inventory")
 async def get_paginated_sku_inventory(
+    request: Request,
     token: str = Depends(security),
     page: int = 1,
     page_size: int = 50,
     use_cache: bool = True,
     force_refresh: bool = False,
     platform: str = "shopify",
-    background_tasks: BackgroundTasks = BackgroundTasks(),
+    sort_by: str = "position",  # position, availability, value, velocity, sku, name
+    sort_order: str = "asc",
+    stock_status: Optional[str] = None,  # out_of_stock, low_stock, in_stock, overstock
+    search: Optional[str] = None,  # SKU code / title prefix
 ):
-    """ INSTANT SKU LIST - Return cached data immediately, refresh in background"""
+    """ INSTANT SKU LIST - Return cached data immediately, refresh in background
+
+    Paging, sorting, stock-status filtering and prefix search run against the
+    row-per-SKU cache in the database.
+    """
 
     try:
 
@@ -5925,19 +6194,43 @@ async def get_paginated_sku_inventory(
                 
                 cache_manager = get_sku_cache_manager(admin_client)
                 cache_key = f"{client_id}_{platform}"
+
+                # Each cache refresh writes a new header, so its created_at versions every page
+                cache_version = cache_manager.get_cache_version(cache_key)
+                etag = None
+                if cache_version:
+                    etag = make_etag(
+                        "/api/dashboard/sku-inventory",
+                        cache_key,
+                        cache_version,
+                        page,
+                        page_size,
+                        sort_by,
+                        sort_order,
+                        stock_status,
+                        search,
+                    )
+                    cached_response = fast_json.cached(request, etag)
+                    if cached_response is not None:
+                        await queue_sku_refresh(client_id, platform)
+                        return cached_response
                 
                 cached_result = await cache_manager.get_cached_skus(
-                    cache_key, page, page_size
+                    cache_key,
+                    page,
+                    page_size,
+                    sort_by=sort_by,
+                    sort_order=sort_order,
+                    stock_status=stock_status,
+                    search=search,
                 )
                 if cached_result.get("success"):
                     logger.info(
                         f" INSTANT RESPONSE: Using cached SKUs for {platform}"
                     )
-                    # Start background refresh for next time
-                    background_tasks.add_task(
-                        refresh_sku_background, client_id, platform, page, page_size
-                    )
-                    return cached_result
+                    # Queue a refresh for next time; skipped unless the data changed
+                    await queue_sku_refresh(client_id, platform)
+                    return fast_json.respond(request, cached_result, etag)
                     
             except Exception as e:
                 logger.warning(f" SKU cache check failed: {e}")
@@ -6194,11 +6487,6 @@ async def get_paginated_sku_inventory(
         )
 
 
-# Legacy function (will be removed) - now replaced by cron job
-async def refresh_sku_background(client_id: str, platform: str, page: int, page_size: int):
-    """Background task to refresh SKU cache - replaced by cron job"""
-    logger.info(f" Background SKU refresh triggered (legacy) - should use cron job instead")
-
 @app.post("/api/admin/trigger-api-sync")
 async def trigger_api_sync_manually(
     token: str = Depends(security),
@@ -6268,15 +6556,20 @@ async def get_scheduler_status(token: str = Depends(security)):
         # Verify admin token
         token_data = verify_token(token.credentials)
         
-        # Get scheduler jobs status
-        jobs_status = get_scheduler_status()
+        # Get scheduler jobs status (this endpoint shadows the imported helper of the same name)
+        from internal_scheduler import get_scheduler_status as get_jobs_status
+        jobs_status = get_jobs_status()
+        leader = jobs_status.get("leader") or {}
         
         return {
             "success": True,
-            "scheduler_running": len(jobs_status) > 0,
+            "scheduler_running": jobs_status.get("status") == "running",
             "jobs": jobs_status,
-            "message": f"Scheduler is {'RUNNING' if jobs_status else 'STOPPED'} with {len(jobs_status)} jobs",
-            "note": "Jobs run automatically inside the FastAPI app - no external cron needed!"
+            "leader": leader.get("leader"),
+            "this_process": leader.get("process"),
+            "this_process_is_leader": leader.get("is_leader", False),
+            "message": f"Scheduler is {jobs_status.get('status', 'unknown').upper()} with {jobs_status.get('total_jobs', 0)} jobs",
+            "note": "Jobs run automatically inside the FastAPI app, in the elected leader process only"
         }
             
     except Exception as e:
@@ -6382,8 +6675,8 @@ async def clear_sku_cache(token: str = Depends(security)):
 
 
 @app.get("/api/dashboard/sku-summary")
-async def get_sku_summary_stats(token: str = Depends(security)):
-    """Get SKU inventory summary statistics quickly"""
+async def get_sku_summary_stats(token: str = Depends(security), platform: str = "shopify"):
+    """Get SKU inventory summary statistics quickly (precomputed when the SKU cache is written)"""
 
     try:
 
@@ -6403,7 +6696,9 @@ async def get_sku_summary_stats(token: str = Depends(security)):
 
         cache_manager = get_sku_cache_manager(db_client)
 
-        stats_result = await cache_manager.get_sku_summary_stats(client_id)
+        stats_result = await cache_manager.get_sku_summary_stats(
+            f"{client_id}_{platform}"
+        )
 
         if stats_result.get("success"):
 
@@ -6421,7 +6716,7 @@ async def get_sku_summary_stats(token: str = Depends(security)):
             from dashboard_inventory_analyzer import dashboard_inventory_analyzer
 
             sku_result = await dashboard_inventory_analyzer.get_sku_list(
-                client_id, 1, 10000, False  # Get all data without cache
+                client_id, 1, 10000, False, platform  # Get all data without cache
             )
 
             if sku_result.get("success"):
@@ -6485,9 +6780,14 @@ async def get_inventory_analytics(
     platform: str = "shopify",
     start_date: Optional[str] = None,  # Date filtering support
     end_date: Optional[str] = None,  # Date filtering support
-    background_tasks: BackgroundTasks = BackgroundTasks(),
+    request: Request = None,
 ):
-    """ INSTANT RESPONSE - Return cached data immediately, refresh in background"""
+    """ INSTANT RESPONSE - Return cached data immediately, refresh in background
+
+    HTTP requests get encoded responses with an ETag (304 when it matches);
+    direct callers (cron refresh, the stream endpoint) pass no request and get
+    the response dict.
+    """
 
     try:
 
@@ -6543,7 +6843,20 @@ async def get_inventory_analytics(
 
                 cached_response["cache_source"] = "persistent_database"
 
-                return cached_response
+                # Each save stamps a new timestamp, so it versions the cached row
+
+                etag = None
+
+                if cached_response.get("timestamp"):
+
+                    etag = make_etag(
+                        endpoint_url,
+                        client_id,
+                        json.dumps(cache_params, sort_keys=True),
+                        cached_response["timestamp"],
+                    )
+
+                return fast_json.respond(request, cached_response, etag)
 
         with calculation_lock:
 
@@ -6583,18 +6896,13 @@ async def get_inventory_analytics(
                     f" INSTANT RESPONSE: Using cached analytics for {platform}"
                 )
 
-                # Start background refresh for next time
+                # Queue a refresh for next time; skipped unless the data changed
 
-                background_tasks.add_task(
-                    refresh_analytics_background,
-                    client_id,
-                    platform,
-                    fast_mode,
-                    start_date,
-                    end_date,
+                await queue_analytics_refresh(
+                    client_id, platform, fast_mode, start_date, end_date
                 )
 
-                return cached_analytics
+                return fast_json.respond(request, cached_analytics)
 
         except Exception as e:
 
@@ -6618,43 +6926,7 @@ async def get_inventory_analytics(
 
             # Quick check for organized tables (check both Shopify and Amazon)
 
-            shopify_table = f"{client_id.replace('-', '_')}_shopify_products"
-
-            amazon_table = f"{client_id.replace('-', '_')}_amazon_orders"
-
-            has_organized_data = False
-
-            try:
-
-                test_response = (
-                    db_client.table(shopify_table).select("id").limit(1).execute()
-                )
-
-                has_organized_data = bool(test_response.data)
-
-            except:
-
-                pass
-
-            # Also check for Amazon organized tables
-
-            if not has_organized_data:
-
-                try:
-
-                    test_response = (
-                        db_client.table(amazon_table).select("id").limit(1).execute()
-                    )
-
-                    has_organized_data = bool(test_response.data)
-
-                    logger.info(
-                        f" Found Amazon organized tables for client {client_id}"
-                    )
-
-                except:
-
-                    pass
+            has_organized_data = has_organized_inventory_tables(db_client, client_id)
 
             if has_organized_data:
 
@@ -6674,21 +6946,9 @@ async def get_inventory_analytics(
                         f" Dashboard inventory analytics completed for client {client_id}"
                     )
 
-                    response_data = {
-                        "client_id": client_id,
-                        "success": True,
-                        "message": f"Dashboard analytics from organized data - {analytics.get('data_summary', {}).get('shopify_products', 0) + analytics.get('data_summary', {}).get('amazon_products', 0)} products, {analytics.get('data_summary', {}).get('shopify_orders', 0) + analytics.get('data_summary', {}).get('amazon_orders', 0)} orders (SKU data available via /api/dashboard/sku-inventory)",
-                        "timestamp": datetime.now().isoformat(),
-                        "data_type": "dashboard_inventory_analytics",
-                        "schema_type": "dashboard_inventory_analytics",
-                        "total_records": analytics.get("data_summary", {}).get(
-                            "total_records", 0
-                        ),
-                        "inventory_analytics": analytics,
-                        "cached": False,
-                        "processing_time": "optimized",
-                        "data_source": "organized_tables",
-                    }
+                    response_data = organized_inventory_analytics_response(
+                        client_id, analytics
+                    )
 
                     # ️ Save response to daily cache
 
@@ -6708,7 +6968,7 @@ async def get_inventory_analytics(
                         client_id, endpoint_url, response_data, cache_params
                     )
 
-                    return response_data
+                    return fast_json.respond(request, response_data)
 
                 else:
 
@@ -7100,6 +7360,233 @@ async def get_inventory_analytics(
         )
 
 
+def _inventory_analytics_sections(analytics: Dict[str, Any], platform: str):
+    """(view, section, data) for every dashboard section found in an analytics payload"""
+
+    from dashboard_inventory_analyzer import STOCK_SECTIONS, METRICS_SECTIONS
+
+    if isinstance(analytics.get("platforms"), dict):
+
+        for view, sections in analytics["platforms"].items():
+
+            for section in STOCK_SECTIONS + METRICS_SECTIONS:
+
+                if section in sections:
+
+                    yield view, section, sections[section]
+
+        return
+
+    for section in STOCK_SECTIONS + METRICS_SECTIONS:
+
+        if section in analytics:
+
+            yield platform, section, analytics[section]
+
+
+@app.get("/api/dashboard/inventory-analytics/stream")
+async def stream_inventory_analytics(
+    token: str = Depends(security),
+    fast_mode: bool = True,
+    force_refresh: bool = False,
+    platform: str = "shopify",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = "sse",
+):
+    """ PROGRESSIVE RESPONSE - Send each inventory-analytics section as soon as it is ready
+
+    Same data as /api/dashboard/inventory-analytics, one event per section
+    ({"view", "section", "data"} or {"view", "section", "error"}). Cached
+    sections are sent immediately; nothing is dropped on a deadline. The last
+    event is "complete". format=sse sends Server-Sent Events, format=ndjson
+    one JSON object per line.
+    """
+
+    token_data = verify_token(token.credentials)
+
+    client_id = str(token_data.client_id)
+
+    if format not in ("sse", "ndjson"):
+
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+
+    # Same cache entry as the JSON endpoint
+
+    endpoint_url = "/api/dashboard/inventory-analytics"
+
+    cache_params = {"fast_mode": fast_mode, "platform": platform}
+
+    if start_date:
+
+        cache_params["start_date"] = start_date
+
+    if end_date:
+
+        cache_params["end_date"] = end_date
+
+    def encode(event: Dict[str, Any]) -> str:
+
+        payload = json.dumps(event, default=str)
+
+        if format == "ndjson":
+
+            return payload + "\n"
+
+        return f"event: {event['section']}\ndata: {payload}\n\n"
+
+    async def event_stream():
+
+        started = time.time()
+
+        try:
+
+            if not force_refresh:
+
+                cached_response = await get_cached_response(
+                    client_id, endpoint_url, cache_params
+                )
+
+                if cached_response:
+
+                    logger.info(
+                        f"️ CACHE HIT: Streaming cached inventory analytics for {client_id}"
+                    )
+
+                    sections = list(
+                        _inventory_analytics_sections(
+                            cached_response.get("inventory_analytics") or {}, platform
+                        )
+                    )
+
+                    for view, section, data in sections:
+
+                        yield encode(
+                            {
+                                "view": view,
+                                "section": section,
+                                "data": data,
+                                "cached": True,
+                            }
+                        )
+
+                    if not sections:
+
+                        # Legacy-shaped cache entry: send it whole
+
+                        yield encode(
+                            {
+                                "view": platform,
+                                "section": "analytics",
+                                "data": cached_response,
+                                "cached": True,
+                            }
+                        )
+
+                    yield encode(
+                        {
+                            "view": platform,
+                            "section": "complete",
+                            "cached": True,
+                            "elapsed_seconds": round(time.time() - started, 3),
+                        }
+                    )
+
+                    return
+
+            db_client = get_admin_client()
+
+            if not db_client or not has_organized_inventory_tables(
+                db_client, client_id
+            ):
+
+                # The legacy JSON-parsing path is not sectioned; send its response as one event
+
+                logger.info(
+                    f" No organized tables for {client_id}, streaming the legacy response in one event"
+                )
+
+                response_data = await get_inventory_analytics(
+                    token=token,
+                    fast_mode=fast_mode,
+                    force_refresh=force_refresh,
+                    platform=platform,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+
+                yield encode(
+                    {"view": platform, "section": "analytics", "data": response_data}
+                )
+
+                yield encode(
+                    {
+                        "view": platform,
+                        "section": "complete",
+                        "elapsed_seconds": round(time.time() - started, 3),
+                    }
+                )
+
+                return
+
+            from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+
+            async for event in dashboard_inventory_analyzer.stream_dashboard_inventory_analytics(
+                client_id, platform
+            ):
+
+                if event["section"] != "complete":
+
+                    yield encode(event)
+
+                    continue
+
+                analytics = event["data"]
+
+                section_errors = analytics.get("section_errors", [])
+
+                if not section_errors:
+
+                    await save_cached_response(
+                        client_id,
+                        endpoint_url,
+                        organized_inventory_analytics_response(client_id, analytics),
+                        cache_params,
+                    )
+
+                logger.info(
+                    f" Streamed inventory analytics for {client_id} ({platform}) in {time.time() - started:.2f}s"
+                )
+
+                yield encode(
+                    {
+                        "view": platform,
+                        "section": "complete",
+                        "section_errors": section_errors,
+                        "elapsed_seconds": round(time.time() - started, 3),
+                    }
+                )
+
+        except Exception as e:
+
+            logger.error(f" Inventory analytics stream failed for {client_id}: {e}")
+
+            yield encode({"view": platform, "section": "error", "error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson"
+        if format == "ndjson"
+        else "text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep GZipMiddleware and proxies from buffering the events
+            "Content-Encoding": "identity",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @app.get("/api/dashboard/business-insights")
 async def get_business_insights_dashboard(
     token: str = Depends(security), fast_mode: bool = True, force_llm: bool = False
@@ -7159,6 +7646,7 @@ async def get_business_insights_dashboard(
                 "schema_type": client_data.get("schema", {}).get("type", "unknown"),
                 "total_records": len(client_data.get("data", [])),
                 "llm_analysis": cached_insights,
+                "insight_tier": TIER_LLM,
                 "cached": True,
                 "response_time": "instant",
             }
@@ -7169,50 +7657,71 @@ async def get_business_insights_dashboard(
             f"🤖 Generating BUSINESS insights with specialized LLM analysis for client {client_id}"
         )
 
-        try:
-
-            # Add timeout to prevent hanging for more than 55 seconds
+        import asyncio
 
-            import asyncio
+        analysis_key = llm_cache_manager.cache_key(client_id, client_data, "business")
 
-            insights = await asyncio.wait_for(
-                dashboard_orchestrator._extract_business_insights_specialized(
-                    client_data
-                ),
-                timeout=55.0,  # 55 second timeout to stay under 60s frontend timeout
-            )
+        async def analyze_and_store():
 
-            logger.info(
-                f" Business insights LLM analysis successful for client {client_id}"
+            insights = await dashboard_orchestrator._extract_business_insights_specialized(
+                client_data
             )
 
-            #  CRITICAL: Store in cache for future requests with data snapshot date
+            if isinstance(insights, dict) and "error" not in insights:
 
-            data_snapshot_date = get_client_data_update_date(client_data)
+                logger.info(
+                    f" Business insights LLM analysis successful for client {client_id}"
+                )
 
-            try:
+                #  CRITICAL: Store in cache for future requests with data snapshot date
 
-                cache_success = await llm_cache_manager.store_cached_llm_response(
-                    client_id, client_data, insights, "business", data_snapshot_date
-                )
+                data_snapshot_date = get_client_data_update_date(client_data)
 
-                if cache_success:
+                try:
 
-                    logger.info(
-                        f" Cached BUSINESS insights response for client {client_id}"
+                    cache_success = await llm_cache_manager.store_cached_llm_response(
+                        client_id, client_data, insights, "business", data_snapshot_date
                     )
 
-                else:
+                    if cache_success:
 
-                    logger.warning(
-                        f" Failed to cache BUSINESS insights response for client {client_id}"
-                    )
+                        logger.info(
+                            f" Cached BUSINESS insights response for client {client_id}"
+                        )
+
+                    else:
+
+                        logger.warning(
+                            f" Failed to cache BUSINESS insights response for client {client_id}"
+                        )
+
+                except Exception as cache_error:
+
+                    logger.error(f" Cache storage error (non-blocking): {cache_error}")
+
+                    # Continue with response even if cache fails
 
-            except Exception as cache_error:
+            return insights
 
-                logger.error(f" Cache storage error (non-blocking): {cache_error}")
+        try:
+
+            # Concurrent requests for the same data share one analysis (55s, capped by
+            # the request deadline when force_llm waits); the instant tier answers meanwhile
 
-                # Continue with response even if cache fails
+            insights, insight_tier = await instant_insights.race(
+                analysis_key,
+                lambda: llm_cache_manager.single_flight(
+                    analysis_key,
+                    lambda: asyncio.wait_for(
+                        analyze_and_store(), timeout=call_timeout(55.0)
+                    ),
+                ),
+                lambda: dashboard_orchestrator._extract_business_entities_for_llm(
+                    client_data.get("data", [])
+                ),
+                "business",
+                wait_for_llm=force_llm,
+            )
 
         except asyncio.TimeoutError:
 
@@ -7243,6 +7752,8 @@ async def get_business_insights_dashboard(
             "schema_type": client_data.get("schema", {}).get("type", "unknown"),
             "total_records": len(client_data.get("data", [])),
             "llm_analysis": insights,
+            "insight_tier": insight_tier,
+            "llm_pending": instant_insights.pending(analysis_key),
             "cached": False,
             "fast_mode": fast_mode,
         }
@@ -7313,6 +7824,7 @@ async def get_performance_dashboard(
                 "schema_type": client_data.get("schema", {}).get("type", "unknown"),
                 "total_records": len(client_data.get("data", [])),
                 "llm_analysis": cached_insights,
+                "insight_tier": TIER_LLM,
                 "cached": True,
                 "response_time": "instant",
             }
@@ -7323,50 +7835,71 @@ async def get_performance_dashboard(
             f" Generating PERFORMANCE insights with specialized LLM analysis for client {client_id}"
         )
 
-        try:
-
-            # Add timeout to prevent hanging for more than 55 seconds
+        import asyncio
 
-            import asyncio
+        analysis_key = llm_cache_manager.cache_key(client_id, client_data, "performance")
 
-            insights = await asyncio.wait_for(
-                dashboard_orchestrator._extract_performance_insights_specialized(
-                    client_data
-                ),
-                timeout=55.0,  # 55 second timeout to stay under 60s frontend timeout
-            )
+        async def analyze_and_store():
 
-            logger.info(
-                f" Performance insights LLM analysis successful for client {client_id}"
+            insights = await dashboard_orchestrator._extract_performance_insights_specialized(
+                client_data
             )
 
-            #  CRITICAL: Store in cache for future requests with data snapshot date
+            if isinstance(insights, dict) and "error" not in insights:
 
-            data_snapshot_date = get_client_data_update_date(client_data)
+                logger.info(
+                    f" Performance insights LLM analysis successful for client {client_id}"
+                )
 
-            try:
+                #  CRITICAL: Store in cache for future requests with data snapshot date
 
-                cache_success = await llm_cache_manager.store_cached_llm_response(
-                    client_id, client_data, insights, "performance", data_snapshot_date
-                )
+                data_snapshot_date = get_client_data_update_date(client_data)
 
-                if cache_success:
+                try:
 
-                    logger.info(
-                        f" Cached PERFORMANCE insights response for client {client_id}"
+                    cache_success = await llm_cache_manager.store_cached_llm_response(
+                        client_id, client_data, insights, "performance", data_snapshot_date
                     )
 
-                else:
+                    if cache_success:
 
-                    logger.warning(
-                        f" Failed to cache PERFORMANCE insights response for client {client_id}"
-                    )
+                        logger.info(
+                            f" Cached PERFORMANCE insights response for client {client_id}"
+                        )
+
+                    else:
+
+                        logger.warning(
+                            f" Failed to cache PERFORMANCE insights response for client {client_id}"
+                        )
+
+                except Exception as cache_error:
+
+                    logger.error(f" Cache storage error (non-blocking): {cache_error}")
+
+                    # Continue with response even if cache fails
 
-            except Exception as cache_error:
+            return insights
 
-                logger.error(f" Cache storage error (non-blocking): {cache_error}")
+        try:
+
+            # Concurrent requests for the same data share one analysis (55s, capped by
+            # the request deadline when force_llm waits); the instant tier answers meanwhile
 
-                # Continue with response even if cache fails
+            insights, insight_tier = await instant_insights.race(
+                analysis_key,
+                lambda: llm_cache_manager.single_flight(
+                    analysis_key,
+                    lambda: asyncio.wait_for(
+                        analyze_and_store(), timeout=call_timeout(55.0)
+                    ),
+                ),
+                lambda: dashboard_orchestrator._extract_business_entities_for_llm(
+                    client_data.get("data", [])
+                ),
+                "performance",
+                wait_for_llm=force_llm,
+            )
 
         except asyncio.TimeoutError:
 
@@ -7397,6 +7930,8 @@ async def get_performance_dashboard(
             "schema_type": client_data.get("schema", {}).get("type", "unknown"),
             "total_records": len(client_data.get("data", [])),
             "llm_analysis": insights,
+            "insight_tier": insight_tier,
+            "llm_pending": instant_insights.pending(analysis_key),
             "cached": False,
             "fast_mode": fast_mode,
         }
@@ -7429,6 +7964,7 @@ async def get_cache_stats(token: str = Depends(security)):
         return {
             "success": True,
             "cache_stats": stats,
+            "insight_tiers": instant_insights.stats(),
             "timestamp": datetime.now().isoformat(),
         }
 
@@ -9800,6 +10336,8 @@ async def improved_batch_insert(
 
                     total_inserted += len(response.data)
 
+                    fingerprint_store.record_inserts(response.data)
+
                     # Log progress every 10 chunks instead of every chunk for speed
 
                     if chunk_num % 10 == 0:
@@ -9911,6 +10449,8 @@ async def improved_batch_insert(
 
                         total_inserted += len(response.data)
 
+                        fingerprint_store.record_inserts(response.data)
+
                         logger.info(f" RECOVERED {len(response.data)} rows")
 
                 except Exception as recovery_error:
@@ -10379,8 +10919,6 @@ async def test_openai_api_key():
 
         import os
 
-        from openai import OpenAI
-
         # Get the API key
 
         api_key = os.getenv("OPENAI_API_KEY")
@@ -10395,15 +10933,13 @@ async def test_openai_api_key():
 
         key_length = len(api_key)
 
-        # Test with a simple API call
-
-        client = OpenAI(api_key=api_key)
+        # Test with a simple API call through the shared gateway
 
         try:
 
             # Make a simple test call
 
-            response = client.chat.completions.create(
+            response = await llm_gateway.chat(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "user", "content": "Say 'Hello, API key is working!'"}
@@ -10562,15 +11098,13 @@ async def force_reload_environment():
 
         key_length = len(api_key) if api_key else 0
 
-        # Test the key
+        # Test the key - the gateway rebuilds its client with the reloaded key
 
-        from openai import OpenAI
-
-        client = OpenAI(api_key=api_key)
+        llm_gateway.reset()
 
         try:
 
-            response = client.chat.completions.create(
+            response = await llm_gateway.chat(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": "Test"}],
                 max_tokens=5,
@@ -11521,8 +12055,10 @@ async def get_client_data_health(client_id: str, token: str = Depends(security))
 
 
 @app.post("/api/superadmin/organize-data/{client_id}")
-async def organize_client_data(client_id: str, token: str = Depends(security)):
-    """Superadmin: Organize client data into structured tables by platform and type"""
+async def organize_client_data(
+    client_id: str, full_refresh: bool = False, token: str = Depends(security)
+):
+    """Superadmin: Organize client data added since the last run into structured tables by platform and type"""
 
     try:
 
@@ -11538,12 +12074,18 @@ async def organize_client_data(client_id: str, token: str = Depends(security)):
 
         organizer = DataOrganizer()
 
-        result = await organizer.organize_client_data(client_id)
+        result = await organizer.organize_client_data(
+            client_id, full_refresh=full_refresh
+        )
 
         if result.get("success"):
 
             logger.info(f" Data organization completed for client {client_id}")
 
+            from llm_cache_manager import llm_cache_manager
+
+            await llm_cache_manager.notify_data_changed(client_id)
+
             return {
                 "success": True,
                 "message": "Data organization completed successfully",
@@ -11552,6 +12094,9 @@ async def organize_client_data(client_id: str, token: str = Depends(security)):
                 "total_raw_records": result.get("total_raw_records"),
                 "organized_records": result.get("organized_records"),
                 "total_organized": result.get("total_organized"),
+                "incremental": result.get("incremental"),
+                "watermark": result.get("watermark"),
+                "failed_batches": result.get("failed_batches", 0),
             }
 
         else:
@@ -0,0 +1,260 @@
+"""
+BAK Scanner - Memory-mapped, single-pass extraction for .bak backups
+Runs every business pattern as one combined bytes regex over an mmap of the
+spooled file and reservoir-samples matches during the scan, so multi-GB SQL
+Server backups parse in bounded memory and linear time.
+"""
+
+import logging
+import mmap
+import os
+import random
+import re
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Business patterns, in priority order. They are combined into a single
+# alternation so the buffer is walked once instead of once per pattern.
+BUSINESS_PATTERNS = [
+    ('email', rb'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    ('phone', rb'\b(?:\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    ('date', rb'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b|\b\d{1,2}[-/]\d{1,2}[-/]\d{4}\b'),
+    ('price', rb'\$\d+(?:\.\d{2})?|\b\d+\.\d{2}\b'),
+    ('id_number', rb'\b[A-Z]{2,}\d{3,}\b|\b\d{6,}\b'),
+    ('name', rb'\b[A-Z][a-z]+ [A-Z][a-z]+\b'),
+    ('address', rb'\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd)\b'),
+    ('zipcode', rb'\b\d{5}(?:-\d{4})?\b'),
+    ('state', rb'\b(?:AL|AK|AZ|AR|CA|CO|CT|DE|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY)\b'),
+    ('product_code', rb'\b[A-Z]{2,4}-?\d{3,6}\b'),
+    ('text_data', rb'\b[A-Za-z]{3,}(?:[ \t]+[A-Za-z]{3,})*\b'),
+]
+
+# Last-resort patterns, only consulted while nothing better has been found
+FALLBACK_PATTERNS = [
+    ('key_value', rb'(\w+):[ \t]*([^\n\r]+)'),
+    ('assignment', rb'(\w+)[ \t]*=[ \t]*([^\n\r]+)'),
+    ('date_pattern', rb'(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})'),
+    ('decimal_number', rb'(\d+\.\d+)'),
+    ('long_word', rb'([A-Za-z]{5,})'),
+]
+
+
+def _combine(patterns) -> 're.Pattern':
+    """Join (name, pattern) pairs into one alternation of named groups"""
+    parts = []
+    for name, pattern in patterns:
+        # Inner capture groups would shift lastgroup, so make them non-capturing
+        body = re.sub(rb'(?<!\\)\((?!\?)', b'(?:', pattern)
+        parts.append(b'(?P<' + name.encode() + b'>' + body + b')')
+    return re.compile(b'|'.join(parts), re.IGNORECASE)
+
+
+_BUSINESS_RE = _combine(BUSINESS_PATTERNS)
+_FALLBACK_RE = _combine(FALLBACK_PATTERNS)
+_FALLBACK_PAIR_RE = {
+    'key_value': re.compile(rb'(\w+):[ \t]*(.+)', re.DOTALL),
+    'assignment': re.compile(rb'(\w+)[ \t]*=[ \t]*(.+)', re.DOTALL),
+}
+_USEFUL_LINE_RE = re.compile(
+    r'\b\d{3,}\b|\b[A-Z][a-z]+\b|[a-zA-Z]+@[a-zA-Z]+|\b\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}\b|\$\d+|\b[A-Z]{2,}\d+\b'
+)
+_SYMBOL_RUN_RE = re.compile(r'[^\w\s]{5,}')
+
+# Bytes outside printable ASCII (plus tab) are dropped from text lines
+_NON_PRINTABLE = bytes(b for b in range(256) if not (32 <= b <= 126 or b == 9))
+
+
+class Reservoir:
+    """Fixed-capacity uniform sample over a stream of unknown length (Algorithm R)"""
+
+    def __init__(self, capacity: int, rng: random.Random):
+        self.capacity = max(1, capacity)
+        self.rng = rng
+        self.seen = 0
+        self.items: List[Any] = []
+
+    def offer(self, item: Any) -> None:
+        self.seen += 1
+        if len(self.items) < self.capacity:
+            self.items.append(item)
+            return
+        slot = self.rng.randrange(self.seen)
+        if slot < self.capacity:
+            self.items[slot] = item
+
+    def sample(self, rate: float) -> List[Any]:
+        """Shrink the reservoir to `rate` of everything seen, in scan order"""
+        target = max(1, int(self.seen * rate)) if self.seen else 0
+        items = self.items
+        if target < len(items):
+            items = self.rng.sample(items, target)
+        # Items carry their byte offset first so the sample keeps file order
+        return sorted(items, key=lambda item: item[0])
+
+
+class BakScanner:
+    """Single-pass scanner turning raw backup bytes into sampled business records"""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.06,
+        max_records: int = 50000,
+        window_size: int = 8 * 1024 * 1024,
+        dedup_limit: int = 500000,
+        seed: Optional[int] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.max_records = max_records
+        self.window_size = window_size
+        self.dedup_limit = dedup_limit
+        self.seed = seed
+
+    def scan_file(self, source: Union[str, BinaryIO]) -> List[Dict[str, Any]]:
+        """Scan a path or file object (e.g. an upload's SpooledTemporaryFile) via mmap"""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as handle:
+                return self.scan_file(handle)
+
+        # SpooledTemporaryFile.fileno() rolls an in-memory spool over to disk
+        fileno = source.fileno()
+        if os.fstat(fileno).st_size == 0:
+            return []
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            return self.scan_buffer(mapped)
+
+    def scan_buffer(self, buffer) -> List[Dict[str, Any]]:
+        """Scan any bytes-like buffer (bytes, bytearray, mmap) in one pass"""
+        rng = random.Random(self.seed)
+        business = Reservoir(self.max_records, rng)
+        text_lines = Reservoir(self.max_records, rng)
+        fallback = Reservoir(self.max_records, rng)
+        seen_values = set()
+        line_number = 0
+
+        total = len(buffer)
+        start = 0
+        while start < total:
+            end = self._window_end(buffer, start, total)
+
+            for match in _BUSINESS_RE.finditer(buffer, start, end):
+                data_type = match.lastgroup
+                value = match.group().decode('ascii', errors='ignore')
+                key = hash((data_type, value))
+                if key in seen_values or not self._is_meaningful_text(value):
+                    continue
+                if len(seen_values) < self.dedup_limit:
+                    seen_values.add(key)
+                business.offer((match.start(), data_type, value))
+
+            # Lower tiers are only returned when the business tier is empty,
+            # so stop feeding them as soon as it has anything
+            if not business.seen:
+                line_number = self._scan_lines(buffer, start, end, line_number, text_lines)
+                if not text_lines.seen:
+                    for match in _FALLBACK_RE.finditer(buffer, start, end):
+                        self._offer_fallback(match, fallback)
+            start = end
+
+        if business.seen:
+            logger.info(f" BAK scan: {business.seen} business patterns in {total} bytes")
+            return [
+                {
+                    'id': idx,
+                    'data_type': data_type,
+                    'value': value,
+                    'category': 'business_data',
+                    '_source_format': 'bak_business_extraction',
+                }
+                for idx, (_, data_type, value) in enumerate(business.sample(self.sample_rate), 1)
+            ]
+
+        if text_lines.seen:
+            logger.info(f" BAK scan: {text_lines.seen} meaningful text lines in {total} bytes")
+            return [
+                {
+                    'id': line_no,
+                    'line_number': line_no,
+                    'content': content,
+                    'category': 'meaningful_text',
+                    '_source_format': 'bak_intelligent_text',
+                }
+                for _, line_no, content in text_lines.sample(self.sample_rate)
+            ]
+
+        if fallback.seen:
+            logger.info(f" BAK scan: {fallback.seen} fallback patterns in {total} bytes")
+            records = []
+            for idx, (_, record) in enumerate(fallback.sample(self.sample_rate), 1):
+                records.append({'id': idx, **record})
+            return records
+
+        return []
+
+    def _window_end(self, buffer, start: int, total: int) -> int:
+        """End the window on a line boundary so matches are rarely split"""
+        end = min(start + self.window_size, total)
+        if end >= total:
+            return total
+        newline = buffer.rfind(b'\n', start, end)
+        return newline + 1 if newline > start else end
+
+    def _scan_lines(self, buffer, start: int, end: int, line_number: int, reservoir: Reservoir) -> int:
+        """Feed meaningful printable lines of one window into the reservoir"""
+        offset = start
+        for raw_line in buffer[start:end].split(b'\n'):
+            line_number += 1
+            text = raw_line.translate(None, _NON_PRINTABLE).decode('ascii').strip()
+            if len(text) > 3 and self._is_meaningful_text(text) and self._contains_useful_data(text):
+                reservoir.offer((offset, line_number, text))
+            offset += len(raw_line) + 1
+        # split() yields a trailing empty piece for windows ending in a newline
+        return line_number - 1 if end > start and buffer[end - 1:end] == b'\n' else line_number
+
+    def _offer_fallback(self, match, reservoir: Reservoir) -> None:
+        pattern_type = match.lastgroup
+        raw = match.group()
+        pair = _FALLBACK_PAIR_RE.get(pattern_type)
+        if pair is not None:
+            parts = pair.match(raw)
+            if not parts:
+                return
+            key = parts.group(1).decode('ascii', errors='ignore').strip()
+            value = parts.group(2).decode('ascii', errors='ignore').strip()
+            if not (self._is_meaningful_text(key) and self._is_meaningful_text(value)):
+                return
+            record = {'pattern_type': pattern_type, 'key': key, 'value': value}
+        else:
+            value = raw.decode('ascii', errors='ignore').strip()
+            if not self._is_meaningful_text(value):
+                return
+            record = {'pattern_type': pattern_type, 'value': value}
+        record['category'] = 'fallback_pattern'
+        record['_source_format'] = 'bak_fallback_extraction'
+        reservoir.offer((match.start(), record))
+
+    @staticmethod
+    def _is_meaningful_text(text: str) -> bool:
+        """Same filter as UniversalDataParser._is_meaningful_text, for ASCII input"""
+        text = text.strip()
+        if len(text) < 2:
+            return False
+        if sum(1 for c in text if c.isalpha()) < 2:
+            return False
+        if sum(1 for c in text if 32 <= ord(c) <= 126) / len(text) < 0.8:
+            return False
+        return not _SYMBOL_RUN_RE.search(text)
+
+    @staticmethod
+    def _contains_useful_data(text: str) -> bool:
+        """Same heuristic as UniversalDataParser._contains_useful_data"""
+        if len(text) < 5:
+            return False
+        if _USEFUL_LINE_RE.search(text):
+            return True
+        words = text.split()
+        return 2 <= len(words) <= 20 and any(any(c.isalpha() for c in w) for w in words)
+
+
+# Create global instance
+bak_scanner = BakScanner()
@@ -0,0 +1,326 @@
+"""
+Chart Frame - One typed, columnar frame per dashboard build
+Client records are flattened and their column types (numeric, date, categorical)
+inferred once; every chart widget's series is then a vectorized operation over
+the whole frame (groupby + top-N, time resampling, histograms) instead of a
+Python loop over sample rows per widget. Parsed values, labels and dates are
+cached per column, so generation cost no longer scales with widgets x rows.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# A column is numeric when more than this share of its values parse as numbers
+NUMERIC_THRESHOLD = 0.7
+
+# ... and a date column when this share of its first few values parse as dates
+DATE_THRESHOLD = 0.6
+DATE_PROBE_ROWS = 5
+
+# Fields whose months become the time dropdown of every chart
+DATE_FIELDS = ("date", "created_at", "updated_at", "time", "period")
+
+# Series sizes, as the dashboard has always rendered them
+TOP_CATEGORIES = 12
+TOP_GROUPS = 15
+MAX_BUCKETS = 31
+DROPDOWN_ITEMS = 8
+HISTOGRAM_BINS = 10
+
+_TZ_ABBREVIATIONS = {" PST": "-08:00", " EST": "-05:00", " MST": "-07:00", " CST": "-06:00"}
+_MISSING_LABELS = {"", "null", "None", "nan", "NaT"}
+
+
+def flatten_records(records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten nested API values: lists become counts (and a truncated string), dicts a truncated string"""
+    flattened = []
+    for record in records:
+        flat = {}
+        for key, value in record.items():
+            if isinstance(value, list):
+                flat[key + "_count"] = len(value)
+                if key == "variants":
+                    # Keep the first variant price for product charts
+                    first = value[0] if value else None
+                    if isinstance(first, dict) and "price" in first:
+                        try:
+                            flat["first_variant_price"] = float(first["price"])
+                        except (TypeError, ValueError):
+                            pass
+                else:
+                    flat[key + "_string"] = str(value)[:200]
+            elif isinstance(value, dict):
+                flat[key + "_json"] = str(value)[:200]
+            else:
+                flat[key] = value
+        flattened.append(flat)
+    return flattened
+
+
+def _date_strings(series: pd.Series) -> pd.Series:
+    text = series.astype(str).str.strip()
+    for abbreviation, offset in _TZ_ABBREVIATIONS.items():
+        text = text.str.replace(abbreviation, offset, regex=False)
+    return text
+
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """UTC timestamps (NaT where unparseable); ISO-8601 first, mixed formats only if that fails"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(series, utc=True)
+    text = _date_strings(series.where(series.notna()))
+    parsed = pd.to_datetime(text, errors="coerce", utc=True, format="ISO8601")
+    if parsed.notna().sum() < series.notna().sum() * DATE_THRESHOLD:
+        parsed = pd.to_datetime(text, errors="coerce", utc=True, format="mixed")
+    return parsed
+
+
+def infer_column_types(df: pd.DataFrame) -> Tuple[List[str], List[str], List[str]]:
+    """
+    (numeric, categorical, date) column names. Numeric columns are converted in
+    place; date columns keep their raw values (see ChartFrame.dates).
+    """
+    numeric_columns, categorical_columns, date_columns = [], [], []
+    for col in df.columns:
+        col_data = df[col]
+        try:
+            numeric_values = pd.to_numeric(col_data, errors="coerce")
+            if len(col_data) and numeric_values.notna().sum() / len(col_data) > NUMERIC_THRESHOLD:
+                numeric_columns.append(col)
+                df[col] = numeric_values
+                continue
+        except (TypeError, ValueError):
+            pass
+
+        if col_data.dtype == "object":
+            probe = col_data.dropna().head(DATE_PROBE_ROWS)
+            try:
+                parsed = pd.to_datetime(_date_strings(probe), errors="coerce", utc=True, format="mixed")
+            except (TypeError, ValueError):
+                parsed = pd.Series(dtype="datetime64[ns, UTC]")
+            if len(probe) and parsed.notna().sum() >= len(probe) * DATE_THRESHOLD:
+                date_columns.append(col)
+                continue
+
+        categorical_columns.append(col)
+
+    # Charts need a measure: try harder on the first columns if nothing parsed as numeric
+    if not numeric_columns:
+        for col in df.columns[:3]:
+            col_data = df[col]
+            if col_data.dtype in ["int64", "float64"]:
+                numeric_columns.append(col)
+            elif col_data.dtype == "object":
+                cleaned = pd.to_numeric(col_data.astype(str).str.replace(r"[,$%]", "", regex=True), errors="coerce")
+                if cleaned.notna().sum() > len(col_data) * 0.5:
+                    numeric_columns.append(col)
+                    df[col] = cleaned
+                    if col in categorical_columns:
+                        categorical_columns.remove(col)
+                    logger.info(f" Force-converted column '{col}' to numeric")
+                    break
+
+    return numeric_columns, categorical_columns, date_columns
+
+
+def _point(name: str, value: float, count: int, color_index: int, measured: bool) -> Dict[str, Any]:
+    """One chart datum in the shape every MUI chart component reads"""
+    if not measured:
+        count = int(count)
+        return {
+            "name": name,
+            "value": count,
+            "count": count,
+            "desktop": count,
+            "mobile": max(1, int(count * 0.85)),
+            "visitors": count,
+            "browser": name,
+            "month": name,
+            "fill": f"hsl(var(--chart-{(color_index % 5) + 1}))",
+        }
+    value = round(float(value), 2)
+    return {
+        "name": name,
+        "value": value,
+        "count": int(count),
+        "desktop": value,
+        "mobile": round(value * 0.8, 2),
+        "visitors": value,
+        "browser": name,
+        "month": name,
+        "total": value,
+        "amount": value,
+        "fill": f"hsl(var(--chart-{(color_index % 5) + 1}))",
+    }
+
+
+class ChartFrame:
+    """Typed columns of one dashboard build, with per-column parse caches"""
+
+    def __init__(self, df: pd.DataFrame, numeric_columns: List[str], categorical_columns: List[str],
+                 date_columns: List[str]):
+        self.df = df
+        self.numeric_columns = numeric_columns
+        self.categorical_columns = categorical_columns
+        self.date_columns = date_columns
+        self._values: Dict[str, pd.Series] = {}
+        self._labels: Dict[str, pd.Series] = {}
+        self._dates: Dict[str, pd.Series] = {}
+        self._periods: Optional[List[str]] = None
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "ChartFrame":
+        df = pd.DataFrame(flatten_records(records))
+        numeric_columns, categorical_columns, date_columns = infer_column_types(df)
+        return cls(df, numeric_columns, categorical_columns, date_columns)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def values(self, column: str) -> pd.Series:
+        """Float values, with currency symbols and thousands separators stripped"""
+        if column not in self._values:
+            col = self.df[column]
+            if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+                values = col.astype(float)
+            else:
+                values = pd.to_numeric(col.astype(str).str.replace(r"[$,]", "", regex=True), errors="coerce")
+                values = values.where(col.notna())
+            self._values[column] = values
+        return self._values[column]
+
+    def labels(self, column: str) -> pd.Series:
+        """Stripped string labels; NaN where the value is missing or a null placeholder"""
+        if column not in self._labels:
+            col = self.df[column]
+            labels = col.astype(str).str.strip()
+            self._labels[column] = labels.where(col.notna() & ~labels.isin(_MISSING_LABELS))
+        return self._labels[column]
+
+    def dates(self, column: str) -> pd.Series:
+        if column not in self._dates:
+            self._dates[column] = parse_dates(self.df[column])
+        return self._dates[column]
+
+    def periods(self) -> List[str]:
+        """Sorted year-months present in any of the standard date fields"""
+        if self._periods is None:
+            months = set()
+            for field in DATE_FIELDS:
+                if field in self.df.columns:
+                    dates = self.dates(field).dropna()
+                    months.update(dates.dt.strftime("%Y-%m").unique())
+            self._periods = sorted(months)
+        return self._periods
+
+    def dropdown_options(self, name_key: str) -> List[Dict[str, str]]:
+        options = [{"value": "all", "label": "All Data"}]
+        periods = self.periods()
+        if len(periods) > 1:
+            for period in periods[-DROPDOWN_ITEMS:]:
+                label = pd.Timestamp(period + "-01").strftime("%B %Y")
+                options.append({"value": period, "label": label})
+            return options
+        if name_key in self.df.columns:
+            categories = np.sort(self.labels(name_key).dropna().unique())
+            if len(categories) > 1:
+                options.extend({"value": category, "label": category} for category in categories[:DROPDOWN_ITEMS])
+        return options
+
+    def _buckets(self, dates: pd.Series) -> Tuple[str, str]:
+        """Resample frequency and label format for the span of a date column"""
+        span = dates.max() - dates.min()
+        if span <= pd.Timedelta(days=62):
+            return "D", "%Y-%m-%d"
+        if span <= pd.Timedelta(days=366):
+            return "W", "%Y-%m-%d"
+        return "MS", "%b %Y"
+
+    def _time_points(self, name_key: str, data_key: str) -> List[Dict[str, Any]]:
+        dates = self.dates(name_key)
+        measured = data_key != "count"
+        values = self.values(data_key) if measured else pd.Series(1.0, index=dates.index)
+        mask = dates.notna() & values.notna()
+        if not mask.any():
+            return []
+        series = pd.Series(values[mask].to_numpy(), index=pd.DatetimeIndex(dates[mask]))
+        freq, label_format = self._buckets(series.index.to_series())
+        buckets = series.sort_index().resample(freq).agg(["sum", "count", "mean"]).tail(MAX_BUCKETS)
+        aggregate = buckets["mean"] if "price" in data_key.lower() else buckets["sum"]
+        labels = buckets.index.strftime(label_format)
+        return [
+            _point(label, value, count, i, measured)
+            for i, (label, value, count) in enumerate(zip(labels, aggregate.to_numpy(), buckets["count"].to_numpy()))
+        ]
+
+    def _histogram_points(self, name_key: str) -> List[Dict[str, Any]]:
+        values = self.values(name_key).dropna()
+        counts, edges = np.histogram(values.to_numpy(), bins=HISTOGRAM_BINS)
+        return [
+            _point(f"{edges[i]:,.2f} - {edges[i + 1]:,.2f}", count, count, i, False)
+            for i, count in enumerate(counts)
+        ]
+
+    def _group_points(self, name_key: str, data_key: str) -> List[Dict[str, Any]]:
+        labels = self.labels(name_key)
+        if data_key == "count":
+            counts = labels.value_counts().head(TOP_CATEGORIES)
+            return [_point(name, count, count, i, False) for i, (name, count) in enumerate(counts.items())]
+
+        values = self.values(data_key)
+        mask = labels.notna() & values.notna()
+        grouped = values[mask].groupby(labels[mask]).agg(["sum", "count", "mean"])
+        grouped = grouped.sort_values("sum", ascending=False).head(TOP_GROUPS)
+        # Prices are averaged; totals, amounts and everything else are summed
+        aggregate = grouped["mean"] if "price" in data_key.lower() else grouped["sum"]
+        return [
+            _point(name, value, count, i, True)
+            for i, (name, value, count) in enumerate(zip(grouped.index, aggregate.to_numpy(), grouped["count"].to_numpy()))
+        ]
+
+    def chart_points(self, name_key: str, data_key: str) -> List[Dict[str, Any]]:
+        """
+        Series for a (name column, measure column or "count") widget: time buckets
+        for date axes, a histogram for counts over a many-valued numeric axis,
+        otherwise top-N groups. Empty and non-positive points are dropped.
+        """
+        if name_key not in self.df.columns or (data_key != "count" and data_key not in self.df.columns):
+            return []
+        if name_key in self.date_columns:
+            points = self._time_points(name_key, data_key)
+        elif (data_key == "count" and name_key in self.numeric_columns
+              and self.values(name_key).nunique() > TOP_CATEGORIES):
+            points = self._histogram_points(name_key)
+        else:
+            points = self._group_points(name_key, data_key)
+        return [point for point in points if point["value"] > 0 and str(point["name"]).strip()]
+
+    def template_points(self, name_key: str, data_key: str, limit: int = TOP_GROUPS) -> List[Dict[str, Any]]:
+        """Compact {name, value} series for template charts, largest first"""
+        points = []
+        for point in self.chart_points(name_key, data_key)[:limit]:
+            item = {"name": str(point["name"])[:30], "value": point["value"], name_key: point["name"]}
+            if data_key != "count":
+                item[data_key] = point["value"]
+            points.append(item)
+        return sorted(points, key=lambda item: item["value"], reverse=True)
+
+
+def frame_for(data_analysis: Dict[str, Any]) -> Optional[ChartFrame]:
+    """
+    The build's frame; analyses that did not come from _analyze_real_client_data
+    get one from their sample rows, built once and kept on the analysis.
+    """
+    frame = data_analysis.get("chart_frame")
+    if frame is None:
+        sample_data = data_analysis.get("sample_data") or []
+        if not sample_data:
+            return None
+        frame = ChartFrame.from_records(sample_data)
+        data_analysis["chart_frame"] = frame
+    return frame if len(frame) else None
@@ -6,14 +6,66 @@ with date range and platform filtering. Each function handles a specific
 component type and returns appropriately formatted data.
 """
 
+import asyncio
+import contextvars
+import copy
+import functools
 import logging
 import json
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta, timezone
-from database import get_admin_client
+from database import get_admin_client, QUERY_TIMEOUT_SECONDS
+from request_deadline import DeadlineExceeded, check_deadline, run_blocking
 
 logger = logging.getLogger(__name__)
 
+# Results of platform-level queries and intermediates for the current batch
+# (see ComponentDataManager.batch); None outside a batch, where nothing is shared
+_batch_memo: contextvars.ContextVar[Optional[Dict[Any, Any]]] = contextvars.ContextVar("component_batch_memo", default=None)
+
+
+def _batch_key(method, args, kwargs) -> tuple:
+    return (method.__name__,) + args + tuple(sorted(kwargs.items()))
+
+
+def _batched(method=None, *, copy_result: bool = True):
+    """
+    Run an async method once per argument tuple inside a batch; concurrent
+    callers await the same task. Results are deep-copied per caller because the
+    component functions reshape the dicts they get back.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            memo = _batch_memo.get()
+            if memo is None:
+                return await method(self, *args, **kwargs)
+            key = _batch_key(method, args, kwargs)
+            task = memo.get(key)
+            if task is None:
+                task = asyncio.ensure_future(method(self, *args, **kwargs))
+                memo[key] = task
+            # One caller being cancelled must not cancel the shared task
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result) if copy_result else result
+        return wrapper
+    return decorate(method) if method is not None else decorate
+
+
+def _batched_sync(method):
+    """Synchronous counterpart of _batched for cheap-to-return values (counts, totals)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo = _batch_memo.get()
+        if memo is None:
+            return method(self, *args, **kwargs)
+        key = _batch_key(method, args, kwargs)
+        if key not in memo:
+            memo[key] = method(self, *args, **kwargs)
+        return memo[key]
+    return wrapper
+
 
 class ComponentDataManager:
     """Manages component-specific database queries for dashboard components"""
@@ -21,6 +73,37 @@ class ComponentDataManager:
     def __init__(self):
         pass
     
+    @asynccontextmanager
+    async def batch(self):
+        """
+        Scope for computing several components of one request together: each
+        platform-level query and intermediate (orders in range, daily units,
+        inventory levels, available inventory) runs once and is shared by every
+        component computed inside it.
+        """
+        memo: Dict[Any, Any] = {}
+        token = _batch_memo.set(memo)
+        try:
+            yield self
+        finally:
+            _batch_memo.reset(token)
+            for value in memo.values():
+                if isinstance(value, asyncio.Future) and not value.done():
+                    value.cancel()
+            logger.info(f" Component batch shared {len(memo)} query/intermediate results")
+    
+    @_batched(copy_result=False)
+    async def _fetch_orders(self, table_name: str, start_iso: Optional[str], end_iso: Optional[str]) -> List[Dict[str, Any]]:
+        """Orders created within [start, end]; sales, units sold and the historical comparison read the same window"""
+        query = get_admin_client().table(table_name).select("*")
+        if start_iso:
+            query = query.gte("created_at", start_iso)
+        if end_iso:
+            query = query.lte("created_at", end_iso)
+        response = await run_blocking(query.execute, timeout=QUERY_TIMEOUT_SECONDS)
+        # Order rows are only read, never modified, so batch callers share them
+        return response.data or []
+    
     def _get_table_names(self, client_id: str) -> Dict[str, str]:
         """Get organized table names for a client"""
         safe_client_id = client_id.replace('-', '_')
@@ -51,6 +134,7 @@ class ComponentDataManager:
                 logger.warning(f"Could not parse date: {date_str}")
                 return None
     
+    @_batched_sync
     def _get_available_inventory_for_platform(self, client_id: str, platform: str) -> int:
         """Get available inventory for a specific platform (total - outgoing/reserved)"""
         try:
@@ -87,6 +171,8 @@ class ComponentDataManager:
                 products = products_response.data or []
                 
                 for product in products:
+                    # One outgoing query per SKU - stop as soon as the request is gone
+                    check_deadline()
                     total_inventory = product.get('quantity', 0) or 0
                     sku = product.get('sku') or product.get('asin')
                     
@@ -99,6 +185,8 @@ class ComponentDataManager:
             logger.info(f" {platform.upper()} Available Inventory: {available_inventory} units")
             return available_inventory
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error calculating available inventory for {platform}: {e}")
             return 0
@@ -241,6 +329,8 @@ class ComponentDataManager:
             logger.info(f" Amazon SKU {sku} outgoing inventory: {outgoing} units from {len(orders)} unshipped orders")
             return outgoing
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error calculating Amazon outgoing for SKU {sku}: {e}")
             return 0
@@ -339,36 +429,22 @@ class ComponentDataManager:
             logger.info(f" Total sales data retrieved for {platform}")
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting total sales data: {str(e)}")
             return {"error": str(e)}
     
+    @_batched
     async def _get_platform_sales_data(self, table_name: str, platform: str, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
         """Get sales data for a specific platform"""
         try:
-            # Build query based on platform
-            db_client = get_admin_client()
-            query = db_client.table(table_name).select("*")
-            
-            # Add date filtering if provided
-            if start_date:
-                start_dt = self._parse_date(start_date)
-                if start_dt:
-                    if platform == "shopify":
-                        query = query.gte("created_at", start_dt.isoformat())
-                    elif platform == "amazon":
-                        query = query.gte("created_at", start_dt.isoformat())
-            
-            if end_date:
-                end_dt = self._parse_date(end_date)
-                if end_dt:
-                    if platform == "shopify":
-                        query = query.lte("created_at", end_dt.isoformat())
-                    elif platform == "amazon":
-                        query = query.lte("created_at", end_dt.isoformat())
-            
-            response = query.execute()
-            orders = response.data or []
+            # Date filtering if provided
+            start_dt = self._parse_date(start_date)
+            end_dt = self._parse_date(end_date)
+            orders = await self._fetch_orders(
+                table_name, start_dt.isoformat() if start_dt else None, end_dt.isoformat() if end_dt else None
+            )
             
             # Calculate sales metrics
             total_revenue = 0
@@ -378,6 +454,7 @@ class ComponentDataManager:
             total_units = 0
             
             for order in orders:
+                check_deadline()
                 #  NEW: Check if order should be counted based on fulfillment status
                 if self._is_order_fulfilled(order):
                     fulfilled_orders += 1
@@ -441,6 +518,8 @@ class ComponentDataManager:
                 }
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting {platform} sales data: {str(e)}")
             return {
@@ -449,6 +528,7 @@ class ComponentDataManager:
                 'error': str(e)
             }
     
+    @_batched
     async def _get_within_period_trend(self, table_name: str, platform: str, start_date: Optional[str], end_date: Optional[str], period_days: int) -> tuple[float, float]:
         """Get revenue for first half and second half of the selected period to calculate within-period growth"""
         try:
@@ -472,7 +552,7 @@ class ComponentDataManager:
             elif platform == "amazon":
                 first_half_query = first_half_query.gte("created_at", start_dt.isoformat()).lt("created_at", midpoint_dt.isoformat())
             
-            first_half_response = first_half_query.execute()
+            first_half_response = await run_blocking(first_half_query.execute, timeout=QUERY_TIMEOUT_SECONDS)
             first_half_orders = first_half_response.data or []
             
             # Get second half revenue (midpoint to end)
@@ -482,7 +562,7 @@ class ComponentDataManager:
             elif platform == "amazon":
                 second_half_query = second_half_query.gte("created_at", midpoint_dt.isoformat()).lte("created_at", end_dt.isoformat())
             
-            second_half_response = second_half_query.execute()
+            second_half_response = await run_blocking(second_half_query.execute, timeout=QUERY_TIMEOUT_SECONDS)
             second_half_orders = second_half_response.data or []
             
             # Calculate revenue for each half
@@ -498,10 +578,13 @@ class ComponentDataManager:
             
             return first_half_revenue, second_half_revenue
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting within-period trend: {str(e)}")
             return 0.0, 0.0
     
+    @_batched
     async def _get_platform_turnover_trend(self, client_id: str, platform: str, start_date: Optional[str], end_date: Optional[str], period_days: int) -> tuple[float, float]:
         """Get turnover rates for first half and second half of the selected period"""
         try:
@@ -550,10 +633,13 @@ class ComponentDataManager:
             
             return first_half_turnover, second_half_turnover
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting platform turnover trend: {str(e)}")
             return 0.0, 0.0
     
+    @_batched
     async def _get_combined_turnover_trend(self, client_id: str, start_date: Optional[str], end_date: Optional[str], period_days: int, combined_inventory: int) -> tuple[float, float]:
         """Get combined turnover rates for first half and second half of the selected period"""
         try:
@@ -595,6 +681,8 @@ class ComponentDataManager:
             
             return combined_first_half, combined_second_half
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting combined turnover trend: {str(e)}")
             return 0.0, 0.0
@@ -631,17 +719,20 @@ class ComponentDataManager:
             logger.info(f" Inventory levels data retrieved for {platform}")
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting inventory levels data: {str(e)}")
             return {"error": str(e)}
     
+    @_batched
     async def _get_platform_inventory_levels(self, table_name: str, platform: str, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
         """Calculate inventory levels: inventory_at_start_date - cumulative units sold since start date"""
         try:
             db_client = get_admin_client()
             
             # Get current products
-            products_response = db_client.table(table_name).select("*").execute()
+            products_response = await run_blocking(db_client.table(table_name).select("*").execute, timeout=QUERY_TIMEOUT_SECONDS)
             products = products_response.data or []
             
             #  CRITICAL: If no products exist, return empty inventory levels immediately
@@ -718,7 +809,7 @@ class ComponentDataManager:
             orders_query = orders_query.gte("created_at", start_dt.isoformat())
             orders_query = orders_query.lte("created_at", now.isoformat())
             
-            orders_response = orders_query.execute()
+            orders_response = await run_blocking(orders_query.execute, timeout=QUERY_TIMEOUT_SECONDS)
             all_orders_since_start = orders_response.data or []
             
             logger.info(f" INVENTORY CALCULATION (NEW LOGIC):")
@@ -846,6 +937,7 @@ class ComponentDataManager:
             period_orders_processed = 0
             
             for order in all_orders_since_start:
+                check_deadline()
                 order_date = self._parse_date(order.get('created_at', ''))
                 if order_date and start_dt <= order_date <= end_dt:
                     date_key = order_date.strftime('%Y-%m-%d')
@@ -931,6 +1023,8 @@ class ComponentDataManager:
                 }
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting {platform} inventory levels: {str(e)}")
             return {
@@ -979,6 +1073,8 @@ class ComponentDataManager:
                 'combined': True
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error combining inventory timelines: {str(e)}")
             return {
@@ -1215,6 +1311,8 @@ class ComponentDataManager:
             logger.info(f" Inventory turnover data calculated for {platform}")
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting inventory turnover data: {str(e)}")
             return {
@@ -1313,6 +1411,8 @@ class ComponentDataManager:
             logger.info(f" Days of stock data calculated for {platform}")
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting days of stock data: {str(e)}")
             return {"error": str(e)}
@@ -1371,34 +1471,27 @@ class ComponentDataManager:
             
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting units sold data: {str(e)}")
             return {"error": str(e)}
     
+    @_batched
     async def _get_platform_units_sold(self, table_name: str, platform: str, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
         """Get REAL units sold data using orders data with SAME date filtering as total sales"""
         try:
-            db_client = get_admin_client()
-            
-            # Build query with date filtering (IDENTICAL to total sales function)
-            query = db_client.table(table_name).select("*")
-            
-            # Add date filtering if provided (CONSISTENT with total sales)
-            if start_date:
-                start_dt = self._parse_date(start_date)
-                if start_dt:
-                    query = query.gte("created_at", start_dt.isoformat())
-                    logger.info(f" UNITS SOLD - Filtering orders >= {start_dt.isoformat()}")
-            
-            if end_date:
-                end_dt = self._parse_date(end_date)
-                if end_dt:
-                    query = query.lte("created_at", end_dt.isoformat())
-                    logger.info(f" UNITS SOLD - Filtering orders <= {end_dt.isoformat()}")
+            # Date filtering (IDENTICAL to total sales function - same orders window)
+            start_dt = self._parse_date(start_date)
+            end_dt = self._parse_date(end_date)
+            if start_dt:
+                logger.info(f" UNITS SOLD - Filtering orders >= {start_dt.isoformat()}")
+            if end_dt:
+                logger.info(f" UNITS SOLD - Filtering orders <= {end_dt.isoformat()}")
             
-            # Execute query with filters
-            orders_response = query.execute()
-            orders = orders_response.data or []
+            orders = await self._fetch_orders(
+                table_name, start_dt.isoformat() if start_dt else None, end_dt.isoformat() if end_dt else None
+            )
             
             logger.info(f" UNITS SOLD DEBUG - Platform: {platform}, Orders: {len(orders)}")
             
@@ -1492,6 +1585,8 @@ class ComponentDataManager:
                 }
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting {platform} units sold: {str(e)}")
             return {
@@ -1519,6 +1614,7 @@ class ComponentDataManager:
         
         # Since orders are already filtered by date at the database level, ALL orders should be in range
         for order in orders:
+            check_deadline()
             orders_processed += 1
             try:
                 # Parse order date
@@ -1737,10 +1833,13 @@ class ComponentDataManager:
             
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting historical comparison data: {str(e)}")
             return {"error": str(e)}
 
+    @_batched
     async def _get_platform_historical_comparison(self, table_name: str, platform: str, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
         """Get historical comparison data for a specific platform"""
         try:
@@ -1768,16 +1867,13 @@ class ComponentDataManager:
             logger.info(f"   Current: {start_dt.strftime('%Y-%m-%d')} to {end_dt.strftime('%Y-%m-%d')} ({period_length} days)")
             logger.info(f"   Previous: {previous_start_dt.strftime('%Y-%m-%d')} to {previous_end_dt.strftime('%Y-%m-%d')} ({period_length} days)")
             
-            # Get current period orders
-            current_query = db_client.table(table_name).select("*")
-            current_query = current_query.gte("created_at", start_dt.isoformat()).lte("created_at", end_dt.isoformat())
-            current_response = current_query.execute()
-            current_orders = current_response.data or []
+            # Get current period orders (same window as sales and units sold)
+            current_orders = await self._fetch_orders(table_name, start_dt.isoformat(), end_dt.isoformat())
             
             # Get previous period orders
             previous_query = db_client.table(table_name).select("*")
             previous_query = previous_query.gte("created_at", previous_start_dt.isoformat()).lte("created_at", previous_end_dt.isoformat())
-            previous_response = previous_query.execute()
+            previous_response = await run_blocking(previous_query.execute, timeout=QUERY_TIMEOUT_SECONDS)
             previous_orders = previous_response.data or []
             
             logger.info(f" ORDERS FOUND:")
@@ -1850,6 +1946,8 @@ class ComponentDataManager:
                 }
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f" Error getting {platform} historical comparison: {str(e)}")
             return {
@@ -1860,5 +1958,38 @@ class ComponentDataManager:
             }
 
 
+    async def get_platform_components(self, client_id: str, platform: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run each platform-level calculation once for a single platform.
+        The results are the inputs of a PlatformPartial; merging partials gives the
+        combined view without querying either platform a second time.
+        """
+        tables = self._get_table_names(client_id)
+        orders_table = tables[f'{platform}_orders']
+        products_table = tables[f'{platform}_products']
+        
+        sales, inventory_levels, units_sold, historical_comparison = await asyncio.gather(
+            self._get_platform_sales_data(orders_table, platform, start_date, end_date),
+            self._get_platform_inventory_levels(products_table, platform, start_date, end_date),
+            self._get_platform_units_sold(orders_table, platform, start_date, end_date),
+            self._get_platform_historical_comparison(orders_table, platform, start_date, end_date),
+            return_exceptions=True
+        )
+        
+        components = {
+            'sales': sales,
+            'inventory_levels': inventory_levels,
+            'units_sold': units_sold,
+            'historical_comparison': historical_comparison,
+            'available_inventory': self._get_available_inventory_for_platform(client_id, platform)
+        }
+        for name, value in list(components.items()):
+            if isinstance(value, Exception):
+                logger.error(f" {platform} {name} calculation failed: {value}")
+                components[name] = {}
+        
+        logger.info(f" Platform components calculated for {client_id} - {platform}")
+        return components
+
 # Global instance
 component_data_manager = ComponentDataManager()
\ No newline at end of file
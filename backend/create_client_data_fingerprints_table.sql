@@ -0,0 +1,35 @@
+-- Client Data Fingerprints - per-day bucket hashes of client_data, maintained at ingest
+-- A bucket holds the row count and the sum (mod 2^256) of the SHA-256 of every row
+-- created that day, so inserts, updates and deletes adjust it without rereading the
+-- bucket, and the dataset fingerprint is a hash over the (few) bucket rows.
+-- Run this in your Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS client_data_fingerprints (
+    client_id uuid NOT NULL,
+    bucket varchar(20) NOT NULL,              -- UTC day of client_data.created_at, e.g. "2025-01-31"
+    row_count bigint NOT NULL DEFAULT 0,
+    digest numeric(78, 0) NOT NULL DEFAULT 0, -- sum of row hashes mod 2^256
+    updated_at timestamptz DEFAULT now(),
+    PRIMARY KEY (client_id, bucket)
+);
+
+-- Apply bucket deltas atomically, so concurrent ingests for one client cannot lose updates
+-- p_deltas: [{"bucket": "2025-01-31", "row_count": 3, "digest": "1234..."}]
+CREATE OR REPLACE FUNCTION apply_client_data_fingerprint(p_client_id uuid, p_deltas jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO client_data_fingerprints AS f (client_id, bucket, row_count, digest, updated_at)
+    SELECT p_client_id, d->>'bucket', (d->>'row_count')::bigint, (d->>'digest')::numeric, now()
+    FROM jsonb_array_elements(p_deltas) AS d
+    ON CONFLICT (client_id, bucket) DO UPDATE SET
+        row_count = f.row_count + EXCLUDED.row_count,
+        digest = mod(f.digest + EXCLUDED.digest, power(2::numeric, 256)),
+        updated_at = now();
+$$;
+
+-- Verify table creation
+SELECT
+    'Client data fingerprints table created successfully!' as status,
+    COUNT(*) as initial_record_count
+FROM client_data_fingerprints;
@@ -0,0 +1,38 @@
+-- SQL for incremental data organization
+-- Run this in your Supabase SQL Editor
+
+-- Watermarks: newest client_data.created_at already organized, per client and pipeline
+-- (data_organizer, populate_shopify_orders, populate_amazon_data, repopulate_shopify_products, ...)
+CREATE TABLE IF NOT EXISTS organization_watermarks (
+    id uuid DEFAULT gen_random_uuid() PRIMARY KEY,
+    client_id uuid NOT NULL,
+    pipeline varchar(100) NOT NULL,
+    last_created_at timestamptz NOT NULL,
+    rows_processed integer DEFAULT 0,
+    updated_at timestamptz DEFAULT now(),
+    UNIQUE(client_id, pipeline)
+);
+
+-- Incremental fetches filter client_data by created_at per client and keyset-page
+-- it on (created_at, id)
+DROP INDEX IF EXISTS "idx_client_data_client_id_created_at";
+CREATE INDEX IF NOT EXISTS "idx_client_data_client_id_created_at_id"
+ON client_data (client_id, created_at, id);
+
+-- Natural keys used as upsert conflict targets.
+-- Orders (order_id), incoming inventory (shipment_id) and variants (variant_id)
+-- are already UNIQUE; products need a unique index on their natural key.
+-- Remove duplicate rows left by earlier full reloads before creating these.
+
+-- Shopify products are stored one row per variant
+CREATE UNIQUE INDEX IF NOT EXISTS "uq_3b619a14_3cd8_49fa_9c24_d8df5e54c452_shopify_products_variant_id"
+ON "3b619a14_3cd8_49fa_9c24_d8df5e54c452_shopify_products" (variant_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS "uq_6ee35b37_57af_4b70_bc62_1eddf1d0fd15_amazon_products_asin"
+ON "6ee35b37_57af_4b70_bc62_1eddf1d0fd15_amazon_products" (asin);
+
+-- Verify table creation
+SELECT
+    'Organization watermarks table created successfully!' as status,
+    COUNT(*) as initial_record_count
+FROM organization_watermarks;
@@ -0,0 +1,18 @@
+-- Refresh Checkpoints Table - per tenant/platform checkpoints of the nightly refresh crons
+-- analytics_refresh_cron and sku_analysis_cron record the data version each unit was
+-- built from and skip units whose version (data plus rolling windows) is unchanged.
+-- The crons run as separate processes, so checkpoints must outlive them.
+-- Run this in your Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS refresh_checkpoints (
+    key VARCHAR(255) PRIMARY KEY,             -- "<job>:<client_id>:<platform>", e.g. "nightly_analytics:<uuid>:shopify"
+    value TEXT NOT NULL,                      -- data version the unit was last built from
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Verify table creation
+SELECT
+    'Refresh checkpoints table created successfully!' as status,
+    COUNT(*) as initial_record_count
+FROM refresh_checkpoints;
@@ -0,0 +1,17 @@
+-- Scheduler Leases Table - leader election for the internal scheduler
+-- Every gunicorn worker (and every instance) starts the scheduler; only the process
+-- holding the unexpired lease row runs the scheduled jobs.
+-- Run this in your Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name VARCHAR(100) PRIMARY KEY,            -- one row per leader role, e.g. "internal_scheduler"
+    holder VARCHAR(255) NOT NULL,             -- "<hostname>:<pid>" of the current leader
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    renewed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Verify table creation
+SELECT
+    'Scheduler leases table created successfully!' as status,
+    COUNT(*) as initial_record_count
+FROM scheduler_leases;
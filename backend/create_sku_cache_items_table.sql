@@ -0,0 +1,38 @@
+-- SKU Cache Items Table - one row per cached SKU
+-- Lets /api/dashboard/sku-inventory page, sort, filter and search in the database
+-- instead of downloading the whole cached SKU list for every page.
+-- Run this in your Supabase SQL Editor AFTER create_sku_cache_table.sql
+
+CREATE TABLE IF NOT EXISTS sku_cache_items (
+    id BIGSERIAL PRIMARY KEY,
+    cache_key VARCHAR(255) NOT NULL,          -- "<client_id>_<platform>", same as sku_cache.client_id
+    generation BIGINT NOT NULL,               -- matches the generation in the sku_cache header row
+    position INTEGER NOT NULL,                -- original order from the analyzer
+    sku_code TEXT NOT NULL DEFAULT '',
+    item_name TEXT NOT NULL DEFAULT '',
+    sku_code_lower TEXT GENERATED ALWAYS AS (lower(sku_code)) STORED,   -- search columns (see below)
+    item_name_lower TEXT GENERATED ALWAYS AS (lower(item_name)) STORED,
+    current_availability NUMERIC NOT NULL DEFAULT 0,
+    total_value NUMERIC NOT NULL DEFAULT 0,
+    velocity NUMERIC NOT NULL DEFAULT 0,      -- units sold (or outgoing units when sales are unknown)
+    stock_status VARCHAR(20) NOT NULL,        -- out_of_stock / low_stock / in_stock / overstock
+    data JSONB NOT NULL,                      -- the full SKU record returned to the frontend
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Every query is scoped to (cache_key, generation); the trailing column serves the sort
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_position ON sku_cache_items(cache_key, generation, position);
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_availability ON sku_cache_items(cache_key, generation, current_availability);
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_value ON sku_cache_items(cache_key, generation, total_value);
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_velocity ON sku_cache_items(cache_key, generation, velocity);
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_status ON sku_cache_items(cache_key, generation, stock_status, position);
+
+-- Case-insensitive prefix search on SKU code and title. PostgREST can only filter on
+-- columns, not on lower(...) expressions, and ilike cannot use a btree index, so the
+-- app searches the lowercased columns with `like 'term%'` - served by text_pattern_ops
+ALTER TABLE sku_cache_items ADD COLUMN IF NOT EXISTS sku_code_lower TEXT GENERATED ALWAYS AS (lower(sku_code)) STORED;
+ALTER TABLE sku_cache_items ADD COLUMN IF NOT EXISTS item_name_lower TEXT GENERATED ALWAYS AS (lower(item_name)) STORED;
+DROP INDEX IF EXISTS idx_sku_cache_items_sku_prefix;
+DROP INDEX IF EXISTS idx_sku_cache_items_name_prefix;
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_sku_prefix ON sku_cache_items(cache_key, generation, sku_code_lower text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_sku_cache_items_name_prefix ON sku_cache_items(cache_key, generation, item_name_lower text_pattern_ops);
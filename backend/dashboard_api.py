@@ -89,7 +89,7 @@ def analyze_data():
             return jsonify({"error": "No data provided or data is empty"}), 400
         
         # Perform AI analysis
-        analysis = orchestrator.analyze_data_pattern(df)
+        analysis = orchestrator.analyze_data_pattern_sync(df)
         
         # Generate insights summary
         insights_summary = orchestrator.generate_insights_summary(analysis)
@@ -348,7 +348,7 @@ def get_specific_insights(insight_type):
             return jsonify({"error": "Data is empty"}), 400
         
         # Perform full analysis first
-        analysis = orchestrator.analyze_data_pattern(df)
+        analysis = orchestrator.analyze_data_pattern_sync(df)
         
         # Extract specific insight type
         if insight_type == 'trends':
@@ -7,14 +7,26 @@ All data retrieved via direct SQL queries from organized client tables
 import logging
 import json
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 import pandas as pd
-from database import get_admin_client
+from database import get_admin_client, QUERY_TIMEOUT_SECONDS
 from component_data_functions import ComponentDataManager
+from platform_aggregates import PlatformPartial
+from request_deadline import call_timeout, run_blocking
 
 logger = logging.getLogger(__name__)
 
+SKU_INVENTORY_RECOMMENDATIONS = [
+    "Use /api/dashboard/sku-inventory for detailed SKU data with pagination",
+    "SKU data separated for optimal performance with large datasets",
+    "Enable caching for faster subsequent requests"
+]
+
+# Dashboard sections and the partial (stock or metrics) each one is rendered from
+STOCK_SECTIONS = ("alerts_summary", "sku_inventory", "data_summary")
+METRICS_SECTIONS = ("sales_kpis", "trend_analysis")
+
 class DashboardInventoryAnalyzer:
     """Dashboard-focused inventory analyzer with specific KPIs and data structures"""
     
@@ -32,6 +44,73 @@ class DashboardInventoryAnalyzer:
                 raise Exception("No admin database client available")
         return self.admin_client
 
+    async def get_data_version(self, client_id: str, platform: str = "shopify") -> Optional[str]:
+        """Cheap change marker for a client's organized data: the newest order and product
+        timestamps of each platform. None when it cannot be read, so callers rebuild."""
+        platforms = [platform.lower()] if platform.lower() in ("shopify", "amazon") else ["shopify", "amazon"]
+        table_prefix = client_id.replace('-', '_')
+        probes = []
+        for name in platforms:
+            probes.append((f"{table_prefix}_{name}_orders", "created_at"))
+            # Shopify products are upserted in place; Amazon products only carry created_at
+            probes.append((f"{table_prefix}_{name}_products", "updated_at" if name == "shopify" else "created_at"))
+
+        try:
+            admin_client = self._ensure_client()
+            stamps = []
+            for table, column in probes:
+                query = admin_client.table(table).select(column).order(column, desc=True, nullsfirst=False).limit(1)
+                response = await run_blocking(query.execute, timeout=QUERY_TIMEOUT_SECONDS)
+                stamps.append(str(response.data[0].get(column)) if response.data else "-")
+            return "|".join(stamps)
+        except Exception as e:
+            logger.warning(f" Could not read data version for {client_id} ({platform}): {e}")
+            return None
+
+    def rolling_windows(self) -> List[Tuple[str, str]]:
+        """[start, end] order windows the analytics read as of now: the KPI window, its
+        previous-period comparison and the two weeks behind the spike/slowdown alerts"""
+        start_date, end_date = self._analysis_window()
+        # component_data_functions reads both dates as UTC midnight
+        start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        previous_end = start - timedelta(days=1)
+        previous_start = previous_end - timedelta(days=(end - start).days)
+        now = datetime.now()
+        return [
+            (start.isoformat(), end.isoformat()),
+            (previous_start.isoformat(), previous_end.isoformat()),
+            ((now - timedelta(days=7)).isoformat(), now.isoformat()),
+            ((now - timedelta(days=14)).isoformat(), (now - timedelta(days=7)).isoformat()),
+        ]
+
+    async def get_window_signature(self, client_id: str, platform: str = "shopify") -> Optional[str]:
+        """Which orders each rolling window holds right now, as count plus oldest created_at.
+        With the data version unchanged the orders are fixed, so equal signatures mean equal
+        window contents even though the windows moved. None when it cannot be read."""
+        platforms = [platform.lower()] if platform.lower() in ("shopify", "amazon") else ["shopify", "amazon"]
+        table_prefix = client_id.replace('-', '_')
+        try:
+            admin_client = self._ensure_client()
+            parts = []
+            for name in platforms:
+                for start, end in self.rolling_windows():
+                    query = (
+                        admin_client.table(f"{table_prefix}_{name}_orders")
+                        .select("created_at", count="exact")
+                        .gte("created_at", start)
+                        .lte("created_at", end)
+                        .order("created_at")
+                        .limit(1)
+                    )
+                    response = await run_blocking(query.execute, timeout=QUERY_TIMEOUT_SECONDS)
+                    oldest = response.data[0].get("created_at") if response.data else "-"
+                    parts.append(f"{response.count or 0}@{oldest}")
+            return "|".join(parts)
+        except Exception as e:
+            logger.warning(f" Could not read rolling windows for {client_id} ({platform}): {e}")
+            return None
+
     async def get_dashboard_inventory_analytics(self, client_id: str, platform: str = "shopify", start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """Get complete dashboard inventory analytics"""
         try:
@@ -45,99 +124,36 @@ class DashboardInventoryAnalyzer:
                 return await self._get_multi_platform_analytics(client_id, start_date, end_date)
             
             # Get data sources based on platform selection
-            if platform.lower() == "shopify":
-                shopify_data = await self._get_shopify_data(client_id)
-                amazon_data = {"products": [], "orders": []}  # Empty Amazon data
-            elif platform.lower() == "amazon":
-                amazon_data = await self._get_amazon_data(client_id)
-                shopify_data = {"products": [], "orders": []}  # Empty Shopify data
+            if platform.lower() in ("shopify", "amazon"):
+                platforms = [platform.lower()]
             else:
                 # For backward compatibility, get both if platform is invalid
-                shopify_data = await self._get_shopify_data(client_id)
-                amazon_data = await self._get_amazon_data(client_id)
+                platforms = ["shopify", "amazon"]
             
-            #  PARALLEL CALCULATIONS - ALL AT ONCE, NO WAITING!
-            logger.info(f" Running ALL calculations in parallel for {client_id} ({platform})")
+            # Each platform is reduced once; several platforms are merged, not recomputed
+            window_start, window_end = self._analysis_window()
+            # Fast-path budget, never longer than what is left of the request's deadline
+            partials = await self._get_platform_partials(client_id, platforms, window_start, window_end, timeout=call_timeout(3.0))
+            partial = PlatformPartial.merge_all(partials.values(), partials[platforms[0]].period_days)
             
-            #  ULTRA-FAST PARALLEL CALCULATIONS - ALL AT ONCE!
-            logger.info(f" TURBO MODE: Running all calculations in parallel for {client_id} ({platform})")
+            view = self._platform_view(client_id, partial, window_start, window_end)
+            summary_stats = view["sku_inventory"]["summary_stats"]
             
-            # Run ALL calculations simultaneously with timeout - NO WAITING!
-            kpis_task = asyncio.create_task(self._get_kpi_charts(client_id, shopify_data, amazon_data))
-            trends_task = asyncio.create_task(self._get_trend_visualizations(client_id, shopify_data, amazon_data))
-            alerts_task = asyncio.create_task(self._get_alerts_summary(client_id, shopify_data, amazon_data))
-            
-            # Wait for all calculations with 3 second timeout - NO WAITING!
-            try:
-                sales_kpis, trend_analysis, alerts_summary = await asyncio.wait_for(
-                    asyncio.gather(kpis_task, trends_task, alerts_task, return_exceptions=True),
-                    timeout=3.0
-                )
-                logger.info(f" TURBO COMPLETE: All calculations finished in <3s for {client_id}")
-            except asyncio.TimeoutError:
-                logger.warning(f" Calculations timeout after 3s, using partial results")
-                # Get whatever completed - NO WAITING!
-                sales_kpis = kpis_task.result() if kpis_task.done() else {}
-                trend_analysis = trends_task.result() if trends_task.done() else {}
-                alerts_summary = alerts_task.result() if alerts_task.done() else {}
-            
-            # Handle any exceptions from parallel execution
-            if isinstance(sales_kpis, Exception):
-                logger.error(f" KPIs calculation failed: {sales_kpis}")
-                sales_kpis = {}
-            if isinstance(trend_analysis, Exception):
-                logger.error(f" Trends calculation failed: {trend_analysis}")
-                trend_analysis = {}
-            if isinstance(alerts_summary, Exception):
-                logger.error(f" Alerts calculation failed: {alerts_summary}")
-                alerts_summary = {}
-            
-            logger.info(f" ALL calculations completed in parallel for {client_id} ({platform})")
-            
-            #  CALCULATE REAL INVENTORY METRICS - NO MORE HARDCODED ZEROS!
-            total_inventory_value = self._calculate_total_inventory_value(shopify_data, amazon_data)
-            total_skus = len([p for p in shopify_data.get('products', []) if p.get('sku')]) + len([p for p in amazon_data.get('products', []) if p.get('sku')])
-            
-            # Get real counts from alerts calculation
-            low_stock_count = alerts_summary.get('summary_counts', {}).get('low_stock_alerts', 0)
-            overstock_count = alerts_summary.get('summary_counts', {}).get('overstock_alerts', 0)
-            out_of_stock_count = self._calculate_out_of_stock_count(shopify_data, amazon_data)
-            
-            logger.info(f" REAL VALUES: SKUs: {total_skus}, Inventory Value: ${total_inventory_value}, Low Stock: {low_stock_count}, Out of Stock: {out_of_stock_count}")
+            logger.info(f" REAL VALUES: SKUs: {summary_stats['total_skus']}, Inventory Value: ${summary_stats['total_inventory_value']}, Low Stock: {summary_stats['low_stock_count']}, Out of Stock: {summary_stats['out_of_stock_count']}")
             
             analytics = {
                 "success": True,
                 "timestamp": datetime.now().isoformat(),
                 "client_id": client_id,
-                "sales_kpis": sales_kpis,
-                "trend_analysis": trend_analysis,
-                "alerts_summary": alerts_summary,
-                "data_summary": {
-                    "platform": platform,
-                    "total_records": len(shopify_data.get('products', [])) + len(amazon_data.get('products', [])) + len(shopify_data.get('orders', [])) + len(amazon_data.get('orders', [])),
-                    "total_skus": total_skus,
-                    "analysis_period": "30_days", 
-                    "data_completeness": 100,
-                    "shopify_products": len(shopify_data.get('products', [])),
-                    "shopify_orders": len(shopify_data.get('orders', [])),
-                    "amazon_products": len(amazon_data.get('products', [])),
-                    "amazon_orders": len(amazon_data.get('orders', []))
-                },
+                "sales_kpis": view["sales_kpis"],
+                "trend_analysis": view["trend_analysis"],
+                "alerts_summary": view["alerts_summary"],
+                "data_summary": self._data_summary(platform, partials),
                 "sku_inventory": {
                     "skus": [],  # Empty - use dedicated endpoint for SKU data
-                    "summary_stats": {
-                        "total_skus": total_skus,
-                        "total_inventory_value": total_inventory_value,
-                        "low_stock_count": low_stock_count,
-                        "out_of_stock_count": out_of_stock_count,
-                        "overstock_count": overstock_count
-                    }
+                    "summary_stats": summary_stats
                 },
-                "recommendations": [
-                    "Use /api/dashboard/sku-inventory for detailed SKU data with pagination",
-                    "SKU data separated for optimal performance with large datasets",
-                    "Enable caching for faster subsequent requests"
-                ]
+                "recommendations": SKU_INVENTORY_RECOMMENDATIONS
             }
             
             logger.info(f"Dashboard inventory analytics completed for client {client_id}")
@@ -153,67 +169,24 @@ class DashboardInventoryAnalyzer:
             }
     
     async def _get_multi_platform_analytics(self, client_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
-        """Get analytics for both Shopify and Amazon platforms separately"""
+        """Get analytics for both Shopify and Amazon platforms separately, plus their merge"""
         try:
             logger.info(f" Getting SEPARATE analytics for both platforms: {client_id}")
             
-            # Get both platform data in parallel
-            shopify_data_task = asyncio.create_task(self._get_shopify_data(client_id))
-            amazon_data_task = asyncio.create_task(self._get_amazon_data(client_id))
-            
-            shopify_data, amazon_data = await asyncio.gather(shopify_data_task, amazon_data_task)
-            
-            # Calculate analytics for Shopify only
-            shopify_kpis_task = asyncio.create_task(self._get_kpi_charts(client_id, shopify_data, {"products": [], "orders": []}))
-            shopify_trends_task = asyncio.create_task(self._get_trend_visualizations(client_id, shopify_data, {"products": [], "orders": []}))
-            shopify_alerts_task = asyncio.create_task(self._get_alerts_summary(client_id, shopify_data, {"products": [], "orders": []}))
+            # Compute each platform once; "combined" is the merge of the two partials
+            window_start, window_end = self._analysis_window()
+            partials = await self._get_platform_partials(client_id, ["shopify", "amazon"], window_start, window_end)
+            shopify_partial = partials["shopify"]
+            amazon_partial = partials["amazon"]
+            combined_partial = shopify_partial.merge(amazon_partial)
             
-            # Calculate analytics for Amazon only
-            amazon_kpis_task = asyncio.create_task(self._get_kpi_charts(client_id, {"products": [], "orders": []}, amazon_data))
-            amazon_trends_task = asyncio.create_task(self._get_trend_visualizations(client_id, {"products": [], "orders": []}, amazon_data))
-            amazon_alerts_task = asyncio.create_task(self._get_alerts_summary(client_id, {"products": [], "orders": []}, amazon_data))
+            shopify_view = self._platform_view(client_id, shopify_partial, window_start, window_end)
+            amazon_view = self._platform_view(client_id, amazon_partial, window_start, window_end)
+            combined_view = self._platform_view(client_id, combined_partial, window_start, window_end)
             
-            # Wait for all calculations
-            (shopify_kpis, shopify_trends, shopify_alerts, 
-             amazon_kpis, amazon_trends, amazon_alerts) = await asyncio.gather(
-                shopify_kpis_task, shopify_trends_task, shopify_alerts_task,
-                amazon_kpis_task, amazon_trends_task, amazon_alerts_task,
-                return_exceptions=True
-            )
-            
-            # Handle exceptions
-            def safe_result(result):
-                return result if not isinstance(result, Exception) else {}
-            
-            shopify_kpis = safe_result(shopify_kpis)
-            shopify_trends = safe_result(shopify_trends) 
-            shopify_alerts = safe_result(shopify_alerts)
-            amazon_kpis = safe_result(amazon_kpis)
-            amazon_trends = safe_result(amazon_trends)
-            amazon_alerts = safe_result(amazon_alerts)
-            
-            # Also calculate COMBINED analytics (Shopify + Amazon together)
-            combined_kpis_task = asyncio.create_task(self._get_kpi_charts(client_id, shopify_data, amazon_data))
-            combined_trends_task = asyncio.create_task(self._get_trend_visualizations(client_id, shopify_data, amazon_data))
-            combined_alerts_task = asyncio.create_task(self._get_alerts_summary(client_id, shopify_data, amazon_data))
-            
-            combined_kpis, combined_trends, combined_alerts = await asyncio.gather(
-                combined_kpis_task, combined_trends_task, combined_alerts_task,
-                return_exceptions=True
-            )
-            
-            combined_kpis = safe_result(combined_kpis)
-            combined_trends = safe_result(combined_trends) 
-            combined_alerts = safe_result(combined_alerts)
-            
-            #  CALCULATE REAL INVENTORY METRICS FOR MULTI-PLATFORM - NO MORE HARDCODED ZEROS!
-            shopify_inventory_value = self._calculate_total_inventory_value(shopify_data, {"products": [], "orders": []})
-            amazon_inventory_value = self._calculate_total_inventory_value({"products": [], "orders": []}, amazon_data)
-            combined_inventory_value = self._calculate_total_inventory_value(shopify_data, amazon_data)
-            
-            shopify_total_skus = len([p for p in shopify_data.get('products', []) if p.get('sku')])
-            amazon_total_skus = len([p for p in amazon_data.get('products', []) if p.get('sku')])
-            combined_total_skus = shopify_total_skus + amazon_total_skus
+            shopify_view["data_summary"] = self._view_data_summary("shopify", partials)
+            amazon_view["data_summary"] = self._view_data_summary("amazon", partials)
+            combined_view["data_summary"] = self._view_data_summary("combined", partials)
             
             logger.info(f" Multi-platform analytics completed for {client_id}")
             
@@ -223,70 +196,9 @@ class DashboardInventoryAnalyzer:
                 "client_id": client_id,
                 "platform": "all",
                 "platforms": {
-                    "shopify": {
-                        "sales_kpis": shopify_kpis,
-                        "trend_analysis": shopify_trends,
-                        "alerts_summary": shopify_alerts,
-                        "data_summary": {
-                            "platform": "shopify",
-                            "shopify_products": len(shopify_data.get('products', [])),
-                            "shopify_orders": len(shopify_data.get('orders', [])),
-                            "amazon_products": 0,
-                            "amazon_orders": 0
-                        },
-                        "sku_inventory": {
-                            "summary_stats": {
-                                "total_skus": shopify_total_skus,
-                                "total_inventory_value": shopify_inventory_value,
-                                "low_stock_count": shopify_alerts.get('summary_counts', {}).get('low_stock_alerts', 0),
-                                "out_of_stock_count": self._calculate_out_of_stock_count(shopify_data, {"products": [], "orders": []}),
-                                "overstock_count": shopify_alerts.get('summary_counts', {}).get('overstock_alerts', 0)
-                            }
-                        }
-                    },
-                    "amazon": {
-                        "sales_kpis": amazon_kpis,
-                        "trend_analysis": amazon_trends,
-                        "alerts_summary": amazon_alerts,
-                        "data_summary": {
-                            "platform": "amazon",
-                            "shopify_products": 0,
-                            "shopify_orders": 0,
-                            "amazon_orders": len(amazon_data.get('orders', [])),
-                            "amazon_products": len(amazon_data.get('products', [])),
-                        },
-                        "sku_inventory": {
-                            "summary_stats": {
-                                "total_skus": amazon_total_skus,
-                                "total_inventory_value": amazon_inventory_value,
-                                "low_stock_count": amazon_alerts.get('summary_counts', {}).get('low_stock_alerts', 0),
-                                "out_of_stock_count": self._calculate_out_of_stock_count({"products": [], "orders": []}, amazon_data),
-                                "overstock_count": amazon_alerts.get('summary_counts', {}).get('overstock_alerts', 0)
-                            }
-                        }
-                    },
-                    "combined": {
-                        "sales_kpis": combined_kpis,
-                        "trend_analysis": combined_trends,
-                        "alerts_summary": combined_alerts,
-                        "data_summary": {
-                            "platform": "combined",
-                            "shopify_products": len(shopify_data.get('products', [])),
-                            "shopify_orders": len(shopify_data.get('orders', [])),
-                            "amazon_orders": len(amazon_data.get('orders', [])),
-                            "amazon_products": len(amazon_data.get('products', [])),
-                            "total_records": len(shopify_data.get('products', [])) + len(amazon_data.get('products', [])) + len(shopify_data.get('orders', [])) + len(amazon_data.get('orders', []))
-                        },
-                        "sku_inventory": {
-                            "summary_stats": {
-                                "total_skus": combined_total_skus,
-                                "total_inventory_value": combined_inventory_value,
-                                "low_stock_count": combined_alerts.get('summary_counts', {}).get('low_stock_alerts', 0),
-                                "out_of_stock_count": self._calculate_out_of_stock_count(shopify_data, amazon_data),
-                                "overstock_count": combined_alerts.get('summary_counts', {}).get('overstock_alerts', 0)
-                            }
-                        }
-                    }
+                    "shopify": shopify_view,
+                    "amazon": amazon_view,
+                    "combined": combined_view
                 },
                 "message": "Multi-platform analytics with separate Shopify, Amazon, and combined data"
             }
@@ -295,6 +207,233 @@ class DashboardInventoryAnalyzer:
             logger.error(f"Error getting multi-platform analytics: {e}")
             return {"success": False, "error": str(e)}
     
+    def _data_summary(self, platform: str, partials: Dict[str, PlatformPartial]) -> Dict[str, Any]:
+        """data_summary for a single-platform request (several platforms are summed)"""
+        shopify_partial = partials.get("shopify") or PlatformPartial(["shopify"])
+        amazon_partial = partials.get("amazon") or PlatformPartial(["amazon"])
+        return {
+            "platform": platform,
+            "total_records": sum(p.product_count + p.order_count for p in partials.values()),
+            "total_skus": sum(p.total_skus for p in partials.values()),
+            "analysis_period": "30_days", 
+            "data_completeness": 100,
+            "shopify_products": shopify_partial.product_count,
+            "shopify_orders": shopify_partial.order_count,
+            "amazon_products": amazon_partial.product_count,
+            "amazon_orders": amazon_partial.order_count
+        }
+    
+    def _view_data_summary(self, view: str, partials: Dict[str, PlatformPartial]) -> Dict[str, Any]:
+        """data_summary for the shopify, amazon or combined view of a platform=all request"""
+        shopify_partial = partials.get("shopify") if view in ("shopify", "combined") else None
+        amazon_partial = partials.get("amazon") if view in ("amazon", "combined") else None
+        shopify_partial = shopify_partial or PlatformPartial(["shopify"])
+        amazon_partial = amazon_partial or PlatformPartial(["amazon"])
+        summary = {
+            "platform": view,
+            "shopify_products": shopify_partial.product_count,
+            "shopify_orders": shopify_partial.order_count,
+            "amazon_orders": amazon_partial.order_count,
+            "amazon_products": amazon_partial.product_count
+        }
+        if view == "combined":
+            summary["total_records"] = sum(p.product_count + p.order_count for p in (shopify_partial, amazon_partial))
+        return summary
+    
+    async def stream_dashboard_inventory_analytics(self, client_id: str, platform: str = "shopify") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield dashboard sections as soon as the partials they depend on are ready.
+        Alerts and SKU summary come from the product/order fetch, KPIs and trends from
+        the component calculations, so the fast cards arrive without waiting on the slow
+        ones. There is no deadline: every section is sent, either with "data" or with
+        an "error". Events look like {"view", "section", "data"}; the last one is the
+        "complete" section carrying the assembled analytics (same shape as
+        get_dashboard_inventory_analytics).
+        """
+        self._ensure_client()
+        requested = platform.lower()
+        platforms = [requested] if requested in ("shopify", "amazon") else ["shopify", "amazon"]
+        if requested == "all":
+            views = {"shopify": ["shopify"], "amazon": ["amazon"], "combined": ["shopify", "amazon"]}
+        else:
+            views = {requested: platforms}
+        
+        window_start, window_end = self._analysis_window()
+        stage_functions = {"stock": self._get_platform_stock_partial, "metrics": self._get_platform_metrics_partial}
+        tasks = {
+            asyncio.create_task(function(client_id, name, window_start, window_end)): (stage, name)
+            for stage, function in stage_functions.items()
+            for name in platforms
+        }
+        results: Dict[Tuple[str, str], Any] = {}
+        
+        if requested == "all":
+            analytics = {
+                "success": True,
+                "timestamp": datetime.now().isoformat(),
+                "client_id": client_id,
+                "platform": "all",
+                "platforms": {view: {} for view in views},
+                "message": "Multi-platform analytics with separate Shopify, Amazon, and combined data"
+            }
+        else:
+            analytics = {
+                "success": True,
+                "timestamp": datetime.now().isoformat(),
+                "client_id": client_id,
+                "recommendations": SKU_INVENTORY_RECOMMENDATIONS
+            }
+        section_errors = []
+        
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage, name = tasks[task]
+                    results[(stage, name)] = task.exception() or task.result()
+                    if isinstance(results[(stage, name)], Exception):
+                        logger.error(f" {name} {stage} calculation failed: {results[(stage, name)]}")
+                    
+                    for view, view_platforms in views.items():
+                        # A view is ready once this stage has finished for all of its platforms
+                        if name not in view_platforms or any((stage, p) not in results for p in view_platforms):
+                            continue
+                        partials = {p: results[(stage, p)] for p in view_platforms}
+                        failure = next((r for r in partials.values() if isinstance(r, Exception)), None)
+                        if failure is not None:
+                            sections = STOCK_SECTIONS if stage == "stock" else METRICS_SECTIONS
+                            for section in sections:
+                                section_errors.append({"view": view, "section": section, "error": str(failure)})
+                                yield {"view": view, "section": section, "error": str(failure)}
+                            continue
+                        
+                        for section, data in self._render_stage(client_id, requested, view, stage, partials, window_start, window_end).items():
+                            if requested == "all":
+                                analytics["platforms"][view][section] = data
+                            else:
+                                analytics[section] = data
+                            yield {"view": view, "section": section, "data": data}
+        finally:
+            # Stop the remaining work if the client went away mid-stream
+            for task in pending:
+                task.cancel()
+        
+        if section_errors:
+            analytics["section_errors"] = section_errors
+        logger.info(f" Streamed dashboard inventory analytics for {client_id} ({platform}), {len(section_errors)} failed sections")
+        yield {"view": requested, "section": "complete", "data": analytics}
+    
+    def _render_stage(self, client_id: str, requested: str, view: str, stage: str, partials: Dict[str, PlatformPartial], start_date: str, end_date: str) -> Dict[str, Any]:
+        """Sections renderable from one stage's partials for one view"""
+        partial = PlatformPartial.merge_all(partials.values(), self._period_days(start_date, end_date))
+        if stage == "metrics":
+            return {
+                "sales_kpis": partial.sales_kpis(start_date, end_date),
+                "trend_analysis": partial.trend_analysis(start_date, end_date)
+            }
+        if requested == "all":
+            sku_inventory = {"summary_stats": partial.summary_stats()}
+            data_summary = self._view_data_summary(view, partials)
+        else:
+            sku_inventory = {"skus": [], "summary_stats": partial.summary_stats()}
+            data_summary = self._data_summary(requested, partials)
+        return {
+            "alerts_summary": partial.alerts_summary(client_id),
+            "sku_inventory": sku_inventory,
+            "data_summary": data_summary
+        }
+    
+    def _analysis_window(self) -> Tuple[str, str]:
+        """Last 30 days, as used by the component_data_functions KPIs"""
+        now = datetime.now()
+        thirty_days_ago = now - timedelta(days=30)
+        return thirty_days_ago.strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d")
+    
+    async def _get_platform_partials(self, client_id: str, platforms: List[str], start_date: str, end_date: str, timeout: Optional[float] = None) -> Dict[str, PlatformPartial]:
+        """Reduce each platform to partial aggregates in parallel; late or failed platforms come back empty"""
+        tasks = {
+            platform: asyncio.create_task(self._get_platform_partial(client_id, platform, start_date, end_date))
+            for platform in platforms
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        if pending:
+            logger.warning(f" Platform calculations timeout after {timeout}s, using partial results")
+            for task in pending:
+                task.cancel()
+        
+        partials = {}
+        for platform, task in tasks.items():
+            if task in done and task.exception() is None:
+                partials[platform] = task.result()
+            else:
+                if task in done:
+                    logger.error(f" {platform} calculation failed: {task.exception()}")
+                partials[platform] = PlatformPartial([platform])
+        return partials
+    
+    async def _get_platform_partial(self, client_id: str, platform: str, start_date: str, end_date: str) -> PlatformPartial:
+        """Run every KPI, trend and alert calculation for one platform exactly once"""
+        stock_partial, metrics_partial = await asyncio.gather(
+            self._get_platform_stock_partial(client_id, platform, start_date, end_date),
+            self._get_platform_metrics_partial(client_id, platform, start_date, end_date)
+        )
+        return stock_partial.merge(metrics_partial)
+    
+    def _period_days(self, start_date: str, end_date: str) -> int:
+        return (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days + 1
+    
+    async def _get_platform_metrics_partial(self, client_id: str, platform: str, start_date: str, end_date: str) -> PlatformPartial:
+        """Sales, turnover, stock-days and timeline aggregates (feeds sales_kpis and trend_analysis)"""
+        components = await self.component_data.get_platform_components(client_id, platform, start_date, end_date)
+        return PlatformPartial([platform], self._period_days(start_date, end_date)).add_components(components)
+    
+    async def _get_platform_stock_partial(self, client_id: str, platform: str, start_date: str, end_date: str) -> PlatformPartial:
+        """Product and order counts, inventory value and alerts (feeds alerts_summary and sku_inventory)"""
+        fetch_data = self._get_shopify_data if platform == "shopify" else self._get_amazon_data
+        platform_data = await fetch_data(client_id)
+        partial = PlatformPartial([platform], self._period_days(start_date, end_date))
+        
+        empty_data = {"products": [], "orders": []}
+        shopify_data, amazon_data = (platform_data, empty_data) if platform == "shopify" else (empty_data, platform_data)
+        products = platform_data.get('products', [])
+        orders = platform_data.get('orders', [])
+        
+        partial.product_count = len(products)
+        partial.order_count = len(orders)
+        partial.total_skus = len([p for p in products if p.get('sku')])
+        partial.inventory_value = self._calculate_total_inventory_value(shopify_data, amazon_data)
+        partial.out_of_stock_count = self._calculate_out_of_stock_count(shopify_data, amazon_data)
+        
+        # Stock alerts: low stock < 5, overstock > 100
+        for product in products:
+            if platform == "shopify":
+                quantity = product.get('inventory_quantity', 0) or 0
+                alert = {"sku": product.get('sku'), "item_name": product.get('title', 'Unknown Product')}
+            else:
+                quantity = product.get('quantity', 0) or 0
+                alert = {"sku": product.get('sku'), "asin": product.get('asin'), "item_name": product.get('title', 'Unknown Product')}
+            partial.add_stock_level(platform, quantity, alert)
+        
+        # Week-over-week revenue for the sales spike / slowdown alerts
+        now = datetime.now()
+        partial.recent_week_revenue = self._calculate_sales_for_period(orders, now - timedelta(days=7), now)['revenue']
+        partial.previous_week_revenue = self._calculate_sales_for_period(orders, now - timedelta(days=14), now - timedelta(days=7))['revenue']
+        
+        logger.info(f" {platform} partial aggregates ready: {partial.product_count} products, {partial.order_count} orders")
+        return partial
+    
+    def _platform_view(self, client_id: str, partial: PlatformPartial, start_date: str, end_date: str) -> Dict[str, Any]:
+        """Render KPIs, trends, alerts and summary stats from (possibly merged) partial aggregates"""
+        return {
+            "sales_kpis": partial.sales_kpis(start_date, end_date),
+            "trend_analysis": partial.trend_analysis(start_date, end_date),
+            "alerts_summary": partial.alerts_summary(client_id),
+            "sku_inventory": {
+                "summary_stats": partial.summary_stats()
+            }
+        }
+    
     async def _get_shopify_data(self, client_id: str) -> Dict[str, Any]:
         """ PARALLEL Shopify data fetch - NO WAITING!"""
         try:
@@ -309,9 +448,12 @@ class DashboardInventoryAnalyzer:
             #  RUN BOTH QUERIES IN PARALLEL - NO SEQUENTIAL WAITING!
             async def fetch_products():
                 try:
-                    response = admin_client.table(products_table).select(
-                        "sku,title,variant_title,inventory_quantity,price,option1,option2,variant_id"
-                    ).execute()
+                    response = await run_blocking(
+                        admin_client.table(products_table).select(
+                            "sku,title,variant_title,inventory_quantity,price,option1,option2,variant_id"
+                        ).execute,
+                        timeout=QUERY_TIMEOUT_SECONDS,
+                    )
                     return response.data if response.data else []
                 except Exception as e:
                     logger.info(f"Shopify products table not found or empty: {e}")
@@ -319,9 +461,12 @@ class DashboardInventoryAnalyzer:
             
             async def fetch_orders():
                 try:
-                    response = admin_client.table(orders_table).select(
-                        "order_id,total_price,created_at,line_items_count,financial_status,fulfillment_status,order_number,raw_data"
-                    ).execute()
+                    response = await run_blocking(
+                        admin_client.table(orders_table).select(
+                            "order_id,total_price,created_at,line_items_count,financial_status,fulfillment_status,order_number,raw_data"
+                        ).execute,
+                        timeout=QUERY_TIMEOUT_SECONDS,
+                    )
                     return response.data if response.data else []
                 except Exception as e:
                     logger.info(f"Shopify orders table not found or empty: {e}")
@@ -360,9 +505,12 @@ class DashboardInventoryAnalyzer:
             #  RUN BOTH QUERIES IN PARALLEL - NO SEQUENTIAL WAITING!
             async def fetch_orders():
                 try:
-                    response = admin_client.table(orders_table).select(
-                        "order_id,total_price,created_at,number_of_items_shipped,order_status,order_number"
-                    ).execute()
+                    response = await run_blocking(
+                        admin_client.table(orders_table).select(
+                            "order_id,total_price,created_at,number_of_items_shipped,order_status,order_number"
+                        ).execute,
+                        timeout=QUERY_TIMEOUT_SECONDS,
+                    )
                     return response.data if response.data else []
                 except Exception as e:
                     logger.info(f"Amazon orders table not found or empty: {e}")
@@ -370,9 +518,12 @@ class DashboardInventoryAnalyzer:
             
             async def fetch_products():
                 try:
-                    response = admin_client.table(products_table).select(
-                        "sku,asin,title,quantity,price,brand,status"
-                    ).execute()
+                    response = await run_blocking(
+                        admin_client.table(products_table).select(
+                            "sku,asin,title,quantity,price,brand,status"
+                        ).execute,
+                        timeout=QUERY_TIMEOUT_SECONDS,
+                    )
                     return response.data if response.data else []
                 except Exception as e:
                     logger.info(f"Amazon products table not found or empty: {e}")
@@ -775,94 +926,6 @@ class DashboardInventoryAnalyzer:
             return "HIGH"
         else:
             return "PREMIUM"
-    async def _get_kpi_charts(self, client_id: str, shopify_data: Dict, amazon_data: Dict) -> Dict[str, Any]:
-        """Get optimized KPI charts data using same calculations as component_data_functions"""
-        try:
-            logger.info(f" Using component_data_functions for consistent 30-day metrics for client {client_id}")
-            
-            # Use component_data_functions for consistent 30-day calculations
-            # Calculate 30-day date range  
-            now = datetime.now()
-            thirty_days_ago = now - timedelta(days=30)
-            start_date = thirty_days_ago.strftime("%Y-%m-%d")
-            end_date = now.strftime("%Y-%m-%d")
-            
-            # Get consistent metrics using component_data_functions
-            total_sales_task = asyncio.create_task(
-                self.component_data.get_total_sales_data(client_id, "combined", start_date, end_date)
-            )
-            inventory_turnover_task = asyncio.create_task(
-                self.component_data.get_inventory_turnover_data(client_id, "combined", start_date, end_date)
-            )
-            days_of_stock_task = asyncio.create_task(
-                self.component_data.get_days_of_stock_data(client_id, "combined", start_date, end_date)
-            )
-            units_sold_task = asyncio.create_task(
-                self.component_data.get_units_sold_data(client_id, "combined", start_date, end_date)
-            )
-            inventory_levels_task = asyncio.create_task(
-                self.component_data.get_inventory_levels_data(client_id, "combined", start_date, end_date)
-            )
-            
-            # Wait for all calculations to complete
-            total_sales_data, inventory_turnover_data, days_of_stock_data, units_sold_data, inventory_levels_data = await asyncio.gather(
-                total_sales_task, inventory_turnover_task, days_of_stock_task, units_sold_task, inventory_levels_task,
-                return_exceptions=True
-            )
-            
-            # Handle any exceptions from parallel execution
-            def safe_get_data(data, default={}):
-                return data if not isinstance(data, Exception) else default
-            
-            total_sales_data = safe_get_data(total_sales_data)
-            inventory_turnover_data = safe_get_data(inventory_turnover_data)
-            days_of_stock_data = safe_get_data(days_of_stock_data)
-            units_sold_data = safe_get_data(units_sold_data)
-            inventory_levels_data = safe_get_data(inventory_levels_data)
-            
-            # Extract the consistent 30-day metrics
-            combined_sales = total_sales_data.get('combined', {})
-            combined_turnover = inventory_turnover_data.get('combined', {})
-            combined_days_stock = days_of_stock_data.get('combined', {})
-            combined_units_sold = units_sold_data.get('combined', {})
-            combined_inventory = inventory_levels_data.get('combined', {})
-            
-            logger.info(f" Component data functions completed for consistent metrics")
-            
-            return {
-                "total_sales_30_days": {
-                    "revenue": combined_sales.get('total_revenue', 0),
-                    "units": combined_units_sold.get('total_units_sold_30d', 0),
-                    "orders": combined_sales.get('total_orders', 0)
-                },
-                "inventory_turnover_30_days": {
-                    "turnover_rate": combined_turnover.get('inventory_turnover_ratio', 0),
-                    "comparison": combined_turnover.get('turnover_comparison', {}),
-                    "avg_days_to_sell": combined_turnover.get('avg_days_to_sell', 999),
-                    "fast_moving_items": combined_turnover.get('fast_moving_items', 0)
-                },
-                "days_of_remaining_stock": {
-                    "avg_days_of_stock": combined_days_stock.get('avg_days_of_stock', 999),
-                    "daily_sales_velocity": combined_days_stock.get('daily_sales_velocity', 0),
-                    "current_inventory": combined_days_stock.get('current_inventory', 0),
-                    "low_stock_count": combined_days_stock.get('low_stock_count', 0),
-                    "out_of_stock_count": combined_days_stock.get('out_of_stock_count', 0),
-                    "overstock_count": combined_days_stock.get('overstock_count', 0)
-                },
-                "inventory_levels_chart": combined_inventory.get('inventory_levels_chart', []),
-                "units_sold_30_days": {
-                    "total_units_sold": combined_units_sold.get('total_units_sold_30d', 0),
-                    "units_sold_chart": combined_units_sold.get('units_sold_chart', []),
-                    "velocity_metrics": combined_units_sold.get('velocity_metrics', {})
-                },
-                "total_inventory_units": combined_inventory.get('current_total_inventory', 0),
-                "data_source": "component_data_functions",
-                "calculation_period": f"{start_date} to {end_date}"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error calculating KPI charts using component_data_functions: {e}")
-            return {"error": str(e)}
     
     def _calculate_available_inventory(self, shopify_data: Dict, amazon_data: Dict) -> int:
         """Calculate available (on-hand) inventory = total inventory - outgoing inventory"""
@@ -1077,72 +1140,6 @@ class DashboardInventoryAnalyzer:
         
         return total
     
-    async def _get_trend_visualizations(self, client_id: str, shopify_data: Dict, amazon_data: Dict) -> Dict[str, Any]:
-        """Get trend visualization data using component_data_functions for consistent calculations"""
-        try:
-            logger.info(f" Using component_data_functions for consistent trend analysis for client {client_id}")
-            
-            # Calculate 30-day date range  
-            now = datetime.now()
-            thirty_days_ago = now - timedelta(days=30)
-            start_date = thirty_days_ago.strftime("%Y-%m-%d")
-            end_date = now.strftime("%Y-%m-%d")
-            
-            # Get historical comparison using component_data_functions for consistency
-            historical_comparison_task = asyncio.create_task(
-                self.component_data.get_historical_comparison_data(client_id, "combined", start_date, end_date)
-            )
-            inventory_levels_task = asyncio.create_task(
-                self.component_data.get_inventory_levels_data(client_id, "combined", start_date, end_date)
-            )
-            units_sold_task = asyncio.create_task(
-                self.component_data.get_units_sold_data(client_id, "combined", start_date, end_date)
-            )
-            
-            # Wait for all trend calculations to complete
-            historical_comparison_data, inventory_levels_data, units_sold_data = await asyncio.gather(
-                historical_comparison_task, inventory_levels_task, units_sold_task,
-                return_exceptions=True
-            )
-            
-            # Handle any exceptions from parallel execution
-            def safe_get_data(data, default={}):
-                return data if not isinstance(data, Exception) else default
-            
-            historical_comparison_data = safe_get_data(historical_comparison_data)
-            inventory_levels_data = safe_get_data(inventory_levels_data)
-            units_sold_data = safe_get_data(units_sold_data)
-            
-            # Extract the consistent trend data
-            combined_historical = historical_comparison_data.get('combined', {})
-            combined_inventory = inventory_levels_data.get('combined', {})
-            combined_units_sold = units_sold_data.get('combined', {})
-            
-            logger.info(f" Component data functions completed for consistent trend analysis")
-            
-            return {
-                "inventory_levels_chart_30_days": combined_inventory.get('inventory_levels_chart', []),
-                "units_sold_chart_30_days": combined_units_sold.get('units_sold_chart', []),
-                "historical_comparison_30_days": {
-                    "current_period_revenue": combined_historical.get('current_period_revenue', 0),
-                    "previous_period_revenue": combined_historical.get('previous_period_revenue', 0),
-                    "revenue_change_percent": combined_historical.get('revenue_change_percent', 0),
-                    "current_period_units": combined_historical.get('current_period_units', 0),
-                    "previous_period_units": combined_historical.get('previous_period_units', 0),
-                    "units_change_percent": combined_historical.get('units_change_percent', 0),
-                    "current_period_orders": combined_historical.get('current_period_orders', 0),
-                    "previous_period_orders": combined_historical.get('previous_period_orders', 0),
-                    "orders_change_percent": combined_historical.get('orders_change_percent', 0)
-                },
-                "velocity_metrics_30_days": combined_units_sold.get('velocity_metrics', {}),
-                "data_source": "component_data_functions",
-                "calculation_period": f"{start_date} to {end_date}"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generating trend visualizations using component_data_functions: {e}")
-            return {"error": str(e)}
-    
     def _estimate_historical_inventory_levels(self, weekly_data: List[Dict], current_inventory: int, all_orders: List[Dict]) -> List[Dict]:
         """Estimate historical inventory levels based on sales data"""
         inventory_chart = []
@@ -1166,173 +1163,6 @@ class DashboardInventoryAnalyzer:
         
         return inventory_chart
     
-    async def _get_alerts_summary(self, client_id: str, shopify_data: Dict, amazon_data: Dict) -> Dict[str, Any]:
-        """Get comprehensive alerts summary with proper calculations"""
-        try:
-            logger.info(f"Generating alerts for client {client_id}")
-            
-            # Initialize counters
-            low_stock_count = 0
-            overstock_count = 0
-            low_stock_details = []
-            overstock_details = []
-            
-            # Process Shopify products for stock alerts
-            shopify_products = shopify_data.get('products', [])
-            for product in shopify_products:
-                inventory = product.get('inventory_quantity', 0) or 0
-                title = product.get('title', 'Unknown Product')
-                sku = product.get('sku')
-                
-                if inventory < 5:  #  CONSISTENT: Low stock threshold < 5 (as specified by user)
-                    low_stock_count += 1
-                    if len(low_stock_details) < 10:  # Show more details for low stock alerts
-                        severity = "critical" if inventory == 0 else "high" if inventory <= 2 else "medium"
-                        low_stock_details.append({
-                            "platform": "shopify",
-                            "sku": sku,
-                            "item_name": title,
-                            "current_stock": inventory,
-                            "severity": severity,
-                            "alert_type": "low_stock"
-                        })
-                elif inventory > 100:  #  CONSISTENT: Overstock threshold > 100 (as specified by user)
-                    overstock_count += 1
-                    if len(overstock_details) < 3:  # Keep first 3 for display
-                        overstock_details.append({
-                            "platform": "shopify",
-                            "sku": sku,
-                            "item_name": title,
-                            "current_stock": inventory,
-                            "severity": "medium",
-                            "alert_type": "overstock"
-                        })
-            
-            # Process Amazon products for stock alerts
-            amazon_products = amazon_data.get('products', [])
-            for product in amazon_products:
-                quantity = product.get('quantity', 0) or 0
-                title = product.get('title', 'Unknown Product')
-                sku = product.get('sku')
-                asin = product.get('asin')
-                
-                if quantity < 5:  #  CONSISTENT: Low stock threshold < 5 (as specified by user)
-                    low_stock_count += 1
-                    if len(low_stock_details) < 10:  # Show more details for low stock alerts
-                        severity = "critical" if quantity == 0 else "high" if quantity <= 2 else "medium"
-                        low_stock_details.append({
-                            "platform": "amazon",
-                            "sku": sku,
-                            "asin": asin,
-                            "item_name": title,
-                            "current_stock": quantity,
-                            "severity": severity,
-                            "alert_type": "low_stock"
-                        })
-                elif quantity > 100:  #  CONSISTENT: Overstock threshold > 100 (as specified by user)
-                    overstock_count += 1
-                    if len(overstock_details) < 3:  # Keep first 3 for display
-                        overstock_details.append({
-                            "platform": "amazon",
-                            "sku": sku,
-                            "asin": asin,
-                            "item_name": title,
-                            "current_stock": quantity,
-                            "severity": "medium",
-                            "alert_type": "overstock"
-                        })
-            
-            # Calculate sales trend alerts
-            all_orders = shopify_data.get('orders', []) + amazon_data.get('orders', [])
-            now = datetime.now()
-            
-            # Compare recent week vs previous week for trend analysis
-            recent_week_sales = self._calculate_sales_for_period(
-                all_orders, 
-                now - timedelta(days=7), 
-                now
-            )
-            previous_week_sales = self._calculate_sales_for_period(
-                all_orders, 
-                now - timedelta(days=14), 
-                now - timedelta(days=7)
-            )
-            
-            sales_spike_count = 0
-            sales_slowdown_count = 0
-            sales_spike_details = []
-            sales_slowdown_details = []
-            
-            #  CONSISTENT ALERT THRESHOLDS: Use same logic as component_data_functions
-            # Low stock: products with quantity < 5
-            # Overstock: products with stock > 100  
-            # Sales dropping: > 20% decrease
-            sales_spike_threshold = 50  # 50% increase = spike
-            sales_down_threshold = 20   # 20% decrease = slowdown (as specified by user)
-            
-            # Check for significant sales changes
-            if previous_week_sales['revenue'] > 0:
-                revenue_change = ((recent_week_sales['revenue'] - previous_week_sales['revenue']) / previous_week_sales['revenue']) * 100
-                
-                if revenue_change > sales_spike_threshold:  # Configurable spike threshold
-                    sales_spike_count = 1
-                    sales_spike_details.append({
-                        "alert_type": "sales_spike",
-                        "type": "sales_spike", 
-                        "severity": "info",
-                        "message": f"Sales spiked {revenue_change:.1f}% this week (${recent_week_sales['revenue']:.2f} vs ${previous_week_sales['revenue']:.2f})",
-                        "current_revenue": recent_week_sales['revenue'],
-                        "previous_revenue": previous_week_sales['revenue'],
-                        "change_percent": revenue_change
-                    })
-                elif revenue_change < -sales_down_threshold:  #  FIXED: Configurable sales down threshold (was -30, now -20)
-                    sales_slowdown_count = 1
-                    sales_slowdown_details.append({
-                        "alert_type": "sales_dropping",
-                        "type": "sales_slowdown",
-                        "severity": "warning",  
-                        "message": f"Sales dropped {abs(revenue_change):.1f}% this week (${recent_week_sales['revenue']:.2f} vs ${previous_week_sales['revenue']:.2f})",
-                        "current_revenue": recent_week_sales['revenue'],
-                        "previous_revenue": previous_week_sales['revenue'],
-                        "change_percent": revenue_change,
-                        "threshold_used": sales_down_threshold  # Track which threshold was used (20% as specified by user)
-                    })
-            
-            total_alerts = low_stock_count + overstock_count + sales_spike_count + sales_slowdown_count
-            
-            logger.info(f"Alerts calculated - Low stock: {low_stock_count}, Overstock: {overstock_count}, Spikes: {sales_spike_count}, Slowdowns: {sales_slowdown_count}")
-            
-            return {
-                "summary_counts": {
-                    "low_stock_alerts": low_stock_count,  # Products with quantity < 5
-                    "overstock_alerts": overstock_count,  # Products with stock > 100
-                    "sales_dropping_alerts": sales_slowdown_count,  # Sales dropping > 20%
-                    "sales_spike_alerts": sales_spike_count,
-                    "total_alerts": total_alerts
-                },
-                "detailed_alerts": {
-                    "low_stock_alerts": low_stock_details,  # Products whose quantity < 5
-                    "overstock_alerts": overstock_details,  # Products whose stock > 100  
-                    "sales_dropping_alerts": sales_slowdown_details,  # Sales dropping > 20%
-                    "sales_spike_alerts": sales_spike_details
-                },
-                "alert_thresholds": {
-                    "low_stock_threshold": 5,  # Quantity < 5
-                    "overstock_threshold": 100,  # Stock > 100
-                    "sales_dropping_threshold": sales_down_threshold  # 20% decrease
-                },
-                "quick_links": {
-                    "view_low_stock": f"/dashboard/alerts/low-stock?client_id={client_id}",
-                    "view_overstock": f"/dashboard/alerts/overstock?client_id={client_id}",
-                    "view_sales_alerts": f"/dashboard/alerts/sales?client_id={client_id}"
-                },
-                "data_source": "dashboard_inventory_analyzer_with_consistent_thresholds"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generating alerts summary: {e}")
-            return {"error": str(e)}
-
     def _calculate_total_inventory_value(self, shopify_data: Dict, amazon_data: Dict) -> float:
         """ FIXED: Calculate the total value of all inventory across platforms with better price handling"""
         total_value = 0.0
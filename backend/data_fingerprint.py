@@ -0,0 +1,203 @@
+"""
+Data Fingerprint - Incremental, order-independent fingerprints of client data
+Every row hashes to a 256-bit number; a bucket (the UTC day the row was created)
+keeps the row count and the sum of its row hashes mod 2^256. Adding, changing or
+removing any row moves its bucket's sum, row order does not matter, and a
+bucket can be adjusted without rereading it. The dataset fingerprint is a hash
+over the sorted bucket entries, so once the buckets are persisted at ingest
+(client_data_fingerprints) a fingerprint costs O(buckets), not O(rows).
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_TABLE = "client_data_fingerprints"
+
+# After a failed read (e.g. the table is not created yet), fall back to row hashing this long
+RETRY_AFTER_SECONDS = 300
+
+_MODULUS = 2 ** 256
+
+# Bucket for rows without a creation time (in-memory datasets)
+ALL_ROWS = "all"
+
+
+def row_digest(record: Any) -> int:
+    """256-bit hash of one row's content (key order does not matter)"""
+    try:
+        canonical = json.dumps(record, sort_keys=True, default=str)
+    except Exception:
+        canonical = str(record)
+    return int.from_bytes(hashlib.sha256(canonical.encode("utf-8")).digest(), "big")
+
+
+def day_bucket(created_at: Any = None) -> str:
+    """UTC day of a client_data.created_at value; rows written with now() land in today's bucket"""
+    if isinstance(created_at, datetime):
+        return created_at.astimezone(timezone.utc).date().isoformat() if created_at.tzinfo else created_at.date().isoformat()
+    if isinstance(created_at, str) and len(created_at) >= 10 and created_at[4] == "-":
+        return created_at[:10]
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class DataFingerprint:
+    """Bucket -> [row_count, digest]; also used for deltas, since the sums just add"""
+
+    def __init__(self, buckets: Optional[Dict[str, List[int]]] = None):
+        self.buckets: Dict[str, List[int]] = buckets or {}
+
+    def add(self, record: Any, bucket: str = ALL_ROWS, sign: int = 1) -> "DataFingerprint":
+        entry = self.buckets.setdefault(bucket, [0, 0])
+        entry[0] += sign
+        entry[1] = (entry[1] + sign * row_digest(record)) % _MODULUS
+        return self
+
+    def remove(self, record: Any, bucket: str = ALL_ROWS) -> "DataFingerprint":
+        return self.add(record, bucket, sign=-1)
+
+    def root(self) -> str:
+        """Hash over the bucket entries; empty buckets (everything removed) do not count"""
+        entries = [
+            f"{bucket}:{count}:{digest:064x}"
+            for bucket, (count, digest) in sorted(self.buckets.items())
+            if count or digest
+        ]
+        return hashlib.sha256("|".join(entries).encode("utf-8")).hexdigest()
+
+    def deltas(self) -> List[Dict[str, Any]]:
+        return [
+            {"bucket": bucket, "row_count": count, "digest": str(digest)}
+            for bucket, (count, digest) in sorted(self.buckets.items())
+        ]
+
+
+def fingerprint_records(records: Iterable[Any]) -> str:
+    """Fingerprint of an in-memory dataset: one hash per row, no sorted dump of the whole set"""
+    fingerprint = DataFingerprint()
+    for record in records:
+        fingerprint.add(record)
+    return fingerprint.root()
+
+
+class FingerprintStore:
+    """Persisted per-day buckets in client_data_fingerprints, adjusted by every client_data write"""
+
+    def __init__(self, admin_client=None):
+        self._admin_client = admin_client
+        self._unavailable_until = 0.0
+
+    @property
+    def admin_client(self):
+        if self._admin_client is None:
+            from database import get_admin_client
+
+            self._admin_client = get_admin_client()
+        return self._admin_client
+
+    def record_changes(self, client_id: str, added: Iterable[Tuple[Any, Any]] = (),
+                       removed: Iterable[Tuple[Any, Any]] = ()):
+        """
+        Apply rows written to / removed from client_data, given as (created_at, data)
+        pairs. Never raises: the data version also carries the row count and newest
+        created_at, so a missed insert still changes it; rebuild() repairs the buckets.
+        """
+        delta = DataFingerprint()
+        for created_at, record in added:
+            delta.add(record, day_bucket(created_at))
+        for created_at, record in removed:
+            delta.remove(record, day_bucket(created_at))
+        if not delta.buckets:
+            return
+        try:
+            self.admin_client.rpc(
+                "apply_client_data_fingerprint",
+                {"p_client_id": str(client_id), "p_deltas": delta.deltas()},
+            ).execute()
+        except Exception as e:
+            logger.warning(f" Could not update data fingerprint for client {client_id}: {e}")
+
+    def record_inserts(self, rows: Iterable[Dict[str, Any]]):
+        """client_data rows as inserted ({"client_id": ..., "data": ..., "created_at": ...})"""
+        by_client: Dict[str, List[Tuple[Any, Any]]] = {}
+        for row in rows:
+            by_client.setdefault(str(row.get("client_id")), []).append((row.get("created_at"), row.get("data")))
+        for client_id, added in by_client.items():
+            self.record_changes(client_id, added=added)
+
+    def get_root(self, client_id: str, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None) -> Optional[str]:
+        """
+        Fingerprint of the client's rows in the date range, or None when no buckets
+        are recorded or the table cannot be read (callers then hash the rows themselves)
+        """
+        if time.monotonic() < self._unavailable_until:
+            return None
+        try:
+            query = (
+                self.admin_client.table(FINGERPRINT_TABLE)
+                .select("bucket, row_count, digest")
+                .eq("client_id", str(client_id))
+            )
+            if start_date:
+                query = query.gte("bucket", str(start_date)[:10])
+            if end_date:
+                query = query.lte("bucket", str(end_date)[:10])
+            response = query.execute()
+        except Exception as e:
+            self._unavailable_until = time.monotonic() + RETRY_AFTER_SECONDS
+            logger.warning(f" Data fingerprints unavailable ({e}), hashing rows for {RETRY_AFTER_SECONDS}s")
+            return None
+        if not response.data:
+            return None
+        return DataFingerprint({
+            row["bucket"]: [int(row["row_count"]), int(row["digest"])]
+            for row in response.data
+        }).root()
+
+    def rebuild(self, client_id: str, page_size: int = 1000) -> int:
+        """Recompute a client's buckets from client_data (backfill for rows written before tracking)"""
+        fingerprint = DataFingerprint()
+        rows = 0
+        offset = 0
+        while True:
+            response = (
+                self.admin_client.table("client_data")
+                .select("data, created_at")
+                .eq("client_id", str(client_id))
+                .order("created_at")
+                .range(offset, offset + page_size - 1)
+                .execute()
+            )
+            batch = response.data or []
+            for row in batch:
+                fingerprint.add(row.get("data"), day_bucket(row.get("created_at")))
+            rows += len(batch)
+            if len(batch) < page_size:
+                break
+            offset += page_size
+
+        self.admin_client.table(FINGERPRINT_TABLE).delete().eq("client_id", str(client_id)).execute()
+        if fingerprint.buckets:
+            self.admin_client.table(FINGERPRINT_TABLE).insert([
+                {"client_id": str(client_id), **delta} for delta in fingerprint.deltas()
+            ]).execute()
+        logger.info(f" Rebuilt data fingerprint for client {client_id}: {rows} rows in {len(fingerprint.buckets)} buckets")
+        return rows
+
+
+# Global instance
+fingerprint_store = FingerprintStore()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    for client_id in sys.argv[1:]:
+        fingerprint_store.rebuild(client_id)
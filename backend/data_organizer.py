@@ -4,15 +4,21 @@ Data Organization Script for Client Data
 This script extracts JSON data from the client_data table and organizes it into 
 structured tables based on platform (Shopify, Amazon) and data type (orders, products).
 
+Only rows created since the client's last organized watermark are read, and
+organized rows are upserted by natural key, so re-running costs time
+proportional to new data.
+
 Usage:
     python data_organizer.py --client-id 3b619a14-3cd8-49fa-9c24-d8df5e54c452
+    python data_organizer.py --client-id 3b619a14-3cd8-49fa-9c24-d8df5e54c452 --full-refresh
 """
 
 import os
 import json
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass
 import pandas as pd
@@ -20,6 +26,15 @@ from dotenv import load_dotenv
 
 # Import our database manager
 from database import get_admin_client, get_db_manager
+from data_fingerprint import fingerprint_store
+from organization_sync import (
+    NATURAL_KEYS,
+    UPSERT_BATCH_SIZE,
+    WatermarkStore,
+    dedupe_by_key,
+    fetch_client_rows_since,
+    upsert_batches,
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +51,11 @@ class TableSchema:
 class DataOrganizer:
     """Organizes client data from JSON format into structured database tables"""
     
+    # Organized rows go to client_data (organized_ prefix) unless a subclass
+    # writes to the real per-client tables
+    use_separate_tables = False
+    watermark_name = "data_organizer"
+    
     def __init__(self):
         load_dotenv()
         self.db_manager = get_db_manager()
@@ -46,6 +66,12 @@ class DataOrganizer:
         
         # Define table schemas for different data types
         self.schemas = self._define_table_schemas()
+        
+        self.watermarks = WatermarkStore(self.admin_client)
+        
+        # Backlogs at least this large are categorized/transformed in worker processes
+        self.process_pool_threshold = int(os.getenv("ORGANIZE_PROCESS_POOL_THRESHOLD", "20000"))
+        self.max_workers = int(os.getenv("ORGANIZE_MAX_WORKERS", "4"))
     
     def _define_table_schemas(self) -> Dict[str, TableSchema]:
         """Define schemas for organized data tables"""
@@ -90,7 +116,12 @@ class DataOrganizer:
                 'id': 'uuid DEFAULT gen_random_uuid() PRIMARY KEY',
                 'client_id': 'uuid NOT NULL',
                 'product_id': 'bigint',
+                'variant_id': 'bigint UNIQUE',
+                'sku': 'varchar(100)',
                 'title': 'varchar(500)',
+                'variant_title': 'varchar(200)',
+                'price': 'decimal(10,2)',
+                'inventory_quantity': 'integer',
                 'handle': 'varchar(255)',
                 'vendor': 'varchar(255)',
                 'platform': 'varchar(20) DEFAULT \'shopify\'',
@@ -103,7 +134,7 @@ class DataOrganizer:
                 'processed_at': 'timestamptz DEFAULT now()'
             },
             primary_key='id',
-            indexes=['product_id', 'client_id', 'handle', 'vendor']
+            indexes=['product_id', 'variant_id', 'client_id', 'handle', 'vendor']
         )
         
         # Amazon Orders Schema
@@ -206,29 +237,24 @@ class DataOrganizer:
             logger.error(f" Failed to create organized tables: {e}")
             return False
     
-    async def fetch_client_data(self, client_id: str) -> List[Dict[str, Any]]:
-        """Fetch all data for a specific client from client_data table"""
+    async def fetch_client_data(self, client_id: str, since: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """Fetch client_data rows created since the watermark (all rows when since is None)"""
         try:
             logger.info(f" Fetching data for client {client_id}")
             
-            # Use the optimized data lookup
-            result = await self.db_manager.fast_client_data_lookup(
-                client_id=client_id,
-                use_cache=False  # Get fresh data for organization
-            )
+            raw_data, newest = fetch_client_rows_since(self.admin_client, client_id, since)
             
-            if not result or not result.get('data'):
-                logger.warning(f" No data found for client {client_id}")
-                return []
+            if not raw_data:
+                logger.info(f" No new data for client {client_id}")
+                return [], since
             
-            raw_data = result['data']
             logger.info(f" Found {len(raw_data)} records for client {client_id}")
             
-            return raw_data
+            return raw_data, newest
             
         except Exception as e:
             logger.error(f" Failed to fetch client data: {e}")
-            return []
+            return [], since
     
     def categorize_data(self, raw_data: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
         """Categorize raw JSON data by platform and type"""
@@ -326,26 +352,37 @@ class DataOrganizer:
             logger.warning(f" Error transforming Shopify order: {e}")
             return None
     
-    def transform_shopify_product(self, data: Dict[str, Any], client_id: str) -> Dict[str, Any]:
-        """Transform Shopify product data to match schema"""
+    def transform_shopify_product(self, data: Dict[str, Any], client_id: str) -> List[Dict[str, Any]]:
+        """Transform Shopify product data to match schema - one row per variant, keyed by variant_id"""
         try:
-            return {
-                'client_id': client_id,
-                'product_id': data.get('id'),
-                'title': data.get('title'),
-                'handle': data.get('handle'),
-                'vendor': data.get('vendor'),
-                'platform': 'shopify',
-                'status': data.get('status'),
-                'tags': data.get('tags', ''),
-                'variants': json.dumps(data.get('variants', [])),
-                'options': json.dumps(data.get('options', [])),
-                'images': json.dumps(data.get('images', [])),
-                'raw_data': json.dumps(data)
-            }
+            rows = []
+            for variant in data.get('variants', []):
+                variant_id = variant.get('variant_id') or variant.get('id')
+                if not variant_id:
+                    continue
+                rows.append({
+                    'client_id': client_id,
+                    'product_id': data.get('id'),
+                    'variant_id': variant_id,
+                    'sku': variant.get('sku'),
+                    'title': data.get('title'),
+                    'variant_title': variant.get('title'),
+                    'price': self._safe_decimal(variant.get('price')),
+                    'inventory_quantity': variant.get('inventory_quantity'),
+                    'handle': data.get('handle'),
+                    'vendor': data.get('vendor'),
+                    'platform': 'shopify',
+                    'status': data.get('status'),
+                    'tags': data.get('tags', ''),
+                    'variants': json.dumps([]),  # Expanded into rows
+                    'options': json.dumps(data.get('options', [])),
+                    'images': json.dumps(data.get('images', [])),
+                    'raw_data': json.dumps(data)
+                })
+            return rows
         except Exception as e:
             logger.warning(f" Error transforming Shopify product: {e}")
-            return None
+            return []
     
     def transform_amazon_order(self, data: Dict[str, Any], client_id: str) -> Dict[str, Any]:
         """Transform Amazon order data to match schema"""
@@ -417,99 +454,177 @@ class DataOrganizer:
         except Exception:
             return None
     
-    async def insert_organized_data(self, client_id: str, categorized_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
-        """Insert organized data into structured tables"""
-        try:
-            results = {}
-            
-            # Transform and insert each category
-            for data_type, records in categorized_data.items():
-                if not records:
-                    results[data_type] = 0
-                    continue
-                
-                logger.info(f" Processing {len(records)} {data_type} records")
-                
-                # Transform records based on type
-                transformed_records = []
-                for record in records:
-                    try:
-                        if data_type == 'shopify_orders':
-                            transformed = self.transform_shopify_order(record, client_id)
-                        elif data_type == 'shopify_products':
-                            transformed = self.transform_shopify_product(record, client_id)
-                        elif data_type == 'amazon_orders':
-                            transformed = self.transform_amazon_order(record, client_id)
-                        elif data_type == 'amazon_products':
-                            transformed = self.transform_amazon_product(record, client_id)
-                        else:
-                            continue
-                        
-                        if transformed:
-                            transformed_records.append(transformed)
-                    
-                    except Exception as e:
-                        logger.warning(f" Error transforming {data_type} record: {e}")
-                        continue
-                
-                if not transformed_records:
-                    results[data_type] = 0
-                    continue
-                
-                # Insert into organized table
-                table_name = f"{client_id.replace('-', '_')}_{data_type}"
-                
+    def transform_record(self, data_type: str, record: Dict[str, Any], client_id: str) -> Union[Dict[str, Any], List[Dict[str, Any]], None]:
+        """Dispatch a categorized record to transform_<platform>_<type> (a row, or a list of rows)"""
+        transform = getattr(self, f"transform_{data_type[:-1]}", None)
+        if transform is None:
+            return None
+        return transform(record, client_id)
+    
+    def transform_categorized(self, client_id: str, categorized_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Transform every categorized record into its organized-table row"""
+        transformed_data = {}
+        for data_type, records in categorized_data.items():
+            transformed_records = []
+            for record in records:
                 try:
-                    # For now, we'll insert using the client_data table with a special table_name prefix
-                    # In a real implementation, you'd insert directly into the structured tables
-                    organized_records = []
-                    for record in transformed_records:
-                        organized_records.append({
-                            "client_id": client_id,
-                            "table_name": f"organized_{table_name}",
-                            "data": record,
-                            "created_at": datetime.utcnow().isoformat()
-                        })
-                    
-                    # Batch insert
-                    if organized_records:
-                        response = self.admin_client.table("client_data").insert(organized_records).execute()
-                        results[data_type] = len(response.data) if response.data else 0
-                        logger.info(f" Inserted {results[data_type]} {data_type} records")
-                    else:
-                        results[data_type] = 0
-                
+                    transformed = self.transform_record(data_type, record, client_id)
+                    if isinstance(transformed, list):
+                        transformed_records.extend(transformed)
+                    elif transformed:
+                        transformed_records.append(transformed)
                 except Exception as e:
-                    logger.error(f" Failed to insert {data_type} data: {e}")
-                    results[data_type] = 0
+                    logger.warning(f" Error transforming {data_type} record: {e}")
+                    continue
+            transformed_data[data_type] = transformed_records
+        return transformed_data
+    
+    async def prepare_organized_data(self, client_id: str, raw_data: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Categorize and transform raw rows, fanning large backlogs out to a process pool"""
+        if len(raw_data) < self.process_pool_threshold:
+            return self.transform_categorized(client_id, self.categorize_data(raw_data))
+        
+        workers = max(1, min(os.cpu_count() or 1, self.max_workers))
+        chunk_size = -(-len(raw_data) // workers)
+        chunks = [raw_data[i:i + chunk_size] for i in range(0, len(raw_data), chunk_size)]
+        logger.info(f" Organizing {len(raw_data)} records in {len(chunks)} worker processes")
+        
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            parts = await asyncio.gather(*[
+                loop.run_in_executor(pool, _organize_chunk, self, client_id, chunk)
+                for chunk in chunks
+            ])
+        
+        # Chunks are in created_at order, so later rows still win on key collisions
+        merged: Dict[str, List[Dict[str, Any]]] = {}
+        for part in parts:
+            for data_type, rows in part.items():
+                merged.setdefault(data_type, []).extend(rows)
+        return merged
+    
+    async def write_organized_data(self, client_id: str, transformed_data: Dict[str, List[Dict[str, Any]]]) -> Tuple[Dict[str, int], int]:
+        """Upsert organized rows by natural key; returns per-type counts and failed batches"""
+        results = {}
+        failed = 0
+        
+        for data_type, records in transformed_data.items():
+            if not records:
+                results[data_type] = 0
+                continue
+            
+            natural_key = NATURAL_KEYS.get(data_type)
+            if not natural_key:
+                logger.warning(f" No natural key for {data_type}, skipping")
+                results[data_type] = 0
+                continue
+            
+            table_name = f"{client_id.replace('-', '_')}_{data_type}"
+            
+            if self.use_separate_tables:
+                written, failed_batches = upsert_batches(self.admin_client, table_name, records, natural_key)
+                if failed_batches:
+                    logger.info(f" Make sure the table {table_name} exists with a unique {natural_key}")
+            else:
+                written, failed_batches = self._replace_in_client_data(client_id, table_name, records, natural_key)
             
+            results[data_type] = written
+            failed += failed_batches
+        
+        return results, failed
+    
+    def _replace_in_client_data(self, client_id: str, table_name: str, records: List[Dict[str, Any]], natural_key: str) -> Tuple[int, int]:
+        """Upsert into the organized_ rows of client_data by replacing only the keys being written"""
+        records = dedupe_by_key(records, natural_key)
+        written = 0
+        failed = 0
+        
+        for i in range(0, len(records), UPSERT_BATCH_SIZE):
+            batch = records[i:i + UPSERT_BATCH_SIZE]
+            try:
+                keys = [str(record[natural_key]) for record in batch]
+                deleted = self.admin_client.table("client_data").delete().eq(
+                    "client_id", client_id
+                ).eq("table_name", f"organized_{table_name}").in_(f"data->>{natural_key}", keys).execute()
+                fingerprint_store.record_changes(
+                    client_id, removed=[(row.get("created_at"), row.get("data")) for row in deleted.data or []]
+                )
+                
+                now = datetime.utcnow().isoformat()
+                response = self.admin_client.table("client_data").insert([
+                    {
+                        "client_id": client_id,
+                        "table_name": f"organized_{table_name}",
+                        "data": record,
+                        "created_at": now
+                    }
+                    for record in batch
+                ]).execute()
+                written += len(response.data) if response.data else 0
+                fingerprint_store.record_inserts(response.data or [])
+            except Exception as e:
+                failed += 1
+                logger.error(f" Failed to write organized {table_name} batch {i // UPSERT_BATCH_SIZE + 1}: {e}")
+        
+        logger.info(f" Wrote {written} organized {table_name} records")
+        return written, failed
+    
+    async def insert_organized_data(self, client_id: str, categorized_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+        """Transform categorized data and upsert it into the organized tables"""
+        try:
+            transformed_data = self.transform_categorized(client_id, categorized_data)
+            results, _ = await self.write_organized_data(client_id, transformed_data)
             return results
             
         except Exception as e:
             logger.error(f" Failed to insert organized data: {e}")
             return {}
     
-    async def organize_client_data(self, client_id: str) -> Dict[str, Any]:
-        """Main method to organize all client data"""
+    async def organize_client_data(self, client_id: str, full_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Organize client data added since the last run. full_refresh=True ignores
+        the watermark and re-upserts everything (nothing is deleted either way).
+        """
         try:
             logger.info(f" Starting data organization for client {client_id}")
             start_time = datetime.now()
             
-            # Step 1: Fetch raw data
-            raw_data = await self.fetch_client_data(client_id)
+            # Step 1: Fetch raw rows newer than the watermark
+            since = None if full_refresh else self.watermarks.get(client_id, self.watermark_name)
+            raw_data, newest = await self.fetch_client_data(client_id, since)
+            
             if not raw_data:
-                return {"error": "No data found for client"}
+                if since is None:
+                    return {"error": "No data found for client"}
+                
+                # Nothing new since the last run - already up to date
+                return {
+                    "client_id": client_id,
+                    "processing_time_seconds": (datetime.now() - start_time).total_seconds(),
+                    "total_raw_records": 0,
+                    "organized_records": {},
+                    "total_organized": 0,
+                    "incremental": True,
+                    "watermark": since,
+                    "success": True
+                }
+            
+            # Step 2: Create organized tables (schema definition)
+            await self.create_organized_tables(client_id)
             
-            # Step 2: Categorize data
-            categorized_data = self.categorize_data(raw_data)
-            if not categorized_data:
+            # Step 3: Categorize and transform (process pool for large backlogs)
+            transformed_data = await self.prepare_organized_data(client_id, raw_data)
+            if not transformed_data:
                 return {"error": "Failed to categorize data"}
             
-            # Step 3: Create organized tables (schema definition)
-            await self.create_organized_tables(client_id)
+            # Step 4: Upsert organized data by natural key
+            results, failed_batches = await self.write_organized_data(client_id, transformed_data)
             
-            # Step 4: Transform and insert organized data
-            results = await self.insert_organized_data(client_id, categorized_data)
+            # Only move the watermark once every batch landed, so failures are retried
+            if failed_batches:
+                logger.warning(f" {failed_batches} batches failed, keeping watermark at {since}")
+            elif newest:
+                self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
             
             end_time = datetime.now()
             processing_time = (end_time - start_time).total_seconds()
@@ -520,6 +635,9 @@ class DataOrganizer:
                 "total_raw_records": len(raw_data),
                 "organized_records": results,
                 "total_organized": sum(results.values()),
+                "incremental": since is not None,
+                "watermark": since if failed_batches else newest,
+                "failed_batches": failed_batches,
                 "success": True
             }
             
@@ -531,6 +649,18 @@ class DataOrganizer:
         except Exception as e:
             logger.error(f" Data organization failed: {e}")
             return {"error": str(e), "success": False}
+    
+    def __getstate__(self):
+        # Worker processes only categorize and transform, so leave the DB clients behind
+        state = self.__dict__.copy()
+        state['db_manager'] = None
+        state['admin_client'] = None
+        state['watermarks'] = None
+        return state
+
+def _organize_chunk(organizer: DataOrganizer, client_id: str, raw_chunk: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Process-pool entry point: categorize and transform one chunk of raw rows"""
+    return organizer.transform_categorized(client_id, organizer.categorize_data(raw_chunk))
 
 async def main():
     """Main function for running the data organizer"""
@@ -538,11 +668,12 @@ async def main():
     
     parser = argparse.ArgumentParser(description='Organize client data into structured tables')
     parser.add_argument('--client-id', required=True, help='Client ID to organize data for')
+    parser.add_argument('--full-refresh', action='store_true', help='Ignore the watermark and re-organize all rows')
     args = parser.parse_args()
     
     try:
         organizer = DataOrganizer()
-        result = await organizer.organize_client_data(args.client_id)
+        result = await organizer.organize_client_data(args.client_id, full_refresh=args.full_refresh)
         
         if result.get('success'):
             print(f" Data organization successful!")
@@ -1,4 +1,5 @@
 import os
+import hashlib
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from typing import Optional, Dict, List, Any, Union
@@ -10,6 +11,8 @@ from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor
 import threading
 from collections import defaultdict
+from request_deadline import run_blocking
+from data_fingerprint import DataFingerprint, day_bucket, fingerprint_store
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +21,9 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Longest a single client_data read may take; a request deadline shortens it further
+QUERY_TIMEOUT_SECONDS = 120.0
+
 class PerformanceOptimizedDatabaseManager:
     """High-performance database manager with caching, pooling, and batch operations"""
     
@@ -250,13 +256,24 @@ class PerformanceOptimizedDatabaseManager:
                 # Don't apply large limits - get all data for comprehensive analysis
                 logger.info(f" Skipping large limit {limit} to ensure complete data retrieval")
 
-            response = query.execute()
+            response, data_fingerprint = await asyncio.gather(
+                run_blocking(query.execute, timeout=QUERY_TIMEOUT_SECONDS),
+                run_blocking(fingerprint_store.get_root, client_id, start_date, end_date, timeout=QUERY_TIMEOUT_SECONDS),
+            )
 
             data_records = [record["data"] for record in (response.data or [])]
 
+            if data_fingerprint is None:
+                # No buckets recorded at ingest yet - same fingerprint, computed from the rows
+                fingerprint = DataFingerprint()
+                for record in response.data or []:
+                    fingerprint.add(record["data"], day_bucket(record.get("created_at")))
+                data_fingerprint = fingerprint.root()
+
             result = {
                 "client_id": client_id,
                 "data": data_records,
+                "data_fingerprint": data_fingerprint,
                 "row_count": len(data_records),
                 "query_time": time.time() - start_time,
                 "cached": False,
@@ -271,10 +288,67 @@ class PerformanceOptimizedDatabaseManager:
             )
             return result
 
+        except asyncio.TimeoutError:
+            # Out of request budget (or the client left) - nothing to wrap
+            raise
         except Exception as e:
             logger.error(f" Fast client data lookup failed: {e}")
             raise Exception(f"Database lookup failed: {str(e)}")
     
+    async def probe_client_data_version(self, client_id: str, start_date: str = None, end_date: str = None) -> Dict:
+        """Cheap data-version probe: newest created_at plus row count for the same rows
+        fast_client_data_lookup would return, without transferring any payloads."""
+        try:
+            client = self._get_pooled_admin_client()
+
+            query = client.table("client_data").select("created_at", count="exact").eq("client_id", client_id)
+            if start_date:
+                query = query.gte("created_at", start_date)
+            if end_date:
+                query = query.lte("created_at", end_date)
+
+            # Bucket hashes kept at ingest also catch in-place edits, which leave count and timestamp alone
+            response, data_fingerprint, data_type = await asyncio.gather(
+                run_blocking(query.order("created_at", desc=True).limit(1).execute, timeout=QUERY_TIMEOUT_SECONDS),
+                run_blocking(fingerprint_store.get_root, client_id, start_date, end_date, timeout=QUERY_TIMEOUT_SECONDS),
+                run_blocking(self.client_data_type, client_id, timeout=QUERY_TIMEOUT_SECONDS),
+            )
+
+            row_count = response.count or 0
+            max_created_at = response.data[0].get("created_at") if response.data else None
+            version = _data_version(client_id, start_date, end_date, row_count, max_created_at, data_fingerprint)
+            version["data_type"] = data_type
+            return version
+
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f" Client data version probe failed: {e}")
+            raise Exception(f"Database probe failed: {str(e)}")
+    
+    def client_data_type(self, client_id: str) -> str:
+        """The data type recorded in the client's latest client_schemas row ("unknown" without one)"""
+        cache_key = self._cache_key("client_data_type", client_id)
+        cached = self._get_from_cache(cache_key)
+        if cached:
+            return cached
+        try:
+            response = (
+                self._get_pooled_admin_client()
+                .table("client_schemas")
+                .select("data_type")
+                .eq("client_id", client_id)
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            data_type = (response.data[0].get("data_type") if response.data else None) or "unknown"
+        except Exception as e:
+            logger.warning(f" Could not read the data type of client {client_id}: {e}")
+            return "unknown"
+        self._set_cache(cache_key, data_type, ttl_seconds=300)
+        return data_type
+    
     async def batch_insert_client_data(self, table_name: str, data: List[Dict[str, Any]], client_id: str) -> int:
         """High-performance batch insert with retry logic and exponential backoff for large datasets"""
         try:
@@ -315,6 +389,7 @@ class PerformanceOptimizedDatabaseManager:
                         
                         if response.data:
                             total_inserted += len(response.data)
+                            fingerprint_store.record_inserts(response.data)
                             logger.debug(f" Batch {batch_num}: {len(response.data)} records inserted")
                             batch_inserted = True
                         else:
@@ -356,6 +431,7 @@ class PerformanceOptimizedDatabaseManager:
                             response = client.table("client_data").insert(recovery_batch).execute()
                             if response.data:
                                 total_inserted += len(response.data)
+                                fingerprint_store.record_inserts(response.data)
                                 logger.info(f" Recovered {len(response.data)} records")
                         except Exception as final_error:
                             logger.error(f" Final batch attempt failed: {final_error}")
@@ -455,14 +531,14 @@ class PerformanceOptimizedDatabaseManager:
                         "event_id", "record_id", "external_id", "sku", "product_id"
                     ]:
                         if key_name in rec and rec[key_name] is not None and str(rec[key_name]).strip() != "":
-                            existing_by_key[f"{key_name}:{rec[key_name]}"] = {"row_id": row.get("id"), "data": rec}
+                            existing_by_key[f"{key_name}:{rec[key_name]}"] = {"row_id": row.get("id"), "data": rec, "created_at": row.get("created_at")}
                             break
         except Exception as e:
             logger.warning(f" Could not load existing scope records for dedup/update: {e}")
 
         # Filter incoming
         unique_records: List[Dict[str, Any]] = []
-        updates: List[Dict[str, Any]] = []  # {row_id, new_data}
+        updates: List[Dict[str, Any]] = []  # {row_id, new_data, old_data, created_at}
         for rec in data:
             try:
                 record_obj = rec if isinstance(rec, dict) else {"value": rec}
@@ -481,7 +557,12 @@ class PerformanceOptimizedDatabaseManager:
                     existing_entry = existing_by_key[stable_key]
                     # If content differs, schedule update
                     if self._compute_record_fingerprint(existing_entry["data"]) != fp:
-                        updates.append({"row_id": existing_entry["row_id"], "new_data": record_obj})
+                        updates.append({
+                            "row_id": existing_entry["row_id"],
+                            "new_data": record_obj,
+                            "old_data": existing_entry["data"],
+                            "created_at": existing_entry["created_at"],
+                        })
                     # Whether updated or same, do not insert as new
                     continue
 
@@ -501,6 +582,12 @@ class PerformanceOptimizedDatabaseManager:
                 try:
                     client.table("client_data").update({"data": upd["new_data"], "updated_at": "now()"}).eq("id", upd["row_id"]).execute()
                     updated_count += 1
+                    # The row keeps its created_at, so only its own bucket moves
+                    fingerprint_store.record_changes(
+                        client_id,
+                        added=[(upd["created_at"], upd["new_data"])],
+                        removed=[(upd["created_at"], upd["old_data"])],
+                    )
                 except Exception as ue:
                     logger.warning(f" Failed to update row {upd['row_id']}: {ue}")
 
@@ -715,10 +802,14 @@ class SimpleDatabaseManager:
         logger.info(f" Simple manager: Table creation simulated for {table_name}")
         return True
     
-    async def fast_client_data_lookup(self, client_id: str, use_cache: bool = True):
+    async def fast_client_data_lookup(self, client_id: str, use_cache: bool = True, start_date: str = None, end_date: str = None, limit: int = None):
         """Simple fallback for data lookup"""
         return {"data": [], "row_count": 0, "query_time": 0.001}
     
+    async def probe_client_data_version(self, client_id: str, start_date: str = None, end_date: str = None):
+        """Simple fallback for the data-version probe"""
+        return {**_data_version(client_id, start_date, end_date, 0, None), "data_type": "unknown"}
+    
     async def batch_insert_client_data(self, table_name: str, data: list, client_id: str):
         """Simple fallback for data insertion"""
         logger.info(f" Simple manager: Data insertion simulated for {table_name}")
@@ -743,6 +834,57 @@ class SimpleDatabaseManager:
         logger.info(f" Simple manager: Data insertion simulated for {table_name}")
         return len(records)
 
+def _data_version(client_id: str, start_date: Optional[str], end_date: Optional[str],
+                  row_count: int, max_created_at: Optional[str], data_fingerprint: Optional[str] = None) -> Dict:
+    """Build the version record used as a cache key for a client's data in a date range"""
+    fingerprint = f"{client_id}|{start_date or ''}|{end_date or ''}|{row_count}|{max_created_at or ''}"
+    if data_fingerprint:
+        fingerprint += f"|{data_fingerprint}"
+    return {
+        "row_count": row_count,
+        "max_created_at": max_created_at,
+        "data_fingerprint": data_fingerprint,
+        "version": hashlib.sha256(fingerprint.encode("utf-8")).hexdigest(),
+    }
+
+class LazyClientData:
+    """
+    Handle on a client's data for a date range that probes the data version
+    first and only downloads the rows when load() is awaited (once).
+    """
+    
+    def __init__(self, client_id: str, start_date: str = None, end_date: str = None):
+        self.client_id = client_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self._version: Optional[Dict] = None
+        self._data: Optional[Dict] = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None
+    
+    async def probe(self) -> Dict:
+        if self._version is None:
+            self._version = await get_db_manager().probe_client_data_version(
+                self.client_id, start_date=self.start_date, end_date=self.end_date
+            )
+        return self._version
+    
+    async def load(self) -> Dict:
+        if self._data is None:
+            result = await get_db_manager().fast_client_data_lookup(
+                self.client_id, use_cache=True, start_date=self.start_date, end_date=self.end_date
+            )
+            # Ensure client_id is present for hashing
+            result['client_id'] = self.client_id
+            # Same shape as the client data endpoint: the schema type is the recorded data type
+            data_type = (await self.probe()).get('data_type', 'unknown')
+            result['data_type'] = data_type
+            result['schema'] = {'type': data_type, 'source': 'database'}
+            self._data = result
+        return self._data
+
 # Convenience functions (optimized with lazy loading)
 def get_db_client() -> Client:
     """Get a high-performance pooled database client"""
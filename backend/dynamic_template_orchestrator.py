@@ -11,7 +11,7 @@ import os
 # LangGraph imports
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor
-from langchain_openai import ChatOpenAI
+from llm_gateway import fan_out, llm_gateway
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
@@ -35,6 +35,7 @@ class TemplateCategory(Enum):
     MONITORING = "monitoring"
     STRATEGIC = "strategic"
     OPERATIONAL = "operational"
+    ANALYTICAL = "analytical"
 
 @dataclass
 class TemplateArchitecture:
@@ -98,11 +99,9 @@ class DynamicTemplateOrchestrator:
         if not self.openai_api_key:
             raise Exception("OpenAI API key required for template orchestration")
         
-        self.llm = ChatOpenAI(
-            api_key=self.openai_api_key,
-            model="gpt-4o",
-            temperature=0.7
-        )
+        # Completions go through the shared gateway (pooled client, concurrency limits, retries)
+        self.model = "gpt-4o"
+        self.temperature = 0.7
         
         self.business_dna_analyzer = BusinessDNAAnalyzer()
         self.workflow_graph = self._create_workflow_graph()
@@ -232,20 +231,22 @@ class DynamicTemplateOrchestrator:
             business_dna = state["business_dna"]
             data_analysis = state["data_analysis"]
             
-            # Generate 3 unique template architectures
-            architectures = []
-            
-            # Template 1: Strategic Overview
-            strategic_arch = await self._design_strategic_template(business_dna, data_analysis)
-            architectures.append(strategic_arch)
-            
-            # Template 2: Operational Deep Dive
-            operational_arch = await self._design_operational_template(business_dna, data_analysis)
-            architectures.append(operational_arch)
+            # Generate 3 unique template architectures: Strategic Overview, Operational Deep Dive,
+            # Performance Intelligence. The designs are independent, so they run concurrently.
+            designs = [
+                (self._design_strategic_template, self._create_fallback_strategic_architecture),
+                (self._design_operational_template, self._create_fallback_operational_architecture),
+                (self._design_performance_template, self._create_fallback_performance_architecture),
+            ]
+            results = await fan_out(design(business_dna, data_analysis) for design, _ in designs)
             
-            # Template 3: Performance Intelligence
-            performance_arch = await self._design_performance_template(business_dna, data_analysis)
-            architectures.append(performance_arch)
+            architectures = []
+            for (design, fallback), result in zip(designs, results):
+                if isinstance(result, Exception):
+                    # One failed design keeps its fallback architecture instead of failing the node
+                    logger.warning(f" {design.__name__} failed, using fallback architecture: {result}")
+                    result = fallback(business_dna)
+                architectures.append(result)
             
             state["template_architectures"] = architectures
             logger.info(f"️ Designed {len(architectures)} template architectures")
@@ -293,10 +294,10 @@ class DynamicTemplateOrchestrator:
             """)
         ])
         
-        response = await self.llm.ainvoke(prompt.format_messages())
+        response = await llm_gateway.complete(prompt.format_messages(), tenant=data_analysis.get('client_id'), model=self.model, temperature=self.temperature)
         
         try:
-            arch_data = json.loads(response.content)
+            arch_data = json.loads(response)
             
             return TemplateArchitecture(
                 template_id=f"strategic_{uuid.uuid4().hex[:8]}",
@@ -346,10 +347,10 @@ class DynamicTemplateOrchestrator:
             """)
         ])
         
-        response = await self.llm.ainvoke(prompt.format_messages())
+        response = await llm_gateway.complete(prompt.format_messages(), tenant=data_analysis.get('client_id'), model=self.model, temperature=self.temperature)
         
         try:
-            arch_data = json.loads(response.content)
+            arch_data = json.loads(response)
             
             return TemplateArchitecture(
                 template_id=f"operational_{uuid.uuid4().hex[:8]}",
@@ -399,10 +400,10 @@ class DynamicTemplateOrchestrator:
             """)
         ])
         
-        response = await self.llm.ainvoke(prompt.format_messages())
+        response = await llm_gateway.complete(prompt.format_messages(), tenant=data_analysis.get('client_id'), model=self.model, temperature=self.temperature)
         
         try:
-            arch_data = json.loads(response.content)
+            arch_data = json.loads(response)
             
             return TemplateArchitecture(
                 template_id=f"performance_{uuid.uuid4().hex[:8]}",
@@ -432,12 +433,20 @@ class DynamicTemplateOrchestrator:
             
             all_components = []
             
-            for architecture in state["template_architectures"]:
-                components = await self._select_components_for_architecture(
+            architectures = state["template_architectures"]
+            results = await fan_out(
+                self._select_components_for_architecture(
                     architecture, 
                     state["data_analysis"], 
                     state["business_dna"]
                 )
+                for architecture in architectures
+            )
+            
+            for architecture, components in zip(architectures, results):
+                if isinstance(components, Exception):
+                    logger.warning(f" Component selection failed for {architecture.template_id}, using fallback components: {components}")
+                    components = self._create_fallback_components(architecture, state["data_analysis"])
                 all_components.extend(components)
             
             state["selected_components"] = all_components
@@ -476,10 +485,10 @@ class DynamicTemplateOrchestrator:
             """)
         ])
         
-        response = await self.llm.ainvoke(prompt.format_messages())
+        response = await llm_gateway.complete(prompt.format_messages(), tenant=data_analysis.get('client_id'), model=self.model, temperature=self.temperature)
         
         try:
-            selected_components = json.loads(response.content)
+            selected_components = json.loads(response)
             
             for i, comp_data in enumerate(selected_components):
                 component = ComponentBlueprint(
@@ -4,6 +4,7 @@ Simplified version that works with existing database structure
 """
 
 import pandas as pd
+import numpy as np
 import json
 import io
 import chardet
@@ -12,6 +13,8 @@ import logging
 from typing import Dict, Any, List, Union, Optional, Tuple
 from dataclasses import dataclass
 
+from data_profiler import DataProfiler, DataProfile
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -68,6 +71,11 @@ class EnhancedDataParser:
             'text/yaml',
             'application/octet-stream'  # For parquet/avro
         }
+        
+        # Quality profiling: "auto" is exact for small files and switches to
+        # HyperLogLog sketches per column once it passes exact_profile_limit
+        self.profiling_mode = "auto"
+        self.exact_profile_limit = 50000
 
     def detect_file_type(self, file_content: bytes, filename: str = "") -> str:
         """Detect file type using multiple methods"""
@@ -168,11 +176,13 @@ class EnhancedDataParser:
                 raise ValueError(f"Unsupported format: {format_type}")
             
             #  CRITICAL: Convert ALL data to standardized JSON format
-            standardized_data = self._standardize_to_json(data, columns_info, format_type)
+            # (quality profiling runs in the same pass)
+            profiler = self._new_profiler()
+            standardized_data = self._standardize_to_json(data, columns_info, format_type, profiler)
             logger.info(f" Converted {format_type.upper()} to JSON: {len(standardized_data)} records")
             
             # Analyze the standardized JSON data 
-            data_analysis = self._analyze_standardized_data(standardized_data, columns_info)
+            data_analysis = self._analyze_standardized_data(standardized_data, columns_info, profiler.profile)
             
             return ParsedDataResult(
                 data=standardized_data,  # ← Always JSON now!
@@ -189,10 +199,21 @@ class EnhancedDataParser:
             logger.error(f" Error parsing {filename}: {str(e)}")
             raise ValueError(f"Failed to parse data: {str(e)}")
     
-    def _standardize_to_json(self, data: List[Dict], columns_info: List[Dict], source_format: str) -> List[Dict]:
+    def _new_profiler(self) -> DataProfiler:
+        return DataProfiler(mode=self.profiling_mode, exact_limit=self.exact_profile_limit)
+    
+    @staticmethod
+    def _clean_field_name(key) -> str:
+        """Clean field names (remove special chars, spaces)"""
+        clean_key = str(key).strip().replace(' ', '_').replace('-', '_')
+        return ''.join(c for c in clean_key if c.isalnum() or c == '_')
+    
+    def _standardize_to_json(self, data: List[Dict], columns_info: List[Dict], source_format: str,
+                             profiler: Optional[DataProfiler] = None) -> List[Dict]:
         """
          NEW: Convert ALL formats to standardized JSON structure
         This ensures uniform processing regardless of source format
+        If a profiler is given, each cleaned record is profiled as it is produced
         """
         try:
             standardized_records = []
@@ -218,9 +239,7 @@ class EnhancedDataParser:
                     # Clean and validate each field
                     clean_record = {}
                     for key, value in record.items():
-                        # Clean field names (remove special chars, spaces)
-                        clean_key = str(key).strip().replace(' ', '_').replace('-', '_')
-                        clean_key = ''.join(c for c in clean_key if c.isalnum() or c == '_')
+                        clean_key = self._clean_field_name(key)
                         
                         # Standardize values
                         if pd.isna(value) or value is None:
@@ -243,6 +262,9 @@ class EnhancedDataParser:
                         
                         clean_record[clean_key] = clean_value
                     
+                    if profiler is not None:
+                        profiler.observe_record(clean_record)
+                    
                     # Add metadata for traceability
                     clean_record['_source_format'] = source_format
                     clean_record['_record_index'] = i
@@ -260,9 +282,11 @@ class EnhancedDataParser:
             logger.error(f" Failed to standardize data to JSON: {e}")
             raise ValueError(f"Data standardization failed: {e}")
     
-    def _analyze_standardized_data(self, standardized_data: List[Dict], columns_info: List[Dict]) -> Dict:
+    def _analyze_standardized_data(self, standardized_data: List[Dict], columns_info: List[Dict],
+                                   profile: Optional[DataProfile] = None) -> Dict:
         """
          NEW: Analyze the standardized JSON data uniformly
+        Works from a streaming profile; one is built here if parsing did not provide it
         """
         try:
             if not standardized_data:
@@ -272,36 +296,31 @@ class EnhancedDataParser:
                     'insights': ['No data to analyze']
                 }
             
+            if profile is None:
+                profile = self._new_profiler().observe_records(standardized_data).profile
+            
             # Analyze data types and quality
             data_types = {}
             column_stats = {}
             
             # Analyze each column
             for col_info in columns_info:
-                col_name = col_info['name']
-                values = [record.get(col_name) for record in standardized_data if col_name in record]
-                non_null_values = [v for v in values if v is not None]
+                col_name = self._clean_field_name(col_info['name'])
+                col_profile = profile.get(col_name)
                 
-                if not non_null_values:
+                if col_profile is None or not col_profile.non_null_count:
                     data_types[col_name] = 'null'
                     column_stats[col_name] = {'completeness': 0.0, 'type': 'null'}
                     continue
                 
-                # Determine dominant type
-                type_counts = {}
-                for value in non_null_values:
-                    value_type = type(value).__name__
-                    type_counts[value_type] = type_counts.get(value_type, 0) + 1
-                
-                dominant_type = max(type_counts.keys(), key=lambda k: type_counts[k])
+                dominant_type = col_profile.dominant_type
                 data_types[col_name] = dominant_type
                 
-                completeness = len(non_null_values) / len(standardized_data)
                 column_stats[col_name] = {
-                    'completeness': completeness,
+                    'completeness': col_profile.non_null_count / len(standardized_data),
                     'type': dominant_type,
-                    'unique_values': len(set(str(v) for v in non_null_values)),
-                    'sample_values': list(set(str(v) for v in non_null_values[:10]))
+                    'unique_values': col_profile.distinct_count,
+                    'sample_values': list(set(str(v) for v in col_profile.sample_values))
                 }
             
             # Calculate overall quality score
@@ -470,14 +489,7 @@ class EnhancedDataParser:
             text = file_content.decode(encoding)
             df = pd.read_csv(io.StringIO(text), sep='\t')
             
-            return {
-                'success': True,
-                'data': df,
-                'format': 'tsv',
-                'rows': len(df),
-                'columns': len(df.columns),
-                'quality_score': self._calculate_quality_score(df)
-            }
+            return self._frame_result(df, 'tsv')
         except Exception as e:
             raise ValueError(f"TSV parsing error: {e}")
 
@@ -550,14 +562,7 @@ class EnhancedDataParser:
             else:
                 df = pd.DataFrame({'value': [data]})
             
-            return {
-                'success': True,
-                'data': df,
-                'format': 'yaml',
-                'rows': len(df),
-                'columns': len(df.columns),
-                'quality_score': self._calculate_quality_score(df)
-            }
+            return self._frame_result(df, 'yaml')
         except Exception as e:
             raise ValueError(f"YAML parsing error: {e}")
 
@@ -569,14 +574,7 @@ class EnhancedDataParser:
             
             df = pd.read_parquet(io.BytesIO(file_content))
             
-            return {
-                'success': True,
-                'data': df,
-                'format': 'parquet',
-                'rows': len(df),
-                'columns': len(df.columns),
-                'quality_score': self._calculate_quality_score(df)
-            }
+            return self._frame_result(df, 'parquet')
         except Exception as e:
             raise ValueError(f"Parquet parsing error: {e}")
 
@@ -594,25 +592,31 @@ class EnhancedDataParser:
             
             df = pd.DataFrame(data) if data else pd.DataFrame()
             
-            return {
-                'success': True,
-                'data': df,
-                'format': 'avro',
-                'rows': len(df),
-                'columns': len(df.columns),
-                'quality_score': self._calculate_quality_score(df)
-            }
+            return self._frame_result(df, 'avro')
         except Exception as e:
             raise ValueError(f"Avro parsing error: {e}")
 
-    def _calculate_quality_score(self, df: pd.DataFrame) -> float:
-        """Calculate enhanced data quality score"""
+    def _frame_result(self, df: pd.DataFrame, format_type: str) -> Dict[str, Any]:
+        """Result of a DataFrame-based parser; the frame is profiled once and the profile is returned for reuse"""
+        profile = self._new_profiler().observe_frame(df).profile
+        return {
+            'success': True,
+            'data': df,
+            'format': format_type,
+            'rows': len(df),
+            'columns': len(df.columns),
+            'quality_score': self._calculate_quality_score(df, profile),
+            'profile': profile
+        }
+
+    def _calculate_quality_score(self, df: pd.DataFrame, profile: DataProfile) -> float:
+        """Calculate enhanced data quality score from the parse pass's (sketch-based) column profile"""
         try:
             if df.empty:
                 return 0.0
             
             # Calculate completeness (non-null values)
-            completeness = (df.count().sum()) / (df.shape[0] * df.shape[1])
+            completeness = profile.completeness
             
             # Calculate data type consistency (prefer numeric and datetime types)
             numeric_cols = len(df.select_dtypes(include=[np.number]).columns)
@@ -623,8 +627,8 @@ class EnhancedDataParser:
             
             # Calculate uniqueness (avoid too many duplicates)
             uniqueness_scores = []
-            for col in df.columns:
-                unique_ratio = df[col].nunique() / len(df)
+            for col_profile in profile.columns.values():
+                unique_ratio = col_profile.unique_ratio
                 # Good uniqueness is between 0.1 and 0.9 (not all same, not all different)
                 if 0.1 <= unique_ratio <= 0.9:
                     uniqueness_scores.append(1.0)
@@ -0,0 +1,105 @@
+"""
+Fake LLM Server - Local stand-in for the OpenAI chat completions API
+Serves POST /v1/chat/completions with a canned reply after a configurable delay,
+and can fail the first N calls with a status code, so the gateway's concurrency
+limits, timeouts and retries can be exercised without network access or cost.
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+"""
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FakeLLMServer:
+    """Threaded HTTP server; every request sleeps `delay` seconds, so concurrent calls overlap"""
+
+    def __init__(self, reply: str = '{"insights": []}', delay: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.reply = reply
+        self.delay = delay
+        self.fail_next = 0
+        self.fail_status = 429
+        self.requests: List[Dict[str, Any]] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests.append(body)
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                    failing = fake.fail_next > 0
+                    if failing:
+                        fake.fail_next -= 1
+                try:
+                    time.sleep(fake.delay)
+                    if failing:
+                        self._send(fake.fail_status, {"error": {"message": "fake failure", "type": "fake_error"}})
+                        return
+                    self._send(200, {
+                        "id": f"chatcmpl-fake-{len(fake.requests)}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake-model"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": fake.reply},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    })
+                finally:
+                    with fake._lock:
+                        fake.active -= 1
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    server = FakeLLMServer(delay=1.0, port=8765).start()
+    logger.info(f" Fake LLM server listening - set OPENAI_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
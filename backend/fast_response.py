@@ -0,0 +1,202 @@
+"""
+Fast Response - orjson serialization, strong ETags and pre-compressed bytes for dashboard APIs
+Responses are encoded once per version: the JSON body and its gzip form are kept
+in a small in-process LRU keyed by ETag, so a repeat request for the same data
+version skips both serialization and compression, and a client that already has
+it (If-None-Match) gets a 304 without a body.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Same threshold as the app's GZipMiddleware
+GZIP_MINIMUM_SIZE = 1000
+GZIP_COMPRESS_LEVEL = 6
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not serialize natively (numpy is handled by OPT_SERIALIZE_NUMPY)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "isoformat"):
+        # pandas Timestamp and friends
+        return value.isoformat()
+    if hasattr(value, "item"):
+        # numpy scalars from object arrays
+        return value.item()
+    return str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to JSON bytes; NaN/Infinity become null instead of invalid JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+    def _fallback(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return _default(value)
+
+    return json.dumps(payload, default=_fallback, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the parts that identify a representation (endpoint, params, data version)"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+class EncodedPayload:
+    """A response body serialized once, with its gzip form"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL) if len(body) >= GZIP_MINIMUM_SIZE else None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzip_body or b"")
+
+
+class EncodedResponseCache:
+    """LRU of encoded payloads keyed by ETag, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, EncodedPayload]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[EncodedPayload]:
+        with self._lock:
+            encoded = self._entries.get(etag)
+            if encoded is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return encoded
+
+    def put(self, etag: str, encoded: EncodedPayload) -> None:
+        if encoded.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(etag, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[etag] = encoded
+            self._bytes += encoded.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    base = etag.strip('"')
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # The gzip representation carries a -gzip suffix on the same tag
+        if candidate.strip('"') in (base, f"{base}-gzip"):
+            return True
+    return False
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"})
+
+
+def _encoded_response(request: Request, encoded: EncodedPayload, etag: str, cache_control: str) -> Response:
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if encoded.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        # Content-Encoding set here makes GZipMiddleware pass the bytes through untouched
+        headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = '"' + etag.strip('"') + '-gzip"'
+        return Response(content=encoded.gzip_body, media_type="application/json", headers=headers)
+    headers["ETag"] = etag
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
+
+
+class FastJSONResponder:
+    """Builds dashboard API responses from payloads or from previously encoded bytes"""
+
+    def __init__(self, max_bytes: int, cache_control: str = "private, no-cache"):
+        self.cache = EncodedResponseCache(max_bytes)
+        self.cache_control = cache_control
+
+    def cached(self, request: Optional[Request], etag: str) -> Optional[Response]:
+        """
+        304 if the client already has this version, the stored bytes if this process
+        encoded it before, otherwise None (the caller builds the payload and calls respond).
+        """
+        if request is None:
+            return None
+        if _etag_matches(request, etag):
+            return _not_modified(etag, self.cache_control)
+        encoded = self.cache.get(etag)
+        if encoded is not None:
+            return _encoded_response(request, encoded, etag, self.cache_control)
+        return None
+
+    def respond(self, request: Optional[Request], payload: Any, etag: Optional[str] = None) -> Any:
+        """
+        Encode the payload once and answer with it. Pass the version-derived etag when
+        there is one; without it the ETag is a hash of the body. Direct (non-HTTP)
+        callers pass request=None and get the payload back unchanged.
+        """
+        if request is None:
+            return payload
+        if etag is not None:
+            response = self.cached(request, etag)
+            if response is not None:
+                return response
+        body = dumps(payload)
+        if etag is None:
+            # Content-derived tags can only save bandwidth; there is no version to look the bytes up by
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            if _etag_matches(request, etag):
+                return _not_modified(etag, self.cache_control)
+            return _encoded_response(request, EncodedPayload(body), etag, self.cache_control)
+        encoded = EncodedPayload(body)
+        self.cache.put(etag, encoded)
+        return _encoded_response(request, encoded, etag, self.cache_control)
+
+
+# Global instance
+fast_json = FastJSONResponder(int(os.getenv("RESPONSE_BYTES_CACHE_MB", "64")) * 1024 * 1024)
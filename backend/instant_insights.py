@@ -0,0 +1,476 @@
+"""
+Instant Insights - Deterministic dashboard insights that race the LLM
+On a cache miss the dashboard used to wait for a full GPT-4o round trip before
+showing anything. The InstantInsightEngine computes KPIs, charts, tables and
+plain-language findings (revenue deltas, top movers, stockout risk, anomalous
+days) from vectorized aggregates in milliseconds, in the same shape as the LLM
+analysis. InsightHedger starts the LLM analysis in the background, answers
+with whichever tier is ready, and the cached LLM analysis replaces the instant
+one on the next request once it lands.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from prompt_budget import records_frame
+
+logger = logging.getLogger(__name__)
+
+# How long a request waits for an LLM analysis already under way before answering with the instant tier
+HEDGE_SECONDS = float(os.getenv("INSTANT_INSIGHTS_HEDGE_SECONDS", "0.5"))
+
+# Background LLM analyses get their own budget: the request that started them is long gone
+BACKGROUND_LLM_TIMEOUT = float(os.getenv("INSTANT_INSIGHTS_LLM_TIMEOUT", "355"))
+
+# After a background analysis fails, serve the instant tier without retrying the LLM for this long
+FAILURE_BACKOFF_SECONDS = 60.0
+
+TIER_INSTANT = "instant"
+TIER_LLM = "llm"
+
+# Column roles, matched by exact name first, then as a suffix of flattened names (customer_total_spent)
+AMOUNT_COLUMNS = ("total_price", "revenue", "total_sales", "sales", "amount", "total", "subtotal_price", "price")
+DATE_COLUMNS = ("created_at", "order_date", "date", "processed_at", "transaction_date", "updated_at")
+ITEM_COLUMNS = ("sku", "product_title", "product_name", "title", "name", "product_id")
+UNITS_COLUMNS = ("quantity", "units_sold", "qty", "units")
+STOCK_COLUMNS = ("inventory_quantity", "on_hand", "available", "stock", "quantity_available")
+SEGMENT_COLUMNS = ("platform", "channel", "source_name", "category", "product_type", "financial_status",
+                   "fulfillment_status", "status", "region")
+
+# Days of cover below which an item counts as at risk of stocking out
+STOCKOUT_DAYS = 14
+
+# Robust z-score (median/MAD over the trailing two weeks) beyond which a day is anomalous
+ANOMALY_Z = 3.5
+
+
+def _find_column(df: pd.DataFrame, names: Sequence[str], exclude: Sequence[str] = ()) -> Optional[str]:
+    columns = [c for c in df.columns if isinstance(c, str) and c not in exclude]
+    lowered = {c.lower(): c for c in columns}
+    for name in names:
+        if name in lowered:
+            return lowered[name]
+    for name in names:
+        for column in columns:
+            if column.lower().endswith(f"_{name}"):
+                return column
+    return None
+
+
+def _numeric(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series, errors="coerce")
+
+
+def _dates(series: pd.Series) -> pd.Series:
+    parsed = pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601")
+    if parsed.notna().mean() < 0.5:
+        parsed = pd.to_datetime(series, errors="coerce", utc=True, format="mixed")
+    return parsed
+
+
+def _change(current: float, previous: float) -> Dict[str, Any]:
+    if previous:
+        percentage = round((current - previous) / abs(previous) * 100, 1)
+    else:
+        percentage = 100.0 if current else 0.0
+    direction = "up" if percentage > 1 else "down" if percentage < -1 else "stable"
+    return {"percentage": percentage, "direction": direction}
+
+
+def _money(value: float) -> str:
+    return f"${value:,.2f}"
+
+
+class InstantInsightEngine:
+    """Deterministic insights from one vectorized pass over the client's records"""
+
+    def analyze(self, records: Sequence[Dict[str, Any]], dashboard_type: str = "metrics") -> Dict[str, Any]:
+        started = time.perf_counter()
+        df = records_frame(records)
+        total = len(df)
+
+        amount_col = _find_column(df, AMOUNT_COLUMNS)
+        date_col = _find_column(df, DATE_COLUMNS)
+        item_col = _find_column(df, ITEM_COLUMNS)
+        stock_col = _find_column(df, STOCK_COLUMNS)
+        units_col = _find_column(df, UNITS_COLUMNS, exclude=[stock_col] if stock_col else ())
+        segment_col = _find_column(df, SEGMENT_COLUMNS)
+
+        frame = pd.DataFrame(index=df.index)
+        if amount_col:
+            frame["amount"] = _numeric(df[amount_col])
+        if date_col:
+            frame["date"] = _dates(df[date_col])
+        if item_col:
+            frame["item"] = df[item_col].astype("string")
+        if units_col:
+            frame["units"] = _numeric(df[units_col])
+        if stock_col:
+            frame["stock"] = _numeric(df[stock_col])
+        if segment_col:
+            frame["segment"] = df[segment_col].astype("string")
+
+        # The windows end at the newest record, so stale datasets still get meaningful comparisons
+        has_dates = "date" in frame and frame["date"].notna().any()
+        end = frame["date"].max() if has_dates else None
+        age_days = ((end - frame["date"]).dt.total_seconds() / 86400).to_numpy() if has_dates else None
+
+        kpis: List[Dict[str, Any]] = []
+        charts: List[Dict[str, Any]] = []
+        tables: List[Dict[str, Any]] = []
+        findings: List[str] = []
+        recommendations: List[str] = []
+
+        kpis.append(self._kpi("total_records", "Total Records", total, "number", "operations"))
+
+        if "amount" in frame and frame["amount"].notna().any():
+            amounts = frame["amount"]
+            kpis += [
+                self._kpi("total_revenue", "Total Revenue", round(float(amounts.sum()), 2), "currency", "revenue"),
+                self._kpi("average_order_value", "Average Order Value", round(float(amounts.mean()), 2), "currency", "revenue"),
+                self._kpi("median_order_value", "Median Order Value", round(float(amounts.median()), 2), "currency", "revenue"),
+            ]
+            if age_days is not None:
+                for days in (7, 30):
+                    current = float(amounts[age_days < days].sum())
+                    previous = float(amounts[(age_days >= days) & (age_days < 2 * days)].sum())
+                    change = _change(current, previous)
+                    kpis.append(self._kpi(
+                        f"revenue_last_{days}_days", f"Revenue Last {days} Days", round(current, 2), "currency", "revenue",
+                        dict(change, description=f"vs previous {days} days ({_money(previous)})"),
+                    ))
+                    if days == 30 and change["direction"] != "stable":
+                        findings.append(
+                            f"Revenue over the last 30 days is {_money(current)}, "
+                            f"{'up' if change['direction'] == 'up' else 'down'} {abs(change['percentage'])}% on the previous 30 days"
+                        )
+                        if change["direction"] == "down" and change["percentage"] < -10:
+                            recommendations.append("Revenue fell more than 10% month over month - review pricing, traffic and stock of top sellers")
+                charts.append(self._daily_revenue_chart(frame, age_days))
+                anomalies = self._anomalous_days(frame)
+                if anomalies:
+                    kpis.append(self._kpi("anomalous_days", "Anomalous Revenue Days", len(anomalies), "number", "performance"))
+                    tables.append(self._table(
+                        "revenue_anomalies", "Unusual Revenue Days", ["Date", "Revenue", "Typical", "Deviation"], anomalies,
+                    ))
+                    latest = anomalies[0]
+                    findings.append(f"{len(anomalies)} day(s) with unusual revenue; most recent {latest[0]} at {_money(latest[1])} vs a typical {_money(latest[2])}")
+
+        if age_days is not None:
+            noun = "orders" if amount_col else "records"
+            count_30 = int((age_days < 30).sum())
+            count_prev = int(((age_days >= 30) & (age_days < 60)).sum())
+            kpis.append(self._kpi(f"{noun}_last_30_days", f"{noun.title()} Last 30 Days", count_30, "number", "operations",
+                                  dict(_change(count_30, count_prev), description=f"vs previous 30 days ({count_prev})")))
+
+        if "segment" in frame and frame["segment"].notna().any():
+            by_segment = (frame.groupby("segment")["amount"].sum() if "amount" in frame
+                          else frame["segment"].value_counts()).sort_values(ascending=False)
+            if by_segment.sum():
+                share = float(by_segment.iloc[0] / by_segment.sum() * 100)
+                kpis.append(self._kpi(f"top_{segment_col}", f"Top {segment_col.replace('_', ' ').title()}",
+                                      f"{by_segment.index[0]} ({share:.0f}%)", "text", "customers"))
+                findings.append(f"{by_segment.index[0]} accounts for {share:.0f}% of {'revenue' if 'amount' in frame else 'records'} by {segment_col}")
+            charts.append(self._chart(
+                f"{segment_col}_breakdown", f"{'Revenue' if 'amount' in frame else 'Records'} by {segment_col.replace('_', ' ').title()}",
+                "pie", [{"name": str(k), "value": round(float(v), 2)} for k, v in by_segment.head(8).items()],
+            ))
+
+        if "item" in frame:
+            movers = self._top_movers(frame, age_days)
+            if movers is not None:
+                metric, rows = movers
+                tables.append(self._table("top_items", f"Top Items by {metric}", ["Item", metric, "Previous 30 Days", "Change %"], rows))
+                charts.append(self._chart(
+                    "top_movers", "Top Movers (30 days)", "bar",
+                    [{"name": row[0], "value": row[1] - row[2]} for row in sorted(rows, key=lambda r: abs(r[1] - r[2]), reverse=True)[:8]],
+                ))
+                rising = max(rows, key=lambda r: r[1] - r[2])
+                if rising[1] > rising[2]:
+                    findings.append(f"Top mover: {rising[0]} ({metric.lower()} {rising[2]:,.0f} -> {rising[1]:,.0f} over the last 30 days)")
+
+        if "stock" in frame and "item" in frame:
+            at_risk = self._stockout_risk(frame, age_days)
+            if at_risk is not None:
+                out_of_stock, rows = at_risk
+                kpis.append(self._kpi("out_of_stock_items", "Out of Stock Items", out_of_stock, "number", "inventory"))
+                kpis.append(self._kpi("stockout_risk_items", "Items at Stockout Risk", len(rows), "number", "inventory"))
+                if rows:
+                    tables.append(self._table("stockout_risk", "Stockout Risk", ["Item", "On Hand", "Daily Sales", "Days of Cover"], rows))
+                    findings.append(f"{len(rows)} item(s) have under {STOCKOUT_DAYS} days of stock at the current sales rate")
+                    recommendations.append(f"Reorder {', '.join(str(row[0]) for row in rows[:3])} - under {STOCKOUT_DAYS} days of cover")
+
+        core = [c for c in ("amount", "date", "item") if c in frame]
+        quality = round(float(1 - frame[core].isna().to_numpy().mean()), 2) if core and total else 0.0
+        if not findings:
+            findings.append(f"{total} records analyzed")
+        recommendations.append("A detailed AI analysis is being prepared and will replace this summary")
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f" Instant insights for {total} records in {elapsed_ms}ms ({len(kpis)} KPIs, {len(charts)} charts, {len(tables)} tables)")
+        return {
+            "business_analysis": {
+                "business_type": "ecommerce_retail" if amount_col and item_col else "other",
+                "business_insights": findings,
+                "recommendations": recommendations,
+                "data_quality_score": quality,
+                "confidence_level": 1.0,
+            },
+            "kpis": kpis,
+            "charts": charts,
+            "tables": tables,
+            "metadata": {
+                "insight_tier": TIER_INSTANT,
+                "dashboard_type": dashboard_type,
+                "generated_at": datetime.utcnow().isoformat(),
+                "compute_ms": elapsed_ms,
+                "columns": {"amount": amount_col, "date": date_col, "item": item_col, "units": units_col,
+                            "stock": stock_col, "segment": segment_col},
+            },
+            "total_records": total,
+        }
+
+    @staticmethod
+    def _kpi(name: str, display_name: str, value: Any, value_format: str, category: str,
+             trend: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            "id": name.replace("_", "-"),
+            "display_name": display_name,
+            "technical_name": name,
+            "value": f"{value:,}" if isinstance(value, (int, float)) and not isinstance(value, bool) else str(value),
+            "trend": trend or {"percentage": 0.0, "direction": "stable", "description": ""},
+            "format": value_format,
+            "category": category,
+        }
+
+    @staticmethod
+    def _chart(name: str, display_name: str, chart_type: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "id": name.replace("_", "-"),
+            "display_name": display_name,
+            "technical_name": name,
+            "chart_type": chart_type,
+            "data": data,
+            "config": {
+                "x_axis": {"field": "name", "display_name": "Name", "format": "text"},
+                "y_axis": {"field": "value", "display_name": "Value", "format": "number"},
+            },
+        }
+
+    @staticmethod
+    def _table(name: str, display_name: str, columns: List[str], rows: List[List[Any]]) -> Dict[str, Any]:
+        return {
+            "id": name.replace("_", "-"),
+            "display_name": display_name,
+            "technical_name": name,
+            "data": rows,
+            "columns": columns,
+            "config": {"sortable": True, "filterable": True, "pagination": True},
+        }
+
+    def _daily_revenue_chart(self, frame: pd.DataFrame, age_days: np.ndarray) -> Dict[str, Any]:
+        recent = frame[age_days < 90]
+        daily = recent.groupby(recent["date"].dt.strftime("%Y-%m-%d"))["amount"].sum()
+        return self._chart("daily_revenue", "Daily Revenue (90 days)", "line",
+                           [{"name": day, "value": round(float(value), 2)} for day, value in daily.items()])
+
+    @staticmethod
+    def _anomalous_days(frame: pd.DataFrame) -> List[List[Any]]:
+        """Days whose revenue is far from the trailing two-week median (robust z-score), newest first"""
+        dated = frame.dropna(subset=["date"])
+        daily = dated.set_index("date")["amount"].resample("D").sum()
+        if len(daily) < 14:
+            return []
+        baseline = daily.shift(1).rolling(14, min_periods=7)
+        median = baseline.median()
+        mad = (daily.shift(1) - median).abs().rolling(14, min_periods=7).median()
+        # A perfectly flat baseline has no spread; treat 5% of its level as the spread instead
+        scale = mad.where(mad > 0, 0.05 * median.abs()).replace(0, np.nan)
+        z = 0.6745 * (daily - median) / scale
+        flagged = daily[z.abs() > ANOMALY_Z].index[::-1][:10]
+        return [
+            [day.strftime("%Y-%m-%d"), round(float(daily[day]), 2), round(float(median[day]), 2), round(float(z[day]), 1)]
+            for day in flagged
+        ]
+
+    @staticmethod
+    def _top_movers(frame: pd.DataFrame, age_days: Optional[np.ndarray]) -> Optional[Tuple[str, List[List[Any]]]]:
+        """Per-item revenue (or units, or order count) in the last 30 days vs the 30 before"""
+        if "amount" in frame:
+            metric, values = "Revenue", frame["amount"]
+        elif "units" in frame:
+            metric, values = "Units", frame["units"]
+        else:
+            metric, values = "Orders", pd.Series(1.0, index=frame.index)
+        items = frame["item"]
+        if age_days is None:
+            totals = values.groupby(items).sum().sort_values(ascending=False).head(10)
+            if totals.empty:
+                return None
+            return metric, [[str(item), round(float(v), 2), 0.0, 0.0] for item, v in totals.items()]
+        window = np.select([age_days < 30, age_days < 60], ["current", "previous"], default="older")
+        pivot = values.groupby([items, window]).sum().unstack(fill_value=0.0)
+        if pivot.empty:
+            return None
+        current = pivot.get("current", pd.Series(0.0, index=pivot.index))
+        previous = pivot.get("previous", pd.Series(0.0, index=pivot.index))
+        top = current.sort_values(ascending=False).head(10).index
+        rows = []
+        for item in top:
+            cur, prev = float(current[item]), float(previous[item])
+            rows.append([str(item), round(cur, 2), round(prev, 2), _change(cur, prev)["percentage"]])
+        return metric, rows
+
+    @staticmethod
+    def _stockout_risk(frame: pd.DataFrame, age_days: Optional[np.ndarray]) -> Optional[Tuple[int, List[List[Any]]]]:
+        """Latest on-hand per item against its 30-day sales rate; items under STOCKOUT_DAYS of cover"""
+        stocked = frame.dropna(subset=["stock", "item"])
+        if stocked.empty:
+            return None
+        if "date" in stocked:
+            stocked = stocked.sort_values("date", na_position="first")
+        on_hand = stocked.groupby("item")["stock"].last()
+        out_of_stock = int((on_hand <= 0).sum())
+
+        if age_days is not None:
+            recent = frame[(age_days < 30) & frame["item"].notna().to_numpy()]
+            sold = recent["units"] if "units" in recent else pd.Series(1.0, index=recent.index)
+            velocity = sold.groupby(recent["item"]).sum().reindex(on_hand.index, fill_value=0.0) / 30
+        else:
+            velocity = pd.Series(0.0, index=on_hand.index)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cover = on_hand / velocity.replace(0, np.nan)
+        at_risk = on_hand[(on_hand <= 0) | (cover < STOCKOUT_DAYS)]
+        ordered = at_risk.index[np.argsort(cover.reindex(at_risk.index).fillna(0).to_numpy(), kind="stable")][:15]
+        rows = [
+            [str(item), round(float(on_hand[item]), 0), round(float(velocity[item]), 2),
+             round(float(cover[item]), 1) if np.isfinite(cover[item]) else 0.0]
+            for item in ordered
+        ]
+        return out_of_stock, rows
+
+
+class InsightHedger:
+    """
+    Races the LLM analysis against the instant tier. The LLM analysis runs as a
+    background task (one per key, outside the request's deadline, so the
+    response going out does not cancel it); the request waits at most
+    HEDGE_SECONDS for it and otherwise answers with the instant insights.
+    """
+
+    def __init__(self, engine: Optional[InstantInsightEngine] = None, hedge_seconds: float = HEDGE_SECONDS,
+                 max_memo: int = 64, max_backoff: int = 1024):
+        self.engine = engine or InstantInsightEngine()
+        self.hedge_seconds = hedge_seconds
+        self.max_memo = max_memo
+        self.max_backoff = max_backoff
+        self._pending: Dict[str, asyncio.Task] = {}
+        # Oldest failure first; every entry gets the same backoff, so this is also expiry order
+        self._failed_until: "OrderedDict[str, float]" = OrderedDict()
+        self._memo: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # instant() runs in worker threads (asyncio.to_thread) while the loop evicts entries
+        self._memo_lock = threading.Lock()
+        self.served = {TIER_INSTANT: 0, TIER_LLM: 0}
+
+    def _start(self, key: str, analyze: Callable[[], Awaitable[Dict[str, Any]]]) -> Optional[asyncio.Task]:
+        task = self._pending.get(key)
+        if task is not None:
+            return task
+        if time.monotonic() < self._failed_until.get(key, 0.0):
+            return None
+
+        async def run():
+            return await asyncio.wait_for(analyze(), BACKGROUND_LLM_TIMEOUT)
+
+        # A fresh context: the request's deadline (and its cancellation on disconnect) must not reach this task
+        task = asyncio.get_running_loop().create_task(run(), context=contextvars.Context())
+        self._pending[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+        if error is None and isinstance(task.result(), dict) and "error" in task.result():
+            error = task.result()["error"]
+        if error is not None:
+            self._back_off(key)
+            logger.warning(f" Background LLM analysis {key} failed: {error}")
+        else:
+            self._failed_until.pop(key, None)
+            with self._memo_lock:
+                self._memo.pop(key, None)
+            logger.info(f" Background LLM analysis {key} ready")
+
+    def _back_off(self, key: str):
+        """Record a failure, dropping expired entries and the oldest ones beyond max_backoff"""
+        now = time.monotonic()
+        while self._failed_until and next(iter(self._failed_until.values())) <= now:
+            self._failed_until.popitem(last=False)
+        self._failed_until.pop(key, None)
+        self._failed_until[key] = now + FAILURE_BACKOFF_SECONDS
+        while len(self._failed_until) > self.max_backoff:
+            self._failed_until.popitem(last=False)
+
+    def instant(self, key: str, records: Sequence[Dict[str, Any]], dashboard_type: str) -> Dict[str, Any]:
+        with self._memo_lock:
+            insights = self._memo.get(key)
+        if insights is None:
+            insights = self.engine.analyze(records, dashboard_type)
+            with self._memo_lock:
+                self._memo[key] = insights
+                while len(self._memo) > self.max_memo:
+                    self._memo.popitem(last=False)
+        return insights
+
+    async def race(self, key: str, analyze: Callable[[], Awaitable[Dict[str, Any]]],
+                   records: Callable[[], Sequence[Dict[str, Any]]], dashboard_type: str,
+                   wait_for_llm: bool = False) -> Tuple[Dict[str, Any], str]:
+        """
+        (insights, tier). With wait_for_llm (force_llm requests) the LLM result or
+        its error is returned as before; otherwise the LLM analysis keeps running in
+        the background and stores itself, and the instant tier answers meanwhile.
+        """
+        if wait_for_llm:
+            self.served[TIER_LLM] += 1
+            return await analyze(), TIER_LLM
+
+        task = self._start(key, analyze)
+        # The instant tier runs in a thread while the LLM analysis gets its hedge window
+        instant = asyncio.ensure_future(asyncio.to_thread(lambda: self.instant(key, records(), dashboard_type)))
+        if task is not None:
+            await asyncio.wait({task}, timeout=self.hedge_seconds)
+            if task.done() and not task.cancelled() and task.exception() is None:
+                result = task.result()
+                if isinstance(result, dict) and "error" not in result:
+                    instant.cancel()
+                    self.served[TIER_LLM] += 1
+                    return result, TIER_LLM
+        insights = await instant
+        self.served[TIER_INSTANT] += 1
+        return insights, TIER_INSTANT
+
+    def pending(self, key: str) -> bool:
+        return key in self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "served": dict(self.served),
+            "llm_in_background": len(self._pending),
+            "backing_off": sum(1 for until in self._failed_until.values() if until > time.monotonic()),
+        }
+
+
+# Global instance
+instant_insights = InsightHedger()
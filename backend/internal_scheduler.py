@@ -2,6 +2,7 @@
 Internal Scheduler for API Sync and SKU Analysis Jobs
 This runs INSIDE the FastAPI application - no external cron needed!
 Perfect for deployment on any platform (Heroku, Render, etc.)
+Every worker starts the scheduler, but jobs only run in the elected leader process.
 """
 
 import logging
@@ -20,6 +21,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import api_sync_cron
 import sku_analysis_cron
 import analytics_refresh_cron
+from leader_election import LeaderElector, create_lease
 
 # Set up logging with safe file handling
 handlers = [logging.StreamHandler(sys.stdout)]
@@ -42,8 +44,16 @@ logger = logging.getLogger(__name__)
 class InternalScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.leader: LeaderElector = None
         logger.info("Internal Scheduler initialized - PERFECT VERSION!")
     
+    def _should_run(self, job_name: str) -> bool:
+        """Scheduled jobs fire in every worker; only the leader runs them"""
+        if self.leader is None or self.leader.is_leader:
+            return True
+        logger.info(f"Skipping {job_name} - process {os.getpid()} is not the scheduler leader")
+        return False
+    
     def start_scheduler(self):
         """Start the internal scheduler with all cron jobs"""
         try:
@@ -51,6 +61,12 @@ class InternalScheduler:
             logger.info(f"Current process ID: {os.getpid()}")
             logger.info(f"Current working directory: {os.getcwd()}")
             
+            # Leader election first, so jobs firing right after start already see the result
+            if self.leader is None:
+                self.leader = LeaderElector(create_lease("internal_scheduler"))
+            self.leader.start()
+            logger.info(f"Scheduler leader election: {'LEADER' if self.leader.is_leader else 'follower'} ({self.leader.lease.backend})")
+            
             # API Sync Job - Daily at 4 AM
             logger.info("Scheduling API sync job to run daily at 4:00 AM")
             
@@ -122,6 +138,8 @@ class InternalScheduler:
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Internal scheduler stopped")
+        if self.leader is not None:
+            self.leader.stop()
             
     def get_jobs_status(self):
         """Get detailed status of scheduled jobs"""
@@ -150,6 +168,7 @@ class InternalScheduler:
                 "jobs": job_info,
                 "total_jobs": len(jobs),
                 "process_id": os.getpid(),
+                "leader": self.leader.status() if self.leader else None,
                 "message": f"Scheduler running with {len(jobs)} jobs"
             }
             
@@ -166,6 +185,8 @@ class InternalScheduler:
     
     async def _run_api_sync(self):
         """Wrapper to run API sync job"""
+        if not self._should_run("API sync"):
+            return
         try:
             logger.info("STARTING SCHEDULED API SYNC JOB...")
             
@@ -180,6 +201,8 @@ class InternalScheduler:
     
     async def _run_sku_analysis(self):
         """Wrapper to run SKU analysis job"""
+        if not self._should_run("SKU analysis"):
+            return
         try:
             logger.info("STARTING SCHEDULED SKU ANALYSIS JOB...")
             
@@ -195,6 +218,8 @@ class InternalScheduler:
     
     async def _run_analytics_refresh(self):
         """Wrapper to run analytics refresh job"""
+        if not self._should_run("analytics refresh"):
+            return
         try:
             logger.info("STARTING SCHEDULED ANALYTICS REFRESH JOB...")
             
@@ -0,0 +1,461 @@
+"""
+Job Queue - Durable, deduplicated background jobs for cache refreshes
+Jobs carry a dedup key: enqueueing a key that is already queued merges into the
+queued job instead of adding another. Starting a job puts its key on a cooldown
+(the job's debounce), so repeated triggers for the same tenant run at most once
+per window. Jobs are claimed by priority, then due time, under a lease; failed
+jobs are retried with exponential backoff and parked in a dead-letter list once
+their attempts run out.
+
+With REDIS_URL set, jobs live in Redis and survive restarts (an expired lease
+puts a job from a dead worker back in the queue); without it the in-memory
+store is used, which is also the fake the tests run against.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+DEAD_LETTER_LIMIT = 100
+
+
+@dataclass
+class Job:
+    kind: str
+    key: str
+    tenant: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    priority: int = PRIORITY_NORMAL
+    debounce: float = 0.0
+    max_attempts: int = 3
+    due_at: float = 0.0
+    attempts: int = 0
+    last_error: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, raw) -> "Job":
+        data = json.loads(raw)
+        # cjson (Redis scripts) turns an empty payload dict into an empty array
+        if not data.get("payload"):
+            data["payload"] = {}
+        return cls(**data)
+
+
+class InMemoryJobStore:
+    """Single-process store with the same semantics as the Redis one; not durable"""
+
+    durable = False
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._pending: Dict[str, str] = {}  # dedup key -> queued job id
+        self._running: Dict[str, float] = {}  # job id -> lease expiry
+        self._cooldowns: Dict[str, float] = {}
+        self._markers: Dict[str, tuple] = {}
+        self.dead: List[Dict[str, Any]] = []
+
+    async def enqueue(self, job: Job) -> bool:
+        existing_id = self._pending.get(job.key)
+        if existing_id is not None:
+            existing = self._jobs[existing_id]
+            existing.payload = job.payload
+            existing.priority = min(existing.priority, job.priority)
+            return False
+        job.due_at = max(job.due_at, self._cooldowns.get(job.key, 0.0))
+        self._jobs[job.id] = job
+        self._pending[job.key] = job.id
+        return True
+
+    def _requeue_expired(self, now: float):
+        for job_id, lease in list(self._running.items()):
+            if lease <= now:
+                del self._running[job_id]
+                job = self._jobs[job_id]
+                if job.key in self._pending:
+                    # A newer queued job already covers this key
+                    del self._jobs[job_id]
+                else:
+                    job.due_at = now
+                    self._pending[job.key] = job_id
+
+    async def claim(self, now: float, lease_seconds: float) -> Optional[Job]:
+        self._requeue_expired(now)
+        best: Optional[Job] = None
+        for job_id in self._pending.values():
+            job = self._jobs[job_id]
+            if job.due_at <= now and (best is None or (job.priority, job.due_at) < (best.priority, best.due_at)):
+                best = job
+        if best is None:
+            return None
+        del self._pending[best.key]
+        best.attempts += 1
+        self._running[best.id] = now + lease_seconds
+        if best.debounce:
+            self._cooldowns[best.key] = now + best.debounce
+        return best
+
+    async def complete(self, job: Job):
+        self._running.pop(job.id, None)
+        self._jobs.pop(job.id, None)
+
+    async def retry(self, job: Job, due_at: float):
+        self._running.pop(job.id, None)
+        if job.key in self._pending:
+            self._jobs.pop(job.id, None)
+            return
+        job.due_at = due_at
+        self._jobs[job.id] = job
+        self._pending[job.key] = job.id
+
+    async def bury(self, job: Job):
+        self._running.pop(job.id, None)
+        self._jobs.pop(job.id, None)
+        self.dead.insert(0, asdict(job))
+        del self.dead[DEAD_LETTER_LIMIT:]
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        entry = self._markers.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    async def set_marker(self, key: str, value: str, ttl: float):
+        self._markers[key] = (value, time.time() + ttl)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"queued": len(self._pending), "running": len(self._running), "dead": len(self.dead)}
+
+
+# Enqueue: merge into the queued job for the same key, else queue at max(due, cooldown)
+_ENQUEUE_SCRIPT = """
+local existing = redis.call('HGET', KEYS[2], ARGV[2])
+if existing then
+    local raw = redis.call('HGET', KEYS[1], existing)
+    if raw then
+        local job = cjson.decode(raw)
+        local new = cjson.decode(ARGV[1])
+        job.payload = new.payload
+        if new.priority < job.priority then
+            redis.call('ZREM', KEYS[3 + job.priority], existing)
+            redis.call('ZADD', KEYS[3 + new.priority], job.due_at, existing)
+            job.priority = new.priority
+        end
+        redis.call('HSET', KEYS[1], existing, cjson.encode(job))
+        return 0
+    end
+end
+local job = cjson.decode(ARGV[1])
+local cooldown = redis.call('GET', KEYS[6])
+if cooldown and tonumber(cooldown) > job.due_at then
+    job.due_at = tonumber(cooldown)
+end
+redis.call('HSET', KEYS[1], job.id, cjson.encode(job))
+redis.call('HSET', KEYS[2], job.key, job.id)
+redis.call('ZADD', KEYS[3 + job.priority], job.due_at, job.id)
+return 1
+"""
+
+# Claim: requeue jobs whose lease expired, then take the earliest due job of the highest priority
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+    redis.call('ZREM', KEYS[3], id)
+    local raw = redis.call('HGET', KEYS[1], id)
+    if raw then
+        local job = cjson.decode(raw)
+        if redis.call('HSETNX', KEYS[2], job.key, id) == 1 then
+            redis.call('ZADD', KEYS[4 + job.priority], now, id)
+        else
+            redis.call('HDEL', KEYS[1], id)
+        end
+    end
+end
+for i = 4, 6 do
+    local ids = redis.call('ZRANGEBYSCORE', KEYS[i], '-inf', now, 'LIMIT', 0, 1)
+    if #ids > 0 then
+        local id = ids[1]
+        redis.call('ZREM', KEYS[i], id)
+        local raw = redis.call('HGET', KEYS[1], id)
+        if raw then
+            local job = cjson.decode(raw)
+            if redis.call('HGET', KEYS[2], job.key) == id then
+                redis.call('HDEL', KEYS[2], job.key)
+            end
+            job.attempts = job.attempts + 1
+            raw = cjson.encode(job)
+            redis.call('HSET', KEYS[1], id, raw)
+            redis.call('ZADD', KEYS[3], now + tonumber(ARGV[2]), id)
+            if job.debounce > 0 then
+                redis.call('SET', ARGV[3] .. job.key, now + job.debounce, 'PX', math.ceil(job.debounce * 1000))
+            end
+            return raw
+        end
+    end
+end
+return false
+"""
+
+# Retry: back in the queue unless a newer job for the key is already queued
+_RETRY_SCRIPT = """
+redis.call('ZREM', KEYS[3], ARGV[1])
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+if not raw then
+    return 0
+end
+local job = cjson.decode(raw)
+if redis.call('HSETNX', KEYS[2], job.key, ARGV[1]) == 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 0
+end
+job.due_at = tonumber(ARGV[2])
+job.last_error = ARGV[3]
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(job))
+redis.call('ZADD', KEYS[4 + job.priority], job.due_at, ARGV[1])
+return 1
+"""
+
+
+class RedisJobStore:
+    """Durable store: job bodies in a hash, one sorted set per priority keyed by due time, leases in another"""
+
+    durable = True
+
+    def __init__(self, url: str, prefix: str = "jobs"):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._jobs_key = f"{prefix}:data"
+        self._pending_key = f"{prefix}:pending"
+        self._running_key = f"{prefix}:running"
+        self._ready_keys = [f"{prefix}:ready:{priority}" for priority in PRIORITIES]
+        self._dead_key = f"{prefix}:dead"
+        self._enqueue = self.redis.register_script(_ENQUEUE_SCRIPT)
+        self._claim = self.redis.register_script(_CLAIM_SCRIPT)
+        self._retry = self.redis.register_script(_RETRY_SCRIPT)
+
+    def _cooldown_key(self, key: str = "") -> str:
+        return f"{self.prefix}:cooldown:{key}"
+
+    async def enqueue(self, job: Job) -> bool:
+        keys = [self._jobs_key, self._pending_key, *self._ready_keys, self._cooldown_key(job.key)]
+        return bool(await self._enqueue(keys=keys, args=[job.to_json(), job.key]))
+
+    async def claim(self, now: float, lease_seconds: float) -> Optional[Job]:
+        keys = [self._jobs_key, self._pending_key, self._running_key, *self._ready_keys]
+        raw = await self._claim(keys=keys, args=[now, lease_seconds, self._cooldown_key()])
+        return Job.from_json(raw) if raw else None
+
+    async def complete(self, job: Job):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._running_key, job.id)
+            pipe.hdel(self._jobs_key, job.id)
+            await pipe.execute()
+
+    async def retry(self, job: Job, due_at: float):
+        keys = [self._jobs_key, self._pending_key, self._running_key, *self._ready_keys]
+        await self._retry(keys=keys, args=[job.id, due_at, job.last_error or ""])
+
+    async def bury(self, job: Job):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._running_key, job.id)
+            pipe.hdel(self._jobs_key, job.id)
+            pipe.lpush(self._dead_key, job.to_json())
+            pipe.ltrim(self._dead_key, 0, DEAD_LETTER_LIMIT - 1)
+            await pipe.execute()
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        return await self.redis.get(f"{self.prefix}:marker:{key}")
+
+    async def set_marker(self, key: str, value: str, ttl: float):
+        await self.redis.set(f"{self.prefix}:marker:{key}", value, px=int(ttl * 1000))
+
+    async def stats(self) -> Dict[str, Any]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hlen(self._pending_key)
+            pipe.zcard(self._running_key)
+            pipe.llen(self._dead_key)
+            queued, running, dead = await pipe.execute()
+        return {"queued": queued, "running": running, "dead": dead}
+
+
+Handler = Callable[[Job], Awaitable[Any]]
+
+
+class JobQueue:
+    """Enqueue API plus the worker loop that runs registered handlers on the app's event loop"""
+
+    def __init__(self, store=None, concurrency: int = 2, poll_interval: float = 1.0,
+                 job_timeout: float = 540.0, retry_base_delay: float = 30.0):
+        self.store = store if store is not None else InMemoryJobStore()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.retry_base_delay = retry_base_delay
+        # A lease outlives the job's own timeout, so only a dead worker's jobs are reclaimed
+        self.lease_seconds = job_timeout + 60.0
+        self.handlers: Dict[str, Handler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.completed = 0
+        self.failed = 0
+        self.deduplicated = 0
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    async def enqueue(self, kind: str, tenant: str, key: Optional[str] = None,
+                      payload: Optional[Dict[str, Any]] = None, priority: int = PRIORITY_NORMAL,
+                      delay: float = 0.0, debounce: float = 0.0, max_attempts: int = 3) -> bool:
+        """
+        Queue a job; returns False when it was merged into an already queued job
+        with the same key (or the store could not be reached). Never raises, so
+        request handlers can fire and forget.
+        """
+        job = Job(
+            kind=kind,
+            key=key or f"{kind}:{tenant}",
+            tenant=tenant,
+            payload=payload or {},
+            priority=priority,
+            debounce=debounce,
+            max_attempts=max_attempts,
+            due_at=time.time() + delay,
+        )
+        try:
+            queued = await self.store.enqueue(job)
+        except Exception as e:
+            logger.warning(f" Could not enqueue {job.key}: {e}")
+            return False
+        if queued:
+            logger.info(f" Queued {kind} job {job.key}")
+            if self._wakeup is not None:
+                self._wakeup.set()
+        else:
+            self.deduplicated += 1
+        return queued
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        """Value a handler recorded for the key (e.g. the data version it last built), if not expired"""
+        try:
+            return await self.store.get_marker(key)
+        except Exception as e:
+            logger.warning(f" Could not read marker for {key}: {e}")
+            return None
+
+    async def set_marker(self, key: str, value: str, ttl: float):
+        try:
+            await self.store.set_marker(key, value, ttl)
+        except Exception as e:
+            logger.warning(f" Could not write marker for {key}: {e}")
+
+    def _backoff(self, attempts: int) -> float:
+        return self.retry_base_delay * (2 ** (attempts - 1))
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job; returns False when nothing was due"""
+        job = await self.store.claim(time.time(), self.lease_seconds)
+        if job is None:
+            return False
+
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for {job.kind}")
+            await asyncio.wait_for(handler(job), timeout=self.job_timeout)
+        except asyncio.CancelledError:
+            # Shutting down - the lease brings the job back on the next start
+            raise
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}"
+            if job.attempts < job.max_attempts:
+                delay = self._backoff(job.attempts)
+                logger.warning(f" Job {job.key} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay:.0f}s: {job.last_error}")
+                await self.store.retry(job, time.time() + delay)
+            else:
+                logger.error(f" Job {job.key} failed after {job.attempts} attempts: {job.last_error}")
+                self.failed += 1
+                await self.store.bury(job)
+            return True
+
+        self.completed += 1
+        await self.store.complete(job)
+        return True
+
+    async def _worker(self):
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f" Job worker error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f" Job queue started with {self.concurrency} workers ({'durable' if self.store.durable else 'in-memory'} store)")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            stats = await self.store.stats()
+        except Exception as e:
+            stats = {"error": str(e)}
+        stats.update({
+            "durable": self.store.durable,
+            "workers": len(self._workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated,
+        })
+        return stats
+
+
+def create_job_store():
+    """Redis when REDIS_URL is configured, otherwise the in-memory store"""
+    url = os.getenv("REDIS_URL")
+    if url:
+        try:
+            return RedisJobStore(url)
+        except Exception as e:
+            logger.warning(f" Redis job store unavailable ({e}), using in-memory job store")
+    else:
+        logger.info(" REDIS_URL not set - background jobs use the in-memory store and do not survive restarts")
+    return InMemoryJobStore()
+
+
+# Global instance
+job_queue = JobQueue(
+    create_job_store(),
+    concurrency=int(os.getenv("JOB_QUEUE_CONCURRENCY", "2")),
+)
@@ -0,0 +1,98 @@
+"""
+Lazy Modules - Heavy AI subsystems loaded on first use
+The AI analyzers and the dashboard orchestrator (with LangChain, LangGraph,
+OpenAI and scikit-learn behind them) are module-level singletons that app.py
+used to import at boot, so every worker paid for them before it could answer a
+health check or an SKU page. A LazyInstance stands in for such a singleton and
+imports its module on the first attribute access; workers can optionally warm
+them in the background once they are already serving (WARM_AI_MODULES=true).
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Import the lazy subsystems in the background after startup instead of on first use
+WARM_AI_MODULES = os.getenv("WARM_AI_MODULES", "false").lower() == "true"
+
+# ... this long after the worker starts serving
+WARM_DELAY_SECONDS = float(os.getenv("WARM_AI_MODULES_DELAY_SECONDS", "5"))
+
+
+class LazyInstance:
+    """Proxy for `module.attribute` (a global instance); attribute access resolves it once"""
+
+    def __init__(self, module_name: str, attribute: Optional[str] = None):
+        object.__setattr__(self, "_lazy_module", module_name)
+        object.__setattr__(self, "_lazy_attribute", attribute or module_name)
+        object.__setattr__(self, "_lazy_target", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+        object.__setattr__(self, "_lazy_seconds", None)
+
+    def _lazy_resolve(self) -> Any:
+        target = self._lazy_target
+        if target is None:
+            with self._lazy_lock:
+                target = self._lazy_target
+                if target is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._lazy_module)
+                    target = getattr(module, self._lazy_attribute)
+                    object.__setattr__(self, "_lazy_seconds", time.perf_counter() - started)
+                    object.__setattr__(self, "_lazy_target", target)
+                    logger.info(f" Loaded {self._lazy_module} on first use in {self._lazy_seconds:.2f}s")
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._lazy_resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._lazy_resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_target is not None else "not loaded"
+        return f"<lazy {self._lazy_module}.{self._lazy_attribute} ({state})>"
+
+
+_registry: List[LazyInstance] = []
+
+
+def lazy_instance(module_name: str, attribute: Optional[str] = None) -> LazyInstance:
+    """A LazyInstance that warm_up() and stats() know about"""
+    instance = LazyInstance(module_name, attribute)
+    _registry.append(instance)
+    return instance
+
+
+async def warm_up(delay: float = WARM_DELAY_SECONDS):
+    """Resolve every registered instance off the event loop, one at a time"""
+    await asyncio.sleep(delay)
+    for instance in _registry:
+        try:
+            await asyncio.to_thread(instance._lazy_resolve)
+        except Exception as e:
+            logger.error(f" Background warm-up of {instance._lazy_module} failed: {e}")
+
+
+def start_warm_up() -> Optional[asyncio.Task]:
+    """Schedule warm_up() when WARM_AI_MODULES is set (call from the running app's lifespan)"""
+    if not WARM_AI_MODULES:
+        return None
+    return asyncio.create_task(warm_up())
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        instance._lazy_module: (
+            {"loaded": True, "load_seconds": round(instance._lazy_seconds, 3)}
+            if instance._lazy_target is not None
+            else {"loaded": False}
+        )
+        for instance in _registry
+    }
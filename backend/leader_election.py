@@ -0,0 +1,218 @@
+"""
+Leader Election - One process runs the scheduled jobs across gunicorn workers and instances
+Every worker starts the scheduler, but only the holder of the named lease runs
+its jobs. The lease is a row in scheduler_leases, taken or renewed with one
+conditional update and renewed from a background thread (so a job blocking the
+event loop cannot lose it); when the leader dies its lease expires and another
+process takes over. Without the table the fallback is an exclusive file lock,
+which covers the workers of a single host and is released by the OS when the
+holding process exits.
+"""
+
+import fcntl
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LEASE_TABLE = "scheduler_leases"
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class SupabaseLease:
+    """Lease row per name: holder plus expiry, taken over only once expired"""
+
+    backend = "lease_row"
+
+    def __init__(self, admin_client, name: str):
+        self.admin_client = admin_client
+        self.name = name
+
+    def try_acquire(self, holder: str, lease_seconds: float) -> bool:
+        now = datetime.now(timezone.utc)
+        row = {
+            "holder": holder,
+            "expires_at": _timestamp(now + timedelta(seconds=lease_seconds)),
+            "renewed_at": _timestamp(now),
+        }
+        # Renew our own lease or take over an expired one in a single statement
+        response = (
+            self.admin_client.table(LEASE_TABLE)
+            .update(row)
+            .eq("name", self.name)
+            .or_(f'holder.eq."{holder}",expires_at.lt."{_timestamp(now)}"')
+            .execute()
+        )
+        if response.data:
+            return True
+
+        try:
+            response = self.admin_client.table(LEASE_TABLE).insert({"name": self.name, **row}).execute()
+            return bool(response.data)
+        except Exception as e:
+            # Someone else holds the row (unique violation); anything else is a real error
+            if "23505" in str(e) or "duplicate key" in str(e):
+                return False
+            raise
+
+    def release(self, holder: str):
+        self.admin_client.table(LEASE_TABLE).update(
+            {"expires_at": _timestamp(datetime.now(timezone.utc))}
+        ).eq("name", self.name).eq("holder", holder).execute()
+
+    def current_leader(self) -> Optional[Dict[str, Any]]:
+        response = (
+            self.admin_client.table(LEASE_TABLE)
+            .select("holder, expires_at, renewed_at")
+            .eq("name", self.name)
+            .limit(1)
+            .execute()
+        )
+        if not response.data:
+            return None
+        row = response.data[0]
+        expires_at = datetime.fromisoformat(row["expires_at"].replace("Z", "+00:00"))
+        if expires_at <= datetime.now(timezone.utc):
+            return None
+        return row
+
+
+class FileLease:
+    """Exclusive flock on a shared file; the holder writes its id into it for status"""
+
+    backend = "file_lock"
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        directory = directory or os.getenv("LEADER_LOCK_DIR", "/tmp")
+        self.path = os.path.join(directory, f"{name}.leader.lock")
+        self._fd: Optional[int] = None
+
+    def try_acquire(self, holder: str, lease_seconds: float) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, holder.encode("utf-8"))
+        self._fd = fd
+        return True
+
+    def release(self, holder: str):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def current_leader(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                holder = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return {"holder": holder} if holder else None
+
+
+class LeaderElector:
+    """Keeps trying to take or renew the lease from a daemon thread; is_leader is read by job wrappers"""
+
+    def __init__(self, lease, lease_seconds: float = 60.0, renew_interval: float = 15.0,
+                 holder: Optional[str] = None):
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _set_leader(self, is_leader: bool):
+        if is_leader and not self.is_leader:
+            self.leader_since = time.time()
+            logger.info(f" {self.holder} is now the scheduler leader ({self.lease.backend})")
+        elif not is_leader and self.is_leader:
+            self.leader_since = None
+            logger.warning(f" {self.holder} lost scheduler leadership")
+        self.is_leader = is_leader
+
+    def check(self) -> bool:
+        """One acquire-or-renew round"""
+        try:
+            acquired = self.lease.try_acquire(self.holder, self.lease_seconds)
+            self.last_error = None
+        except Exception as e:
+            # Cannot tell whether the lease is still ours - stand down rather than risk two leaders
+            acquired = False
+            self.last_error = str(e)
+            logger.warning(f" Leader lease check failed for {self.holder}: {e}")
+        self._set_leader(acquired)
+        return acquired
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.renew_interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.is_leader:
+            try:
+                # Hand over now instead of making the next leader wait out the lease
+                self.lease.release(self.holder)
+            except Exception as e:
+                logger.warning(f" Could not release leader lease: {e}")
+            self.is_leader = False
+            self.leader_since = None
+            logger.info(f" {self.holder} released scheduler leadership")
+
+    def status(self) -> Dict[str, Any]:
+        try:
+            leader = self.lease.current_leader()
+        except Exception as e:
+            leader = {"error": str(e)}
+        return {
+            "backend": self.lease.backend,
+            "process": self.holder,
+            "is_leader": self.is_leader,
+            "leader_since": datetime.fromtimestamp(self.leader_since, timezone.utc).isoformat() if self.leader_since else None,
+            "leader": leader,
+            "last_error": self.last_error,
+        }
+
+
+def create_lease(name: str):
+    """Lease row when the scheduler_leases table is reachable, otherwise a host-local file lock"""
+    try:
+        from database import get_admin_client
+
+        admin_client = get_admin_client()
+        if admin_client is not None:
+            admin_client.table(LEASE_TABLE).select("name").limit(1).execute()
+            return SupabaseLease(admin_client, name)
+    except Exception as e:
+        logger.warning(f" Scheduler lease table unavailable ({e}), falling back to a local file lock")
+    return FileLease(name)
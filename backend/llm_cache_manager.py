@@ -1,64 +1,140 @@
 #!/usr/bin/env python3
 """
 LLM Cache Manager - Efficient caching for LLM responses
-Stores responses in database and only regenerates when client data changes
+Stores responses in database and only regenerates when client data changes.
+Entries are content-addressed by (prompt version, model, data fingerprint, tenant),
+concurrent identical requests share one in-flight completion, and a tenant's
+entries are expired explicitly when its data changes.
 """
 
+import asyncio
 import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+from datetime import datetime, timedelta, timezone
 from database import get_admin_client
+from data_fingerprint import fingerprint_records
+from llm_gateway import DEFAULT_MODEL
+from request_deadline import run_blocking
 import uuid
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Bump when the analysis prompts change, so responses from old prompts stop matching
+PROMPT_VERSION = "1"
+
+CACHE_MAX_AGE_DAYS = 7
+
+# data_hash of entries expired by invalidate_cache; never equal to a content address
+INVALIDATED_HASH = "invalidated"
+
+# Fields that change on every request but don't affect analysis
+VOLATILE_FIELDS = frozenset([
+    'retrieved_at', 'generated_at', 'last_updated', 'timestamp', 'request_id', 'cached',
+    'response_time', 'query_time', 'processing_time', 'metadata', 'last_fetched', 'fetch_time',
+])
+
 class LLMCacheManager:
     """Manages LLM response caching to avoid unnecessary regeneration"""
     
     def __init__(self):
         self.db_client = get_admin_client()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stores = 0
+    
+    def _normalize(self, value: Any) -> Any:
+        """Drop volatile fields at every level so the fingerprint only reflects business data"""
+        if isinstance(value, dict):
+            return {str(k): self._normalize(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+        if isinstance(value, (list, tuple)):
+            return [self._normalize(v) for v in value]
+        return value
     
     def _calculate_data_hash(self, client_data: Dict[str, Any]) -> str:
-        """Calculate SHA256 hash of client data to detect changes (excludes volatile fields)"""
+        """
+        Fingerprint of client data (excludes volatile fields): the rows' fingerprint -
+        the persisted bucket hashes when the lookup supplied one, otherwise one hash
+        per row - plus the remaining fields, instead of a sorted dump of every row
+        """
         try:
-            #  DEBUG: Log the structure of client_data to understand what's changing
-            logger.info(f" DEBUG: client_data keys: {list(client_data.keys()) if isinstance(client_data, dict) else type(client_data)}")
-            
-            # Create a copy of client_data excluding volatile fields that change frequently
-            stable_data = {}
-            excluded_count = 0
-            
-            # Only include the actual business data, not metadata
-            if isinstance(client_data, dict):
-                for key, value in client_data.items():
-                    # Exclude volatile fields that change on every request but don't affect analysis
-                    # Expanded list of volatile fields to exclude
-                    if key not in ['retrieved_at', 'generated_at', 'last_updated', 'timestamp', 'request_id', 'cached', 'response_time', 'query_time', 'processing_time', 'metadata', 'last_fetched', 'fetch_time']:
-                        stable_data[key] = value
-                    else:
-                        excluded_count += 1
-                        logger.info(f" DEBUG: Excluded volatile field '{key}': {str(value)[:100]}...")
-            else:
-                stable_data = client_data
-            
-            #  DEBUG: Log what we're actually hashing
-            logger.info(f" DEBUG: stable_data keys: {list(stable_data.keys()) if isinstance(stable_data, dict) else type(stable_data)}")
-            logger.info(f" DEBUG: Excluded {excluded_count} volatile fields")
+            rows_fingerprint = None
+            rest = client_data
+            if isinstance(client_data, dict) and isinstance(client_data.get("data"), list):
+                rows_fingerprint = client_data.get("data_fingerprint") or fingerprint_records(client_data["data"])
+                rest = {k: v for k, v in client_data.items() if k not in ("data", "data_fingerprint")}
             
-            # Convert to sorted JSON string for consistent hashing  
-            data_str = json.dumps(stable_data, sort_keys=True, default=str)
+            data_str = json.dumps({"rows": rows_fingerprint, "rest": self._normalize(rest)}, sort_keys=True, default=str)
             hash_result = hashlib.sha256(data_str.encode('utf-8')).hexdigest()
             
-            logger.info(f" Calculated data hash: {hash_result[:12]}... from {len(data_str)} chars (excluded {excluded_count} volatile fields)")
+            logger.debug(f" Calculated data hash: {hash_result[:12]}...")
             return hash_result
         except Exception as e:
             logger.error(f" Failed to calculate data hash: {e}")
             return "unknown"
     
-    async def get_cached_llm_response(self, client_id: str, client_data: Dict[str, Any], dashboard_type: str = "default") -> Optional[Dict[str, Any]]:
+    def cache_key(self, client_id: str, client_data: Dict[str, Any], dashboard_type: str = "default",
+                  prompt_version: str = PROMPT_VERSION, model: str = DEFAULT_MODEL) -> str:
+        """
+        Content address of an LLM response: (prompt version, model, data fingerprint, tenant).
+        Stored in data_hash, so a lookup is an exact match and any change in the data,
+        the prompts or the model is a miss rather than a stale hit.
+        """
+        key_str = json.dumps({
+            "prompt_version": prompt_version,
+            "model": model,
+            "tenant": str(client_id),
+            "dashboard_type": dashboard_type,
+            "data": self._calculate_data_hash(client_data),
+        }, sort_keys=True)
+        return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+    
+    def _extract_dashboard_response(self, cached_payload: Any, dashboard_type: str) -> Optional[Dict[str, Any]]:
+        """Unwrap the payload shapes store_cached_llm_response has written over time"""
+        if isinstance(cached_payload, str):
+            try:
+                cached_payload = json.loads(cached_payload)
+            except Exception:
+                logger.warning(" Failed to json.loads llm_response string")
+                return None
+        
+        if not isinstance(cached_payload, dict):
+            return None
+        
+        # Case A: {"metrics": {...}, "main": {...}}
+        if dashboard_type in cached_payload:
+            dashboard_response = cached_payload.get(dashboard_type)
+        # Case B: {"llm_analysis": {...}, ...}
+        elif "llm_analysis" in cached_payload:
+            dashboard_response = cached_payload.get("llm_analysis")
+        else:
+            # Already the payload we want
+            dashboard_response = cached_payload
+        return dashboard_response or None
+    
+    async def _lookup(self, client_id: str, data_hash: str, dashboard_type: str, max_age_days: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query = (
+            self.db_client
+            .table("llm_response_cache")
+            .select("llm_response, created_at")
+            .eq("client_id", client_id)
+            .eq("data_type", dashboard_type)
+            .eq("data_hash", data_hash)
+        )
+        if max_age_days is not None:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+            query = query.gte("created_at", cutoff)
+        response = await run_blocking(query.order("created_at", desc=True).limit(1).execute)
+        if not response.data:
+            return None
+        return self._extract_dashboard_response(response.data[0].get("llm_response"), dashboard_type)
+    
+    async def get_cached_llm_response(self, client_id: str, client_data: Dict[str, Any], dashboard_type: str = "default",
+                                      prompt_version: str = PROMPT_VERSION, model: str = DEFAULT_MODEL) -> Optional[Dict[str, Any]]:
         """
         Get cached LLM response if data hasn't changed
         
@@ -66,117 +142,124 @@ class LLMCacheManager:
             client_id: Client identifier
             client_data: Client data for hashing
             dashboard_type: Type of dashboard (business, performance, etc.) for separate caching
+            prompt_version: Version of the prompt templates that produced the response
+            model: Model that produced the response
         
         Returns:
-            - Cached response if data unchanged
-            - None if no cache or data changed
+            - Cached response if an entry exists for this exact content address
+            - None if no cache, data changed, prompts/model changed or entry expired
         """
         try:
-            # Calculate current data hash
-            current_hash = self._calculate_data_hash(client_data)
+            key = self.cache_key(client_id, client_data, dashboard_type, prompt_version, model)
+            dashboard_response = await self._lookup(client_id, key, dashboard_type, CACHE_MAX_AGE_DAYS)
+            
+            if dashboard_response:
+                self.hits += 1
+                logger.info(f" Cache HIT for client {client_id} ({dashboard_type}) - data unchanged")
+                return dashboard_response
             
-            # Get latest cache record for this client + dashboard_type
+            self.misses += 1
+            logger.info(f" Cache MISS for client {client_id} ({dashboard_type}) - data changed or no cache")
+            return None
+                
+        except Exception as e:
+            self.misses += 1
+            logger.error(f" Error checking cache for client {client_id} ({dashboard_type}): {e}")
+            return None
+    
+    async def single_flight(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run compute() once per key at a time: concurrent callers with the same key
+        await the in-flight call and share its result (or its error) instead of
+        starting their own completion. If the caller doing the work is cancelled,
+        a waiting caller takes over.
+        """
+        while True:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None or in_flight.cancelled():
+                break
+            self.coalesced += 1
+            # wait() rather than await, so the leader's cancellation does not cancel us
+            await asyncio.wait({in_flight})
+            if not in_flight.cancelled():
+                return in_flight.result()
+        
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = task
+        try:
+            return await task
+        finally:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+    
+    async def get_or_compute(self, client_id: str, client_data: Dict[str, Any], compute: Callable[[], Awaitable[Any]],
+                             dashboard_type: str = "default", prompt_version: str = PROMPT_VERSION,
+                             model: str = DEFAULT_MODEL) -> Any:
+        """
+        Cached response for this content address, otherwise compute() once (shared
+        by concurrent identical requests) and store it. Results carrying an "error"
+        key are returned but not cached.
+        """
+        cached = await self.get_cached_llm_response(client_id, client_data, dashboard_type, prompt_version, model)
+        if cached is not None:
+            return cached
+        
+        key = self.cache_key(client_id, client_data, dashboard_type, prompt_version, model)
+        
+        async def compute_and_store():
+            result = await compute()
+            if isinstance(result, dict) and "error" not in result:
+                await self.store_cached_llm_response(
+                    client_id, client_data, result, dashboard_type,
+                    prompt_version=prompt_version, model=model
+                )
+            return result
+        
+        return await self.single_flight(key, compute_and_store)
+    
+    async def get_cached_llm_response_for_version(self, client_id: str, data_version: str, dashboard_type: str = "default") -> Optional[Dict[str, Any]]:
+        """
+        Get a cached LLM response stored for an exact data version
+        (see LazyClientData.probe), without needing the client data itself.
+        """
+        try:
+            dashboard_response = await self._lookup(client_id, data_version, dashboard_type)
+            
+            if dashboard_response:
+                logger.info(f" Cache HIT for client {client_id} ({dashboard_type}) at version {data_version[:12]}...")
+            else:
+                logger.info(f" Cache MISS for client {client_id} ({dashboard_type}) at version {data_version[:12]}...")
+            return dashboard_response
+            
+        except Exception as e:
+            logger.error(f" Error checking versioned cache for client {client_id} ({dashboard_type}): {e}")
+            return None
+
+    async def get_cached_version_stamp(self, client_id: str, data_version: str, dashboard_type: str = "default") -> Optional[str]:
+        """
+        created_at of the cached response for an exact data version, without reading
+        the (large) llm_response column. Together with the version it identifies the
+        cached representation, so HTTP responses can be tagged before it is fetched.
+        """
+        try:
             response = (
                 self.db_client
                 .table("llm_response_cache")
-                .select("*")
+                .select("created_at")
                 .eq("client_id", client_id)
                 .eq("data_type", dashboard_type)
+                .eq("data_hash", data_version)
                 .order("created_at", desc=True)
                 .limit(1)
                 .execute()
             )
-            
             if response.data:
-                cached_record = response.data[0]
-                cached_hash = cached_record.get("data_hash")
-                cached_responses_json = cached_record.get("llm_response")
-                created_at = cached_record.get("created_at")
-                
-                # Check if data hash matches (data hasn't changed)
-                logger.info(f" Hash comparison for client {client_id} ({dashboard_type}): cached={cached_hash[:12]}... vs current={current_hash[:12]}...")
-                
-                #  DISABLE CACHE FOR PLATFORM SWITCHING - FORCE FRESH DATA
-                logger.info(f" FORCING fresh data - no cache for platform switching")
-                return None
-                
-                # Old cache logic (disabled)
-                if False and cached_responses_json:
-                    logger.info(f" TEMP: Using cache regardless of hash for debugging purposes")
-                    try:
-                        # Parse cached payload (string or dict) and normalize shapes
-                        if isinstance(cached_responses_json, str):
-                            try:
-                                cached_payload = json.loads(cached_responses_json)
-                            except Exception:
-                                # If it's already a JSON-like string of the final object
-                                logger.warning(" Failed to json.loads llm_response string; treating as raw text")
-                                cached_payload = cached_responses_json
-                        else:
-                            cached_payload = cached_responses_json
-
-                        dashboard_response = None
-                        if isinstance(cached_payload, dict):
-                            # Case A: {"metrics": {...}, "main": {...}}
-                            if dashboard_type in cached_payload:
-                                dashboard_response = cached_payload.get(dashboard_type)
-                            # Case B: {"llm_analysis": {...}, ...}
-                            elif "llm_analysis" in cached_payload:
-                                dashboard_response = cached_payload.get("llm_analysis")
-                            else:
-                                # Already the payload we want
-                                dashboard_response = cached_payload
-                        else:
-                            # Unexpected type; return None
-                            dashboard_response = None
-                        
-                        if dashboard_response:
-                            logger.info(f" Cache HIT for client {client_id} ({dashboard_type}) - data unchanged")
-                            
-                            # Check if cache is still valid (not too old)
-                            try:
-                                # Handle timezone-aware datetime parsing
-                                created_at_str = created_at
-                                if created_at_str.endswith('Z'):
-                                    created_at_str = created_at_str.replace('Z', '+00:00')
-                                
-                                created_at_dt = datetime.fromisoformat(created_at_str)
-                                
-                                # Ensure both datetimes are timezone-aware
-                                if created_at_dt.tzinfo is None:
-                                    # If created_at is naive, assume UTC
-                                    from datetime import timezone
-                                    created_at_dt = created_at_dt.replace(tzinfo=timezone.utc)
-                                
-                                current_time = datetime.now(created_at_dt.tzinfo)
-                                cache_age = current_time - created_at_dt
-                                
-                                if cache_age.days < 7:  # Cache valid for 7 days
-                                    return dashboard_response
-                                else:
-                                    logger.info(f" Cache expired for client {client_id} ({dashboard_type}) (age: {cache_age.days} days)")
-                                    return None
-                            except Exception as time_error:
-                                logger.warning(f" Failed to parse cache timestamp for client {client_id} ({dashboard_type}): {time_error}")
-                                # If we can't parse the timestamp, assume cache is valid
-                                return dashboard_response
-                        else:
-                            logger.info(f" No {dashboard_type} cache found for client {client_id}")
-                            return None
-                    except Exception as parse_error:
-                        logger.warning(f" Failed to parse cached responses for client {client_id}: {parse_error}")
-                        return None
-                else:
-                    logger.info(f" Cache MISS for client {client_id} ({dashboard_type}) - data changed or no cache")
-                    return None
-            else:
-                logger.info(f" No cache found for client {client_id} ({dashboard_type})")
-                return None
-                
+                return response.data[0].get("created_at")
+            return None
         except Exception as e:
-            logger.error(f" Error checking cache for client {client_id} ({dashboard_type}): {e}")
+            logger.error(f" Error reading cache stamp for client {client_id} ({dashboard_type}): {e}")
             return None
-    
+
     async def get_most_recent_analysis(self, client_id: str, dashboard_type: str) -> Optional[Dict[str, Any]]:
         """Get the most recent cached analysis for a client and dashboard type"""
         try:
@@ -285,16 +368,18 @@ class LLMCacheManager:
             logger.error(f" Failed to get analysis by snapshot date: {e}")
             return None
 
-    async def store_cached_llm_response(self, client_id: str, client_data: Dict[str, Any], llm_response: Dict[str, Any], dashboard_type: str = "default", data_snapshot_date: Optional[str] = None) -> bool:
+    async def store_cached_llm_response(self, client_id: str, client_data: Dict[str, Any], llm_response: Dict[str, Any], dashboard_type: str = "default", data_snapshot_date: Optional[str] = None, data_version: Optional[str] = None,
+                                        prompt_version: str = PROMPT_VERSION, model: str = DEFAULT_MODEL) -> bool:
         """
         Store LLM response and keep a single rolling entry per day per dashboard type.
+        The entry is keyed by its content address (see cache_key); when data_version
+        is given it is stored as the key instead.
         """
         try:
-            data_hash = self._calculate_data_hash(client_data)
+            data_hash = data_version or self.cache_key(client_id, client_data, dashboard_type, prompt_version, model)
 
             # Remove existing entries for today for this client/type (using created_at instead of analysis_date)
             try:
-                from datetime import timezone
                 current_date = datetime.now(timezone.utc).date().isoformat()
                 day_start = f"{current_date}T00:00:00+00:00"
                 day_end = f"{current_date}T23:59:59+00:00"
@@ -330,6 +415,7 @@ class LLMCacheManager:
             try:
                 response = self.db_client.table("llm_response_cache").insert(cache_record).execute()
                 if response.data:
+                    self.stores += 1
                     logger.info(
                         f" Cached daily LLM response for client {client_id} ({dashboard_type}) (hash: {data_hash[:8]}...)"
                     )
@@ -351,6 +437,7 @@ class LLMCacheManager:
                     }
                     response = self.db_client.table("llm_response_cache").insert(minimal_record).execute()
                     if response.data:
+                        self.stores += 1
                         logger.info(f" Cached minimal LLM response for client {client_id} ({dashboard_type})")
                         return True
                 except Exception as minimal_error:
@@ -395,6 +482,9 @@ class LLMCacheManager:
         """
         Invalidate cache for a specific client and/or dashboard type
         
+        Entries are expired rather than deleted: their key no longer matches any
+        lookup, but the rows stay available to the daily history readers.
+        
         Args:
             client_id: Client identifier
             dashboard_type: Optional dashboard type. If None, invalidates all dashboards for client
@@ -404,49 +494,26 @@ class LLMCacheManager:
             - False if invalidation failed
         """
         try:
+            query = (
+                self.db_client
+                .table("llm_response_cache")
+                .update({"data_hash": INVALIDATED_HASH, "updated_at": datetime.now().isoformat()})
+                .eq("client_id", client_id)
+                .neq("data_hash", INVALIDATED_HASH)
+            )
             if dashboard_type:
-                # Invalidate specific dashboard type only - remove it from the JSON structure
-                existing = self.db_client.table("llm_response_cache").select("*").eq("client_id", client_id).limit(1).execute()
-                
-                if existing.data:
-                    existing_record = existing.data[0]
-                    existing_responses_json = existing_record.get("llm_response", "{}")
-                    
-                    try:
-                        existing_responses = json.loads(existing_responses_json)
-                        
-                        # Remove the specific dashboard type
-                        if dashboard_type in existing_responses:
-                            del existing_responses[dashboard_type]
-                            
-                            if existing_responses:
-                                # Update record with remaining dashboard types
-                                update_record = {
-                                    "llm_response": json.dumps(existing_responses),
-                                    "updated_at": datetime.now().isoformat()
-                                }
-                                response = self.db_client.table("llm_response_cache").update(update_record).eq("client_id", client_id).execute()
-                                logger.info(f"️ Invalidated {dashboard_type} cache for client {client_id}")
-                            else:
-                                # No dashboard types left, delete the entire record
-                                response = self.db_client.table("llm_response_cache").delete().eq("client_id", client_id).execute()
-                                logger.info(f"️ Invalidated {dashboard_type} cache (last one) for client {client_id}")
-                        else:
-                            logger.info(f"ℹ️ No {dashboard_type} cache found to invalidate for client {client_id}")
-                    except Exception as parse_error:
-                        logger.warning(f" Failed to parse cache for invalidation, deleting entire record for client {client_id}: {parse_error}")
-                        response = self.db_client.table("llm_response_cache").delete().eq("client_id", client_id).execute()
-                else:
-                    logger.info(f"ℹ️ No cache found to invalidate for client {client_id}")
-            else:
-                # Invalidate all dashboard types for this client - delete entire record
-                response = self.db_client.table("llm_response_cache").delete().eq("client_id", client_id).execute()
-                logger.info(f"️ Invalidated ALL dashboard caches for client {client_id}")
+                query = query.eq("data_type", dashboard_type)
+            response = await run_blocking(query.execute)
+            logger.info(f"️ Invalidated {dashboard_type or 'ALL'} cache for client {client_id} ({len(response.data or [])} entries)")
             return True
         except Exception as e:
             logger.error(f" Error invalidating cache for client {client_id} ({dashboard_type}): {e}")
             return False
     
+    async def notify_data_changed(self, client_id: str):
+        """Called after a client's data is written (upload, sync, organize); never raises"""
+        await self.invalidate_cache(str(client_id))
+    
     async def invalidate_all_cache(self) -> bool:
         """
         Invalidate all cached responses (use with caution)
@@ -463,11 +530,23 @@ class LLMCacheManager:
             logger.error(f" Error invalidating all cache: {e}")
             return False
     
+    def stats(self) -> Dict[str, Any]:
+        """Lookups served by this process since start"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "stores": self.stores,
+            "in_flight": len(self._in_flight),
+        }
+    
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics with dashboard-type breakdown"""
         try:
             # Get all cache entries with dashboard type breakdown
-            response = self.db_client.table("llm_response_cache").select("client_id", "data_type", "created_at").execute()
+            response = self.db_client.table("llm_response_cache").select("client_id", "data_type", "data_hash", "created_at").execute()
             
             if not response.data:
                 return {
@@ -475,29 +554,22 @@ class LLMCacheManager:
                     "by_dashboard_type": {},
                     "unique_clients": 0,
                     "avg_age_days": 0,
-                    "cache_hit_potential": "0%"
+                    "cache_hit_potential": "0%",
+                    "lookups": self.stats()
                 }
             
             # Analyze cache data
             dashboard_types = {}
             unique_clients = set()
             ages = []
+            invalidated = 0
             
             for record in response.data:
-                # Extract client_id and parse dashboard types from JSON
                 client_id = record.get("client_id", "")
-                cached_responses_json = record.get("llm_response", "{}")
-                
-                try:
-                    # Parse the cached responses to count dashboard types
-                    cached_responses = json.loads(cached_responses_json)
-                    
-                    # Count each dashboard type in this record
-                    for dashboard_type in cached_responses.keys():
-                        dashboard_types[dashboard_type] = dashboard_types.get(dashboard_type, 0) + 1
-                except Exception:
-                    # If parsing fails, count as unknown
-                    dashboard_types["unknown"] = dashboard_types.get("unknown", 0) + 1
+                dashboard_type = record.get("data_type") or "unknown"
+                dashboard_types[dashboard_type] = dashboard_types.get(dashboard_type, 0) + 1
+                if record.get("data_hash") == INVALIDATED_HASH:
+                    invalidated += 1
                 
                 # Add to unique clients set
                 unique_clients.add(client_id)
@@ -511,7 +583,6 @@ class LLMCacheManager:
                     created_at = datetime.fromisoformat(created_at_str)
                     
                     if created_at.tzinfo is None:
-                        from datetime import timezone
                         created_at = created_at.replace(tzinfo=timezone.utc)
                     
                     current_time = datetime.now(created_at.tzinfo)
@@ -521,22 +592,25 @@ class LLMCacheManager:
                     logger.warning(f" Failed to parse created_at: {parse_error}")
                     continue
             
+            avg_age = sum(ages) / len(ages) if ages else 0
             oldest_cache = max(ages) if ages else 0
             newest_cache = min(ages) if ages else 0
             
             return {
                 "total_entries": len(response.data),
+                "invalidated_entries": invalidated,
                 "by_dashboard_type": dashboard_types,
                 "unique_clients": len(unique_clients),
                 "avg_age_days": round(avg_age, 1),
                 "oldest_cache_days": oldest_cache,
                 "newest_cache_days": newest_cache,
-                "cache_efficiency": f"{len(unique_clients) * 3}/{len(response.data)}" if len(response.data) > 0 else "0/0"
+                "cache_efficiency": f"{len(unique_clients) * 3}/{len(response.data)}" if len(response.data) > 0 else "0/0",
+                "lookups": self.stats()
             }
             
         except Exception as e:
             logger.error(f" Error getting cache stats: {e}")
-            return {"error": str(e)}
+            return {"error": str(e), "lookups": self.stats()}
     
     async def cleanup_expired_cache(self, max_age_days: int = 7) -> int:
         """
@@ -547,7 +621,6 @@ class LLMCacheManager:
         """
         try:
             # Use timezone-aware datetime for cutoff
-            from datetime import timezone
             cutoff_date = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
             
             # Get expired entries
@@ -0,0 +1,210 @@
+"""
+LLM Gateway - One shared, non-blocking OpenAI client for every module
+Completions go through a single AsyncOpenAI client with a pooled HTTP connection
+set, so a slow completion awaits instead of freezing the worker's event loop.
+Calls are bounded per process and per client, time out within the request's
+deadline, and transient failures (rate limits, timeouts, 5xx, dropped
+connections) are retried with full-jitter exponential backoff. Independent
+per-template steps are fanned out with fan_out() instead of awaited in turn.
+The openai package itself is imported on the first completion, not at boot.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Iterable, List, Optional, Tuple, Type
+
+import httpx
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+from request_deadline import call_timeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o"
+
+# Independent steps one caller runs at once (three templates -> one round-trip)
+FAN_OUT_LIMIT = int(os.getenv("LLM_FAN_OUT_LIMIT", "3"))
+
+
+def retryable_errors() -> Tuple[Type[Exception], ...]:
+    """Transient OpenAI errors (rate limits, timeouts, dropped connections, 5xx)"""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+# LangChain message types to chat roles
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+class LLMGateway:
+    """Shared client plus admission (process and per-client semaphores), deadline-aware timeouts and retries"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: int = 8, per_tenant_limit: int = 3, timeout: float = 120.0,
+                 max_retries: int = 3, retry_base_delay: float = 1.0, retry_max_delay: float = 30.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.per_tenant_limit = per_tenant_limit
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional["AsyncOpenAI"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tenant_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tenant_waiters: Dict[str, int] = {}
+        self.in_flight = 0
+        self.retries = 0
+
+    def _bind(self) -> "AsyncOpenAI":
+        """Client and semaphores belong to one event loop; scripts that call asyncio.run() get fresh ones"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._tenant_slots = {}
+            self._tenant_waiters = {}
+            self._client = None
+            self._loop = loop
+        if self._client is None:
+            api_key = self.api_key or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise Exception("OpenAI API key not configured")
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=self.base_url or os.getenv("OPENAI_BASE_URL") or None,
+                # Retries (with jitter) are ours, so they can respect the deadline and the slots
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency,
+                    ),
+                    timeout=httpx.Timeout(self.timeout, connect=10.0),
+                ),
+            )
+        return self._client
+
+    def reset(self):
+        """Drop the shared client so the next call builds one from the current environment"""
+        self._client = None
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.retry_max_delay))
+            except ValueError:
+                pass
+        return delay
+
+    async def _call(self, client: "AsyncOpenAI", tenant: Optional[str], timeout: Optional[float], kwargs):
+        tenant_slots = None
+        if tenant:
+            tenant_slots = self._tenant_slots.get(tenant)
+            if tenant_slots is None:
+                tenant_slots = self._tenant_slots[tenant] = asyncio.Semaphore(self.per_tenant_limit)
+            self._tenant_waiters[tenant] = self._tenant_waiters.get(tenant, 0) + 1
+        try:
+            # Client quota first, so one client's backlog never holds process slots while waiting
+            if tenant_slots is not None:
+                await tenant_slots.acquire()
+            try:
+                async with self._slots:
+                    self.in_flight += 1
+                    try:
+                        return await client.chat.completions.create(timeout=call_timeout(timeout), **kwargs)
+                    finally:
+                        self.in_flight -= 1
+            finally:
+                if tenant_slots is not None:
+                    tenant_slots.release()
+        finally:
+            if tenant:
+                self._tenant_waiters[tenant] -= 1
+                if not self._tenant_waiters[tenant]:
+                    del self._tenant_waiters[tenant]
+                    del self._tenant_slots[tenant]
+
+    async def chat(self, tenant: Optional[str] = None, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        chat.completions.create through the shared client. Takes the same keyword
+        arguments (model defaults to gpt-4o) and returns the same ChatCompletion.
+        """
+        client = self._bind()
+        errors = retryable_errors()
+        kwargs.setdefault("model", DEFAULT_MODEL)
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            try:
+                return await self._call(client, tenant, timeout, kwargs)
+            except errors as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                remaining = call_timeout()
+                if remaining is not None and delay >= remaining:
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(f" LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def complete(self, messages: Iterable[Any], tenant: Optional[str] = None,
+                       timeout: Optional[float] = None, **kwargs) -> str:
+        """Text of one completion; messages may be chat dicts or LangChain messages (prompt.format_messages())"""
+        chat_messages = [
+            message if isinstance(message, dict)
+            else {"role": _ROLES.get(message.type, "user"), "content": message.content}
+            for message in messages
+        ]
+        response = await self.chat(tenant=tenant, timeout=timeout, messages=chat_messages, **kwargs)
+        return response.choices[0].message.content or ""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "per_tenant_limit": self.per_tenant_limit,
+            "busy_clients": len(self._tenant_slots),
+            "retries": self.retries,
+        }
+
+
+async def fan_out(aws: Iterable[Awaitable[Any]], limit: int = FAN_OUT_LIMIT) -> List[Any]:
+    """
+    Await independent steps concurrently, at most `limit` at a time. Results come
+    back in input order; a step that raised is returned as its exception, so the
+    caller can substitute that item's fallback and keep the rest.
+    """
+    slots = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw: Awaitable[Any]) -> Any:
+        async with slots:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=True)
+
+
+# Global instance
+llm_gateway = LLMGateway(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    per_tenant_limit=int(os.getenv("LLM_PER_CLIENT_LIMIT", "3")),
+    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "120")),
+)
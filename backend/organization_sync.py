@@ -0,0 +1,150 @@
+"""
+Organization Sync - Watermarks and upserts for incremental data organization
+Keeps a per-client, per-pipeline high-water mark on client_data.created_at so
+organizing a tenant only reads rows added since the last run, and writes the
+organized rows with natural-key upserts instead of delete-all-and-reinsert.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_TABLE = "organization_watermarks"
+
+# Natural key of each organized table - the upsert conflict target, so each one must
+# have a unique constraint or index in the SQL schema
+NATURAL_KEYS = {
+    'shopify_orders': 'order_id',
+    'shopify_products': 'variant_id',  # stored one row per variant
+    'shopify_variants': 'variant_id',
+    'amazon_orders': 'order_id',
+    'amazon_products': 'asin',
+    'amazon_incoming_inventory': 'shipment_id',
+}
+
+# PostgREST caps a single select at 1000 rows by default
+PAGE_SIZE = 1000
+UPSERT_BATCH_SIZE = 500
+
+
+class WatermarkStore:
+    """Reads and advances the last organized client_data.created_at per pipeline"""
+
+    def __init__(self, admin_client):
+        self.admin_client = admin_client
+
+    def get(self, client_id: str, pipeline: str) -> Optional[str]:
+        try:
+            response = (
+                self.admin_client.table(WATERMARK_TABLE)
+                .select("last_created_at")
+                .eq("client_id", client_id)
+                .eq("pipeline", pipeline)
+                .limit(1)
+                .execute()
+            )
+            if response.data:
+                return response.data[0].get("last_created_at")
+        except Exception as e:
+            # Without the table every run is a full (but still idempotent) pass
+            logger.warning(f" Could not read {pipeline} watermark for {client_id}: {e}")
+        return None
+
+    def advance(self, client_id: str, pipeline: str, last_created_at: str, rows_processed: int) -> bool:
+        try:
+            self.admin_client.table(WATERMARK_TABLE).upsert(
+                {
+                    "client_id": client_id,
+                    "pipeline": pipeline,
+                    "last_created_at": last_created_at,
+                    "rows_processed": rows_processed,
+                    "updated_at": datetime.utcnow().isoformat(),
+                },
+                on_conflict="client_id,pipeline",
+            ).execute()
+            logger.info(f" {pipeline} watermark for {client_id} advanced to {last_created_at}")
+            return True
+        except Exception as e:
+            logger.warning(f" Could not advance {pipeline} watermark for {client_id}: {e}")
+            return False
+
+
+def fetch_client_rows_since(admin_client, client_id: str, since: Optional[str] = None,
+                            page_size: int = PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    """
+    Page through raw client_data rows created at or after `since`, oldest first.
+    Returns the row payloads and the newest created_at seen (the next watermark).
+    Rows at exactly `since` are read again; the upserts make that harmless and it
+    keeps rows committed late with the same timestamp from being skipped.
+
+    Pages are keyset pages on (created_at, id): rows from one batch insert share a
+    created_at, so offsets over created_at alone could reorder them between pages,
+    and rows inserted during the run would shift every later offset.
+    """
+    records: List[Any] = []
+    newest = since
+    after: Optional[Tuple[str, Any]] = None
+    while True:
+        query = (
+            admin_client.table("client_data")
+            .select("id, data, created_at")
+            .eq("client_id", client_id)
+            # Skip rows written back by DataOrganizer itself
+            .not_.like("table_name", "organized_%")
+        )
+        if after:
+            created_at, row_id = after
+            query = query.or_(
+                f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt."{row_id}")'
+            )
+        elif since:
+            query = query.gte("created_at", since)
+        response = query.order("created_at").order("id").limit(page_size).execute()
+        rows = response.data or []
+        for row in rows:
+            if row.get("data") is not None:
+                records.append(row["data"])
+        if rows:
+            newest = rows[-1].get("created_at") or newest
+            after = (rows[-1]["created_at"], rows[-1]["id"])
+        if len(rows) < page_size:
+            break
+
+    logger.info(f" Fetched {len(records)} client_data rows for {client_id} since {since or 'the beginning'}")
+    return records, newest
+
+
+def dedupe_by_key(rows: List[Dict[str, Any]], natural_key: str) -> List[Dict[str, Any]]:
+    """Last row per key wins; rows without a key cannot be upserted and are dropped"""
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        key = row.get(natural_key)
+        if key is None or key == '':
+            continue
+        latest[key] = row
+    dropped = len(rows) - len(latest)
+    if dropped:
+        logger.info(f" Collapsed {dropped} rows without a unique {natural_key}")
+    return list(latest.values())
+
+
+def upsert_batches(admin_client, table_name: str, rows: List[Dict[str, Any]], natural_key: str,
+                   batch_size: int = UPSERT_BATCH_SIZE) -> Tuple[int, int]:
+    """Upsert rows on their natural key in batches; returns (rows written, failed batches)"""
+    # One statement may not touch the same key twice, so collapse duplicates first
+    rows = dedupe_by_key(rows, natural_key)
+    written = 0
+    failed = 0
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        try:
+            response = admin_client.table(table_name).upsert(batch, on_conflict=natural_key).execute()
+            written += len(response.data) if response.data else 0
+        except Exception as e:
+            failed += 1
+            logger.error(f" Failed to upsert batch {i // batch_size + 1} into {table_name}: {e}")
+    if rows:
+        logger.info(f" Upserted {written} rows into {table_name} on {natural_key}")
+    return written, failed
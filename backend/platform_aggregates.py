@@ -0,0 +1,354 @@
+"""
+Platform Aggregates - Mergeable per-platform partial aggregates for the inventory dashboard
+Each platform is reduced once to sums, counts, per-day buckets and bounded top-k
+lists; the combined view is produced by merging those partials, and ratios
+(turnover, days of stock, growth rates) are derived from the merged sums.
+"""
+
+import heapq
+import logging
+from typing import Any, Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_THRESHOLD = 5  # Quantity < 5
+OVERSTOCK_THRESHOLD = 100  # Stock > 100
+SALES_SPIKE_THRESHOLD = 50  # 50% increase = spike
+SALES_DOWN_THRESHOLD = 20  # 20% decrease = slowdown
+
+LOW_STOCK_DETAILS = 10
+OVERSTOCK_DETAILS = 3
+
+
+class TopK:
+    """Keeps the k items with the smallest key; the top-k of a merge is exact"""
+
+    def __init__(self, k: int, key: Callable[[Any], Any]):
+        self.k = k
+        self.key = key
+        # (-key, -seq, item) so the root is the item to evict next
+        self._heap: List = []
+        self._seq = 0
+
+    def offer(self, item: Any) -> None:
+        if self.k <= 0:
+            return
+        self._seq += 1
+        entry = (-self.key(item), -self._seq, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other: 'TopK') -> None:
+        for item in other.items():
+            self.offer(item)
+
+    def items(self) -> List[Any]:
+        # Smallest key first, earlier offers first on ties
+        return [item for _, _, item in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def _add_buckets(target: Dict[str, float], source: Dict[str, float]) -> None:
+    for date, value in source.items():
+        target[date] = target.get(date, 0) + value
+
+
+def _change_percent(current: float, previous: float) -> float:
+    return ((current - previous) / previous) * 100 if previous > 0 else 0
+
+
+class PlatformPartial:
+    """Partial aggregates for one platform (or a merge of several)"""
+
+    def __init__(self, platforms: Iterable[str] = (), period_days: int = 30):
+        self.platforms = list(platforms)
+        self.period_days = period_days
+
+        # Sales over the period (fulfilled orders only)
+        self.revenue = 0.0
+        self.orders = 0
+        self.units = 0
+        self.first_half_revenue = 0.0
+        self.second_half_revenue = 0.0
+        self.first_half_avg_revenue = 0.0
+        self.second_half_avg_revenue = 0.0
+
+        # Inventory
+        self.current_inventory = 0
+        self.available_inventory = 0
+        self.inventory_value = 0.0
+        self.total_skus = 0
+        self.product_count = 0
+        self.order_count = 0
+        self.out_of_stock_count = 0
+
+        # Per-day buckets keyed by YYYY-MM-DD
+        self.inventory_by_date: Dict[str, float] = {}
+        self.units_by_date: Dict[str, float] = {}
+        self.current_revenue_by_date: Dict[str, float] = {}
+        self.previous_revenue_by_date: Dict[str, float] = {}
+        self.current_period_revenue = 0.0
+        self.previous_period_revenue = 0.0
+
+        # Week-over-week sales for trend alerts
+        self.recent_week_revenue = 0.0
+        self.previous_week_revenue = 0.0
+
+        # Stock alerts
+        self.low_stock_count = 0
+        self.overstock_count = 0
+        self.low_stock = TopK(LOW_STOCK_DETAILS, key=lambda alert: alert["current_stock"])
+        self.overstock = TopK(OVERSTOCK_DETAILS, key=lambda alert: -alert["current_stock"])
+
+    def add_components(self, components: Dict[str, Any]) -> 'PlatformPartial':
+        """Fold in the per-platform results of ComponentDataManager.get_platform_components"""
+        sales = components.get("sales") or {}
+        totals = sales.get("total_sales_30_days", {})
+        self.revenue += totals.get("revenue", 0) or 0
+        self.orders += totals.get("orders", 0) or 0
+        self.units += totals.get("units", 0) or 0
+
+        # Daily averages per half are additive across platforms over the same period
+        comparison = sales.get("sales_comparison", {})
+        first_half_avg = comparison.get("first_half_avg_revenue", 0) or 0
+        second_half_avg = comparison.get("second_half_avg_revenue", 0) or 0
+        first_half_days = max(self.period_days // 2, 1)
+        second_half_days = max(self.period_days - first_half_days, 1)
+        self.first_half_avg_revenue += first_half_avg
+        self.second_half_avg_revenue += second_half_avg
+        self.first_half_revenue += first_half_avg * first_half_days
+        self.second_half_revenue += second_half_avg * second_half_days
+
+        levels = components.get("inventory_levels") or {}
+        self.current_inventory += levels.get("current_total_inventory", 0) or 0
+        _add_buckets(self.inventory_by_date, {
+            item["date"]: item.get("inventory_level", 0) for item in levels.get("inventory_levels_chart", [])
+        })
+
+        units_sold = components.get("units_sold") or {}
+        _add_buckets(self.units_by_date, {
+            item["date"]: item.get("units_sold", 0) for item in units_sold.get("units_sold_chart", [])
+        })
+
+        historical = components.get("historical_comparison") or {}
+        self.current_period_revenue += historical.get("total_current_period", 0) or 0
+        self.previous_period_revenue += historical.get("total_previous_period", 0) or 0
+        chart = historical.get("comparison_chart", [])
+        _add_buckets(self.current_revenue_by_date, {item["date"]: item.get("current_period", 0) for item in chart})
+        _add_buckets(self.previous_revenue_by_date, {item["date"]: item.get("previous_period", 0) for item in chart})
+
+        self.available_inventory += components.get("available_inventory", 0) or 0
+        return self
+
+    def add_stock_level(self, platform: str, quantity: int, alert: Dict[str, Any]) -> None:
+        """Count one product against the low-stock / overstock thresholds"""
+        if quantity < LOW_STOCK_THRESHOLD:
+            self.low_stock_count += 1
+            severity = "critical" if quantity == 0 else "high" if quantity <= 2 else "medium"
+            self.low_stock.offer({"platform": platform, **alert, "current_stock": quantity,
+                                  "severity": severity, "alert_type": "low_stock"})
+        elif quantity > OVERSTOCK_THRESHOLD:
+            self.overstock_count += 1
+            self.overstock.offer({"platform": platform, **alert, "current_stock": quantity,
+                                  "severity": "medium", "alert_type": "overstock"})
+
+    def merge(self, other: 'PlatformPartial') -> 'PlatformPartial':
+        """Return a new partial holding the aggregates of both"""
+        merged = PlatformPartial(self.platforms + [p for p in other.platforms if p not in self.platforms],
+                                 self.period_days)
+        for source in (self, other):
+            for name in ("revenue", "orders", "units", "first_half_revenue", "second_half_revenue",
+                         "first_half_avg_revenue", "second_half_avg_revenue", "current_inventory",
+                         "available_inventory", "inventory_value", "total_skus", "product_count",
+                         "order_count", "out_of_stock_count", "current_period_revenue",
+                         "previous_period_revenue", "recent_week_revenue", "previous_week_revenue",
+                         "low_stock_count", "overstock_count"):
+                setattr(merged, name, getattr(merged, name) + getattr(source, name))
+            for name in ("inventory_by_date", "units_by_date", "current_revenue_by_date", "previous_revenue_by_date"):
+                _add_buckets(getattr(merged, name), getattr(source, name))
+            merged.low_stock.merge(source.low_stock)
+            merged.overstock.merge(source.overstock)
+        return merged
+
+    @classmethod
+    def merge_all(cls, partials: Iterable['PlatformPartial'], period_days: int = 30) -> 'PlatformPartial':
+        merged = cls(period_days=period_days)
+        for partial in partials:
+            merged = merged.merge(partial)
+        return merged
+
+    # Derived metrics - computed from the (merged) sums, never averaged across platforms
+
+    @property
+    def units_sold_estimate(self) -> int:
+        """Units sold, estimated from orders when orders carry revenue but no unit counts"""
+        if self.revenue > 0 and self.units == 0 and self.orders > 0:
+            return int(self.orders * 1.5)
+        return self.units
+
+    def turnover(self) -> Dict[str, Any]:
+        units = self.units_sold_estimate
+        if self.current_inventory == 0:
+            return {"turnover_rate": 0, "avg_days_to_sell": 999,
+                    "comparison": {"first_half_turnover_rate": 0, "second_half_turnover_rate": 0, "growth_rate": 0}}
+        # Average of begin (current + sold since) and end (current) inventory
+        average_inventory = (2 * self.current_inventory + units) / 2
+        turnover_rate = units / average_inventory if average_inventory > 0 and units > 0 else 0
+        first_half = self.first_half_revenue / self.current_inventory
+        second_half = self.second_half_revenue / self.current_inventory
+        return {
+            "turnover_rate": round(turnover_rate, 3),
+            "avg_days_to_sell": round(365 / turnover_rate, 1) if turnover_rate > 0 else 999,
+            "comparison": {
+                "first_half_turnover_rate": round(first_half, 3),
+                "second_half_turnover_rate": round(second_half, 3),
+                "growth_rate": _change_percent(second_half, first_half),
+            },
+        }
+
+    def days_of_stock(self) -> Dict[str, Any]:
+        daily_sales_velocity = self.units_sold_estimate / self.period_days if self.period_days > 0 else 0
+        days = self.available_inventory / max(daily_sales_velocity, 1) if daily_sales_velocity > 0 else 999
+        return {
+            "avg_days_of_stock": round(days, 1),
+            "daily_sales_velocity": round(daily_sales_velocity, 2),
+            "current_inventory": self.current_inventory,
+            "low_stock_count": 1 if days < 7 else 0,
+            "out_of_stock_count": 1 if self.current_inventory == 0 else 0,
+            "overstock_count": 1 if days > 90 else 0,
+        }
+
+    def inventory_levels_chart(self) -> List[Dict[str, Any]]:
+        return [{"date": date, "inventory_level": level, "value": level}
+                for date, level in sorted(self.inventory_by_date.items())]
+
+    def units_sold_chart(self) -> List[Dict[str, Any]]:
+        return [{"date": date, "units_sold": units, "value": units}
+                for date, units in sorted(self.units_by_date.items())]
+
+    def velocity_metrics(self) -> Dict[str, Any]:
+        total_units = sum(self.units_by_date.values())
+        return {
+            "total_units_sold": total_units,
+            "avg_daily_units_sold": round(total_units / self.period_days, 2) if self.period_days > 0 else 0,
+            "period_days": self.period_days,
+        }
+
+    def sales_kpis(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        turnover = self.turnover()
+        units_sold_total = sum(self.units_by_date.values())
+        return {
+            "total_sales_30_days": {
+                "revenue": self.revenue,
+                "units": self.units,
+                "orders": self.orders
+            },
+            "inventory_turnover_30_days": {
+                "turnover_rate": turnover["turnover_rate"],
+                "comparison": turnover["comparison"],
+                "avg_days_to_sell": turnover["avg_days_to_sell"],
+                "fast_moving_items": 0
+            },
+            "days_of_remaining_stock": self.days_of_stock(),
+            "inventory_levels_chart": self.inventory_levels_chart(),
+            "units_sold_30_days": {
+                "total_units_sold": units_sold_total,
+                "units_sold_chart": self.units_sold_chart(),
+                "velocity_metrics": self.velocity_metrics()
+            },
+            "total_inventory_units": self.current_inventory,
+            "data_source": "component_data_functions",
+            "calculation_period": f"{start_date} to {end_date}"
+        }
+
+    def trend_analysis(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        return {
+            "inventory_levels_chart_30_days": self.inventory_levels_chart(),
+            "units_sold_chart_30_days": self.units_sold_chart(),
+            "historical_comparison_30_days": {
+                "current_period_revenue": self.current_period_revenue,
+                "previous_period_revenue": self.previous_period_revenue,
+                "revenue_change_percent": round(_change_percent(self.current_period_revenue, self.previous_period_revenue), 2),
+                "current_period_units": 0,
+                "previous_period_units": 0,
+                "units_change_percent": 0,
+                "current_period_orders": 0,
+                "previous_period_orders": 0,
+                "orders_change_percent": 0
+            },
+            "velocity_metrics_30_days": self.velocity_metrics(),
+            "data_source": "component_data_functions",
+            "calculation_period": f"{start_date} to {end_date}"
+        }
+
+    def sales_trend_alerts(self) -> Dict[str, List[Dict[str, Any]]]:
+        spikes: List[Dict[str, Any]] = []
+        slowdowns: List[Dict[str, Any]] = []
+        recent, previous = self.recent_week_revenue, self.previous_week_revenue
+        if previous > 0:
+            revenue_change = _change_percent(recent, previous)
+            if revenue_change > SALES_SPIKE_THRESHOLD:
+                spikes.append({
+                    "alert_type": "sales_spike",
+                    "type": "sales_spike",
+                    "severity": "info",
+                    "message": f"Sales spiked {revenue_change:.1f}% this week (${recent:.2f} vs ${previous:.2f})",
+                    "current_revenue": recent,
+                    "previous_revenue": previous,
+                    "change_percent": revenue_change
+                })
+            elif revenue_change < -SALES_DOWN_THRESHOLD:
+                slowdowns.append({
+                    "alert_type": "sales_dropping",
+                    "type": "sales_slowdown",
+                    "severity": "warning",
+                    "message": f"Sales dropped {abs(revenue_change):.1f}% this week (${recent:.2f} vs ${previous:.2f})",
+                    "current_revenue": recent,
+                    "previous_revenue": previous,
+                    "change_percent": revenue_change,
+                    "threshold_used": SALES_DOWN_THRESHOLD
+                })
+        return {"spikes": spikes, "slowdowns": slowdowns}
+
+    def alerts_summary(self, client_id: str) -> Dict[str, Any]:
+        trend = self.sales_trend_alerts()
+        total_alerts = self.low_stock_count + self.overstock_count + len(trend["spikes"]) + len(trend["slowdowns"])
+        return {
+            "summary_counts": {
+                "low_stock_alerts": self.low_stock_count,
+                "overstock_alerts": self.overstock_count,
+                "sales_dropping_alerts": len(trend["slowdowns"]),
+                "sales_spike_alerts": len(trend["spikes"]),
+                "total_alerts": total_alerts
+            },
+            "detailed_alerts": {
+                "low_stock_alerts": self.low_stock.items(),  # Lowest stock first
+                "overstock_alerts": self.overstock.items(),  # Highest stock first
+                "sales_dropping_alerts": trend["slowdowns"],
+                "sales_spike_alerts": trend["spikes"]
+            },
+            "alert_thresholds": {
+                "low_stock_threshold": LOW_STOCK_THRESHOLD,
+                "overstock_threshold": OVERSTOCK_THRESHOLD,
+                "sales_dropping_threshold": SALES_DOWN_THRESHOLD
+            },
+            "quick_links": {
+                "view_low_stock": f"/dashboard/alerts/low-stock?client_id={client_id}",
+                "view_overstock": f"/dashboard/alerts/overstock?client_id={client_id}",
+                "view_sales_alerts": f"/dashboard/alerts/sales?client_id={client_id}"
+            },
+            "data_source": "dashboard_inventory_analyzer_with_consistent_thresholds"
+        }
+
+    def summary_stats(self) -> Dict[str, Any]:
+        return {
+            "total_skus": self.total_skus,
+            "total_inventory_value": round(self.inventory_value, 2),
+            "low_stock_count": self.low_stock_count,
+            "out_of_stock_count": self.out_of_stock_count,
+            "overstock_count": self.overstock_count
+        }
@@ -2,19 +2,20 @@
 Script to populate Amazon orders and products tables from client JSON data
 
 This script:
-1. Fetches raw client data for Amazon client
+1. Fetches raw client data added since the last run (watermark)
 2. Extracts Amazon orders and products from JSON
 3. Transforms data to proper table structure
-4. Inserts into Amazon orders and products tables
+4. Upserts into Amazon orders and products tables by natural key
 """
 
 import asyncio
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import pandas as pd
 from database import get_admin_client, get_db_manager
+from organization_sync import WatermarkStore, fetch_client_rows_since, upsert_batches
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -29,27 +30,28 @@ class AmazonDataPopulator:
         
         if not self.admin_client:
             raise Exception(" No admin database client available")
+        
+        self.watermarks = WatermarkStore(self.admin_client)
+        self.watermark_name = "populate_amazon_data"
+        self.failed_batches = 0
     
-    async def fetch_client_data(self, client_id: str) -> List[Dict[str, Any]]:
-        """Fetch all data for a specific client"""
+    async def fetch_client_data(self, client_id: str, since: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """Fetch client data created since the watermark (all data when since is None)"""
         try:
             logger.info(f" Fetching data for Amazon client {client_id}")
             
-            result = await self.db_manager.fast_client_data_lookup(
-                client_id=client_id,
-                use_cache=False
-            )
+            raw_data, newest = fetch_client_rows_since(self.admin_client, client_id, since)
             
-            if not result or not result.get('data'):
-                logger.warning(f" No data found for client {client_id}")
-                return []
+            if not raw_data:
+                logger.info(f" No new data for client {client_id}")
+                return [], since
             
-            logger.info(f" Found {len(result['data'])} records for client {client_id}")
-            return result['data']
+            logger.info(f" Found {len(raw_data)} records for client {client_id}")
+            return raw_data, newest
             
         except Exception as e:
             logger.error(f" Failed to fetch client data: {e}")
-            return []
+            return [], since
     
     def extract_amazon_data(self, raw_data: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
         """Extract Amazon orders, products, and incoming inventory from raw data"""
@@ -281,34 +283,6 @@ class AmazonDataPopulator:
         except Exception:
             return None
     
-    async def clear_existing_data(self, client_id: str) -> bool:
-        """Clear existing Amazon data for the client"""
-        try:
-            orders_table = f"{client_id.replace('-', '_')}_amazon_orders"
-            products_table = f"{client_id.replace('-', '_')}_amazon_products"
-            
-            logger.info(f"️ Clearing existing data from Amazon tables")
-            
-            # Clear orders
-            try:
-                self.admin_client.table(orders_table).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-                logger.info(f" Cleared {orders_table}")
-            except Exception as e:
-                logger.warning(f" Could not clear {orders_table}: {e}")
-            
-            # Clear products
-            try:
-                self.admin_client.table(products_table).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-                logger.info(f" Cleared {products_table}")
-            except Exception as e:
-                logger.warning(f" Could not clear {products_table}: {e}")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f" Failed to clear existing data: {e}")
-            return False
-    
     async def insert_amazon_data(self, client_id: str, amazon_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
         """Insert Amazon orders, products, and incoming inventory into their respective tables"""
         results = {}
@@ -348,32 +322,17 @@ class AmazonDataPopulator:
             if not transformed_orders:
                 return 0
             
-            logger.info(f" Inserting {len(transformed_orders)} Amazon orders into {table_name}")
-            
-            # Insert in batches
-            batch_size = 100
-            total_inserted = 0
+            logger.info(f" Upserting {len(transformed_orders)} Amazon orders into {table_name}")
             
-            for i in range(0, len(transformed_orders), batch_size):
-                batch = transformed_orders[i:i + batch_size]
-                
-                try:
-                    response = self.admin_client.table(table_name).insert(batch).execute()
-                    
-                    if response.data:
-                        batch_inserted = len(response.data)
-                        total_inserted += batch_inserted
-                        logger.info(f" Inserted orders batch {i//batch_size + 1}: {batch_inserted} rows")
-                
-                except Exception as e:
-                    logger.error(f" Failed to insert orders batch {i//batch_size + 1}: {e}")
-                    continue
+            total_inserted, failed_batches = upsert_batches(self.admin_client, table_name, transformed_orders, 'order_id')
+            self.failed_batches += failed_batches
             
             logger.info(f" Total Amazon orders inserted: {total_inserted}")
             return total_inserted
             
         except Exception as e:
             logger.error(f" Failed to insert Amazon orders: {e}")
+            self.failed_batches += 1
             return 0
     
     async def _insert_products(self, client_id: str, products: List[Dict[str, Any]]) -> int:
@@ -391,32 +350,17 @@ class AmazonDataPopulator:
             if not transformed_products:
                 return 0
             
-            logger.info(f" Inserting {len(transformed_products)} Amazon products into {table_name}")
-            
-            # Insert in batches
-            batch_size = 100
-            total_inserted = 0
+            logger.info(f" Upserting {len(transformed_products)} Amazon products into {table_name}")
             
-            for i in range(0, len(transformed_products), batch_size):
-                batch = transformed_products[i:i + batch_size]
-                
-                try:
-                    response = self.admin_client.table(table_name).insert(batch).execute()
-                    
-                    if response.data:
-                        batch_inserted = len(response.data)
-                        total_inserted += batch_inserted
-                        logger.info(f" Inserted products batch {i//batch_size + 1}: {batch_inserted} rows")
-                
-                except Exception as e:
-                    logger.error(f" Failed to insert products batch {i//batch_size + 1}: {e}")
-                    continue
+            total_inserted, failed_batches = upsert_batches(self.admin_client, table_name, transformed_products, 'asin')
+            self.failed_batches += failed_batches
             
             logger.info(f" Total Amazon products inserted: {total_inserted}")
             return total_inserted
             
         except Exception as e:
             logger.error(f" Failed to insert Amazon products: {e}")
+            self.failed_batches += 1
             return 0
     
     async def _insert_incoming_inventory(self, client_id: str, incoming_inventory: List[Dict[str, Any]]) -> int:
@@ -434,56 +378,49 @@ class AmazonDataPopulator:
             if not transformed_inventory:
                 return 0
             
-            logger.info(f" Inserting {len(transformed_inventory)} Amazon incoming inventory items into {table_name}")
+            logger.info(f" Upserting {len(transformed_inventory)} Amazon incoming inventory items into {table_name}")
             
-            # Insert in batches
-            batch_size = 100
-            total_inserted = 0
-            
-            for i in range(0, len(transformed_inventory), batch_size):
-                batch = transformed_inventory[i:i + batch_size]
-                
-                try:
-                    response = self.admin_client.table(table_name).insert(batch).execute()
-                    
-                    if response.data:
-                        batch_inserted = len(response.data)
-                        total_inserted += batch_inserted
-                        logger.info(f" Inserted incoming inventory batch {i//batch_size + 1}: {batch_inserted} rows")
-                
-                except Exception as e:
-                    logger.error(f" Failed to insert incoming inventory batch {i//batch_size + 1}: {e}")
-                    continue
+            total_inserted, failed_batches = upsert_batches(self.admin_client, table_name, transformed_inventory, 'shipment_id')
+            self.failed_batches += failed_batches
             
             logger.info(f" Total Amazon incoming inventory inserted: {total_inserted}")
             return total_inserted
             
         except Exception as e:
             logger.error(f" Failed to insert Amazon incoming inventory: {e}")
+            self.failed_batches += 1
             return 0
     
-    async def populate_amazon_data(self, client_id: str) -> Dict[str, Any]:
-        """Main method to populate Amazon data tables"""
+    async def populate_amazon_data(self, client_id: str, full_refresh: bool = False) -> Dict[str, Any]:
+        """Main method to populate Amazon data tables from rows added since the last run"""
         try:
             logger.info(f" Starting Amazon data population for client {client_id}")
             start_time = datetime.now()
+            self.failed_batches = 0
             
-            # Step 1: Fetch raw data
-            raw_data = await self.fetch_client_data(client_id)
+            # Step 1: Fetch raw data newer than the watermark
+            since = None if full_refresh else self.watermarks.get(client_id, self.watermark_name)
+            raw_data, newest = await self.fetch_client_data(client_id, since)
             if not raw_data:
+                if since is not None:
+                    return self._up_to_date_summary(client_id, since)
                 return {"error": "No data found for client", "success": False}
             
             # Step 2: Extract Amazon data
             amazon_data = self.extract_amazon_data(raw_data)
-            if not amazon_data['orders'] and not amazon_data['products']:
+            if not amazon_data['orders'] and not amazon_data['products'] and not amazon_data['incoming_inventory']:
+                if since is not None:
+                    self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
+                    return self._up_to_date_summary(client_id, newest)
                 return {"error": "No Amazon data found", "success": False}
             
-            # Step 3: Clear existing data
-            await self.clear_existing_data(client_id)
-            
-            # Step 4: Insert Amazon data
+            # Step 3: Upsert Amazon data
             insert_results = await self.insert_amazon_data(client_id, amazon_data)
             
+            # Step 4: Advance the watermark once every batch landed
+            if not self.failed_batches:
+                self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
+            
             end_time = datetime.now()
             processing_time = (end_time - start_time).total_seconds()
             
@@ -498,6 +435,8 @@ class AmazonDataPopulator:
                 "products_inserted": insert_results.get('products', 0),
                 "incoming_inventory_inserted": insert_results.get('incoming_inventory', 0),
                 "total_inserted": insert_results.get('orders', 0) + insert_results.get('products', 0) + insert_results.get('incoming_inventory', 0),
+                "incremental": since is not None,
+                "failed_batches": self.failed_batches,
                 "success": True
             }
             
@@ -509,6 +448,24 @@ class AmazonDataPopulator:
         except Exception as e:
             logger.error(f" Amazon data population failed: {e}")
             return {"error": str(e), "success": False}
+    
+    def _up_to_date_summary(self, client_id: str, watermark: str) -> Dict[str, Any]:
+        logger.info(f" Amazon data for {client_id} already up to date (watermark {watermark})")
+        return {
+            "client_id": client_id,
+            "processing_time_seconds": 0.0,
+            "raw_records_processed": 0,
+            "amazon_orders_found": 0,
+            "amazon_products_found": 0,
+            "amazon_incoming_inventory_found": 0,
+            "orders_inserted": 0,
+            "products_inserted": 0,
+            "incoming_inventory_inserted": 0,
+            "total_inserted": 0,
+            "incremental": True,
+            "failed_batches": 0,
+            "success": True
+        }
 
 async def main():
     """Main function for testing"""
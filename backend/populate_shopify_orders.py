@@ -1,16 +1,18 @@
 """
 Script to populate Shopify orders table from client JSON data
 
-This script extracts Shopify orders from client_data JSON and populates the organized shopify_orders table
+This script extracts Shopify orders from client_data JSON and populates the organized shopify_orders table.
+Only rows added since the last run are read, and orders are upserted on order_id.
 """
 
 import asyncio
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import pandas as pd
 from database import get_admin_client, get_db_manager
+from organization_sync import WatermarkStore, fetch_client_rows_since, upsert_batches
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -25,27 +27,28 @@ class ShopifyOrdersPopulator:
         
         if not self.admin_client:
             raise Exception(" No admin database client available")
+        
+        self.watermarks = WatermarkStore(self.admin_client)
+        self.watermark_name = "populate_shopify_orders"
+        self.failed_batches = 0
     
-    async def fetch_client_data(self, client_id: str) -> List[Dict[str, Any]]:
-        """Fetch all data for a specific client"""
+    async def fetch_client_data(self, client_id: str, since: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """Fetch client data created since the watermark (all data when since is None)"""
         try:
             logger.info(f" Fetching data for client {client_id}")
             
-            result = await self.db_manager.fast_client_data_lookup(
-                client_id=client_id,
-                use_cache=False
-            )
+            raw_data, newest = fetch_client_rows_since(self.admin_client, client_id, since)
             
-            if not result or not result.get('data'):
-                logger.warning(f" No data found for client {client_id}")
-                return []
+            if not raw_data:
+                logger.info(f" No new data for client {client_id}")
+                return [], since
             
-            logger.info(f" Found {len(result['data'])} records for client {client_id}")
-            return result['data']
+            logger.info(f" Found {len(raw_data)} records for client {client_id}")
+            return raw_data, newest
             
         except Exception as e:
             logger.error(f" Failed to fetch client data: {e}")
-            return []
+            return [], since
     
     def extract_shopify_orders(self, raw_data: List[Any]) -> List[Dict[str, Any]]:
         """Extract Shopify orders from raw data"""
@@ -196,27 +199,8 @@ class ShopifyOrdersPopulator:
         except Exception:
             return None
     
-    async def clear_existing_data(self, client_id: str) -> bool:
-        """Clear existing Shopify orders for the client"""
-        try:
-            orders_table = f"{client_id.replace('-', '_')}_shopify_orders"
-            
-            logger.info(f"️ Clearing existing data from {orders_table}")
-            
-            try:
-                self.admin_client.table(orders_table).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-                logger.info(f" Cleared {orders_table}")
-            except Exception as e:
-                logger.warning(f" Could not clear {orders_table}: {e}")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f" Failed to clear existing data: {e}")
-            return False
-    
     async def insert_shopify_orders(self, client_id: str, orders: List[Dict[str, Any]]) -> int:
-        """Insert Shopify orders into the organized table"""
+        """Upsert Shopify orders into the organized table"""
         try:
             table_name = f"{client_id.replace('-', '_')}_shopify_orders"
             
@@ -230,56 +214,50 @@ class ShopifyOrdersPopulator:
             if not transformed_orders:
                 return 0
             
-            logger.info(f" Inserting {len(transformed_orders)} Shopify orders into {table_name}")
+            logger.info(f" Upserting {len(transformed_orders)} Shopify orders into {table_name}")
             
-            # Insert in batches
-            batch_size = 100
-            total_inserted = 0
-            
-            for i in range(0, len(transformed_orders), batch_size):
-                batch = transformed_orders[i:i + batch_size]
-                
-                try:
-                    response = self.admin_client.table(table_name).insert(batch).execute()
-                    
-                    if response.data:
-                        batch_inserted = len(response.data)
-                        total_inserted += batch_inserted
-                        logger.info(f" Inserted batch {i//batch_size + 1}: {batch_inserted} orders")
-                
-                except Exception as e:
-                    logger.error(f" Failed to insert batch {i//batch_size + 1}: {e}")
-                    continue
+            # Upsert on order_id so re-runs update existing orders instead of duplicating them
+            total_inserted, failed_batches = upsert_batches(self.admin_client, table_name, transformed_orders, 'order_id')
+            self.failed_batches += failed_batches
             
             logger.info(f" Total Shopify orders inserted: {total_inserted}")
             return total_inserted
             
         except Exception as e:
             logger.error(f" Failed to insert Shopify orders: {e}")
+            self.failed_batches += 1
             return 0
     
-    async def populate_shopify_orders(self, client_id: str) -> Dict[str, Any]:
-        """Main method to populate Shopify orders table"""
+    async def populate_shopify_orders(self, client_id: str, full_refresh: bool = False) -> Dict[str, Any]:
+        """Main method to populate Shopify orders table from rows added since the last run"""
         try:
             logger.info(f" Starting Shopify orders population for client {client_id}")
             start_time = datetime.now()
+            self.failed_batches = 0
             
-            # Step 1: Fetch raw data
-            raw_data = await self.fetch_client_data(client_id)
+            # Step 1: Fetch raw data newer than the watermark
+            since = None if full_refresh else self.watermarks.get(client_id, self.watermark_name)
+            raw_data, newest = await self.fetch_client_data(client_id, since)
             if not raw_data:
+                if since is not None:
+                    return self._up_to_date_summary(client_id, since)
                 return {"error": "No data found for client", "success": False}
             
             # Step 2: Extract Shopify orders
             shopify_orders = self.extract_shopify_orders(raw_data)
             if not shopify_orders:
+                if since is not None:
+                    self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
+                    return self._up_to_date_summary(client_id, newest)
                 return {"error": "No Shopify orders found", "success": False}
             
-            # Step 3: Clear existing data
-            await self.clear_existing_data(client_id)
-            
-            # Step 4: Insert orders
+            # Step 3: Upsert orders
             inserted_count = await self.insert_shopify_orders(client_id, shopify_orders)
             
+            # Step 4: Advance the watermark once every batch landed
+            if not self.failed_batches:
+                self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
+            
             end_time = datetime.now()
             processing_time = (end_time - start_time).total_seconds()
             
@@ -289,6 +267,8 @@ class ShopifyOrdersPopulator:
                 "raw_records_processed": len(raw_data),
                 "shopify_orders_found": len(shopify_orders),
                 "orders_inserted": inserted_count,
+                "incremental": since is not None,
+                "failed_batches": self.failed_batches,
                 "success": True
             }
             
@@ -300,6 +280,19 @@ class ShopifyOrdersPopulator:
         except Exception as e:
             logger.error(f" Shopify orders population failed: {e}")
             return {"error": str(e), "success": False}
+    
+    def _up_to_date_summary(self, client_id: str, watermark: str) -> Dict[str, Any]:
+        logger.info(f" Shopify orders for {client_id} already up to date (watermark {watermark})")
+        return {
+            "client_id": client_id,
+            "processing_time_seconds": 0.0,
+            "raw_records_processed": 0,
+            "shopify_orders_found": 0,
+            "orders_inserted": 0,
+            "incremental": True,
+            "failed_batches": 0,
+            "success": True
+        }
 
 async def main():
     """Main function for testing"""
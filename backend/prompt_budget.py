@@ -0,0 +1,333 @@
+"""
+Prompt Budget - Token-budgeted data context for LLM prompts
+Instead of pasting every (flattened) row into a prompt, the data is described by
+per-column statistics computed vectorized over the whole dataset (null rates,
+quantiles, top-k categories, date ranges) plus a small stratified sample of
+rows. The rendered context is shrunk step by step (fewer sample rows, fewer
+categories, fewer columns) until the whole prompt fits an explicit token
+budget, estimated offline, so prompt size no longer grows with tenant data.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Whole-prompt input budget (instructions + data context), in tokens
+PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "10000"))
+
+# Marker a prompt template leaves where the data context goes (see PromptBuilder.fill)
+DATA_SLOT = "<<DATA_CONTEXT>>"
+
+QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+# A column is numeric/datetime when at least this share of its non-null values parse as such
+PARSE_THRESHOLD = 0.9
+
+# ISO-8601 dates/timestamps, as APIs and exports write them
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}"
+
+# Stratify samples by a categorical column with at most this many distinct values
+MAX_STRATA = 20
+
+# o200k/cl100k average a little under 4 characters per token on English and JSON;
+# long runs of letters or digits split further, punctuation is mostly its own token
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|\s+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Offline token estimate, no tokenizer download: words count per ~4 letters,
+    digit runs per 3 digits, each punctuation mark as one token. Errs slightly
+    high on JSON, which is what a budget wants.
+    """
+    if not text:
+        return 0
+    pieces = _TOKEN_PATTERN.findall(text)
+    tokens = 0
+    for piece in pieces:
+        first = piece[0]
+        if first.isspace():
+            # Single spaces merge into the next word; indentation runs are ~1 token per 4
+            tokens += (len(piece) - 1) // 4
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif first.isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    # Characters outside the pattern (non-ASCII letters) are roughly one token each
+    return tokens + (len(text) - sum(len(piece) for piece in pieces)) // 2
+
+
+def records_frame(data: Union[pd.DataFrame, Sequence[Dict[str, Any]]]) -> pd.DataFrame:
+    """Records (or a frame) as a frame, one level of nesting flattened to parent_child columns"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    records = [record for record in data if isinstance(record, dict)]
+    if not records:
+        return pd.DataFrame()
+    df = pd.DataFrame.from_records(records)
+    # One level of nesting becomes parent_child columns; deeper values stay objects
+    for name in list(df.columns):
+        series = df[name]
+        if series.dtype != object:
+            continue
+        is_dict = series.map(lambda v: isinstance(v, dict))
+        if not is_dict.any():
+            continue
+        nested = pd.DataFrame.from_records(
+            [v if isinstance(v, dict) else {} for v in series], index=df.index
+        ).add_prefix(f"{name}_")
+        df = pd.concat([df.drop(columns=[name]), nested], axis=1)
+    return df
+
+
+def _hashable(series: pd.Series) -> pd.Series:
+    """Lists/dicts cannot be counted; compare them by their text"""
+    if series.dtype == object and series.map(lambda v: isinstance(v, (list, dict, set))).any():
+        return series.map(lambda v: json.dumps(v, sort_keys=True, default=str) if isinstance(v, (list, dict, set)) else v)
+    return series
+
+
+def _clip(value: Any, max_chars: int) -> Any:
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, default=str)
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "..."
+    return value
+
+
+def _missing(value: Any) -> bool:
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value)
+
+
+def _scalar(value: Any) -> Any:
+    """numpy/pandas scalars to plain JSON values, floats rounded for the prompt"""
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            return None
+        return round(float(value), 4) if abs(value) < 1e6 else round(float(value), 1)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return value
+
+
+def summarize_columns(df: pd.DataFrame, top_k: int = 5, max_chars: int = 60) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-column statistics over every row. Null rates and numeric quantiles are
+    computed for all columns at once; text columns get their top-k values.
+    Numeric and date strings (common in API payloads) are parsed first.
+    """
+    if df.empty:
+        return {}
+
+    null_rates = df.isna().mean()
+    numeric: Dict[str, pd.Series] = {}
+    dates: Dict[str, pd.Series] = {}
+    categorical: List[str] = []
+
+    for name in df.columns:
+        series = df[name]
+        non_null = int(series.notna().sum())
+        if pd.api.types.is_bool_dtype(series):
+            categorical.append(name)
+        elif pd.api.types.is_numeric_dtype(series):
+            numeric[name] = series
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            dates[name] = series
+        elif non_null:
+            parsed = pd.to_numeric(series, errors="coerce")
+            if parsed.notna().sum() >= PARSE_THRESHOLD * non_null:
+                numeric[name] = parsed
+                continue
+            strings = series.dropna()
+            if strings.map(lambda v: isinstance(v, str)).all() and \
+                    strings.str.match(_DATE_PATTERN).mean() >= PARSE_THRESHOLD:
+                parsed_dates = pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601")
+                if parsed_dates.notna().sum() >= PARSE_THRESHOLD * non_null:
+                    dates[name] = parsed_dates
+                    continue
+            categorical.append(name)
+        else:
+            categorical.append(name)
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+
+    if numeric:
+        frame = pd.DataFrame(numeric)
+        quantiles = frame.quantile(list(QUANTILES))
+        means = frame.mean()
+        sums = frame.sum()
+        for name in numeric:
+            summaries[name] = {
+                "type": "numeric",
+                "null_rate": _scalar(null_rates[name]),
+                "quantiles": {f"p{int(q * 100)}": _scalar(quantiles.at[q, name]) for q in QUANTILES},
+                "mean": _scalar(means[name]),
+                "sum": _scalar(sums[name]),
+            }
+
+    for name, series in dates.items():
+        summaries[name] = {
+            "type": "datetime",
+            "null_rate": _scalar(null_rates[name]),
+            "min": _scalar(series.min()),
+            "max": _scalar(series.max()),
+        }
+
+    for name in categorical:
+        series = _hashable(df[name]).dropna()
+        counts = series.value_counts()
+        summary = {
+            "type": "categorical",
+            "null_rate": _scalar(null_rates[name]),
+            "distinct": int(len(counts)),
+        }
+        if len(counts) and counts.iloc[0] > 1:
+            summary["top"] = {str(_clip(value, max_chars)): int(count) for value, count in counts.head(top_k).items()}
+        else:
+            # Identifier-like (every value unique): frequencies say nothing, show what values look like
+            summary["examples"] = [_clip(value, max_chars) for value in counts.index[:2]]
+        summaries[name] = summary
+
+    # Keep the frame's column order
+    return {name: summaries[name] for name in df.columns if name in summaries}
+
+
+def stratified_sample(df: pd.DataFrame, rows: int, stratify_by: Optional[str] = None,
+                      seed: int = 0) -> pd.DataFrame:
+    """
+    Up to `rows` rows, spread proportionally over the values of `stratify_by`
+    (every value gets at least one row while there is room), so rare segments
+    are represented. Deterministic for a given seed.
+    """
+    if rows <= 0 or df.empty:
+        return df.iloc[0:0]
+    if len(df) <= rows:
+        return df
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(df))
+    if not stratify_by or stratify_by not in df.columns:
+        return df.iloc[np.sort(order[:rows])]
+
+    shuffled = df.iloc[order]
+    strata = _hashable(shuffled[stratify_by]).fillna("<null>")
+    rank = strata.groupby(strata, sort=False).cumcount().to_numpy()
+    shares = strata.value_counts(normalize=True)
+    quota = np.maximum(1, np.floor(shares * rows)).astype(int)
+    picked = rank < strata.map(quota).to_numpy()
+    # Rank-major order keeps one row per stratum first if the quotas overshoot
+    chosen = np.flatnonzero(picked)
+    chosen = chosen[np.argsort(rank[chosen], kind="stable")][:rows]
+    return shuffled.iloc[np.sort(chosen)]
+
+
+def pick_stratum_column(summaries: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """The categorical column with the fewest (2..MAX_STRATA) distinct values, e.g. status or platform"""
+    candidates = [
+        (summary["distinct"], name)
+        for name, summary in summaries.items()
+        if summary["type"] == "categorical" and 2 <= summary["distinct"] <= MAX_STRATA
+    ]
+    return min(candidates)[1] if candidates else None
+
+
+class PromptBuilder:
+    """Renders a dataset as column statistics plus sample rows, shrunk to a token budget"""
+
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET, sample_rows: int = 20,
+                 top_k: int = 5, max_value_chars: int = 80, seed: int = 0):
+        self.token_budget = token_budget
+        self.sample_rows = sample_rows
+        self.top_k = top_k
+        self.max_value_chars = max_value_chars
+        self.seed = seed
+
+    def _render(self, row_count: int, summaries: Dict[str, Dict[str, Any]], columns: List[str],
+                sample: pd.DataFrame, rows: int, top_k: int, stratum: Optional[str]) -> str:
+        column_stats = {}
+        for name in columns:
+            summary = summaries[name]
+            if len(summary.get("top", ())) > top_k:
+                summary = dict(summary, top=dict(list(summary["top"].items())[:top_k]))
+            column_stats[str(name)] = summary
+        sample_rows = [
+            {str(k): _clip(_scalar(v), self.max_value_chars) for k, v in row.items() if not _missing(v)}
+            for row in sample[columns].head(rows).to_dict("records")
+        ] if rows and columns else []
+        context = {
+            "total_records": row_count,
+            "column_statistics": column_stats,
+            "sample_rows": sample_rows,
+        }
+        if stratum and sample_rows:
+            context["sample_stratified_by"] = str(stratum)
+        omitted = len(summaries) - len(columns)
+        if omitted:
+            context["omitted_columns"] = omitted
+        return json.dumps(context, default=str, separators=(",", ":"))
+
+    def data_context(self, data: Union[pd.DataFrame, Sequence[Dict[str, Any]]],
+                     token_budget: Optional[int] = None) -> str:
+        """
+        JSON description of the whole dataset within token_budget tokens:
+        fewer sample rows first, then fewer top values, then fewer columns.
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        df = records_frame(data)
+        row_count = len(df)
+        summaries = summarize_columns(df, top_k=self.top_k, max_chars=self.max_value_chars)
+        stratum = pick_stratum_column(summaries)
+        sample = stratified_sample(df, self.sample_rows, stratum, seed=self.seed)
+        columns = list(summaries)
+        rows = len(sample)
+        top_k = self.top_k
+
+        while True:
+            rendered = self._render(row_count, summaries, columns, sample, rows, top_k, stratum)
+            tokens = estimate_tokens(rendered)
+            if tokens <= budget:
+                break
+            if rows > 0:
+                rows //= 2
+            elif top_k > 1:
+                top_k -= 2 if top_k > 2 else 1
+            elif len(columns) > 1:
+                # Drop columns from the end, a share proportional to the overshoot
+                keep = max(1, min(len(columns) - 1, int(len(columns) * budget / tokens)))
+                columns = columns[:keep]
+            else:
+                rendered = rendered[:max(0, budget) * 3]
+                break
+
+        logger.info(
+            f" Prompt data context: {row_count} rows, {len(columns)}/{len(summaries)} columns, "
+            f"{rows} sample rows, ~{estimate_tokens(rendered)} tokens (budget {budget})"
+        )
+        return rendered
+
+    def fill(self, template: str, data: Union[pd.DataFrame, Sequence[Dict[str, Any]]],
+             token_budget: Optional[int] = None) -> str:
+        """Replace DATA_SLOT in template with a data context sized to what the template leaves of the budget"""
+        budget = self.token_budget if token_budget is None else token_budget
+        remaining = budget - estimate_tokens(template.replace(DATA_SLOT, ""))
+        if remaining < budget // 8:
+            logger.warning(f" Prompt instructions use ~{budget - remaining} of {budget} tokens, data context squeezed")
+            remaining = budget // 8
+        return template.replace(DATA_SLOT, self.data_context(data, remaining))
+
+
+# Global instance
+prompt_builder = PromptBuilder()
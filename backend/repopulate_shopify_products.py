@@ -2,18 +2,18 @@
 Script to properly populate Shopify products table with variants as separate rows
 
 This script:
-1. Clears existing Shopify products data
-2. Fetches raw client data
-3. Creates one row per variant, repeating the product name
-4. Inserts into the updated shopify_products table structure
+1. Fetches raw client data added since the last run (watermark)
+2. Creates one row per variant, repeating the product name
+3. Upserts into the updated shopify_products table structure on variant_id
 """
 
 import asyncio
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from database import get_admin_client, get_db_manager
+from organization_sync import WatermarkStore, fetch_client_rows_since, upsert_batches
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -28,26 +28,27 @@ class ShopifyProductRepopulator:
         
         if not self.admin_client:
             raise Exception(" No admin database client available")
+        
+        self.watermarks = WatermarkStore(self.admin_client)
+        self.watermark_name = "repopulate_shopify_products"
+        self.failed_batches = 0
     
-    async def fetch_client_data(self, client_id: str) -> List[Dict[str, Any]]:
-        """Fetch all data for a specific client"""
+    async def fetch_client_data(self, client_id: str, since: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """Fetch client data created since the watermark (all data when since is None)"""
         try:
             logger.info(f" Fetching data for client {client_id}")
             
-            result = await self.db_manager.fast_client_data_lookup(
-                client_id=client_id,
-                use_cache=False
-            )
+            raw_data, newest = fetch_client_rows_since(self.admin_client, client_id, since)
             
-            if not result or not result.get('data'):
-                logger.warning(f" No data found for client {client_id}")
-                return []
+            if not raw_data:
+                logger.info(f" No new data for client {client_id}")
+                return [], since
             
-            return result['data']
+            return raw_data, newest
             
         except Exception as e:
             logger.error(f" Failed to fetch client data: {e}")
-            return []
+            return [], since
     
     def extract_shopify_products(self, raw_data: List[Any]) -> List[Dict[str, Any]]:
         """Extract Shopify products from raw data"""
@@ -161,79 +162,52 @@ class ShopifyProductRepopulator:
         except (ValueError, TypeError):
             return None
     
-    async def clear_existing_data(self, client_id: str) -> bool:
-        """Clear existing Shopify products data"""
-        try:
-            table_name = f"{client_id.replace('-', '_')}_shopify_products"
-            
-            logger.info(f"️ Clearing existing data from {table_name}")
-            
-            # Delete all existing records
-            response = self.admin_client.table(table_name).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-            
-            logger.info(f" Cleared existing data from {table_name}")
-            return True
-            
-        except Exception as e:
-            logger.error(f" Failed to clear existing data: {e}")
-            return False
-    
     async def insert_variant_rows(self, client_id: str, variant_rows: List[Dict[str, Any]]) -> int:
-        """Insert variant rows into the shopify_products table"""
+        """Upsert variant rows into the shopify_products table"""
         try:
             if not variant_rows:
                 return 0
             
             table_name = f"{client_id.replace('-', '_')}_shopify_products"
             
-            logger.info(f" Inserting {len(variant_rows)} variant rows into {table_name}")
+            logger.info(f" Upserting {len(variant_rows)} variant rows into {table_name}")
             
-            # Insert in batches to avoid timeouts
-            batch_size = 100
-            total_inserted = 0
-            
-            for i in range(0, len(variant_rows), batch_size):
-                batch = variant_rows[i:i + batch_size]
-                
-                try:
-                    response = self.admin_client.table(table_name).insert(batch).execute()
-                    
-                    if response.data:
-                        batch_inserted = len(response.data)
-                        total_inserted += batch_inserted
-                        logger.info(f" Inserted batch {i//batch_size + 1}: {batch_inserted} rows")
-                    
-                except Exception as e:
-                    logger.error(f" Failed to insert batch {i//batch_size + 1}: {e}")
-                    continue
+            # One row per variant, so variant_id is the natural key
+            total_inserted, failed_batches = upsert_batches(self.admin_client, table_name, variant_rows, 'variant_id')
+            self.failed_batches += failed_batches
             
             logger.info(f" Total inserted: {total_inserted} variant rows")
             return total_inserted
             
         except Exception as e:
             logger.error(f" Failed to insert variant rows: {e}")
+            self.failed_batches += 1
             return 0
     
-    async def repopulate_shopify_products(self, client_id: str) -> Dict[str, Any]:
-        """Main method to repopulate Shopify products with proper variant structure"""
+    async def repopulate_shopify_products(self, client_id: str, full_refresh: bool = False) -> Dict[str, Any]:
+        """Main method to upsert Shopify variant rows for products added since the last run"""
         try:
             logger.info(f" Starting Shopify products repopulation for client {client_id}")
             start_time = datetime.now()
+            self.failed_batches = 0
             
-            # Step 1: Fetch raw data
-            raw_data = await self.fetch_client_data(client_id)
+            # Step 1: Fetch raw data newer than the watermark
+            since = None if full_refresh else self.watermarks.get(client_id, self.watermark_name)
+            raw_data, newest = await self.fetch_client_data(client_id, since)
             if not raw_data:
+                if since is not None:
+                    return self._up_to_date_summary(client_id, since)
                 return {"error": "No data found for client", "success": False}
             
             # Step 2: Extract Shopify products
             shopify_products = self.extract_shopify_products(raw_data)
             if not shopify_products:
+                if since is not None:
+                    self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
+                    return self._up_to_date_summary(client_id, newest)
                 return {"error": "No Shopify products found", "success": False}
             
-            # Step 3: Clear existing data
-            await self.clear_existing_data(client_id)
-            
-            # Step 4: Create variant rows
+            # Step 3: Create variant rows
             all_variant_rows = []
             for product in shopify_products:
                 variant_rows = self.create_variant_rows(product, client_id)
@@ -242,9 +216,13 @@ class ShopifyProductRepopulator:
             if not all_variant_rows:
                 return {"error": "No variant rows created", "success": False}
             
-            # Step 5: Insert variant rows
+            # Step 4: Upsert variant rows
             inserted_count = await self.insert_variant_rows(client_id, all_variant_rows)
             
+            # Step 5: Advance the watermark once every batch landed
+            if not self.failed_batches:
+                self.watermarks.advance(client_id, self.watermark_name, newest, len(raw_data))
+            
             end_time = datetime.now()
             processing_time = (end_time - start_time).total_seconds()
             
@@ -254,6 +232,8 @@ class ShopifyProductRepopulator:
                 "shopify_products_found": len(shopify_products),
                 "variant_rows_created": len(all_variant_rows),
                 "variant_rows_inserted": inserted_count,
+                "incremental": since is not None,
+                "failed_batches": self.failed_batches,
                 "success": True
             }
             
@@ -265,6 +245,19 @@ class ShopifyProductRepopulator:
         except Exception as e:
             logger.error(f" Shopify products repopulation failed: {e}")
             return {"error": str(e), "success": False}
+    
+    def _up_to_date_summary(self, client_id: str, watermark: str) -> Dict[str, Any]:
+        logger.info(f" Shopify products for {client_id} already up to date (watermark {watermark})")
+        return {
+            "client_id": client_id,
+            "processing_time_seconds": 0.0,
+            "shopify_products_found": 0,
+            "variant_rows_created": 0,
+            "variant_rows_inserted": 0,
+            "incremental": True,
+            "failed_batches": 0,
+            "success": True
+        }
 
 async def main():
     """Main function for testing"""
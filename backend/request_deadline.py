@@ -0,0 +1,194 @@
+"""
+Request Deadline - Request-scoped time budget and cooperative cancellation
+The deadline lives in a context variable, so everything a request awaits, the
+tasks it spawns and the threads it hands work to (asyncio.to_thread copies the
+context) see the same budget. Fetch helpers size their per-call timeouts from
+what is left, long Python loops call check_deadline(), and the middleware
+cancels the request's task once the budget runs out or the client disconnects.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# gunicorn's --timeout; the Dockerfile and render.yaml start gunicorn with this same variable
+WORKER_TIMEOUT_SECONDS = float(os.getenv("WORKER_TIMEOUT_SECONDS", "120"))
+
+# Left between the deadline and the worker kill for the handler to unwind and answer
+DEADLINE_MARGIN_SECONDS = 20
+
+# Under the worker timeout so a stuck request is cut off by us, not by a worker kill
+DEFAULT_REQUEST_DEADLINE = float(
+    os.getenv("REQUEST_DEADLINE_SECONDS", str(max(1.0, WORKER_TIMEOUT_SECONDS - DEADLINE_MARGIN_SECONDS)))
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's budget ran out or the client went away; existing TimeoutError handlers apply"""
+
+
+class Deadline:
+    """Absolute expiry on the monotonic clock plus an explicit cancel flag"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self.cancel_reason: Optional[str] = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.cancel_reason is not None or time.monotonic() >= self.expires_at
+
+    def cancel(self, reason: str):
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+
+    def check(self):
+        if self.cancel_reason is not None:
+            raise DeadlineExceeded(self.cancel_reason)
+        if time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Run a block under a budget; nested scopes can only shorten the outer one"""
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline.expires_at = outer.expires_at
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_deadline():
+    """Cooperative cancellation point for loops; no-op outside a request"""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def call_timeout(default: Optional[float] = None) -> Optional[float]:
+    """Timeout for one call: the caller's default, capped by what is left of the request budget"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    deadline.check()
+    remaining = deadline.remaining()
+    return remaining if default is None else min(default, remaining)
+
+
+async def run_blocking(func: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Run a blocking call (a Supabase .execute(), a pandas pass) in a thread under the
+    request budget. The event loop stays free while it runs, and the request stops
+    waiting when the budget is gone; the thread sees the same deadline for its own checks.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(func, *args, **kwargs), timeout=call_timeout(timeout))
+    except asyncio.TimeoutError:
+        # Out of request budget rather than past this call's own timeout
+        check_deadline()
+        raise
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware giving each request on selected paths a deadline and cancelling
+    its task when the deadline passes (504 if nothing was sent yet) or the client
+    disconnects. The request body is read up front so the disconnect can be
+    watched while the endpoint is still computing.
+    """
+
+    def __init__(self, app, paths: Iterable[str], seconds: float = DEFAULT_REQUEST_DEADLINE):
+        self.app = app
+        self.paths = tuple(paths)
+        self.seconds = seconds
+
+    def _controlled(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._controlled(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        body_messages = []
+        while True:
+            message = await receive()
+            body_messages.append(message)
+            if message["type"] != "http.request" or not message.get("more_body", False):
+                break
+        if body_messages[-1]["type"] == "http.disconnect":
+            return
+
+        disconnected = asyncio.Event()
+
+        async def replay_receive():
+            if body_messages:
+                return body_messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        response_started = False
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        with deadline_scope(self.seconds) as deadline:
+            app_task = asyncio.create_task(self.app(scope, replay_receive, tracking_send))
+
+            async def watch_disconnect():
+                while True:
+                    message = await receive()
+                    if message["type"] == "http.disconnect":
+                        deadline.cancel("Client disconnected")
+                        disconnected.set()
+                        app_task.cancel()
+                        return
+
+            watcher = asyncio.create_task(watch_disconnect())
+            try:
+                await asyncio.wait_for(asyncio.shield(app_task), timeout=deadline.remaining())
+            except asyncio.TimeoutError:
+                deadline.cancel("Request deadline exceeded")
+                app_task.cancel()
+                logger.warning(f" Cancelled {scope['path']} after its {self.seconds:.0f}s deadline")
+                if not response_started:
+                    body = json.dumps({"detail": "Request deadline exceeded"}).encode("utf-8")
+                    await send({
+                        "type": "http.response.start",
+                        "status": 504,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+            except asyncio.CancelledError:
+                if deadline.cancel_reason != "Client disconnected":
+                    raise
+                logger.info(f" Client disconnected from {scope['path']}, request cancelled")
+            finally:
+                watcher.cancel()
+                if not app_task.done():
+                    app_task.cancel()
@@ -0,0 +1,247 @@
+"""
+Response Cache - Per-client cached endpoint responses
+Read and written by the API endpoints and by the nightly analytics refresh,
+which rebuilds the inventory-analytics response outside the web app. Kept free
+of FastAPI so the cron does not load the whole application to reuse them.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from database import get_admin_client
+
+logger = logging.getLogger(__name__)
+
+
+async def create_client_cache_table(client_id: str):
+    """Check if cache table exists - assume tables are pre-created via SQL"""
+
+    try:
+
+        # Clean client_id for table name
+
+        clean_client_id = client_id.replace("-", "_")
+
+        table_name = f"{clean_client_id}_cached_responses"
+
+        db_client = get_admin_client()
+
+        if not db_client:
+
+            logger.error(" Database not configured for cache table access")
+
+            return False
+
+        # Try to access the table to verify it exists
+
+        try:
+            # Simple test query to check if table exists
+            db_client.table(table_name).select("id").limit(1).execute()
+            logger.info(f" Cache table verified: {table_name}")
+            return True
+
+        except Exception as e:
+
+            logger.warning(f" Cache table {table_name} may not exist: {e}")
+            logger.warning(f" Please create the table manually using SQL: CREATE TABLE IF NOT EXISTS \"{table_name}\" (id uuid DEFAULT gen_random_uuid() PRIMARY KEY, client_id uuid NOT NULL, endpoint_url text NOT NULL, cache_key text NOT NULL, response_data jsonb NOT NULL, created_at timestamptz DEFAULT now(), expires_at timestamptz, UNIQUE(cache_key));")
+            return False
+
+    except Exception as e:
+
+        logger.error(f" Failed to verify cache table for client {client_id}: {e}")
+
+        return False
+
+
+async def get_cached_response(
+    client_id: str, endpoint_url: str, params: Dict[str, Any] = None
+) -> Optional[Dict[str, Any]]:
+    """Get cached response if it exists (no expiration)"""
+
+    try:
+
+        # Generate cache key
+
+        params_str = json.dumps(params or {}, sort_keys=True)
+
+        cache_key_data = f"{endpoint_url}_{params_str}"
+
+        cache_key = hashlib.md5(cache_key_data.encode()).hexdigest()
+
+        # Clean client_id for table name
+
+        clean_client_id = client_id.replace("-", "_")
+
+        table_name = f"{clean_client_id}_cached_responses"
+
+        db_client = get_admin_client()
+
+        if not db_client:
+
+            return None
+
+        try:
+
+            # Query cached response (no expiration check)
+
+            response = (
+                db_client.table(table_name)
+                .select("*")
+                .eq("cache_key", cache_key)
+                .limit(1)
+                .execute()
+            )
+
+            if response.data and len(response.data) > 0:
+
+                cached_data = response.data[0]
+
+                logger.info(f" Found cached response for client {client_id}")
+
+                return cached_data["response_data"]
+
+        except Exception as e:
+
+            # Table might not exist yet
+
+            logger.info(
+                f" Cache table not found for client {client_id}, will create on save"
+            )
+
+        return None
+
+    except Exception as e:
+
+        logger.error(f" Failed to get cached response for client {client_id}: {e}")
+
+        return None
+
+
+async def save_cached_response(
+    client_id: str,
+    endpoint_url: str,
+    response_data: Dict[str, Any],
+    params: Dict[str, Any] = None,
+):
+    """Save response to cache (persistent until manually cleared)"""
+
+    try:
+
+        # Generate cache key
+
+        params_str = json.dumps(params or {}, sort_keys=True)
+
+        cache_key_data = f"{endpoint_url}_{params_str}"
+
+        cache_key = hashlib.md5(cache_key_data.encode()).hexdigest()
+
+        # Clean client_id for table name
+
+        clean_client_id = client_id.replace("-", "_")
+
+        table_name = f"{clean_client_id}_cached_responses"
+
+        db_client = get_admin_client()
+
+        if not db_client:
+
+            logger.error(" Database not configured for cache saving")
+
+            return False
+
+        # Check if cache table exists
+
+        table_exists = await create_client_cache_table(client_id)
+        
+        if not table_exists:
+            logger.warning(f" Cache table doesn't exist for client {client_id}, skipping cache save")
+            return False
+
+        try:
+
+            # Insert or update cached response (no expiration)
+
+            cache_record = {
+                "client_id": client_id,
+                "endpoint_url": endpoint_url,
+                "cache_key": cache_key,
+                "response_data": response_data,
+                "expires_at": None,  # No expiration
+            }
+
+            # Try to upsert (insert or update if exists)
+
+            db_client.table(table_name).upsert(
+                cache_record, on_conflict="cache_key"
+            ).execute()
+
+            logger.info(f" Saved cached response for client {client_id} (persistent)")
+
+            return True
+
+        except Exception as e:
+
+            logger.error(f" Failed to save cached response: {e}")
+            logger.warning(f" This may be due to missing cache table: {table_name}")
+
+            return False
+
+    except Exception as e:
+
+        logger.error(f" Failed to save cached response for client {client_id}: {e}")
+
+        return False
+
+
+def has_organized_inventory_tables(db_client, client_id: str) -> bool:
+    """Whether the client has rows in its organized Shopify products or Amazon orders table"""
+
+    for table_name in (
+        f"{client_id.replace('-', '_')}_shopify_products",
+        f"{client_id.replace('-', '_')}_amazon_orders",
+    ):
+
+        try:
+
+            test_response = (
+                db_client.table(table_name).select("id").limit(1).execute()
+            )
+
+            if test_response.data:
+
+                logger.info(
+                    f" Found organized table {table_name} for client {client_id}"
+                )
+
+                return True
+
+        except Exception:
+
+            pass
+
+    return False
+
+
+def organized_inventory_analytics_response(
+    client_id: str, analytics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Wrap dashboard_inventory_analyzer output in the inventory-analytics response shape"""
+
+    data_summary = analytics.get("data_summary", {})
+
+    return {
+        "client_id": client_id,
+        "success": True,
+        "message": f"Dashboard analytics from organized data - {data_summary.get('shopify_products', 0) + data_summary.get('amazon_products', 0)} products, {data_summary.get('shopify_orders', 0) + data_summary.get('amazon_orders', 0)} orders (SKU data available via /api/dashboard/sku-inventory)",
+        "timestamp": datetime.now().isoformat(),
+        "data_type": "dashboard_inventory_analytics",
+        "schema_type": "dashboard_inventory_analytics",
+        "total_records": data_summary.get("total_records", 0),
+        "inventory_analytics": analytics,
+        "cached": False,
+        "processing_time": "optimized",
+        "data_source": "organized_tables",
+    }
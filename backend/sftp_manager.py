@@ -7,9 +7,14 @@ Handles SFTP connections, file listings, and downloads
 import paramiko
 import os
 import io
+import json
 import stat
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -30,12 +35,76 @@ class SFTPFileInfo:
     modified_time: str
     is_directory: bool = False
 
+@dataclass
+class SFTPIngestedFile:
+    """A remote file that went through the ingestion stage"""
+    filename: str
+    local_path: str
+    size: int
+    modified_time: int
+    sha256: str = ""
+    status: str = "downloaded"  # downloaded | unchanged | failed
+    resumed_from: int = 0
+    error: str = ""
+
+class SFTPManifest:
+    """
+    Per-source record of what was ingested last run: {filename: {size, mtime, sha256}}
+    plus the remote (size, mtime) of partial downloads so they can be resumed
+    """
+    
+    FILENAME = ".manifest.json"
+    
+    def __init__(self, spool_dir: str):
+        self.path = os.path.join(spool_dir, self.FILENAME)
+        self._lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r") as handle:
+                data = json.load(handle)
+            self.files = data.get("files", {})
+            self.pending = data.get("pending", {})
+        except (OSError, ValueError):
+            pass
+    
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.files.get(filename)
+    
+    def get_pending(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.pending.get(filename)
+    
+    def set_pending(self, filename: str, size: int, mtime: int):
+        with self._lock:
+            self.pending[filename] = {"size": size, "mtime": mtime}
+            self._save()
+    
+    def commit(self, filename: str, size: int, mtime: int, sha256: str):
+        with self._lock:
+            self.files[filename] = {"size": size, "mtime": mtime, "sha256": sha256}
+            self.pending.pop(filename, None)
+            self._save()
+    
+    def _save(self):
+        # Write-then-rename so a crash never leaves a truncated manifest
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump({"files": self.files, "pending": self.pending}, handle)
+        os.replace(tmp_path, self.path)
+
 class SFTPManager:
     """Manages SFTP connections and file operations"""
     
+    # Concurrent SFTP channels per ingestion run (one SSH connection, N channels)
+    MAX_CHANNELS = int(os.getenv("SFTP_MAX_CHANNELS", "4"))
+    CHUNK_SIZE = 1024 * 1024
+    
     def __init__(self):
         self.client = None
         self.sftp = None
+        self.spool_root = os.getenv("SFTP_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "sftp_spool"))
         
     def test_connection(self, credentials: SFTPCredentials) -> Tuple[bool, str, List[SFTPFileInfo]]:
         """
@@ -205,6 +274,164 @@ class SFTPManager:
             result["errors"]["connection"] = str(e)
             return result
     
+    def ingest_files(
+        self,
+        credentials: SFTPCredentials,
+        filenames: List[str],
+        client_id: str,
+        spool_dir: Optional[str] = None,
+        max_channels: Optional[int] = None,
+        force: bool = False,
+    ) -> Iterator[SFTPIngestedFile]:
+        """
+        Stream files to a local spool directory over a small pool of SFTP channels
+        and yield each one as soon as it completes, so it can be parsed while the
+        rest are still downloading.
+        
+        Files whose (size, mtime) match the manifest from the last run are yielded
+        as "unchanged" without being transferred, and re-downloaded files whose
+        hash did not change are reported as "unchanged" too. Partial downloads
+        left by an interrupted run are resumed. A file is recorded in the manifest
+        only once the caller is done with it - set ``status = "failed"`` on the
+        yielded object to have it picked up again next run.
+        
+        The spool and manifest belong to one client: two clients pointed at the
+        same SFTP account each ingest every file into their own data.
+        """
+        spool_dir = spool_dir or self._default_spool_dir(credentials, client_id)
+        os.makedirs(spool_dir, exist_ok=True)
+        manifest = SFTPManifest(spool_dir)
+        channels = max(1, min(max_channels or self.MAX_CHANNELS, len(filenames) or 1))
+        
+        ssh_client = self._connect(credentials)
+        transport = ssh_client.get_transport()
+        opened: List[paramiko.SFTPClient] = []
+        opened_lock = threading.Lock()
+        local = threading.local()
+        
+        def channel() -> paramiko.SFTPClient:
+            # Each worker thread gets its own SFTP channel on the shared transport
+            if getattr(local, "sftp", None) is None:
+                local.sftp = paramiko.SFTPClient.from_transport(transport)
+                with opened_lock:
+                    opened.append(local.sftp)
+            return local.sftp
+        
+        try:
+            listing_sftp = paramiko.SFTPClient.from_transport(transport)
+            opened.append(listing_sftp)
+            try:
+                listing = {attr.filename: attr for attr in listing_sftp.listdir_attr(credentials.remote_path)}
+            except Exception as list_error:
+                logger.warning(f" Could not list {credentials.remote_path}, falling back to stat: {list_error}")
+                listing = {}
+            
+            logger.info(f" Ingesting {len(filenames)} SFTP files over {channels} channels into {spool_dir}")
+            with ThreadPoolExecutor(max_workers=channels, thread_name_prefix="sftp-ingest") as executor:
+                futures = [
+                    executor.submit(
+                        self._ingest_one, channel, credentials, filename,
+                        listing.get(filename), spool_dir, manifest, force
+                    )
+                    for filename in filenames
+                ]
+                for future in as_completed(futures):
+                    ingested = future.result()
+                    yield ingested
+                    if ingested.status == "downloaded":
+                        manifest.commit(ingested.filename, ingested.size, ingested.modified_time, ingested.sha256)
+        finally:
+            for sftp in opened:
+                try:
+                    sftp.close()
+                except Exception:
+                    pass
+            ssh_client.close()
+    
+    def _ingest_one(
+        self,
+        channel,
+        credentials: SFTPCredentials,
+        filename: str,
+        attr: Optional[paramiko.SFTPAttributes],
+        spool_dir: str,
+        manifest: SFTPManifest,
+        force: bool,
+    ) -> SFTPIngestedFile:
+        """Download (or skip, or resume) a single file into the spool directory"""
+        remote_file_path = os.path.join(credentials.remote_path, filename).replace('\\', '/')
+        local_path = os.path.join(spool_dir, os.path.basename(filename))
+        part_path = local_path + ".part"
+        try:
+            sftp = channel()
+            if attr is None:
+                attr = sftp.stat(remote_file_path)
+            size, mtime = int(attr.st_size or 0), int(attr.st_mtime or 0)
+            
+            previous = manifest.get(filename)
+            if (
+                not force
+                and previous
+                and previous["size"] == size
+                and previous["mtime"] == mtime
+                and os.path.exists(local_path)
+                and os.path.getsize(local_path) == size
+            ):
+                logger.info(f" Skipping unchanged SFTP file {filename}")
+                return SFTPIngestedFile(filename, local_path, size, mtime, previous["sha256"], status="unchanged")
+            
+            # Resume only if the partial file belongs to the same remote version
+            offset = 0
+            pending = manifest.get_pending(filename)
+            if pending == {"size": size, "mtime": mtime} and os.path.exists(part_path):
+                offset = min(os.path.getsize(part_path), size)
+            else:
+                manifest.set_pending(filename, size, mtime)
+            
+            digest = hashlib.sha256()
+            if offset:
+                logger.info(f" Resuming {filename} at byte {offset}/{size}")
+                with open(part_path, "rb") as existing:
+                    for chunk in iter(lambda: existing.read(self.CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            
+            with sftp.open(remote_file_path, "rb") as remote, open(part_path, "ab" if offset else "wb") as spool:
+                remote.seek(offset)
+                remote.prefetch(size)
+                for chunk in iter(lambda: remote.read(self.CHUNK_SIZE), b""):
+                    spool.write(chunk)
+                    digest.update(chunk)
+            os.replace(part_path, local_path)
+            
+            sha256 = digest.hexdigest()
+            if not force and previous and previous.get("sha256") == sha256:
+                # Touched on the server but identical content - nothing to parse
+                manifest.commit(filename, size, mtime, sha256)
+                return SFTPIngestedFile(filename, local_path, size, mtime, sha256, status="unchanged", resumed_from=offset)
+            
+            logger.info(f" Downloaded {filename}: {size} bytes")
+            return SFTPIngestedFile(filename, local_path, size, mtime, sha256, resumed_from=offset)
+            
+        except Exception as file_error:
+            logger.error(f" Failed to ingest {filename}: {file_error}")
+            return SFTPIngestedFile(filename, local_path, 0, 0, status="failed", error=str(file_error))
+    
+    def _connect(self, credentials: SFTPCredentials) -> paramiko.SSHClient:
+        ssh_client = paramiko.SSHClient()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh_client.connect(
+            hostname=credentials.host,
+            port=credentials.port,
+            username=credentials.username,
+            password=credentials.password,
+            timeout=30
+        )
+        return ssh_client
+    
+    def _default_spool_dir(self, credentials: SFTPCredentials, client_id: str) -> str:
+        source_key = f"{client_id}/{credentials.username}@{credentials.host}:{credentials.port}{credentials.remote_path}"
+        return os.path.join(self.spool_root, hashlib.sha1(source_key.encode()).hexdigest()[:16])
+    
     def list_files_with_details(self, credentials: SFTPCredentials) -> Tuple[bool, List[SFTPFileInfo], str]:
         """
         Get detailed file listing from SFTP server
@@ -2,6 +2,8 @@
 """
 SKU Analysis Cron Job - FIXED VERSION
 Uses the EXACT same logic as old working app.py system
+Clients run in a bounded-concurrency pool (tenant_refresh), most active first,
+skipping client/platform pairs whose data is unchanged since their last refresh
 """
 
 import asyncio
@@ -10,8 +12,10 @@ import sys
 import os
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
+from request_deadline import run_blocking
+from tenant_refresh import REFRESH_CONCURRENCY, TenantRefreshPool, data_version, get_active_clients
 
 # Setup logging
 logging.basicConfig(
@@ -26,21 +30,74 @@ load_dotenv()
 class SKUAnalysisCronJob:
     """Cron job to refresh SKU analysis cache every 8 hours - FIXED VERSION"""
     
-    def __init__(self):
+    def __init__(self, concurrency: int = None):
         self.platforms = ["shopify", "amazon"]
+        self.pool = TenantRefreshPool(
+            "nightly_sku",
+            self.refresh_client_sku_analysis,
+            data_version,
+            concurrency=concurrency or REFRESH_CONCURRENCY,
+        )
         logger.info("SKU Analysis Cron Job initialized - USING OLD WORKING LOGIC")
     
     async def get_specific_client(self, target_client_id: str = None) -> List[str]:
-        """Get specific client ID or default to main client"""
+        """Get specific client ID, every client with a connected integration, or the main client"""
         if target_client_id:
             logger.info(f" Targeting specific client: {target_client_id}")
             return [target_client_id]
         
+        active_clients = await get_active_clients()
+        if active_clients:
+            logger.info(f" Found {len(active_clients)} active clients for SKU analysis")
+            return active_clients
+        
         # Default to the main active client (the one with most data)
         main_client = "3b619a14-3cd8-49fa-9c24-d8df5e54c452"  # Your current client
         logger.info(f" Using main client: {main_client}")
         return [main_client]
     
+    async def _legacy_amazon_skus(self, client_id: str, admin_client) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """SKUs generated by the legacy inventory analyzer from raw client_data (AMZ-ORDER-xxxxx)"""
+        from inventory_analyzer import inventory_analyzer
+        
+        logger.info(f" No organized Amazon data for {client_id}, using legacy inventory analyzer")
+        
+        # Off the event loop, so other clients' refreshes keep running meanwhile
+        query = admin_client.table("client_data").select("*").eq("client_id", client_id).order("created_at", desc=True)
+        response = await run_blocking(query.execute)
+        
+        if not response.data:
+            return [], "No client data found for Amazon analysis"
+        
+        # Prepare data for legacy analysis (same as old working system)
+        client_data_for_analysis = {
+            "client_id": client_id,
+            "data": []
+        }
+        
+        for record in response.data:
+            if record.get('data'):
+                try:
+                    if isinstance(record['data'], dict):
+                        parsed_data = record['data']
+                    elif isinstance(record['data'], str):
+                        parsed_data = json.loads(record['data'])
+                    else:
+                        continue
+                    client_data_for_analysis["data"].append(parsed_data)
+                except:
+                    continue
+        
+        if not client_data_for_analysis["data"]:
+            return [], "No valid data for Amazon analysis"
+        
+        logger.info(f" Running legacy inventory analysis on {len(client_data_for_analysis['data'])} records")
+        analytics = await run_blocking(inventory_analyzer.analyze_inventory_data, client_data_for_analysis)
+        skus = analytics.get("sku_inventory", {}).get("skus", [])
+        
+        logger.info(f" Legacy analyzer returned {len(skus)} Amazon SKUs")
+        return skus, None
+    
     async def refresh_client_sku_analysis(self, client_id: str, platform: str) -> Dict[str, Any]:
         """Refresh SKU analysis for a specific client and platform - OLD WORKING SYSTEM"""
         try:
@@ -63,48 +120,21 @@ class SKUAnalysisCronJob:
                 logger.info(f" Dashboard analyzer returned {len(skus)} Shopify SKUs")
                 
             elif platform.lower() == "amazon":
-                # AMAZON: Use legacy inventory analyzer (generates SKUs from 10000 orders like old working system)
-                logger.info(f" Using legacy inventory analyzer for Amazon (SKU generation from 10000 orders like old system)")
-                
+                # AMAZON: Organized orders/products through the same dashboard analyzer (SKUs are
+                # extracted from orders when there are no product rows); the legacy analyzer over
+                # all client_data only runs for clients without organized Amazon data
                 from database import get_admin_client
-                from inventory_analyzer import inventory_analyzer
                 
                 admin_client = get_admin_client()
+                sku_result = await dashboard_inventory_analyzer.get_sku_list(client_id, 1, 10000, use_cache=False, platform=platform)
+                skus = sku_result.get("skus", []) if sku_result.get("success") else []
                 
-                # Get raw client data (same approach as old working system that generated 100+ SKUs)
-                response = admin_client.table("client_data").select("*").eq("client_id", client_id).order("created_at", desc=True).execute()
-                
-                if not response.data:
-                    return {"success": False, "error": "No client data found for Amazon analysis"}
-                
-                # Prepare data for legacy analysis (same as old working system)
-                client_data_for_analysis = {
-                    "client_id": client_id,
-                    "data": []
-                }
-                
-                for record in response.data:
-                    if record.get('data'):
-                        try:
-                            if isinstance(record['data'], dict):
-                                parsed_data = record['data']
-                            elif isinstance(record['data'], str):
-                                parsed_data = json.loads(record['data'])
-                            else:
-                                continue
-                            client_data_for_analysis["data"].append(parsed_data)
-                        except:
-                            continue
-                
-                if not client_data_for_analysis["data"]:
-                    return {"success": False, "error": "No valid data for Amazon analysis"}
-                
-                # Run legacy analysis (same as old working system that generated AMZ-ORDER-xxxxx)
-                logger.info(f" Running legacy inventory analysis on {len(client_data_for_analysis['data'])} records")
-                analytics = inventory_analyzer.analyze_inventory_data(client_data_for_analysis)
-                skus = analytics.get("sku_inventory", {}).get("skus", [])
-                
-                logger.info(f" Legacy analyzer returned {len(skus)} Amazon SKUs (same as old working system)")
+                if skus:
+                    logger.info(f" Dashboard analyzer returned {len(skus)} Amazon SKUs")
+                else:
+                    skus, error = await self._legacy_amazon_skus(client_id, admin_client)
+                    if error:
+                        return {"success": False, "error": error}
                 
             else:
                 return {"success": False, "error": f"Unsupported platform: {platform}"}
@@ -120,18 +150,11 @@ class SKUAnalysisCronJob:
                     
                 cache_key = f"{client_id}_{platform}"
                 
-                # Clear old cache
-                admin_client.table("sku_cache").delete().eq("client_id", cache_key).eq("data_type", "sku_list").execute()
+                # Row-per-SKU cache with precomputed summary stats
+                from sku_cache_manager import get_sku_cache_manager
                 
-                # Insert new cache
-                cache_record = {
-                    "client_id": cache_key,
-                    "data_type": "sku_list", 
-                    "data": json.dumps(skus),
-                    "total_count": len(skus),
-                    "created_at": datetime.now().isoformat()
-                }
-                admin_client.table("sku_cache").insert(cache_record).execute()
+                if not await get_sku_cache_manager(admin_client).cache_skus(cache_key, skus):
+                    return {"success": False, "error": "Failed to cache data"}
                 
                 logger.info(f" Successfully cached {len(skus)} SKUs for client {client_id} ({platform}) - OLD WORKING SYSTEM")
                 
@@ -180,31 +203,14 @@ class SKUAnalysisCronJob:
                 "failed_jobs": 0
             }
         
-        logger.info(f" Processing {len(active_clients)} clients with {len(self.platforms)} platforms each")
-        results["total_jobs"] = len(active_clients) * len(self.platforms)
+        logger.info(f" Processing {len(active_clients)} clients with {len(self.platforms)} platforms each, {self.pool.concurrency} at a time")
         
-        # Process each client with proper platform separation
-        for client_id in active_clients:
-            client_results = {}
-            
-            for platform in self.platforms:
-                try:
-                    result = await self.refresh_client_sku_analysis(client_id, platform)
-                    client_results[platform] = result
-                    
-                    if result.get("success"):
-                        results["successful_jobs"] += 1
-                        logger.info(f" SUCCESS - Client {client_id} ({platform}): {result.get('skus_cached', 0)} SKUs cached")
-                    else:
-                        results["failed_jobs"] += 1
-                        logger.warning(f" FAILED - Client {client_id} ({platform}): {result.get('error')}")
-                        
-                except Exception as e:
-                    logger.error(f" Failed to process client {client_id} ({platform}): {e}")
-                    client_results[platform] = {"success": False, "error": str(e)}
-                    results["failed_jobs"] += 1
-            
-            results["client_results"][client_id] = client_results
+        # Most active clients first; unchanged client/platform pairs are skipped
+        pool_results = await self.pool.run(active_clients, self.platforms)
+        results.update({
+            key: pool_results[key]
+            for key in ("total_jobs", "successful_jobs", "skipped_jobs", "failed_jobs", "tenant_order", "client_results")
+        })
         
         # Calculate final results
         duration = (datetime.now() - start_time).total_seconds()
@@ -212,8 +218,8 @@ class SKUAnalysisCronJob:
         
         logger.info(f" SKU analysis cron job completed in {duration:.2f} seconds")
         
-        if results['successful_jobs'] > 0:
-            logger.info(f" Results: {results['successful_jobs']} successful, {results['failed_jobs']} failed out of {results['total_jobs']} total jobs")
+        if results['successful_jobs'] > 0 or results['skipped_jobs'] > 0:
+            logger.info(f" Results: {results['successful_jobs']} successful, {results['skipped_jobs']} unchanged, {results['failed_jobs']} failed out of {results['total_jobs']} total jobs")
         else:
             logger.info(f"ℹ️ Results: No SKUs cached - this may indicate organized data tables don't exist yet")
         
@@ -1,104 +1,202 @@
 """
 SKU Cache Manager
-Handles caching and pagination for large SKU datasets to prevent timeouts
+Handles caching and pagination for large SKU datasets to prevent timeouts.
+SKUs are stored one row per SKU so paging, sorting, filtering and search
+run server-side; summary stats are precomputed at write time.
 """
 
 import json
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+# Sort keys accepted by get_cached_skus -> indexed columns of sku_cache_items
+SORT_COLUMNS = {
+    "position": "position",
+    "availability": "current_availability",
+    "value": "total_value",
+    "velocity": "velocity",
+    "sku": "sku_code",
+    "name": "item_name",
+}
+
+STOCK_STATUSES = ("out_of_stock", "low_stock", "in_stock", "overstock")
+
+# PostgREST turns every * in a like operand into %, so it cannot be matched literally
+_SEARCH_UNSAFE = str.maketrans("", "", "*")
+
+
+def like_prefix_operand(term: str) -> str:
+    """
+    PostgREST `like` operand matching values that start with `term` literally:
+    LIKE's own wildcards (% and _) are escaped, and the value is double-quoted
+    so commas and parentheses cannot break an or=(...) filter
+    """
+    pattern = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    quoted = pattern.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{quoted}*"'
+
+
+def stock_status(availability: float) -> str:
+    """Same thresholds as the summary stats: <=0 out, <=10 low, >100 overstock"""
+    if availability <= 0:
+        return "out_of_stock"
+    if availability <= 10:
+        return "low_stock"
+    if availability > 100:
+        return "overstock"
+    return "in_stock"
+
+
+def calculate_summary_stats(sku_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summary stats over the full SKU list - computed once, when the cache is written"""
+    stats = {
+        "total_skus": len(sku_data),
+        "total_inventory_value": 0,
+        "low_stock_count": 0,
+        "out_of_stock_count": 0,
+        "overstock_count": 0
+    }
+    for sku in sku_data:
+        stats["total_inventory_value"] += sku.get('total_value', 0) or 0
+        status = stock_status(sku.get('current_availability', 0) or 0)
+        if status != "in_stock":
+            stats[f"{status}_count"] += 1
+    return stats
+
+
 class SKUCacheManager:
+    """
+    Stores each cached SKU list as one row per SKU (sku_cache_items) plus a
+    small header row in sku_cache holding the generation, total count and
+    precomputed summary stats. Paging, sorting, stock-status filters and
+    prefix search run in the database, so a page costs the same for 200 or
+    20k SKUs.
+    """
+
     def __init__(self, admin_client: Client):
         self.admin_client = admin_client
         self.cache_table = "sku_cache"
+        self.items_table = "sku_cache_items"
+        self.insert_batch_size = 1000
         self.cache_duration = timedelta(hours=2)  # Cache for 2 hours - refreshed by cron job
         
-    async def get_cached_skus(self, client_id: str, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
-        """Get cached SKU data with pagination"""
+    async def get_cached_skus(
+        self,
+        client_id: str,
+        page: int = 1,
+        page_size: int = 50,
+        sort_by: str = "position",
+        sort_order: str = "asc",
+        stock_status: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of cached SKUs, sorted/filtered/searched server-side"""
         try:
-            # Check if cache exists and is valid
-            cache_response = self.admin_client.table(self.cache_table).select(
-                "data, created_at, total_count"
-            ).eq("client_id", client_id).eq("data_type", "sku_list").execute()
-            
-            if cache_response.data:
-                cache_record = cache_response.data[0]
-                created_at = datetime.fromisoformat(cache_record['created_at'].replace('Z', '+00:00'))
-                
-                # Check if cache is still valid
-                if datetime.now().replace(tzinfo=created_at.tzinfo) - created_at < self.cache_duration:
-                    cached_data = json.loads(cache_record['data'])
-                    total_count = cache_record['total_count']
-                    
-                    # Apply pagination
-                    start_idx = (page - 1) * page_size
-                    end_idx = start_idx + page_size
-                    paginated_skus = cached_data[start_idx:end_idx]
-                    
-                    total_pages = (total_count + page_size - 1) // page_size
-                    
-                    logger.info(f" Cache hit for client {client_id} - page {page}/{total_pages}")
-                    
-                    # Calculate summary stats for frontend
-                    summary_stats = {
-                        "total_skus": total_count,
-                        "total_inventory_value": sum(sku.get('total_value', 0) for sku in cached_data),
-                        "low_stock_count": sum(1 for sku in cached_data if 0 < sku.get('current_availability', 0) <= 10),
-                        "out_of_stock_count": sum(1 for sku in cached_data if sku.get('current_availability', 0) <= 0),
-                        "overstock_count": sum(1 for sku in cached_data if sku.get('current_availability', 0) > 100)
-                    }
-                    
-                    return {
-                        "client_id": client_id.split('_')[0],  # Remove platform suffix
-                        "success": True,
-                        "sku_inventory": {
-                            "skus": paginated_skus,
-                            "summary_stats": summary_stats
-                        },
-                        "pagination": {
-                            "current_page": page,
-                            "page_size": page_size,
-                            "total_count": total_count,
-                            "total_pages": total_pages,
-                            "has_next": page < total_pages,
-                            "has_previous": page > 1
-                        },
-                        "cached": True,
-                        "timestamp": datetime.now().isoformat(),
-                        "processing_time": "cached",
-                        "data_source": "cron_cache"
-                    }
-            
-            return {"success": False, "cached": False, "message": "No valid cache found - analysis runs via cron job every 2 hours"}
+            header = self._get_header(client_id)
+            if not header or not self._is_fresh(header):
+                return {"success": False, "cached": False, "message": "No valid cache found - analysis runs via cron job every 2 hours"}
+            
+            page = max(1, page)
+            page_size = max(1, page_size)
+            meta = header["meta"]
+            
+            if meta is None:
+                # Cache written before row storage - serve it the old way until the next refresh
+                skus, total_count = self._page_legacy_blob(header["legacy_skus"], page, page_size, sort_by, sort_order, stock_status, search)
+                summary_stats = calculate_summary_stats(header["legacy_skus"])
+            else:
+                skus, total_count = self._query_page(client_id, meta["generation"], page, page_size, sort_by, sort_order, stock_status, search)
+                summary_stats = meta["summary_stats"]
+            
+            total_pages = (total_count + page_size - 1) // page_size
+            
+            logger.info(f" Cache hit for client {client_id} - page {page}/{total_pages}")
+            
+            return {
+                "client_id": client_id.split('_')[0],  # Remove platform suffix
+                "success": True,
+                "sku_inventory": {
+                    "skus": skus,
+                    "summary_stats": summary_stats
+                },
+                "pagination": {
+                    "current_page": page,
+                    "page_size": page_size,
+                    "total_count": total_count,
+                    "total_pages": total_pages,
+                    "has_next": page < total_pages,
+                    "has_previous": page > 1
+                },
+                "cached": True,
+                "timestamp": datetime.now().isoformat(),
+                "processing_time": "cached",
+                "data_source": "cron_cache"
+            }
             
         except Exception as e:
             logger.error(f" Error retrieving cached SKUs: {e}")
             return {"success": False, "cached": False, "error": str(e)}
     
     async def cache_skus(self, client_id: str, sku_data: List[Dict[str, Any]]) -> bool:
-        """Cache SKU data for fast retrieval"""
+        """Cache SKU data as indexed rows under a new generation, then switch the header to it"""
         try:
-            # First, delete any existing cache for this client
-            self.admin_client.table(self.cache_table).delete().eq(
-                "client_id", client_id
-            ).eq("data_type", "sku_list").execute()
+            generation = int(time.time() * 1000)
+            
+            rows = []
+            for position, sku in enumerate(sku_data):
+                availability = sku.get('current_availability', 0) or 0
+                rows.append({
+                    "cache_key": client_id,
+                    "generation": generation,
+                    "position": position,
+                    "sku_code": str(sku.get('sku_code') or ''),
+                    "item_name": str(sku.get('item_name') or ''),
+                    "current_availability": availability,
+                    "total_value": sku.get('total_value', 0) or 0,
+                    "velocity": sku.get('units_sold') or sku.get('outgoing_inventory', 0) or 0,
+                    "stock_status": stock_status(availability),
+                    "data": sku
+                })
             
-            # Cache the new data
-            cache_record = {
+            for i in range(0, len(rows), self.insert_batch_size):
+                self.admin_client.table(self.items_table).insert(rows[i:i + self.insert_batch_size]).execute()
+            
+            # Readers follow the header, so they switch to the new rows atomically
+            header = {
                 "client_id": client_id,
                 "data_type": "sku_list",
-                "data": json.dumps(sku_data),
+                "data": json.dumps({
+                    "format": "rows",
+                    "generation": generation,
+                    "summary_stats": calculate_summary_stats(sku_data)
+                }),
                 "total_count": len(sku_data),
                 "created_at": datetime.now().isoformat()
             }
+            existing = self.admin_client.table(self.cache_table).select("id").eq(
+                "client_id", client_id
+            ).eq("data_type", "sku_list").execute()
+            if existing.data:
+                self.admin_client.table(self.cache_table).update(header).eq(
+                    "id", existing.data[0]["id"]
+                ).execute()
+                # Drop duplicate headers left by the old delete-then-insert writes
+                for stale in existing.data[1:]:
+                    self.admin_client.table(self.cache_table).delete().eq("id", stale["id"]).execute()
+            else:
+                self.admin_client.table(self.cache_table).insert(header).execute()
             
-            self.admin_client.table(self.cache_table).insert(cache_record).execute()
+            # Older generations are unreachable now
+            self.admin_client.table(self.items_table).delete().eq(
+                "cache_key", client_id
+            ).neq("generation", generation).execute()
             
-            logger.info(f" Cached {len(sku_data)} SKUs for client {client_id}")
+            logger.info(f" Cached {len(sku_data)} SKUs for client {client_id} (generation {generation})")
             return True
             
         except Exception as e:
@@ -106,47 +204,141 @@ class SKUCacheManager:
             return False
     
     async def get_sku_summary_stats(self, client_id: str) -> Dict[str, Any]:
-        """Get summary statistics from cached SKU data"""
+        """Get the summary statistics precomputed when the SKU cache was written"""
         try:
-            cache_response = self.admin_client.table(self.cache_table).select(
-                "data, total_count"
-            ).eq("client_id", client_id).eq("data_type", "sku_list").execute()
+            header = self._get_header(client_id)
             
-            if not cache_response.data:
+            if not header:
                 return {"success": False, "error": "No cached data found"}
             
-            cached_data = json.loads(cache_response.data[0]['data'])
-            
-            # Calculate summary stats
-            total_skus = len(cached_data)
-            total_inventory_value = sum(item.get('total_value', 0) for item in cached_data)
-            low_stock_count = sum(1 for item in cached_data if item.get('current_availability', 0) < 10)
-            out_of_stock_count = sum(1 for item in cached_data if item.get('current_availability', 0) <= 0)
-            overstock_count = sum(1 for item in cached_data if item.get('current_availability', 0) > 100)
+            if header["meta"] is None:
+                summary_stats = calculate_summary_stats(header["legacy_skus"])
+            else:
+                summary_stats = header["meta"]["summary_stats"]
             
             return {
                 "success": True,
-                "summary_stats": {
-                    "total_skus": total_skus,
-                    "total_inventory_value": total_inventory_value,
-                    "low_stock_count": low_stock_count,
-                    "out_of_stock_count": out_of_stock_count,
-                    "overstock_count": overstock_count
-                }
+                "summary_stats": summary_stats
             }
             
         except Exception as e:
             logger.error(f" Error calculating summary stats: {e}")
             return {"success": False, "error": str(e)}
     
+    def get_cache_version(self, client_id: str) -> Optional[str]:
+        """created_at of the fresh cache header (each refresh writes a new one), or None"""
+        try:
+            cache_response = self.admin_client.table(self.cache_table).select(
+                "created_at"
+            ).eq("client_id", client_id).eq("data_type", "sku_list").order(
+                "created_at", desc=True
+            ).limit(1).execute()
+
+            if not cache_response.data:
+                return None
 
+            header = cache_response.data[0]
+            return header['created_at'] if self._is_fresh(header) else None
 
+        except Exception as e:
+            logger.error(f" Error reading SKU cache version: {e}")
+            return None
+
+    def _get_header(self, client_id: str) -> Optional[Dict[str, Any]]:
+        """Read the small header row; legacy rows carry the whole SKU list instead"""
+        cache_response = self.admin_client.table(self.cache_table).select(
+            "data, created_at, total_count"
+        ).eq("client_id", client_id).eq("data_type", "sku_list").order(
+            "created_at", desc=True
+        ).limit(1).execute()
+        
+        if not cache_response.data:
+            return None
+        
+        record = cache_response.data[0]
+        payload = record['data']
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        
+        is_rows = isinstance(payload, dict) and payload.get("format") == "rows"
+        return {
+            "created_at": record['created_at'],
+            "total_count": record['total_count'],
+            "meta": payload if is_rows else None,
+            "legacy_skus": None if is_rows else (payload or [])
+        }
+    
+    def _is_fresh(self, header: Dict[str, Any]) -> bool:
+        created_at = datetime.fromisoformat(header['created_at'].replace('Z', '+00:00'))
+        return datetime.now().replace(tzinfo=created_at.tzinfo) - created_at < self.cache_duration
+    
+    def _query_page(self, client_id: str, generation: int, page: int, page_size: int, sort_by: str,
+                    sort_order: str, status: Optional[str], search: Optional[str]):
+        """One indexed, ranged query for the page plus its filtered count"""
+        query = self.admin_client.table(self.items_table).select(
+            "data", count="exact"
+        ).eq("cache_key", client_id).eq("generation", generation)
+        
+        if status in STOCK_STATUSES:
+            query = query.eq("stock_status", status)
+        
+        term = (search or "").translate(_SEARCH_UNSAFE).strip().lower()
+        if term:
+            # Prefix LIKE on the lowercased columns, which the text_pattern_ops indexes serve
+            # (ilike and expression indexes are not usable from PostgREST filters)
+            operand = like_prefix_operand(term)
+            query = query.or_(f"sku_code_lower.like.{operand},item_name_lower.like.{operand}")
+        
+        column = SORT_COLUMNS.get(sort_by, "position")
+        query = query.order(column, desc=(sort_order == "desc"))
+        if column != "position":
+            # Stable order between pages for ties
+            query = query.order("position")
+        
+        start_idx = (page - 1) * page_size
+        response = query.range(start_idx, start_idx + page_size - 1).execute()
+        
+        skus = [row["data"] for row in (response.data or [])]
+        return skus, response.count or 0
+    
+    def _page_legacy_blob(self, cached_data: List[Dict[str, Any]], page: int, page_size: int, sort_by: str,
+                          sort_order: str, status: Optional[str], search: Optional[str]):
+        """Same sort/filter/search semantics as _query_page, in memory"""
+        skus = cached_data
+        if status in STOCK_STATUSES:
+            skus = [sku for sku in skus if stock_status(sku.get('current_availability', 0) or 0) == status]
+        
+        term = (search or "").translate(_SEARCH_UNSAFE).strip().lower()
+        if term:
+            skus = [
+                sku for sku in skus
+                if str(sku.get('sku_code') or '').lower().startswith(term)
+                or str(sku.get('item_name') or '').lower().startswith(term)
+            ]
+        
+        column = SORT_COLUMNS.get(sort_by, "position")
+        if column in ("sku_code", "item_name"):
+            skus = sorted(skus, key=lambda sku: str(sku.get(column) or ''), reverse=(sort_order == "desc"))
+        elif column == "velocity":
+            skus = sorted(skus, key=lambda sku: sku.get('units_sold') or sku.get('outgoing_inventory', 0) or 0, reverse=(sort_order == "desc"))
+        elif column != "position":
+            skus = sorted(skus, key=lambda sku: sku.get(column, 0) or 0, reverse=(sort_order == "desc"))
+        elif sort_order == "desc":
+            skus = list(reversed(skus))
+        
+        start_idx = (page - 1) * page_size
+        return skus[start_idx:start_idx + page_size], len(skus)
+    
     async def invalidate_cache(self, client_id: str):
-        """Invalidate/clear cached SKU data for a client"""
+        """Invalidate/clear cached SKU data for a client (every platform unless one is in the key)"""
         try:
-            self.admin_client.table(self.cache_table).delete().eq(
-                "client_id", client_id
+            # Caches are keyed "<client_id>_<platform>"
+            self.admin_client.table(self.cache_table).delete().like(
+                "client_id", f"{client_id}%"
             ).eq("data_type", "sku_list").execute()
+            self.admin_client.table(self.items_table).delete().like(
+                "cache_key", f"{client_id}%"
+            ).execute()
             
             logger.info(f"️ Invalidated SKU cache for client {client_id}")
             return True
@@ -9,7 +9,7 @@ from datetime import datetime
 import hashlib
 import colorsys
 
-from langchain_openai import ChatOpenAI
+from llm_gateway import fan_out, llm_gateway
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 
@@ -89,11 +89,9 @@ class TemplateEcosystemManager:
     """Advanced template ecosystem manager with intelligent relationships and theming"""
     
     def __init__(self, openai_api_key: str):
-        self.llm = ChatOpenAI(
-            api_key=openai_api_key,
-            model="gpt-4o",
-            temperature=0.6
-        )
+        # Completions go through the shared gateway (pooled client, concurrency limits, retries)
+        self.model = "gpt-4o"
+        self.temperature = 0.6
         
         self.color_psychology_mapping = self._initialize_color_psychology()
         self.business_theme_profiles = self._initialize_business_themes()
@@ -252,14 +250,24 @@ class TemplateEcosystemManager:
             base_theme = await self._generate_base_theme(business_dna, business_profile)
             
             # Create personalized themes for each template
-            themes = {}
-            for i, architecture in enumerate(template_architectures):
-                theme = await self._personalize_theme_for_template(
+            results = await fan_out(
+                self._personalize_theme_for_template(
                     base_theme, 
                     architecture, 
                     business_dna,
                     variation_index=i
                 )
+                for i, architecture in enumerate(template_architectures)
+            )
+            
+            themes = {}
+            fallback_themes = None
+            for architecture, theme in zip(template_architectures, results):
+                if isinstance(theme, Exception):
+                    logger.warning(f" Theme failed for {architecture.template_id}, using fallback theme: {theme}")
+                    if fallback_themes is None:
+                        fallback_themes = await self._generate_fallback_themes(template_architectures)
+                    theme = fallback_themes[architecture.template_id]
                 themes[architecture.template_id] = theme
             
             logger.info(f" Generated {len(themes)} personalized themes")
@@ -310,11 +318,11 @@ class TemplateEcosystemManager:
             """)
         ])
         
-        response = await self.llm.ainvoke(prompt.format_messages())
+        response = await llm_gateway.complete(prompt.format_messages(), model=self.model, temperature=self.temperature)
         
         try:
             # Parse AI response for colors
-            ai_colors = await self._parse_color_response(response.content)
+            ai_colors = await self._parse_color_response(response)
             
             # Enhance with color psychology
             return {
@@ -400,13 +408,22 @@ class TemplateEcosystemManager:
         try:
             logger.info(f"️ Generating smart names for {len(template_architectures)} templates")
             
-            smart_names = {}
-            
-            for architecture in template_architectures:
-                smart_name = await self._generate_contextual_name(
+            results = await fan_out(
+                self._generate_contextual_name(
                     architecture, 
                     business_dna
                 )
+                for architecture in template_architectures
+            )
+            
+            smart_names = {}
+            fallback_names = None
+            for architecture, smart_name in zip(template_architectures, results):
+                if isinstance(smart_name, Exception):
+                    logger.warning(f" Naming failed for {architecture.template_id}, using fallback name: {smart_name}")
+                    if fallback_names is None:
+                        fallback_names = await self._generate_fallback_names(template_architectures)
+                    smart_name = fallback_names[architecture.template_id]
                 smart_names[architecture.template_id] = smart_name
             
             # Ensure name uniqueness across ecosystem
@@ -458,11 +475,11 @@ class TemplateEcosystemManager:
             """)
         ])
         
-        response = await self.llm.ainvoke(prompt.format_messages())
+        response = await llm_gateway.complete(prompt.format_messages(), model=self.model, temperature=self.temperature)
         
         try:
             # Parse AI response
-            name_data = await self._parse_naming_response(response.content)
+            name_data = await self._parse_naming_response(response)
             
             return SmartTemplateName(
                 template_id=architecture.template_id,
@@ -0,0 +1,258 @@
+"""
+Tenant Refresh - Prioritized, bounded-concurrency refresh runs across tenants
+The nightly analytics and SKU jobs hand their per-tenant, per-platform work to a
+TenantRefreshPool instead of looping over clients one at a time. Tenants are
+ordered by recent activity, then data size (both read from the per-day row
+counts in client_data_fingerprints), a fixed number of refreshes run at once,
+and every finished unit checkpoints the data version it was built from. A
+unit whose data version matches its checkpoint is skipped, so an unchanged
+tenant costs one version probe and a run that died resumes where it stopped.
+The version covers the rolling windows (last 7/30 days, ...) the analytics
+read, and checkpoints are rows in refresh_checkpoints, so they outlive the
+cron process.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from data_fingerprint import ALL_ROWS, FINGERPRINT_TABLE
+from request_deadline import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Refreshes one run keeps in flight (each one is mostly database and analyzer awaits)
+REFRESH_CONCURRENCY = int(os.getenv("NIGHTLY_REFRESH_CONCURRENCY", "4"))
+
+# A unit whose data is unchanged is still rebuilt once its checkpoint is this old
+CHECKPOINT_MAX_AGE_SECONDS = float(os.getenv("NIGHTLY_REFRESH_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+
+CHECKPOINT_TABLE = "refresh_checkpoints"
+
+# One tenant and platform may not hold a worker longer than this
+UNIT_TIMEOUT_SECONDS = float(os.getenv("NIGHTLY_REFRESH_UNIT_TIMEOUT_SECONDS", "600"))
+
+# "Recent activity" = rows ingested in the last this many days
+ACTIVITY_DAYS = 7
+
+Refresh = Callable[[str, str], Awaitable[Dict[str, Any]]]
+Version = Callable[[str, str], Awaitable[Optional[str]]]
+
+
+def _admin_client():
+    from database import get_admin_client
+
+    return get_admin_client()
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class CheckpointTable:
+    """
+    Checkpoints as rows in refresh_checkpoints (key, value, expires_at), with the
+    job queue's marker interface. The crons run as their own processes without
+    Redis, so in-memory markers would be gone by the next run.
+    """
+
+    def __init__(self, admin_client=None):
+        self._client = admin_client
+
+    def _table(self):
+        self._client = self._client or _admin_client()
+        return self._client.table(CHECKPOINT_TABLE)
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        try:
+            query = (
+                self._table()
+                .select("value")
+                .eq("key", key)
+                .gt("expires_at", _timestamp(datetime.now(timezone.utc)))
+                .limit(1)
+            )
+            response = await run_blocking(query.execute)
+        except Exception as e:
+            # Without a readable checkpoint the unit is rebuilt
+            logger.warning(f" Could not read checkpoint {key}: {e}")
+            return None
+        return response.data[0].get("value") if response.data else None
+
+    async def set_marker(self, key: str, value: str, ttl: float):
+        now = datetime.now(timezone.utc)
+        row = {
+            "key": key,
+            "value": value,
+            "expires_at": _timestamp(now + timedelta(seconds=ttl)),
+            "updated_at": _timestamp(now),
+        }
+        try:
+            await run_blocking(self._table().upsert(row, on_conflict="key").execute)
+        except Exception as e:
+            logger.warning(f" Could not save checkpoint {key}: {e}")
+
+
+async def get_active_clients(db_client=None) -> List[str]:
+    """Clients with a connected API integration"""
+    try:
+        db_client = db_client or _admin_client()
+        if not db_client:
+            logger.error(" No database connection")
+            return []
+        query = db_client.table("client_api_credentials").select("client_id").eq("status", "connected")
+        response = await run_blocking(query.execute)
+        return sorted({str(row["client_id"]) for row in response.data or []})
+    except Exception as e:
+        logger.error(f" Failed to get active clients: {e}")
+        return []
+
+
+async def rank_tenants(client_ids: Iterable[str], db_client=None) -> List[str]:
+    """
+    Most recently active first (rows ingested in the last ACTIVITY_DAYS), then the
+    largest datasets. Tenants without recorded buckets keep their order at the end;
+    if the buckets cannot be read the input order is kept.
+    """
+    client_ids = list(client_ids)
+    if len(client_ids) < 2:
+        return client_ids
+    try:
+        db_client = db_client or _admin_client()
+        query = (
+            db_client.table(FINGERPRINT_TABLE)
+            .select("client_id, bucket, row_count")
+            .in_("client_id", client_ids)
+        )
+        response = await run_blocking(query.execute)
+    except Exception as e:
+        logger.warning(f" Could not rank tenants by activity ({e}), keeping their order")
+        return client_ids
+
+    since = (datetime.now(timezone.utc) - timedelta(days=ACTIVITY_DAYS)).strftime("%Y-%m-%d")
+    recent: Dict[str, int] = {}
+    total: Dict[str, int] = {}
+    for row in response.data or []:
+        client_id = str(row["client_id"])
+        rows = int(row.get("row_count") or 0)
+        total[client_id] = total.get(client_id, 0) + rows
+        # Day buckets are ISO dates, so they compare as strings
+        bucket = str(row.get("bucket", ""))
+        if bucket != ALL_ROWS and bucket >= since:
+            recent[client_id] = recent.get(client_id, 0) + rows
+
+    position = {client_id: i for i, client_id in enumerate(client_ids)}
+    return sorted(
+        client_ids,
+        key=lambda c: (c not in total, -recent.get(c, 0), -total.get(c, 0), position[c]),
+    )
+
+
+class TenantRefreshPool:
+    """Runs refresh(client_id, platform) for every unit of a run, skipping unchanged ones"""
+
+    def __init__(self, name: str, refresh: Refresh, version: Version,
+                 concurrency: int = REFRESH_CONCURRENCY, max_age: float = CHECKPOINT_MAX_AGE_SECONDS,
+                 unit_timeout: float = UNIT_TIMEOUT_SECONDS, checkpoints=None):
+        self.name = name
+        self.refresh = refresh
+        self.version = version
+        self.concurrency = max(1, concurrency)
+        self.max_age = max_age
+        self.unit_timeout = unit_timeout
+        self.checkpoints = checkpoints if checkpoints is not None else CheckpointTable()
+
+    def checkpoint_key(self, client_id: str, platform: str) -> str:
+        return f"{self.name}:{client_id}:{platform}"
+
+    async def _run_unit(self, client_id: str, platform: str) -> Dict[str, Any]:
+        try:
+            version = await self.version(client_id, platform)
+        except Exception as e:
+            logger.warning(f" Could not read data version for {client_id} ({platform}): {e}")
+            version = None
+        key = self.checkpoint_key(client_id, platform)
+        if version and version == await self.checkpoints.get_marker(key):
+            return {"success": True, "skipped": True, "reason": "data unchanged"}
+
+        try:
+            result = await asyncio.wait_for(self.refresh(client_id, platform), timeout=self.unit_timeout)
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"timed out after {self.unit_timeout:.0f}s"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        if result.get("success") and version:
+            await self.checkpoints.set_marker(key, version, self.max_age)
+        return result
+
+    async def run(self, client_ids: Iterable[str], platforms: Iterable[str],
+                  ranked: bool = True) -> Dict[str, Any]:
+        """
+        Refresh every (client, platform) unit, highest-priority tenants first, at
+        most `concurrency` at a time. Returns per-unit results and run totals.
+        """
+        started = time.monotonic()
+        platforms = list(platforms)
+        client_ids = await rank_tenants(client_ids) if ranked else list(client_ids)
+        units: asyncio.Queue = asyncio.Queue()
+        for client_id in client_ids:
+            for platform in platforms:
+                units.put_nowait((client_id, platform))
+
+        results: Dict[str, Any] = {
+            "success": True,
+            "timestamp": datetime.now().isoformat(),
+            "total_jobs": units.qsize(),
+            "successful_jobs": 0,
+            "skipped_jobs": 0,
+            "failed_jobs": 0,
+            "concurrency": self.concurrency,
+            "tenant_order": client_ids,
+            "client_results": {client_id: {} for client_id in client_ids},
+        }
+
+        async def worker():
+            while True:
+                try:
+                    client_id, platform = units.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._run_unit(client_id, platform)
+                results["client_results"][client_id][platform] = result
+                if result.get("skipped"):
+                    results["skipped_jobs"] += 1
+                elif result.get("success"):
+                    results["successful_jobs"] += 1
+                else:
+                    results["failed_jobs"] += 1
+                    logger.warning(f" {self.name} FAILED - {client_id} ({platform}): {result.get('error')}")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, max(1, results["total_jobs"])))))
+
+        results["duration_seconds"] = round(time.monotonic() - started, 2)
+        logger.info(
+            f" {self.name}: {results['successful_jobs']} refreshed, {results['skipped_jobs']} unchanged, "
+            f"{results['failed_jobs']} failed of {results['total_jobs']} in {results['duration_seconds']:.2f}s"
+        )
+        return results
+
+
+async def data_version(client_id: str, platform: str) -> Optional[str]:
+    """
+    The organized-data version the on-demand refresh jobs compare against, plus what
+    the rolling windows hold today: unchanged data still yields new analytics once
+    an order ages out of (or into) a window, and only then
+    """
+    from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+
+    version = await dashboard_inventory_analyzer.get_data_version(client_id, platform)
+    if version is None:
+        return None
+    windows = await dashboard_inventory_analyzer.get_window_signature(client_id, platform)
+    if windows is None:
+        return None
+    return f"{version}#{windows}"
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for per-client admission control and fair queuing
+"""
+
+import asyncio
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from admission_control import AdmissionController, AdmissionMiddleware, AdmissionRejected
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def _hold(controller, client_id, order, release):
+    async with controller.admit(client_id):
+        order.append(client_id)
+        await release.wait()
+
+def test_per_client_quota_leaves_room_for_others():
+    """A busy client is capped at its quota; another client is admitted immediately"""
+    async def run():
+        controller = AdmissionController(max_concurrency=4, per_client_limit=2, max_queue_delay=5)
+        order, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(_hold(controller, "big", order, release)) for _ in range(6)]
+        await asyncio.sleep(0.01)
+        assert controller.stats()["active"] == 2 and controller.stats()["queued"] == 4
+        tasks.append(asyncio.create_task(_hold(controller, "small", order, release)))
+        await asyncio.sleep(0.01)
+        assert order == ["big", "big", "small"]
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.stats()["active"] == 0 and controller.stats()["busy_clients"] == 0
+
+    asyncio.run(run())
+
+def test_fair_queuing_interleaves_clients():
+    """A client arriving behind another's backlog is served next, not after the backlog"""
+    async def run():
+        controller = AdmissionController(max_concurrency=1, per_client_limit=1, max_queue_delay=5)
+        order = []
+
+        async def work(client_id):
+            async with controller.admit(client_id):
+                order.append(client_id)
+                await asyncio.sleep(0.001)
+
+        tasks = [asyncio.create_task(work("big")) for _ in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(work("small")))
+        await asyncio.gather(*tasks)
+        assert order.index("small") <= 2
+
+    asyncio.run(run())
+
+def test_queue_timeout_sheds_with_retry_after():
+    """Requests that cannot be admitted within the queue budget are rejected"""
+    async def run():
+        controller = AdmissionController(max_concurrency=1, per_client_limit=1, max_queue_delay=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "big", [], release))
+        await asyncio.sleep(0)
+        try:
+            await controller.acquire("other")
+            raise AssertionError("expected AdmissionRejected")
+        except AdmissionRejected as e:
+            assert e.retry_after >= 1
+        release.set()
+        await holder
+        assert controller.stats()["queued"] == 0 and controller.shed == 1
+
+    asyncio.run(run())
+
+def test_middleware_returns_503():
+    """Shed requests get a fast 503 with Retry-After; other paths are untouched"""
+    app = FastAPI()
+    controller = AdmissionController(max_concurrency=0, per_client_limit=1, max_queue_size=0)
+    app.add_middleware(AdmissionMiddleware, controller=controller, paths=["/heavy"],
+                       tenant_resolver=lambda scope: "c1")
+
+    @app.get("/heavy")
+    async def heavy():
+        return {"ok": True}
+
+    @app.get("/light")
+    async def light():
+        return {"ok": True}
+
+    client = TestClient(app)
+    response = client.get("/heavy")
+    assert response.status_code == 503 and int(response.headers["retry-after"]) >= 1
+    assert client.get("/light").status_code == 200
+
+if __name__ == "__main__":
+    test_per_client_quota_leaves_room_for_others()
+    test_fair_queuing_interleaves_clients()
+    test_queue_timeout_sheds_with_retry_after()
+    test_middleware_returns_503()
+    print(" All admission control tests passed!")
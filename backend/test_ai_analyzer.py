@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the upload insights call: transport retries stay in the gateway,
+only an unusable JSON answer is asked for again
+"""
+
+import asyncio
+import json
+import logging
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+
+from fake_llm_server import FakeLLMServer
+from llm_gateway import LLMGateway
+from models import DataFormat, TableSchema
+from request_deadline import DeadlineExceeded
+
+# The module-level analyzer requires an API key at import
+with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+    import ai_analyzer as ai_analyzer_module
+    from ai_analyzer import INSIGHT_JSON_ATTEMPTS, ai_analyzer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VALID_REPLY = json.dumps({
+    "data_type": "ecommerce", "confidence": 0.9, "insights": ["i"], "visualizations": ["bar_chart"],
+    "queries": ["SELECT 1"], "recommendations": ["r"], "kpi_suggestions": ["k"],
+})
+
+def _insights(gateway):
+    df = pd.DataFrame({"sku": ["a", "b"], "price": [1.0, 2.0]})
+    schema = TableSchema(table_name="client_x_data", columns=[])
+    validation = SimpleNamespace(file_size=10, encoding="utf-8")
+    quality = SimpleNamespace(quality_score=1.0, complete_rows=2, missing_values_count=0, duplicate_rows=0,
+                              issues=[], data_types_detected={})
+    with mock.patch.object(ai_analyzer_module, "llm_gateway", gateway):
+        return asyncio.run(ai_analyzer._generate_enhanced_ai_insights(df, schema, DataFormat.CSV, validation, quality))
+
+def _gateway(server):
+    return LLMGateway(api_key="sk-test", base_url=server.base_url, max_retries=2, retry_base_delay=0.01)
+
+def test_transport_errors_are_retried_by_the_gateway_only():
+    """A persistently failing model costs the gateway's attempts once, then the fallback answer"""
+    server = FakeLLMServer(reply=VALID_REPLY).start()
+    server.fail_status, server.fail_next = 500, 100
+    result = _insights(_gateway(server))
+    server.stop()
+    assert len(server.requests) == 3
+    assert result["data_type"] == "general"
+
+def test_invalid_json_is_asked_for_again_at_most_once():
+    """Non-JSON and missing-key answers are re-asked up to INSIGHT_JSON_ATTEMPTS completions"""
+    server = FakeLLMServer(reply="not json").start()
+    result = _insights(_gateway(server))
+    assert len(server.requests) == INSIGHT_JSON_ATTEMPTS and result["data_type"] == "general"
+
+    server.requests.clear()
+    server.reply = json.dumps({"data_type": "crm"})
+    assert _insights(_gateway(server))["data_type"] == "general"
+    assert len(server.requests) == INSIGHT_JSON_ATTEMPTS
+
+    server.requests.clear()
+    server.reply = VALID_REPLY
+    assert _insights(_gateway(server))["data_type"] == "ecommerce" and len(server.requests) == 1
+    server.stop()
+
+def test_deadline_exceeded_is_not_retried():
+    """An exhausted request budget propagates instead of sleeping into another attempt"""
+    calls = []
+
+    async def chat(**kwargs):
+        calls.append(kwargs)
+        raise DeadlineExceeded("request budget exhausted")
+
+    try:
+        _insights(SimpleNamespace(chat=chat))
+        raise AssertionError("DeadlineExceeded was swallowed")
+    except DeadlineExceeded:
+        pass
+    assert len(calls) == 1
+
+if __name__ == "__main__":
+    test_transport_errors_are_retried_by_the_gateway_only()
+    test_invalid_json_is_asked_for_again_at_most_once()
+    test_deadline_exceeded_is_not_retried()
+    print(" All AI analyzer tests passed!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the pattern analyses running in a process pool over shared memory
+"""
+
+import asyncio
+import logging
+import concurrent.futures
+import time
+
+import numpy as np
+import pandas as pd
+
+import analysis_pool as pool_module
+from analysis_pool import AnalysisPool
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _sales(rows=400):
+    rng = np.random.default_rng(7)
+    order_date = pd.date_range("2024-01-01", periods=rows, freq="D").strftime("%Y-%m-%d")
+    month = pd.to_datetime(order_date).month.to_numpy()
+    revenue = 100 + 80 * (month == 12) + rng.normal(0, 5, rows)
+    return pd.DataFrame({
+        "order_date": order_date,
+        "revenue": revenue,
+        "units": (revenue / 10).round().astype(int),
+        "discount": rng.normal(0, 1, rows),
+        "region": rng.choice(["north", "south", None], rows),
+    })
+
+async def _analyze(pool, data):
+    async with pool.share(data) as shared:
+        names = list(pool_module.ANALYSES)
+        results = await asyncio.gather(*(pool.run(name, shared) for name in names))
+    return dict(zip(names, results))
+
+def test_pool_matches_inline_and_leaves_input_untouched():
+    """Worker processes on shared memory give the same results as in-process runs; the frame is not mutated"""
+    data = _sales()
+    before = data.copy()
+    pool = AnalysisPool(processes=2)
+    try:
+        in_pool = asyncio.run(_analyze(pool, data))
+    finally:
+        pool.shutdown()
+    inline = asyncio.run(_analyze(AnalysisPool(processes=0), data))
+
+    assert in_pool == inline
+    pd.testing.assert_frame_equal(data, before)
+    assert in_pool["seasonality"]["revenue"]["peak_month"] == 12
+    assert in_pool["correlations"]["strong_correlations"][0]["variable2"] == "units"
+    assert 0 < in_pool["data_quality"]["missing_ratio"] < 0.1
+
+def test_slow_analysis_times_out_alone():
+    """An analysis past its timeout returns {} while the others still complete"""
+    original = pool_module.ANALYSES["trends"]
+
+    def slow(frame):
+        time.sleep(1)
+        return original(frame)
+
+    pool_module.ANALYSES["trends"] = slow
+    try:
+        pool = AnalysisPool(processes=0, timeout=0.2)
+        results = asyncio.run(_analyze(pool, _sales(50)))
+    finally:
+        pool_module.ANALYSES["trends"] = original
+    assert results["trends"] == {} and pool.timeouts == 1
+    assert results["growth_metrics"]["revenue"]["current_value"] > 0
+
+def test_failing_analysis_returns_empty_alone():
+    """An analysis that raises yields {} for itself; the rest of the gather still completes"""
+    def broken(frame):
+        raise ValueError("bad column")
+
+    original = pool_module.ANALYSES["anomalies"]
+    pool_module.ANALYSES["anomalies"] = broken
+    try:
+        pool = AnalysisPool(processes=0)
+        results = asyncio.run(_analyze(pool, _sales(50)))
+    finally:
+        pool_module.ANALYSES["anomalies"] = original
+    assert results["anomalies"] == {} and pool.failures == 1
+    assert results["growth_metrics"]["revenue"]["current_value"] > 0
+
+class _StuckProcess:
+    def __init__(self):
+        self.terminated = False
+
+    def is_alive(self):
+        return not self.terminated
+
+    def terminate(self):
+        self.terminated = True
+
+class _StuckExecutor:
+    """Accepts work that never finishes, like a pool whose worker is wedged in an analysis"""
+
+    def __init__(self):
+        self._processes = {1: _StuckProcess(), 2: _StuckProcess()}
+        self._pending_work_items = {}
+        self.shutdown_calls = []
+
+    def submit(self, fn, *args):
+        return concurrent.futures.Future()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append((wait, cancel_futures))
+
+def test_pool_timeout_recycles_the_executor():
+    """A timed-out pool analysis terminates the pool's workers and the next call gets a fresh pool"""
+    pool = AnalysisPool(processes=2, timeout=0.1)
+    stuck = _StuckExecutor()
+    pool._executor = stuck
+
+    async def run():
+        async with pool.share(_sales(50)) as shared:
+            return await pool.run("trends", shared)
+
+    assert asyncio.run(run()) == {} and pool.timeouts == 1
+    assert stuck.shutdown_calls == [(False, True)] and pool._executor is None
+    deadline = time.monotonic() + 2
+    while not all(process.terminated for process in stuck._processes.values()):
+        assert time.monotonic() < deadline, "stuck workers were not terminated"
+        time.sleep(0.01)
+    pool.timeout = 60
+    try:
+        assert asyncio.run(_analyze(pool, _sales(50)))["trends"]
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    test_pool_matches_inline_and_leaves_input_untouched()
+    test_slow_analysis_times_out_alone()
+    test_failing_analysis_returns_empty_alone()
+    test_pool_timeout_recycles_the_executor()
+    print(" All analysis pool tests passed!")
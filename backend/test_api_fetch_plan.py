@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test script for the dependency-aware sync plan and per-run fetch memo in APIDataFetcher
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from unittest import mock
+
+import api_connectors
+from api_connectors import AmazonConnector, APIDataFetcher, FetchMemo, memoized
+from models import AmazonCredentials, PlatformType
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SHOPIFY_CREDENTIALS = {"shop_domain": "test-shop.myshopify.com", "access_token": "shpat_test"}
+
+PRODUCTS = {
+    "products": [
+        {
+            "id": 1,
+            "title": "Tee",
+            "variants": [
+                {"id": 11, "sku": "TEE-S", "inventory_item_id": 101, "price": "10.00", "inventory_quantity": 3},
+                {"id": 12, "sku": "TEE-M", "inventory_item_id": 102, "price": "10.00", "inventory_quantity": 5},
+            ],
+        }
+    ]
+}
+
+class _FakeResponse:
+    def __init__(self, body):
+        self.status = 200
+        self.headers = {}
+        self.body = body
+
+    async def json(self):
+        return self.body
+
+    async def text(self):
+        return ""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class _FakeSession:
+    """Stands in for aiohttp.ClientSession: records every request path, serves one catalog page"""
+
+    def __init__(self, requests):
+        self.requests = requests
+
+    def _respond(self, url):
+        path = url.split("/admin/api/2023-10/")[-1]
+        self.requests[path] += 1
+        return _FakeResponse(PRODUCTS if path == "products.json" else {})
+
+    def get(self, url, **kwargs):
+        return self._respond(url)
+
+    def post(self, url, **kwargs):
+        return self._respond(url)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+def test_full_shopify_sync_fetches_the_catalog_once():
+    """Products, incoming inventory, inventory levels and inventory items share one catalog download"""
+    requests = Counter()
+    with mock.patch.object(api_connectors.aiohttp, "ClientSession", lambda *a, **kw: _FakeSession(requests)):
+        all_data = asyncio.run(APIDataFetcher().fetch_all_data(PlatformType.SHOPIFY, SHOPIFY_CREDENTIALS))
+
+    assert requests["products.json"] == 1, dict(requests)
+    assert list(all_data) == [
+        "orders", "products", "incoming_inventory", "inventory_levels", "inventory_items", "fulfillment_orders",
+    ]
+    assert [variant["sku"] for variant in all_data["products"][0]["variants"]] == ["TEE-S", "TEE-M"]
+    # The catalog's inventory item ids still reached the dependent steps
+    assert requests["inventory_items/101.json"] == 1 and requests["inventory_items/102.json"] == 1
+    assert requests["graphql.json"] >= 1
+
+def test_amazon_sync_fetches_fba_inventory_once_and_overlaps_independent_steps():
+    """inventory, fba_inventory and products read one FBA download; orders and listings run alongside it"""
+    calls = Counter()
+    in_flight = 0
+    peak = 0
+
+    async def fake_fetch(name, result):
+        nonlocal in_flight, peak
+        calls[name] += 1
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return result
+
+    class FakeAmazon(AmazonConnector):
+        async def fetch_fba_inventory(self):
+            return await fake_fetch("fba_inventory", [{"asin": "B01", "seller_sku": "SKU-1", "fulfillable_quantity": 4}])
+
+        async def fetch_orders(self, days_back=None):
+            return await fake_fetch("orders", [{"order_id": "o1", "line_items": [{"sku": "SKU-1"}]}])
+
+        async def fetch_incoming_inventory(self):
+            return await fake_fetch("incoming_inventory", [])
+
+        async def fetch_listings_pricing(self):
+            return await fake_fetch("listings_pricing", [{"sku": "SKU-1", "price": 9.5}])
+
+    credentials = {"seller_id": "A1", "marketplace_ids": ["ATVPDKIKX0DER"], "access_key_id": "k", "secret_access_key": "s", "refresh_token": "r"}
+    connector = FakeAmazon(AmazonCredentials(**credentials))
+    with mock.patch.object(api_connectors.APIConnectorFactory, "create_connector", lambda *a: connector):
+        all_data = asyncio.run(APIDataFetcher().fetch_all_data(PlatformType.AMAZON, credentials))
+
+    assert calls["fba_inventory"] == 1, dict(calls)
+    assert all_data["inventory"] == all_data["fba_inventory"] and all_data["products"][0]["sku"] == "SKU-1"
+    assert peak == 3
+    # Outside a sync run the connector fetches directly again
+    assert connector.fetch_memo is None
+    asyncio.run(connector.fetch_inventory())
+    assert calls["fba_inventory"] == 2
+
+def test_memo_shares_one_fetch_between_concurrent_callers():
+    """Concurrent callers of the same upstream await one fetch, failures included"""
+    calls = Counter()
+
+    async def catalog():
+        calls["catalog"] += 1
+        await asyncio.sleep(0.01)
+        return ["p1"]
+
+    async def broken():
+        calls["broken"] += 1
+        raise RuntimeError("HTTP 500")
+
+    async def run():
+        holder = type("Connector", (), {"fetch_memo": FetchMemo()})()
+        results = await asyncio.gather(*(memoized(holder, "products", catalog) for _ in range(5)))
+        errors = await asyncio.gather(*(memoized(holder, "broken", broken) for _ in range(3)), return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(run())
+    assert results == [["p1"]] * 5 and calls["catalog"] == 1
+    assert calls["broken"] == 1 and all(isinstance(error, RuntimeError) for error in errors)
+
+def test_concurrent_amazon_steps_share_one_token_refresh():
+    """Plan steps that start together wait for one LWA token exchange instead of each making their own"""
+    posts = Counter()
+
+    class TokenSession(_FakeSession):
+        def post(self, url, **kwargs):
+            posts[url] += 1
+            return _SlowTokenResponse()
+
+    class _SlowTokenResponse(_FakeResponse):
+        def __init__(self):
+            super().__init__({"access_token": f"token-{sum(posts.values())}", "expires_in": 3600})
+
+        async def __aenter__(self):
+            await asyncio.sleep(0.02)
+            return self
+
+    credentials = AmazonCredentials(
+        seller_id="A1", marketplace_ids=["ATVPDKIKX0DER"], access_key_id="k", secret_access_key="s", refresh_token="r",
+    )
+    connector = AmazonConnector(credentials)
+
+    async def run():
+        return await asyncio.gather(*(connector._get_access_token() for _ in range(3)))
+
+    with mock.patch.object(api_connectors.aiohttp, "ClientSession", lambda *a, **kw: TokenSession(Counter())):
+        tokens = asyncio.run(run())
+    assert tokens == ["token-1"] * 3 and sum(posts.values()) == 1, dict(posts)
+
+if __name__ == "__main__":
+    test_full_shopify_sync_fetches_the_catalog_once()
+    test_amazon_sync_fetches_fba_inventory_once_and_overlaps_independent_steps()
+    test_memo_shares_one_fetch_between_concurrent_callers()
+    test_concurrent_amazon_steps_share_one_token_refresh()
+    print(" All API fetch plan tests passed!")
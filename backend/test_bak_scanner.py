@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped single-pass BAK scanner
+"""
+
+import logging
+import tempfile
+
+from bak_scanner import BakScanner, Reservoir
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _backup_bytes(rows: int) -> bytes:
+    """Fake SQL Server backup: binary noise around readable business rows"""
+    chunks = []
+    for i in range(rows):
+        chunks.append(b'\x00\x07\xff\xfe')
+        chunks.append(f"CUST{100000 + i} Jane Doe{i % 7} jane{i}@shop.com ${i}.99\n".encode())
+    return b''.join(chunks)
+
+def test_reservoir_is_bounded_and_ordered():
+    """Reservoir never grows past capacity and returns items in scan order"""
+    import random
+    reservoir = Reservoir(100, random.Random(7))
+    for offset in range(10000):
+        reservoir.offer((offset, 'value'))
+    assert reservoir.seen == 10000
+    assert len(reservoir.items) == 100
+    sample = reservoir.sample(0.006)
+    assert len(sample) == 60
+    assert [item[0] for item in sample] == sorted(item[0] for item in sample)
+
+def test_scan_buffer_samples_business_data():
+    """Business patterns come back as 6% samples in the legacy record shape"""
+    scanner = BakScanner(seed=1)
+    records = scanner.scan_buffer(_backup_bytes(2000))
+    assert records
+    assert all(r['category'] == 'business_data' for r in records)
+    assert all(r['_source_format'] == 'bak_business_extraction' for r in records)
+    assert {r['data_type'] for r in records} & {'email', 'id_number', 'price'}
+    assert [r['id'] for r in records] == list(range(1, len(records) + 1))
+
+def test_scan_file_matches_scan_buffer():
+    """mmap scan of a spool file gives the same result as scanning the bytes, across windows"""
+    data = _backup_bytes(3000)
+    scanner = BakScanner(seed=3, window_size=4096)
+    with tempfile.SpooledTemporaryFile(max_size=1024) as spool:
+        spool.write(data)
+        from_file = scanner.scan_file(spool)
+    assert from_file == scanner.scan_buffer(data)
+
+def test_scan_buffer_without_business_data():
+    """Pure binary noise yields no records instead of garbage"""
+    assert BakScanner().scan_buffer(b'\x00\x01\x02\xff' * 1000) == []
+
+if __name__ == "__main__":
+    test_reservoir_is_bounded_and_ordered()
+    test_scan_buffer_samples_business_data()
+    test_scan_file_matches_scan_buffer()
+    test_scan_buffer_without_business_data()
+    print(" All BAK scanner tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-build typed chart frame (vectorized chart series)
+"""
+
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+from chart_frame import ChartFrame, frame_for
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _trades(count):
+    return [
+        {
+            "symbol": ["AAPL", "MSFT", "TSLA", "NVDA"][i % 4],
+            "price": f"${100 + i % 4 * 50:,.2f}",
+            "quantity": str(1 + i % 5),
+            "total_value": 10.0 * (1 + i % 4),
+            "created_at": f"{2024 + i % 2}-{1 + i % 12:02d}-{1 + i % 28:02d}T09:30:00Z",
+            "tags": ["a", "b"],
+            "account": {"id": i % 3},
+        }
+        for i in range(count)
+    ]
+
+def test_types_are_inferred_once_per_frame():
+    """Flattening and typing happen at build time; values, labels and dates are cached per column"""
+    frame = ChartFrame.from_records(_trades(100))
+    assert set(frame.numeric_columns) >= {"quantity", "total_value", "tags_count"}
+    assert frame.date_columns == ["created_at"]
+    assert "symbol" in frame.categorical_columns and "account_json" in frame.categorical_columns
+    assert frame.values("price") is frame.values("price")
+    assert frame.values("price").max() == 250.0
+
+def test_series_aggregate_every_row():
+    """Group sums, averaged prices and counts cover the whole dataset, not a sample"""
+    frame = ChartFrame.from_records(_trades(400))
+    totals = {point["name"]: point for point in frame.chart_points("symbol", "total_value")}
+    assert totals["NVDA"]["value"] == 4000.0 and totals["NVDA"]["count"] == 100
+    assert [point["name"] for point in frame.chart_points("symbol", "total_value")][0] == "NVDA"
+    prices = {point["name"]: point["value"] for point in frame.chart_points("symbol", "price")}
+    assert prices == {"AAPL": 100.0, "MSFT": 150.0, "TSLA": 200.0, "NVDA": 250.0}
+    counts = frame.chart_points("symbol", "count")
+    assert sum(point["value"] for point in counts) == 400
+
+    # Date axes resample into time buckets; a many-valued numeric axis becomes a histogram
+    months = frame.chart_points("created_at", "total_value")
+    assert len(months) == 12 and months[0]["name"] == "Jan 2024" and months[-1]["name"] == "Dec 2025"
+    assert sum(point["value"] for point in months) == sum(10.0 * (1 + i % 4) for i in range(400))
+    wide = ChartFrame.from_records([{"amount": i} for i in range(1, 501)])
+    histogram = wide.chart_points("amount", "count")
+    assert len(histogram) == 10 and sum(point["value"] for point in histogram) == 500
+
+    options = frame.dropdown_options("symbol")
+    assert options[0]["value"] == "all" and [option["value"] for option in options[1:]][-1] == "2025-12"
+
+def test_widget_generation_does_not_rescan_rows():
+    """Twelve widgets over 50k rows reuse the build's frame instead of re-scanning records"""
+    # The module builds its analyzer singletons on import, and those require an API key
+    with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        from dashboard_orchestrator import dashboard_orchestrator
+
+    records = _trades(50000)
+    analysis = {"chart_frame": ChartFrame.from_records(records)}
+    keys = [("symbol", "total_value"), ("symbol", "price"), ("symbol", "count"), ("created_at", "total_value"),
+            ("created_at", "count"), ("quantity", "count")] * 2
+    widgets = [
+        SimpleNamespace(title=f"w{i}", subtitle="", chart_type="BarChartOne", config={"real_data_columns": list(pair)})
+        for i, pair in enumerate(keys)
+    ]
+
+    async def build():
+        return [await dashboard_orchestrator._generate_real_chart_data(widget, analysis) for widget in widgets]
+
+    with mock.patch.object(ChartFrame, "from_records", side_effect=AssertionError("widget rebuilt the frame")):
+        results = asyncio.run(build())
+    assert all(result["data"] for result in results)
+
+    # Analyses built elsewhere fall back to a frame over their sample rows, built once
+    sample_analysis = {"sample_data": records[:10]}
+    assert frame_for(sample_analysis) is frame_for(sample_analysis)
+
+if __name__ == "__main__":
+    test_types_are_inferred_once_per_frame()
+    test_series_aggregate_every_row()
+    test_widget_generation_does_not_rescan_rows()
+    print(" All chart frame tests passed!")
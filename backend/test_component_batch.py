@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for batched component data (shared queries and intermediates)
+"""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+from unittest import mock
+
+import component_data_functions
+from component_data_functions import ComponentDataManager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ORDERS = [
+    {"created_at": f"2025-01-0{day}T10:00:00+00:00", "total_price": "10", "financial_status": "paid",
+     "fulfillment_status": "fulfilled", "quantity": 2, "raw_data": None}
+    for day in range(1, 8)
+]
+PRODUCTS = [{"sku": "A", "inventory_quantity": 40, "quantity": 40}]
+
+class _Query:
+    """Records each executed query against an organized table"""
+
+    def __init__(self, executed, table):
+        self.executed, self.table = executed, table
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.executed.append(self.table)
+        return SimpleNamespace(data=PRODUCTS if self.table.endswith("_products") else ORDERS)
+
+def _fake_database(executed):
+    """Points the component queries at _Query for the duration of a with-block"""
+    return mock.patch.object(
+        component_data_functions, "get_admin_client", lambda: SimpleNamespace(table=lambda name: _Query(executed, name))
+    )
+
+async def _components(manager):
+    return await asyncio.gather(
+        manager.get_total_sales_data("c1", "shopify", "2025-01-01", "2025-01-07"),
+        manager.get_units_sold_data("c1", "shopify", "2025-01-01", "2025-01-07"),
+        manager.get_days_of_stock_data("c1", "shopify", "2025-01-01", "2025-01-07"),
+        manager.get_inventory_turnover_data("c1", "shopify", "2025-01-01", "2025-01-07"),
+    )
+
+def test_batch_shares_queries_and_matches_unbatched():
+    """Inside a batch each platform query runs once and results are unchanged"""
+    unbatched_queries, batched_queries = [], []
+    with _fake_database(unbatched_queries):
+        unbatched = asyncio.run(_components(ComponentDataManager()))
+
+    async def batched():
+        manager = ComponentDataManager()
+        async with manager.batch():
+            return await _components(manager)
+
+    with _fake_database(batched_queries):
+        assert asyncio.run(batched()) == unbatched
+    assert len(batched_queries) < len(unbatched_queries) / 2
+    logger.info(f" {len(batched_queries)} queries batched vs {len(unbatched_queries)} unbatched")
+
+def test_batch_results_are_copies():
+    """Callers reshaping a shared result do not affect other components"""
+    async def run():
+        manager = ComponentDataManager()
+        async with manager.batch():
+            first = await manager.get_total_sales_data("c1", "shopify", "2025-01-01", "2025-01-07")
+            first["shopify"]["total_sales_30_days"]["revenue"] = -1
+            return await manager.get_total_sales_data("c1", "shopify", "2025-01-01", "2025-01-07")
+
+    with _fake_database([]):
+        assert asyncio.run(run())["shopify"]["total_sales_30_days"]["revenue"] == 70.0
+
+def test_fake_database_is_restored():
+    """The module's real admin client getter is back once a test's with-block ends"""
+    original = component_data_functions.get_admin_client
+    with _fake_database([]):
+        assert component_data_functions.get_admin_client is not original
+    assert component_data_functions.get_admin_client is original
+
+if __name__ == "__main__":
+    test_batch_shares_queries_and_matches_unbatched()
+    test_batch_results_are_copies()
+    test_fake_database_is_restored()
+    print(" All component batch tests passed!")
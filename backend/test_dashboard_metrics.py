@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for /api/dashboard/metrics cache hits: the client's real data type rides on the version probe
+"""
+
+import logging
+import os
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import app as app_module
+import database
+from database import PerformanceOptimizedDatabaseManager
+from llm_cache_manager import llm_cache_manager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEADERS = {"Authorization": "Bearer test-token"}
+
+class _FakeManager:
+    async def probe_client_data_version(self, client_id, start_date=None, end_date=None):
+        version = database._data_version(client_id, start_date, end_date, 3, "2025-01-31T00:00:00+00:00")
+        return {**version, "data_type": "shopify_orders"}
+
+def test_cache_hit_reports_the_client_data_type():
+    """A versioned cache hit answers with the data type from client_schemas, not "unknown", without loading rows"""
+    async def stamp(client_id, data_version, dashboard_type="default"):
+        return None
+
+    async def cached(client_id, data_version, dashboard_type="default"):
+        return {"kpis": [{"name": "revenue"}]}
+
+    # The endpoint imports dashboard_orchestrator, whose analyzer singletons require an API key
+    with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}), \
+            mock.patch.object(app_module, "verify_token", lambda token: SimpleNamespace(client_id="client-1")), \
+            mock.patch.object(database, "get_db_manager", lambda: _FakeManager()), \
+            mock.patch.object(llm_cache_manager, "get_cached_version_stamp", stamp), \
+            mock.patch.object(llm_cache_manager, "get_cached_llm_response_for_version", cached):
+        body = TestClient(app_module.app).get("/api/dashboard/metrics", headers=HEADERS).json()
+
+    assert body["cached"] is True and body["llm_analysis"] == {"kpis": [{"name": "revenue"}]}
+    assert body["data_type"] == "shopify_orders" and body["schema_type"] == "shopify_orders"
+
+class _SchemaQuery:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.calls.append(1)
+        return SimpleNamespace(data=self.rows)
+
+def _manager(rows, calls):
+    manager = PerformanceOptimizedDatabaseManager.__new__(PerformanceOptimizedDatabaseManager)
+    manager.cache, manager.cache_ttl, manager.cache_lock = {}, {}, threading.Lock()
+    manager.default_cache_duration = 300
+    manager._get_pooled_admin_client = lambda: SimpleNamespace(table=lambda name: _SchemaQuery(rows, calls))
+    return manager
+
+def test_client_data_type_is_read_once_and_defaults_to_unknown():
+    """The latest client_schemas data type is cached per client; clients without a schema row are "unknown" """
+    calls = []
+    manager = _manager([{"data_type": "amazon_orders"}], calls)
+    assert manager.client_data_type("client-1") == "amazon_orders"
+    assert manager.client_data_type("client-1") == "amazon_orders" and len(calls) == 1
+    assert _manager([], []).client_data_type("client-2") == "unknown"
+
+if __name__ == "__main__":
+    test_cache_hit_reports_the_client_data_type()
+    test_client_data_type_is_read_once_and_defaults_to_unknown()
+    print(" All dashboard metrics tests passed!")
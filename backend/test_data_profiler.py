@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming data-quality profiler (HyperLogLog + reservoir samples)
+"""
+
+import logging
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from data_profiler import DataProfiler, HyperLogLog, hash_series
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_hyperloglog_accuracy():
+    """Distinct estimates stay within a few percent of the truth"""
+    for distinct in (1000, 200000):
+        hll = HyperLogLog()
+        hll.add_hashes(hash_series(pd.Series(np.arange(distinct))))
+        error = abs(hll.count() - distinct) / distinct
+        print(f"   {distinct} distinct -> {hll.count()} ({error:.2%} error)")
+        assert error < 0.05
+
+def test_auto_mode_is_exact_for_small_columns():
+    """Small columns keep exact counts, large ones switch to the sketch"""
+    df = pd.DataFrame({
+        'small': np.arange(20000) % 300,
+        'large': np.arange(20000),
+    })
+    profile = DataProfiler(exact_limit=1000).observe_frame(df).profile
+    assert profile['small'].is_exact and profile['small'].distinct_count == 300
+    assert not profile['large'].is_exact
+    assert abs(profile['large'].distinct_count - 20000) / 20000 < 0.05
+
+def test_chunks_match_single_frame():
+    """Profiling chunk by chunk gives the same counts as one big frame"""
+    df = pd.DataFrame({'sku': [f"SKU-{i % 700}" for i in range(5000)], 'qty': [None if i % 4 == 0 else i for i in range(5000)]})
+    whole = DataProfiler(mode="exact").observe_frame(df).profile
+    chunked = DataProfiler(mode="exact")
+    for start in range(0, len(df), 1000):
+        chunked.observe_frame(df.iloc[start:start + 1000])
+    for name in ('sku', 'qty'):
+        assert whole[name].distinct_count == chunked.profile[name].distinct_count
+        assert whole[name].null_count == chunked.profile[name].null_count == (1250 if name == 'qty' else 0)
+
+def test_records_track_missing_columns_as_nulls():
+    """Record-by-record profiling counts absent keys as nulls and keeps bounded samples"""
+    profiler = DataProfiler(sample_size=5, seed=1)
+    profiler.observe_records([{'a': 1, 'b': 'x'}, {'a': None}, {'a': 3, 'c': 2.0}])
+    for i in range(100):
+        profiler.observe_record({'a': i})
+    profile = profiler.profile
+    assert profile.row_count == 103
+    assert profile['a'].null_count == 1
+    assert profile['b'].null_count == 102 and profile['c'].null_count == 102
+    assert profile['a'].dominant_type == 'int'
+    assert len(profile['a'].sample_values) == 5
+
+def test_frame_parsers_profile_once():
+    """A DataFrame-based parse profiles the frame once and scores quality from that same profile"""
+    from enhanced_data_parser import EnhancedDataParser
+
+    parser = EnhancedDataParser()
+    tsv = "sku\tqty\tprice\n" + "".join(f"SKU-{i % 40}\t{i % 7}\t{i * 1.5}\n" for i in range(500))
+    with mock.patch.object(DataProfiler, 'observe_frame', autospec=True, side_effect=DataProfiler.observe_frame) as observe:
+        result = parser._parse_tsv(tsv.encode(), 'utf-8')
+    assert observe.call_count == 1
+    assert result['profile']['sku'].distinct_count == 40
+    assert 0.0 < result['quality_score'] <= 1.0
+
+if __name__ == "__main__":
+    test_hyperloglog_accuracy()
+    test_auto_mode_is_exact_for_small_columns()
+    test_chunks_match_single_frame()
+    test_records_track_missing_columns_as_nulls()
+    test_frame_parsers_profile_once()
+    print(" All data profiler tests passed!")
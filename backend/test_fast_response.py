@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for orjson responses, ETags and pre-compressed bytes (fast_response)
+"""
+
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+
+from fast_response import EncodedPayload, FastJSONResponder, dumps, make_etag
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PAYLOAD = {"skus": [{"sku": f"SKU-{i}", "qty": i} for i in range(200)]}
+
+def _client(responder, calls, version="v1"):
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+    @app.get("/data")
+    async def data(request: Request):
+        etag = make_etag("/data", version)
+        cached = responder.cached(request, etag)
+        if cached is not None:
+            return cached
+        calls.append(1)
+        return responder.respond(request, PAYLOAD, etag)
+
+    return TestClient(app)
+
+def test_dumps_handles_repo_types():
+    """Decimals, datetimes and non-string keys serialize like the json module would"""
+    body = json.loads(dumps({"a": Decimal("1.5"), "t": datetime(2025, 1, 2), 3: {1, 2}}))
+    assert body["a"] == 1.5 and body["t"].startswith("2025-01-02") and sorted(body["3"]) == [1, 2]
+
+def test_etag_304_and_encoded_bytes_reused():
+    """Second request is served from the stored bytes, a matching If-None-Match gets a 304"""
+    responder, calls = FastJSONResponder(1024 * 1024), []
+    client = _client(responder, calls)
+
+    first = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200 and first.headers["content-encoding"] == "gzip"
+    assert first.json() == PAYLOAD
+    etag = first.headers["etag"]
+    assert etag.endswith('-gzip"')
+
+    second = client.get("/data", headers={"Accept-Encoding": "identity"})
+    assert second.json() == PAYLOAD and "content-encoding" not in second.headers
+    assert len(calls) == 1 and responder.cache.stats()["hits"] == 1
+
+    not_modified = client.get("/data", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+def test_direct_callers_get_the_payload():
+    """request=None returns the dict unchanged for cron and internal callers"""
+    assert FastJSONResponder(1024).respond(None, PAYLOAD, '"x"') is PAYLOAD
+
+def test_cache_is_bounded():
+    """Least recently used bodies are evicted past the byte budget"""
+    responder = FastJSONResponder(3000)
+    for i in range(10):
+        responder.cache.put(f'"{i}"', EncodedPayload(dumps({"i": i, "pad": "x" * 500})))
+    stats = responder.cache.stats()
+    assert stats["bytes"] <= 3000 and stats["entries"] < 10
+    assert responder.cache.get('"9"') is not None and responder.cache.get('"0"') is None
+
+if __name__ == "__main__":
+    test_dumps_handles_repo_types()
+    test_etag_304_and_encoded_bytes_reused()
+    test_direct_callers_get_the_payload()
+    test_cache_is_bounded()
+    print(" All fast response tests passed!")
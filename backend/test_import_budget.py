@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for worker cold start: heavy AI subsystems stay out of `import app`,
+and (opt-in, for a quiet machine) the import itself stays within a time budget
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+
+from lazy_modules import LazyInstance
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative `import app` time a worker may spend before serving. Wall-clock timing depends on the
+# machine, so the check only runs when a budget is set (e.g. APP_IMPORT_BUDGET_SECONDS=5 locally)
+IMPORT_BUDGET_SECONDS = os.getenv("APP_IMPORT_BUDGET_SECONDS")
+
+# Loaded on first use, never at boot
+LAZY_MODULES = (
+    "ai_analyzer",
+    "inventory_analyzer",
+    "dashboard_orchestrator",
+    "dynamic_template_orchestrator",
+    "openai",
+    "langchain_core",
+    "langchain_openai",
+    "langgraph",
+    "sklearn",
+)
+
+def _run(*args):
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+
+def test_ai_subsystems_are_not_imported_at_boot():
+    """A fresh worker imports none of the AI stacks until a request needs them"""
+    result = _run("-c", f"import sys, json, app; print(json.dumps([m for m in {list(LAZY_MODULES)!r} if m in sys.modules]))")
+    assert result.returncode == 0, result.stderr[-2000:]
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    assert loaded == [], f"imported at boot: {loaded}"
+
+def test_cold_import_stays_within_budget():
+    """Cumulative `import app` time (best of two, so bytecode compilation is excluded); opt-in"""
+    if not IMPORT_BUDGET_SECONDS:
+        print("   import app budget not set (APP_IMPORT_BUDGET_SECONDS), skipping the timing check")
+        return
+    budget = float(IMPORT_BUDGET_SECONDS)
+    timings = []
+    for _ in range(2):
+        result = _run("-X", "importtime", "-c", "import app")
+        assert result.returncode == 0, result.stderr[-2000:]
+        match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| app$", result.stderr, re.MULTILINE)
+        timings.append(int(match.group(1)) / 1e6)
+    print(f"   import app: {min(timings):.2f}s (budget {budget}s)")
+    assert min(timings) <= budget
+
+def test_lazy_instance_resolves_once_on_first_use():
+    """The proxy forwards attribute access and imports its module a single time"""
+    proxy = LazyInstance("logging", "root")
+    assert proxy._lazy_target is None
+    assert proxy.name == "root"
+    target = proxy._lazy_target
+    assert target is not None and proxy.getEffectiveLevel() == target.getEffectiveLevel()
+    assert proxy._lazy_resolve() is target and "loaded" in repr(proxy)
+
+if __name__ == "__main__":
+    test_ai_subsystems_are_not_imported_at_boot()
+    test_cold_import_stays_within_budget()
+    test_lazy_instance_resolves_once_on_first_use()
+    print(" All import budget tests passed!")
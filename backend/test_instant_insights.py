@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for deterministic instant insights and the LLM/instant hedge
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import instant_insights as insights_module
+from instant_insights import TIER_INSTANT, TIER_LLM, InsightHedger, InstantInsightEngine
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _orders(days=90):
+    """Daily orders for three SKUs: A grows, C is nearly out of stock, one spike day"""
+    start = datetime(2025, 1, 1)
+    rows = []
+    for day in range(days):
+        when = (start + timedelta(days=day)).isoformat() + "Z"
+        rows.append({"created_at": when, "sku": "A", "quantity": 1 + day // 30, "total_price": 20.0 * (1 + day // 30),
+                     "platform": "shopify", "inventory_quantity": 500})
+        rows.append({"created_at": when, "sku": "B", "quantity": 2, "total_price": 30.0,
+                     "platform": "amazon", "inventory_quantity": 400})
+        rows.append({"created_at": when, "sku": "C", "quantity": 3, "total_price": 900.0 if day == days - 5 else 15.0,
+                     "platform": "shopify", "inventory_quantity": 20})
+    return rows
+
+def test_engine_finds_movers_stockouts_and_anomalies():
+    """Deterministic output in the LLM analysis shape"""
+    engine = InstantInsightEngine()
+    started = time.perf_counter()
+    result = engine.analyze(_orders())
+    elapsed = time.perf_counter() - started
+    print(f"   instant insights in {elapsed * 1000:.0f}ms")
+
+    again = engine.analyze(_orders())
+    assert {k: v for k, v in again.items() if k != "metadata"} == {k: v for k, v in result.items() if k != "metadata"}
+    kpis = {kpi["technical_name"]: kpi for kpi in result["kpis"]}
+    assert kpis["total_revenue"]["value"] == f"{sum(r['total_price'] for r in _orders()):,}"
+    assert kpis["revenue_last_30_days"]["trend"]["direction"] == "up"
+    tables = {table["technical_name"]: table for table in result["tables"]}
+    assert [row[0] for row in tables["stockout_risk"]["data"]] == ["C"]
+    # Newest anomaly is the spike day (900 from C plus 90 from A and B)
+    assert tables["revenue_anomalies"]["data"][0][:2] == ["2025-03-27", 990.0]
+    assert tables["top_items"]["data"][0][0] == "A"
+    assert result["metadata"]["insight_tier"] == TIER_INSTANT
+    assert all(key in result for key in ("business_analysis", "kpis", "charts", "tables"))
+
+def test_hedge_answers_instantly_and_swaps_in_the_llm_result():
+    """A slow LLM does not hold the response; once it finishes, the next race returns it"""
+    hedger = InsightHedger(hedge_seconds=0.05)
+    calls = 0
+
+    async def slow_llm():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.3)
+        return {"kpis": ["from llm"]}
+
+    async def run():
+        started = time.perf_counter()
+        first = await asyncio.gather(*(hedger.race("k", slow_llm, _orders, "metrics") for _ in range(3)))
+        first_latency = time.perf_counter() - started
+        # Let the background analysis finish (in the app it stores itself in the LLM cache)
+        await asyncio.sleep(0.4)
+        return first, first_latency
+
+    first, latency = asyncio.run(run())
+    assert all(tier == TIER_INSTANT for _, tier in first) and latency < 0.3
+    assert calls == 1
+
+    async def fast_llm():
+        return {"kpis": ["from llm"]}
+
+    result, tier = asyncio.run(hedger.race("k2", fast_llm, _orders, "metrics"))
+    assert tier == TIER_LLM and result == {"kpis": ["from llm"]}
+
+def test_failed_llm_backs_off_to_instant():
+    """An LLM failure is not retried by every request for a while"""
+    hedger = InsightHedger(hedge_seconds=0.05)
+    calls = 0
+
+    async def failing_llm():
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("provider down")
+
+    async def run():
+        first = await hedger.race("k", failing_llm, _orders, "metrics")
+        await asyncio.sleep(0)
+        second = await hedger.race("k", failing_llm, _orders, "metrics")
+        return first, second
+
+    (_, tier1), (_, tier2) = asyncio.run(run())
+    assert tier1 == tier2 == TIER_INSTANT and calls == 1
+
+def test_backoff_entries_expire_and_are_capped():
+    """Failed keys are pruned once their backoff ends and never exceed max_backoff"""
+    hedger = InsightHedger(max_backoff=3)
+    for i in range(5):
+        hedger._back_off(f"fp{i}")
+    assert list(hedger._failed_until) == ["fp2", "fp3", "fp4"]
+
+    with mock.patch.object(insights_module, "FAILURE_BACKOFF_SECONDS", 0.0):
+        hedger = InsightHedger()
+        for i in range(100):
+            hedger._back_off(f"fp{i}")
+    assert len(hedger._failed_until) == 1 and hedger.stats()["backing_off"] == 0
+
+if __name__ == "__main__":
+    test_engine_finds_movers_stockouts_and_anomalies()
+    test_hedge_answers_instantly_and_swaps_in_the_llm_result()
+    test_failed_llm_backs_off_to_instant()
+    test_backoff_entries_expire_and_are_capped()
+    print(" All instant insights tests passed!")
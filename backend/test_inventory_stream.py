@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the progressive inventory-analytics stream (SSE / NDJSON framing)
+"""
+
+import json
+import logging
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import app as app_module
+from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+URL = "/api/dashboard/inventory-analytics/stream"
+HEADERS = {"Authorization": "Bearer test-token"}
+
+SECTIONS = [
+    ("shopify", "alerts_summary", {"summary_counts": {"total_alerts": 2}}),
+    ("shopify", "sku_inventory", {"summary_stats": {"total_skus": 40}}),
+    ("shopify", "sales_kpis", {"total_sales_30_days": 1200.0}),
+    ("shopify", "trend_analysis", {"weekly_data_points": 4}),
+]
+
+def _analyzer_stream(fail_after=None):
+    async def stream(client_id, platform="shopify"):
+        for i, (view, section, data) in enumerate(SECTIONS):
+            if fail_after is not None and i == fail_after:
+                raise RuntimeError("orders table went away")
+            yield {"view": view, "section": section, "data": data}
+        analytics = {section: data for _, section, data in SECTIONS}
+        analytics["section_errors"] = []
+        yield {"view": platform, "section": "complete", "data": analytics}
+    return stream
+
+def _patched(stream, cached=None, saved=None):
+    async def get_cached_response(client_id, endpoint_url, params):
+        return cached
+
+    async def save_cached_response(client_id, endpoint_url, response, params):
+        saved.append((endpoint_url, response))
+
+    return [
+        mock.patch.object(app_module, "verify_token", lambda token: SimpleNamespace(client_id="client-1")),
+        mock.patch.object(app_module, "get_cached_response", get_cached_response),
+        mock.patch.object(app_module, "save_cached_response", save_cached_response),
+        mock.patch.object(app_module, "get_admin_client", lambda: object()),
+        mock.patch.object(app_module, "has_organized_inventory_tables", lambda db_client, client_id: True),
+        mock.patch.object(dashboard_inventory_analyzer, "stream_dashboard_inventory_analytics", stream),
+    ]
+
+def _get(params, stream, cached=None, saved=None):
+    saved = saved if saved is not None else []
+    patches = _patched(stream, cached, saved)
+    for patch in patches:
+        patch.start()
+    try:
+        return TestClient(app_module.app).get(URL, params=params, headers=HEADERS)
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+
+def _sse_events(body):
+    """[(event name, payload)] from a text/event-stream body"""
+    events = []
+    for block in body.split("\n\n"):
+        if not block.strip():
+            continue
+        lines = block.split("\n")
+        assert lines[0].startswith("event: ") and lines[1].startswith("data: ") and len(lines) == 2, block
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+def test_sse_sections_arrive_in_order_then_complete():
+    """One well-formed SSE event per section, in readiness order, closed by "complete"; the full result is cached"""
+    saved = []
+    response = _get({"format": "sse"}, _analyzer_stream(), saved=saved)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _sse_events(response.text)
+    assert [name for name, _ in events] == [section for _, section, _ in SECTIONS] + ["complete"]
+    assert all(name == payload["section"] for name, payload in events)
+    assert events[2][1] == {"view": "shopify", "section": "sales_kpis", "data": {"total_sales_30_days": 1200.0}}
+    assert events[-1][1]["section_errors"] == [] and "elapsed_seconds" in events[-1][1]
+    assert [endpoint for endpoint, _ in saved] == ["/api/dashboard/inventory-analytics"]
+
+def test_error_mid_stream_is_reported_as_an_event():
+    """A failure after some sections ends the stream with an "error" event, not a cut-off body, and caches nothing"""
+    saved = []
+    response = _get({"format": "ndjson"}, _analyzer_stream(fail_after=2), saved=saved)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = response.text.split("\n")
+    assert lines[-1] == ""
+    events = [json.loads(line) for line in lines[:-1]]
+    assert [event["section"] for event in events] == ["alerts_summary", "sku_inventory", "error"]
+    assert "orders table went away" in events[-1]["error"]
+    assert saved == []
+
+def test_cached_response_is_replayed_as_sections():
+    """A cache hit streams the cached sections immediately and never touches the analyzer"""
+    async def untouched(client_id, platform="shopify"):
+        raise AssertionError("analyzer should not run on a cache hit")
+        yield
+
+    cached = {"inventory_analytics": {section: data for _, section, data in SECTIONS}}
+    events = _sse_events(_get({}, untouched, cached=cached).text)
+    assert [name for name, _ in events] == [section for _, section, _ in SECTIONS] + ["complete"]
+    assert all(payload["cached"] for _, payload in events)
+
+def test_unknown_format_is_rejected():
+    """Only sse and ndjson framings exist"""
+    response = _get({"format": "xml"}, _analyzer_stream())
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    test_sse_sections_arrive_in_order_then_complete()
+    test_error_mid_stream_is_reported_as_an_event()
+    test_cached_response_is_replayed_as_sections()
+    test_unknown_format_is_rejected()
+    print(" All inventory stream tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the deduplicated background job queue (in-memory store)
+"""
+
+import asyncio
+import logging
+
+from job_queue import PRIORITY_HIGH, PRIORITY_LOW, InMemoryJobStore, JobQueue
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _queue(**kwargs):
+    return JobQueue(InMemoryJobStore(), retry_base_delay=0, **kwargs)
+
+def test_same_key_is_merged():
+    """Triggers for a key that is already queued collapse into one job at the best priority"""
+    async def run():
+        queue = _queue()
+        ran = []
+
+        async def handler(job):
+            ran.append((job.key, job.payload["n"]))
+
+        queue.register("refresh", handler)
+        assert await queue.enqueue("refresh", "c1", key="a", payload={"n": 1}, priority=PRIORITY_LOW)
+        for n in range(2, 6):
+            assert not await queue.enqueue("refresh", "c1", key="a", payload={"n": n})
+        await queue.enqueue("refresh", "c2", key="b", payload={"n": 0}, priority=PRIORITY_HIGH)
+        while await queue.run_once():
+            pass
+        # The merged job took the higher priority, the high-priority job still went first
+        assert ran == [("b", 0), ("a", 5)]
+        assert queue.deduplicated == 4
+
+    asyncio.run(run())
+
+def test_debounce_holds_next_run():
+    """Once a key has started, a new trigger waits out the debounce window"""
+    async def run():
+        queue = _queue()
+        ran = []
+
+        async def handler(job):
+            ran.append(job.key)
+
+        queue.register("refresh", handler)
+        await queue.enqueue("refresh", "c1", key="a", debounce=0.2)
+        assert await queue.run_once()
+        assert await queue.enqueue("refresh", "c1", key="a", debounce=0.2)
+        assert not await queue.run_once()
+        await asyncio.sleep(0.25)
+        assert await queue.run_once()
+        assert ran == ["a", "a"]
+
+    asyncio.run(run())
+
+def test_retries_then_dead_letter():
+    """Failing jobs are retried with backoff and parked after their last attempt"""
+    async def run():
+        queue = _queue()
+        attempts = []
+
+        async def flaky(job):
+            attempts.append(job.attempts)
+            raise RuntimeError("database down")
+
+        queue.register("refresh", flaky)
+        await queue.enqueue("refresh", "c1", key="a", max_attempts=3)
+        while await queue.run_once():
+            pass
+        assert attempts == [1, 2, 3]
+        assert queue.failed == 1 and len(queue.store.dead) == 1
+        assert "database down" in queue.store.dead[0]["last_error"]
+
+    asyncio.run(run())
+
+def test_workers_run_jobs_and_markers_expire():
+    """Started workers pick up queued jobs; handler markers expire after their ttl"""
+    async def run():
+        queue = _queue(poll_interval=0.05)
+        done = asyncio.Event()
+
+        async def handler(job):
+            await queue.set_marker(job.key, "v1", ttl=0.1)
+            done.set()
+
+        queue.register("refresh", handler)
+        queue.start()
+        await queue.enqueue("refresh", "c1", key="a")
+        await asyncio.wait_for(done.wait(), timeout=1)
+        assert await queue.get_marker("a") == "v1"
+        await asyncio.sleep(0.15)
+        assert await queue.get_marker("a") is None
+        await queue.stop()
+        assert (await queue.stats())["completed"] == 1
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_same_key_is_merged()
+    test_debounce_holds_next_run()
+    test_retries_then_dead_letter()
+    test_workers_run_jobs_and_markers_expire()
+    print(" All job queue tests passed!")
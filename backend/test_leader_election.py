@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for scheduler leader election
+"""
+
+import logging
+import tempfile
+
+from leader_election import FileLease, LeaderElector
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _FlakyLease:
+    """In-memory lease that can be made to fail like an unreachable database"""
+
+    backend = "fake"
+
+    def __init__(self):
+        self.holder = None
+        self.failing = False
+
+    def try_acquire(self, holder, lease_seconds):
+        if self.failing:
+            raise ConnectionError("database unreachable")
+        if self.holder in (None, holder):
+            self.holder = holder
+            return True
+        return False
+
+    def release(self, holder):
+        if self.holder == holder:
+            self.holder = None
+
+    def current_leader(self):
+        return {"holder": self.holder} if self.holder else None
+
+def test_file_lease_single_leader_and_failover():
+    """Only one worker holds the file lock; the next takes over once it is released"""
+    directory = tempfile.mkdtemp()
+    first = LeaderElector(FileLease("scheduler", directory), holder="w1")
+    second = LeaderElector(FileLease("scheduler", directory), holder="w2")
+
+    assert first.check() and not second.check()
+    assert second.status()["leader"] == {"holder": "w1"}
+
+    first.stop()
+    assert second.check()
+    assert first.status()["leader"] == {"holder": "w2"}
+    second.stop()
+
+def test_stands_down_when_lease_cannot_be_checked():
+    """A leader that cannot renew stops running jobs instead of risking two leaders"""
+    lease = _FlakyLease()
+    elector = LeaderElector(lease, holder="w1")
+    assert elector.check() and elector.is_leader
+
+    lease.failing = True
+    assert not elector.check() and not elector.is_leader
+    assert "unreachable" in elector.status()["last_error"]
+
+    lease.failing = False
+    assert elector.check() and elector.status()["leader_since"] is not None
+
+if __name__ == "__main__":
+    test_file_lease_single_leader_and_failover()
+    test_stands_down_when_lease_cannot_be_checked()
+    print(" All leader election tests passed!")
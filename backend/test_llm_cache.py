@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed LLM response cache and its single-flight
+"""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from llm_cache_manager import LLMCacheManager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _FakeTable:
+    """Just enough of the Supabase query builder for llm_response_cache"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.action = ("select", None)
+        self.max_rows = None
+
+    def select(self, *columns):
+        self.action = ("select", None)
+        return self
+
+    def insert(self, record):
+        self.action = ("insert", record)
+        return self
+
+    def update(self, values):
+        self.action = ("update", values)
+        return self
+
+    def delete(self):
+        self.action = ("delete", None)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gte(self, column, value):
+        return self
+
+    def lte(self, column, value):
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def execute(self):
+        action, payload = self.action
+        if action == "insert":
+            self.rows.append(dict(payload))
+            return SimpleNamespace(data=[payload])
+        matched = [row for row in self.rows if all(f(row) for f in self.filters)]
+        if action == "update":
+            for row in matched:
+                row.update(payload)
+        elif action == "delete":
+            self.rows[:] = [row for row in self.rows if row not in matched]
+        return SimpleNamespace(data=list(reversed(matched))[:self.max_rows])
+
+def _manager():
+    manager = LLMCacheManager()
+    rows = []
+    manager.db_client = SimpleNamespace(table=lambda name: _FakeTable(rows))
+    return manager
+
+def test_cache_key_addresses_content():
+    """Volatile fields and row order are ignored; data, tenant, prompt version and model are not"""
+    manager = _manager()
+    data = {"data": [{"sku": "A", "qty": 3}, {"sku": "B", "qty": 1}], "retrieved_at": "now"}
+    key = manager.cache_key("c1", data, "business")
+
+    assert key == manager.cache_key("c1", {"data": [{"qty": 1, "sku": "B"}, {"qty": 3, "sku": "A"}], "query_time": 2}, "business")
+    assert key != manager.cache_key("c1", {"data": [{"sku": "A", "qty": 4}]}, "business")
+    assert key != manager.cache_key("c2", data, "business")
+    assert key != manager.cache_key("c1", data, "business", prompt_version="0")
+    assert key != manager.cache_key("c1", data, "business", model="gpt-4o-mini")
+
+def test_repeat_and_concurrent_requests_share_one_completion():
+    """Concurrent identical requests coalesce; a repeat on unchanged data is a hit; new data is a miss"""
+    manager = _manager()
+    data = {"data": [{"sku": "A", "qty": 3}]}
+    calls = 0
+
+    async def analyze():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"insights": ["restock A"]}
+
+    async def run():
+        first = await asyncio.gather(*(manager.get_or_compute("c1", data, analyze, "general") for _ in range(5)))
+        repeat = await manager.get_or_compute("c1", data, analyze, "general")
+        return first, repeat
+
+    first, repeat = asyncio.run(run())
+    assert calls == 1 and manager.coalesced == 4
+    assert all(result == {"insights": ["restock A"]} for result in first + [repeat])
+    assert manager.stats()["hits"] == 1
+
+    # Explicit invalidation (data changed) expires the entry without deleting history
+    asyncio.run(manager.notify_data_changed("c1"))
+    asyncio.run(manager.get_or_compute("c1", data, analyze, "general"))
+    assert calls == 2
+
+def test_errors_are_not_cached():
+    """An error result is returned to every waiter but not stored"""
+    manager = _manager()
+
+    async def failing():
+        return {"error": "model unavailable"}
+
+    result = asyncio.run(manager.get_or_compute("c1", {"data": []}, failing))
+    assert result == {"error": "model unavailable"} and manager.stores == 0
+
+if __name__ == "__main__":
+    test_cache_key_addresses_content()
+    test_repeat_and_concurrent_requests_share_one_completion()
+    test_errors_are_not_cached()
+    print(" All LLM cache tests passed!")
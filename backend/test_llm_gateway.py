@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared LLM gateway against the local fake model server
+"""
+
+import asyncio
+import logging
+import time
+
+from fake_llm_server import FakeLLMServer
+from langchain_core.messages import HumanMessage, SystemMessage
+from llm_gateway import LLMGateway
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _gateway(server, **kwargs):
+    return LLMGateway(api_key="sk-test", base_url=server.base_url, retry_base_delay=0.01, **kwargs)
+
+def test_slow_completion_does_not_block_event_loop():
+    """Other coroutines keep running while completions are in flight"""
+    server = FakeLLMServer(reply="ok", delay=0.3).start()
+    gateway = _gateway(server)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        text = await gateway.complete([{"role": "user", "content": "hi"}])
+        ticking.cancel()
+        return text, ticks
+
+    text, ticks = asyncio.run(run())
+    server.stop()
+    assert text == "ok" and ticks >= 10
+
+def test_process_and_client_limits():
+    """At most max_concurrency calls reach the model, and one client gets at most its quota"""
+    server = FakeLLMServer(reply="ok", delay=0.1).start()
+    gateway = _gateway(server, max_concurrency=3, per_tenant_limit=1)
+
+    async def run(tenants):
+        started = time.monotonic()
+        await asyncio.gather(*(gateway.complete([{"role": "user", "content": "x"}], tenant=t) for t in tenants))
+        return time.monotonic() - started
+
+    # One client, four calls: serialized by its quota
+    assert asyncio.run(run(["c1"] * 4)) >= 0.4
+    assert server.max_active == 1
+    # Six clients: capped by the process limit
+    server.max_active = 0
+    asyncio.run(run([f"c{i}" for i in range(6)]))
+    assert server.max_active == 3
+    server.stop()
+
+def test_retries_transient_failures_and_maps_langchain_messages():
+    """Rate-limited calls are retried; LangChain prompts are sent as chat messages"""
+    server = FakeLLMServer(reply='{"a": 1}').start()
+    server.fail_next = 2
+    gateway = _gateway(server)
+
+    text = asyncio.run(gateway.complete([SystemMessage(content="sys"), HumanMessage(content="question")], temperature=0))
+    server.stop()
+    assert text == '{"a": 1}' and gateway.retries == 2 and len(server.requests) == 3
+    assert server.requests[-1]["messages"] == [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "question"},
+    ]
+
+if __name__ == "__main__":
+    test_slow_completion_does_not_block_event_loop()
+    test_process_and_client_limits()
+    test_retries_transient_failures_and_maps_langchain_messages()
+    print(" All LLM gateway tests passed!")
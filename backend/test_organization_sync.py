@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental organization: natural keys must match the SQL schema's unique indexes
+"""
+
+import glob
+import logging
+import os
+import random
+import re
+from types import SimpleNamespace
+
+from data_organizer import DataOrganizer
+from organization_sync import NATURAL_KEYS, fetch_client_rows_since
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Organized tables are named "<client uuid with underscores>_<data type>"; template scripts
+# spell the client part {CLIENT_ID} or :CLIENT_ID (psql variable)
+CLIENT_PREFIX = r'(?:[0-9a-f]{8}_[0-9a-f]{4}_[0-9a-f]{4}_[0-9a-f]{4}_[0-9a-f]{12}_|\{CLIENT_ID\}_|:CLIENT_ID"_)?'
+CREATE_TABLE = re.compile(r'CREATE TABLE (?:IF NOT EXISTS )?"?' + CLIENT_PREFIX + r'(\w+?)"?\s*\((.*?)\n\);', re.S | re.I)
+UNIQUE_INDEX = re.compile(r'CREATE UNIQUE INDEX[^;]*?\bON\s+"?' + CLIENT_PREFIX + r'(\w+?)"?\s*\(\s*(\w+)\s*\)', re.I)
+UNIQUE_COLUMN = re.compile(r'^\s*(\w+)\s+[^,\n]*\bUNIQUE\b', re.M | re.I)
+UNIQUE_CONSTRAINT = re.compile(r'\bUNIQUE\s*\(\s*(\w+)\s*\)', re.I)
+
+def _declared_unique_keys():
+    """{(data type, column)} for every single-column unique constraint or index in the SQL files"""
+    keys = set()
+    for path in glob.glob(os.path.join(BACKEND_DIR, "*.sql")):
+        with open(path) as handle:
+            sql = re.sub(r'--[^\n]*', '', handle.read())
+        for table, body in CREATE_TABLE.findall(sql):
+            keys.update((table, column) for column in UNIQUE_COLUMN.findall(body))
+            keys.update((table, column) for column in UNIQUE_CONSTRAINT.findall(body))
+        keys.update(UNIQUE_INDEX.findall(sql))
+    return keys
+
+def test_every_natural_key_has_a_unique_index():
+    """ON CONFLICT needs a unique constraint on exactly the conflict column"""
+    declared = _declared_unique_keys()
+    missing = {table: key for table, key in NATURAL_KEYS.items() if (table, key) not in declared}
+    assert not missing, f"natural keys without a unique constraint or index in the SQL schema: {missing}"
+
+def test_shopify_products_are_organized_one_row_per_variant():
+    """Product rows carry the variant_id they are upserted on"""
+    organizer = DataOrganizer.__new__(DataOrganizer)
+    product = {
+        "id": 7,
+        "title": "Tee",
+        "variants": [{"id": 71, "sku": "TEE-S", "price": "10.00"}, {"id": 72, "sku": "TEE-M", "price": "12.50"}],
+    }
+    rows = organizer.transform_categorized("client-1", {"shopify_products": [product]})["shopify_products"]
+    assert [row[NATURAL_KEYS["shopify_products"]] for row in rows] == [71, 72]
+    assert [row["sku"] for row in rows] == ["TEE-S", "TEE-M"] and rows[1]["price"] == 12.5
+    assert all(row["product_id"] == 7 for row in rows)
+
+KEYSET = re.compile(r'created_at\.gt\."([^"]+)",and\(created_at\.eq\."([^"]+)",id\.gt\."([^"]+)"\)')
+
+class _ClientDataQuery:
+    """The slice of the PostgREST builder fetch_client_rows_since uses; ties come back in random order"""
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.keys = []
+        self.count = None
+
+    @property
+    def not_(self):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def like(self, column, pattern):
+        prefix = pattern.rstrip("%")
+        self.filters.append(lambda row: not row[column].startswith(prefix))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def or_(self, expression):
+        created_at, _, row_id = KEYSET.fullmatch(expression).groups()
+        self.filters.append(lambda row: (row["created_at"], row["id"]) > (created_at, row_id))
+        return self
+
+    def order(self, column):
+        self.keys.append(column)
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.table.rows if all(keep(row) for keep in self.filters)]
+        random.shuffle(rows)
+        rows.sort(key=lambda row: tuple(row[key] for key in self.keys))
+        self.table.pages += 1
+        if self.table.pages == 1:
+            self.table.on_first_page()
+        return SimpleNamespace(data=[dict(row) for row in rows[:self.count]])
+
+class _ClientDataTable:
+    def __init__(self, rows, on_first_page=lambda: None):
+        self.rows = rows
+        self.pages = 0
+        self.on_first_page = on_first_page
+
+    def table(self, name):
+        assert name == "client_data"
+        return _ClientDataQuery(self)
+
+def _raw_rows(count, created_at, start=0):
+    return [
+        {"id": f"{start + i:06d}", "client_id": "c1", "table_name": "shopify_orders", "data": {"n": start + i},
+         "created_at": created_at}
+        for i in range(count)
+    ]
+
+def test_incremental_fetch_pages_batch_inserts_without_gaps():
+    """Rows sharing one created_at are each read exactly once, even with inserts landing mid-run"""
+    random.seed(3)
+    batch = "2025-01-01T00:00:00+00:00"
+    later = "2025-01-02T00:00:00+00:00"
+    table = _ClientDataTable(
+        _raw_rows(250, batch)
+        + [{"id": "999999", "client_id": "c1", "table_name": "organized_orders", "data": {"n": -1}, "created_at": batch}]
+    )
+    # A newer batch lands after the first page was read
+    table.on_first_page = lambda: table.rows.extend(_raw_rows(5, later, start=1000))
+
+    records, newest = fetch_client_rows_since(table, "c1", since=batch, page_size=40)
+    seen = [record["n"] for record in records]
+    assert sorted(seen) == list(range(250)) + list(range(1000, 1005)), "rows skipped or read twice"
+    assert len(seen) == len(set(seen)) and newest == later
+
+if __name__ == "__main__":
+    test_every_natural_key_has_a_unique_index()
+    test_shopify_products_are_organized_one_row_per_variant()
+    test_incremental_fetch_pages_batch_inserts_without_gaps()
+    print(" All organization sync tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for mergeable per-platform partial aggregates (multi-platform analytics)
+"""
+
+import logging
+import random
+
+from platform_aggregates import PlatformPartial, TopK
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _components(revenue, orders, units, inventory, days):
+    """Per-platform results in the shape ComponentDataManager.get_platform_components returns"""
+    return {
+        'sales': {
+            'total_sales_30_days': {'revenue': revenue, 'orders': orders, 'units': units},
+            'sales_comparison': {'first_half_avg_revenue': revenue / 40, 'second_half_avg_revenue': revenue / 20},
+        },
+        'inventory_levels': {
+            'current_total_inventory': inventory,
+            'inventory_levels_chart': [{'date': d, 'inventory_level': inventory + i} for i, d in enumerate(days)],
+        },
+        'units_sold': {'units_sold_chart': [{'date': d, 'units_sold': units // len(days)} for d in days]},
+        'historical_comparison': {
+            'total_current_period': revenue,
+            'total_previous_period': revenue / 2,
+            'comparison_chart': [{'date': d, 'current_period': 1.0, 'previous_period': 0.5} for d in days],
+        },
+        'available_inventory': inventory,
+    }
+
+def test_topk_merge_is_exact():
+    """Top-k of merged heaps equals top-k of the union"""
+    rng = random.Random(5)
+    values = [rng.randint(0, 1000) for _ in range(500)]
+    left, right, whole = (TopK(10, key=lambda v: v) for _ in range(3))
+    for i, value in enumerate(values):
+        (left if i % 2 else right).offer(value)
+        whole.offer(value)
+    left.merge(right)
+    assert left.items() == sorted(values)[:10] == whole.items()
+
+def test_merge_matches_single_pass():
+    """Merging two platform partials gives the same sums, buckets and alerts as one partial fed both"""
+    days = ['2025-01-01', '2025-01-02', '2025-01-03']
+    shopify = PlatformPartial(['shopify']).add_components(_components(1000.0, 10, 30, 200, days))
+    amazon = PlatformPartial(['amazon']).add_components(_components(500.0, 5, 15, 100, days[1:]))
+    both = PlatformPartial(['shopify', 'amazon'])
+    both.add_components(_components(1000.0, 10, 30, 200, days))
+    both.add_components(_components(500.0, 5, 15, 100, days[1:]))
+    for quantity in (0, 3, 150, 7, 1, 400):
+        shopify.add_stock_level('shopify', quantity, {'sku': f"S{quantity}"})
+        both.add_stock_level('shopify', quantity, {'sku': f"S{quantity}"})
+    for quantity in (2, 120):
+        amazon.add_stock_level('amazon', quantity, {'sku': f"A{quantity}"})
+        both.add_stock_level('amazon', quantity, {'sku': f"A{quantity}"})
+
+    merged = shopify.merge(amazon)
+    assert merged.platforms == ['shopify', 'amazon']
+    assert merged.revenue == 1500.0 and merged.units == 45 and merged.current_inventory == 300
+    assert merged.inventory_levels_chart() == both.inventory_levels_chart()
+    assert merged.inventory_by_date['2025-01-02'] == 201 + 100
+    assert merged.sales_kpis('a', 'b') == both.sales_kpis('a', 'b')
+    assert merged.trend_analysis('a', 'b') == both.trend_analysis('a', 'b')
+    alerts = merged.alerts_summary('client')
+    assert alerts == both.alerts_summary('client')
+    assert alerts['summary_counts']['low_stock_alerts'] == 4
+    assert [a['current_stock'] for a in alerts['detailed_alerts']['low_stock_alerts']] == [0, 1, 2, 3]
+    assert [a['current_stock'] for a in alerts['detailed_alerts']['overstock_alerts']] == [400, 150, 120]
+
+def test_ratios_come_from_merged_sums():
+    """Combined turnover is recomputed from merged sums, not averaged across platforms"""
+    shopify = PlatformPartial(['shopify']).add_components(_components(0.0, 0, 100, 100, ['2025-01-01']))
+    amazon = PlatformPartial(['amazon']).add_components(_components(0.0, 0, 0, 900, ['2025-01-01']))
+    combined = shopify.merge(amazon)
+    # 100 units / ((2 * 1000 + 100) / 2) average inventory
+    assert combined.turnover()['turnover_rate'] == round(100 / 1050, 3)
+    assert shopify.turnover()['turnover_rate'] == round(100 / 150, 3)
+    assert amazon.turnover()['turnover_rate'] == 0
+    assert PlatformPartial().turnover()['avg_days_to_sell'] == 999
+
+def test_week_over_week_alerts_merge():
+    """Sales trend alerts use merged weekly revenue"""
+    shopify, amazon = PlatformPartial(['shopify']), PlatformPartial(['amazon'])
+    shopify.recent_week_revenue, shopify.previous_week_revenue = 50.0, 100.0
+    amazon.recent_week_revenue, amazon.previous_week_revenue = 300.0, 100.0
+    assert shopify.alerts_summary('c')['summary_counts']['sales_dropping_alerts'] == 1
+    combined = shopify.merge(amazon).alerts_summary('c')['summary_counts']
+    assert combined['sales_spike_alerts'] == 1 and combined['sales_dropping_alerts'] == 0
+
+if __name__ == "__main__":
+    test_topk_merge_is_exact()
+    test_merge_matches_single_pass()
+    test_ratios_come_from_merged_sums()
+    test_week_over_week_alerts_merge()
+    print(" All platform aggregate tests passed!")
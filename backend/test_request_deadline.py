@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for request deadlines and cooperative cancellation
+"""
+
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from request_deadline import (
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    call_timeout,
+    check_deadline,
+    deadline_scope,
+    run_blocking,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_budget_caps_call_timeouts():
+    """Per-call timeouts shrink to what is left; nested scopes cannot extend the outer one"""
+    assert call_timeout(5.0) == 5.0
+    with deadline_scope(1.0):
+        assert call_timeout(5.0) <= 1.0
+        with deadline_scope(10.0):
+            assert call_timeout() <= 1.0
+    with deadline_scope(0.0):
+        try:
+            check_deadline()
+            raise AssertionError("expected DeadlineExceeded")
+        except DeadlineExceeded:
+            pass
+
+def test_blocking_call_stops_waiting_at_deadline():
+    """run_blocking returns control when the budget runs out; the thread sees the same deadline"""
+    def slow():
+        time.sleep(0.3)
+
+    def checks_deadline():
+        check_deadline()
+        return "ran"
+
+    async def run():
+        with deadline_scope(0.05):
+            assert await run_blocking(checks_deadline) == "ran"
+            started = time.monotonic()
+            try:
+                await run_blocking(slow)
+                raise AssertionError("expected timeout")
+            except asyncio.TimeoutError:
+                assert time.monotonic() - started < 0.25
+
+    asyncio.run(run())
+
+def test_middleware_answers_504_and_skips_other_paths():
+    """Requests past their deadline are cancelled with a 504"""
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware, paths=["/heavy"], seconds=0.1)
+
+    @app.get("/heavy")
+    async def heavy():
+        await asyncio.sleep(5)
+        return {"ok": True}
+
+    @app.get("/light")
+    async def light():
+        return {"ok": True}
+
+    client = TestClient(app)
+    started = time.monotonic()
+    assert client.get("/heavy").status_code == 504
+    assert time.monotonic() - started < 2
+    assert client.get("/light").status_code == 200
+
+def test_disconnect_cancels_request():
+    """A client that goes away cancels the endpoint's work"""
+    cancelled = asyncio.Event()
+
+    async def endpoint(scope, receive, send):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            raise AssertionError("nothing should be sent to a gone client")
+
+        middleware = DeadlineMiddleware(endpoint, paths=["/heavy"], seconds=10)
+        await middleware({"type": "http", "path": "/heavy"}, receive, send)
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+
+    asyncio.run(run())
+
+def test_default_deadline_fires_before_the_worker_timeout():
+    """The default budget is derived from gunicorn's configured timeout, leaving room to answer"""
+    code = "import request_deadline as r; print(r.DEFAULT_REQUEST_DEADLINE)"
+    for worker_timeout, expected in (("120", 100.0), ("300", 280.0)):
+        env = {k: v for k, v in os.environ.items() if k != "REQUEST_DEADLINE_SECONDS"}
+        env["WORKER_TIMEOUT_SECONDS"] = worker_timeout
+        result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert float(result.stdout.strip()) == expected, result.stderr
+
+def test_component_handlers_let_the_deadline_through():
+    """Component functions turn query failures into error dicts, but not an exhausted request budget"""
+    import component_data_functions
+    from component_data_functions import ComponentDataManager
+
+    class SlowQuery:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+        def execute(self):
+            time.sleep(0.3)
+            return SimpleNamespace(data=[])
+
+    async def run():
+        with deadline_scope(0.05):
+            await ComponentDataManager().get_total_sales_data("c1", "shopify", "2025-01-01", "2025-01-07")
+
+    fake_client = SimpleNamespace(table=lambda name: SlowQuery())
+    with mock.patch.object(component_data_functions, "get_admin_client", lambda: fake_client):
+        try:
+            asyncio.run(run())
+            raise AssertionError("expected DeadlineExceeded")
+        except DeadlineExceeded:
+            pass
+
+if __name__ == "__main__":
+    test_budget_caps_call_timeouts()
+    test_blocking_call_stops_waiting_at_deadline()
+    test_middleware_answers_504_and_skips_other_paths()
+    test_disconnect_cancels_request()
+    test_default_deadline_fires_before_the_worker_timeout()
+    test_component_handlers_let_the_deadline_through()
+    print(" All request deadline tests passed!")
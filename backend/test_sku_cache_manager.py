@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the row-per-SKU cache: stock status buckets, precomputed
+summary stats and the sort/filter/search semantics shared with the legacy blob path
+"""
+
+import logging
+from types import SimpleNamespace
+
+from sku_cache_manager import SKUCacheManager, calculate_summary_stats, stock_status
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _skus(count: int):
+    return [
+        {
+            "sku_code": f"SKU-{i:05d}",
+            "item_name": f"{'Shirt' if i % 2 else 'Pants'} {i}",
+            "current_availability": i % 150,
+            "total_value": float(i),
+            "units_sold": (i * 7) % 31,
+        }
+        for i in range(count)
+    ]
+
+def test_stock_status_thresholds():
+    """Same buckets the summary stats have always used"""
+    assert stock_status(0) == "out_of_stock"
+    assert stock_status(10) == "low_stock"
+    assert stock_status(11) == "in_stock"
+    assert stock_status(100) == "in_stock"
+    assert stock_status(101) == "overstock"
+
+def test_summary_stats_match_full_scan():
+    """Precomputed stats equal the per-request sums the old code did"""
+    skus = _skus(20000)
+    stats = calculate_summary_stats(skus)
+    assert stats["total_skus"] == 20000
+    assert stats["total_inventory_value"] == sum(s["total_value"] for s in skus)
+    assert stats["out_of_stock_count"] == sum(1 for s in skus if s["current_availability"] <= 0)
+    assert stats["low_stock_count"] == sum(1 for s in skus if 0 < s["current_availability"] <= 10)
+    assert stats["overstock_count"] == sum(1 for s in skus if s["current_availability"] > 100)
+
+def test_legacy_page_sort_filter_search():
+    """Sorting, stock filters and prefix search on a legacy blob"""
+    manager = SKUCacheManager(admin_client=None)
+    skus = _skus(500)
+
+    page, total = manager._page_legacy_blob(skus, 1, 10, "value", "desc", None, None)
+    assert total == 500 and [s["total_value"] for s in page] == [499.0 - i for i in range(10)]
+
+    page, total = manager._page_legacy_blob(skus, 2, 5, "availability", "asc", "low_stock", None)
+    assert total == sum(1 for s in skus if 0 < s["current_availability"] <= 10)
+    assert all(0 < s["current_availability"] <= 10 for s in page)
+
+    page, total = manager._page_legacy_blob(skus, 1, 50, "position", "asc", None, "shirt")
+    assert total == 250 and all(s["item_name"].startswith("Shirt") for s in page)
+
+    page, total = manager._page_legacy_blob(skus, 1, 50, "position", "asc", None, "sku-0001")
+    assert total == 10 and page[0]["sku_code"] == "SKU-00010"
+
+class _RecordingQuery:
+    """Records the PostgREST filters a page query builds"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return record
+
+    def execute(self):
+        return SimpleNamespace(data=[], count=0)
+
+def test_search_matches_prefix_literally():
+    """Search filters the indexed lowercased columns with LIKE and treats _ % , as plain characters"""
+    calls = []
+    manager = SKUCacheManager(admin_client=SimpleNamespace(table=lambda name: _RecordingQuery(calls)))
+    manager._query_page("client_shopify", 1, 1, 50, "position", "asc", None, "Tee_S,1(b)")
+    [filters] = [args[0] for name, args in calls if name == "or_"]
+    # LIKE escape \_ , then backslash-escaped again inside PostgREST's double quotes
+    assert filters == r'sku_code_lower.like."tee\\_s,1(b)*",item_name_lower.like."tee\\_s,1(b)*"'
+
+    # The legacy blob path has the same literal semantics
+    skus = [{"sku_code": "TEE_S"}, {"sku_code": "TEEXS"}, {"sku_code": "A%B"}, {"sku_code": "AB"}]
+    page, total = manager._page_legacy_blob(skus, 1, 10, "position", "asc", None, "tee_")
+    assert [s["sku_code"] for s in page] == ["TEE_S"]
+    page, total = manager._page_legacy_blob(skus, 1, 10, "position", "asc", None, "a%")
+    assert [s["sku_code"] for s in page] == ["A%B"]
+
+if __name__ == "__main__":
+    test_stock_status_thresholds()
+    test_summary_stats_match_full_scan()
+    test_legacy_page_sort_filter_search()
+    test_search_matches_prefix_literally()
+    print(" All SKU cache manager tests passed!")
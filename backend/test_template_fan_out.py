@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent template architecture and component generation
+"""
+
+import asyncio
+import logging
+import os
+import time
+from unittest import mock
+
+from business_dna_analyzer import BusinessDNA, BusinessMaturity, BusinessModel, DataSophistication
+from dynamic_template_orchestrator import DynamicTemplateOrchestrator
+from llm_gateway import fan_out
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _business_dna():
+    return BusinessDNA(
+        business_model=BusinessModel.B2C_ECOMMERCE,
+        industry_sector="Retail",
+        maturity_level=BusinessMaturity.GROWTH,
+        data_sophistication=DataSophistication.INTERMEDIATE,
+        primary_workflows=[],
+        success_metrics=["revenue", "orders"],
+        key_relationships={},
+        business_personality={},
+        unique_characteristics=[],
+        data_story="Online store orders",
+        confidence_score=0.8,
+    )
+
+def test_fan_out_keeps_order_limit_and_failures():
+    """Results come back in input order, at most `limit` run at once, and errors are returned"""
+    active = peak = 0
+
+    async def step(i):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        if i == 2:
+            raise ValueError("bad step")
+        return i
+
+    results = asyncio.run(fan_out((step(i) for i in range(5)), limit=2))
+    assert results[:2] == [0, 1] and results[3:] == [3, 4]
+    assert isinstance(results[2], ValueError) and peak == 2
+
+def test_architectures_and_components_run_concurrently():
+    """Three designs and three component selections take two round-trips, not six"""
+    # Every model call below is replaced, so a placeholder key is enough for the constructor
+    with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        orchestrator = DynamicTemplateOrchestrator()
+    calls = []
+
+    def slow(kind, fails=False):
+        async def step(*args):
+            calls.append(kind)
+            await asyncio.sleep(0.2)
+            if fails:
+                raise TimeoutError("model timed out")
+            return getattr(orchestrator, f"_create_fallback_{kind}_architecture")(args[0])
+        return step
+
+    async def slow_components(architecture, data_analysis, business_dna):
+        await asyncio.sleep(0.2)
+        if architecture.category.value == "operational":
+            raise ValueError("unparseable selection")
+        return ["llm_component"]
+
+    orchestrator._design_strategic_template = slow("strategic")
+    orchestrator._design_operational_template = slow("operational", fails=True)
+    orchestrator._design_performance_template = slow("performance")
+    orchestrator._select_components_for_architecture = slow_components
+    state = {
+        "business_dna": _business_dna(),
+        "data_analysis": {"client_id": "c1", "columns": ["total", "status"], "numeric_columns": ["total"]},
+        "error_messages": [],
+    }
+
+    async def run():
+        started = time.monotonic()
+        await orchestrator._design_template_architecture_node(state)
+        await orchestrator._select_components_node(state)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+
+    # The failed design and the failed selection fall back; the others keep their results
+    architectures = state["template_architectures"]
+    assert [a.category.value for a in architectures] == ["strategic", "operational", "analytical"]
+    assert state["selected_components"].count("llm_component") == 2
+    assert len(state["selected_components"]) > 2 and not state["error_messages"]
+    assert len(calls) == 3 and elapsed < 0.6
+
+if __name__ == "__main__":
+    test_fan_out_keeps_order_limit_and_failures()
+    test_architectures_and_components_run_concurrently()
+    print(" All template fan-out tests passed!")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Test script for the prioritized, bounded-concurrency tenant refresh pool
+"""
+
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import tenant_refresh
+from job_queue import InMemoryJobStore, JobQueue
+from tenant_refresh import CheckpointTable, TenantRefreshPool, rank_tenants
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class _FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, *columns):
+        return self
+
+    def in_(self, column, values):
+        self.rows = [row for row in self.rows if row[column] in values]
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+def _day(days_ago):
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+def test_tenants_are_ranked_by_activity_then_size():
+    """Recent ingest beats size; size breaks ties; tenants without buckets go last in input order"""
+    rows = [
+        {"client_id": "big-idle", "bucket": _day(90), "row_count": 50000},
+        {"client_id": "small-active", "bucket": _day(1), "row_count": 40},
+        {"client_id": "busy", "bucket": _day(2), "row_count": 400},
+        {"client_id": "busy", "bucket": _day(60), "row_count": 9000},
+        {"client_id": "mid-idle", "bucket": _day(30), "row_count": 700},
+    ]
+    db = SimpleNamespace(table=lambda name: _FakeQuery(list(rows)))
+    order = asyncio.run(rank_tenants(["new-a", "mid-idle", "small-active", "big-idle", "busy", "new-b"], db_client=db))
+    assert order == ["busy", "small-active", "big-idle", "mid-idle", "new-a", "new-b"]
+
+def test_pool_bounds_concurrency_and_runs_units_in_parallel():
+    """Eight tenants x two platforms run four at a time instead of one after another"""
+    in_flight = 0
+    peak = 0
+
+    async def refresh(client_id, platform):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return {"success": True}
+
+    async def version(client_id, platform):
+        return f"v1:{client_id}"
+
+    async def run():
+        pool = TenantRefreshPool("test", refresh, version, concurrency=4, checkpoints=JobQueue(InMemoryJobStore()))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await pool.run([f"c{i}" for i in range(8)], ["shopify", "amazon"], ranked=False)
+        return results, loop.time() - started
+
+    results, elapsed = asyncio.run(run())
+    assert results["successful_jobs"] == 16 and results["failed_jobs"] == 0
+    assert peak == 4
+    assert elapsed < 16 * 0.05 / 2
+
+def test_unchanged_tenants_are_skipped_and_failed_runs_resume():
+    """Checkpointed units are skipped until their data version moves; failures are retried next run"""
+    checkpoints = JobQueue(InMemoryJobStore())
+    versions = {"a": "1", "b": "1", "c": "1"}
+    calls = []
+    failing = {"b"}
+
+    async def refresh(client_id, platform):
+        calls.append(client_id)
+        if client_id in failing:
+            raise RuntimeError("database went away")
+        return {"success": True}
+
+    async def version(client_id, platform):
+        return versions[client_id]
+
+    async def run():
+        pool = TenantRefreshPool("test", refresh, version, concurrency=2, checkpoints=checkpoints)
+        return await pool.run(["a", "b", "c"], ["shopify"], ranked=False)
+
+    first = asyncio.run(run())
+    assert first["successful_jobs"] == 2 and first["failed_jobs"] == 1
+    assert "database went away" in first["client_results"]["b"]["shopify"]["error"]
+
+    # The rerun only redoes what failed
+    failing.clear()
+    calls.clear()
+    second = asyncio.run(run())
+    assert calls == ["b"] and second["skipped_jobs"] == 2 and second["successful_jobs"] == 1
+
+    # New data for one tenant refreshes just that tenant
+    versions["c"] = "2"
+    calls.clear()
+    third = asyncio.run(run())
+    assert calls == ["c"] and third["skipped_jobs"] == 2
+
+def _instant(value):
+    moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+class _Query:
+    """PostgREST builder over in-memory rows; timestamp columns compare as instants"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.sort = None
+        self.count = None
+        self.upserted = None
+
+    def _compare(self, column, value, test):
+        key = _instant if column.endswith("_at") else str
+        self.filters.append(lambda row: test(key(row[column]), key(value)))
+        return self
+
+    def select(self, columns, count=None):
+        self.with_count = count is not None
+        return self
+
+    def eq(self, column, value):
+        return self._compare(column, value, lambda a, b: a == b)
+
+    def gt(self, column, value):
+        return self._compare(column, value, lambda a, b: a > b)
+
+    def gte(self, column, value):
+        return self._compare(column, value, lambda a, b: a >= b)
+
+    def lte(self, column, value):
+        return self._compare(column, value, lambda a, b: a <= b)
+
+    def order(self, column):
+        self.sort = column
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def upsert(self, row, on_conflict):
+        self.upserted = (row, on_conflict)
+        return self
+
+    def execute(self):
+        if self.upserted:
+            row, key = self.upserted
+            self.rows[:] = [existing for existing in self.rows if existing[key] != row[key]] + [dict(row)]
+            return SimpleNamespace(data=[row], count=None)
+        rows = [row for row in self.rows if all(keep(row) for keep in self.filters)]
+        if self.sort:
+            rows.sort(key=lambda row: _instant(row[self.sort]))
+        return SimpleNamespace(data=rows[:self.count], count=len(rows))
+
+class _FakeDatabase:
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+
+    def table(self, name):
+        return _Query(self.tables.setdefault(name, []))
+
+def _clock(moment):
+    """A datetime whose now() is fixed at `moment` (naive now() in UTC, like the servers)"""
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment.astimezone(tz) if tz else moment.replace(tzinfo=None)
+    return Clock
+
+def test_unchanged_tenants_are_skipped_across_days_until_an_order_leaves_a_window():
+    """Checkpoints persist between cron processes; an unchanged tenant is skipped on later nights
+    until the rolling windows its analytics read gain or lose an order"""
+    from dashboard_inventory_analyzer import dashboard_inventory_analyzer
+
+    database = _FakeDatabase({
+        "c1_shopify_orders": [
+            {"id": 1, "created_at": "2025-02-20T10:00:00+00:00"},  # in the 30-day window and the previous week
+            {"id": 2, "created_at": "2025-01-10T08:00:00+00:00"},  # in the previous 30-day period
+        ],
+    })
+    calls = []
+
+    async def refresh(client_id, platform):
+        calls.append(client_id)
+        return {"success": True}
+
+    async def unchanged_data(client_id, platform="shopify"):
+        return "orders:2025-02-20|products:2025-01-01"
+
+    def night(moment):
+        clock = _clock(moment)
+        with mock.patch.object(tenant_refresh, "datetime", clock), \
+                mock.patch("dashboard_inventory_analyzer.datetime", clock), \
+                mock.patch.object(dashboard_inventory_analyzer, "get_data_version", unchanged_data), \
+                mock.patch.object(dashboard_inventory_analyzer, "admin_client", database, create=True), \
+                mock.patch.object(dashboard_inventory_analyzer, "_client_initialized", True):
+            # A fresh pool and checkpoint store per night, as each cron run is a new process
+            pool = TenantRefreshPool("nightly_analytics", refresh, tenant_refresh.data_version,
+                                     checkpoints=CheckpointTable(database))
+            return asyncio.run(pool.run(["c1"], ["shopify"], ranked=False))
+
+    assert night(datetime(2025, 3, 1, 2, tzinfo=timezone.utc))["successful_jobs"] == 1
+    assert night(datetime(2025, 3, 2, 2, tzinfo=timezone.utc))["skipped_jobs"] == 1
+    assert night(datetime(2025, 3, 3, 2, tzinfo=timezone.utc))["skipped_jobs"] == 1 and calls == ["c1"]
+    # By March 7th the Feb 20th order has left the week-before-last the alerts compare
+    assert night(datetime(2025, 3, 7, 2, tzinfo=timezone.utc))["successful_jobs"] == 1 and calls == ["c1", "c1"]
+    assert [row["key"] for row in database.tables["refresh_checkpoints"]] == ["nightly_analytics:c1:shopify"]
+
+def test_checkpoints_expire():
+    """A checkpoint past its max age no longer counts, so the unit is rebuilt"""
+    checkpoints = CheckpointTable(_FakeDatabase())
+    with mock.patch.object(tenant_refresh, "datetime", _clock(datetime(2025, 3, 1, tzinfo=timezone.utc))):
+        asyncio.run(checkpoints.set_marker("k", "v1", 3600))
+        assert asyncio.run(checkpoints.get_marker("k")) == "v1"
+    with mock.patch.object(tenant_refresh, "datetime", _clock(datetime(2025, 3, 1, 2, tzinfo=timezone.utc))):
+        assert asyncio.run(checkpoints.get_marker("k")) is None
+
+def test_nightly_cron_does_not_load_the_web_app():
+    """The analytics cron reuses the cache helpers without importing FastAPI or app"""
+    code = (
+        "import sys, json, analytics_refresh_cron, response_cache; "
+        "print(json.dumps([m for m in ('app', 'fastapi') if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+if __name__ == "__main__":
+    test_tenants_are_ranked_by_activity_then_size()
+    test_pool_bounds_concurrency_and_runs_units_in_parallel()
+    test_unchanged_tenants_are_skipped_and_failed_runs_resume()
+    test_unchanged_tenants_are_skipped_across_days_until_an_order_leaves_a_window()
+    test_checkpoints_expire()
+    test_nightly_cron_does_not_load_the_web_app()
+    print(" All tenant refresh tests passed!")
@@ -11,6 +11,8 @@ import xml.etree.ElementTree as ET
 from typing import List, Dict, Any
 import re
 
+from bak_scanner import bak_scanner
+
 class UniversalDataParser:
     """Universal parser that converts ALL data formats to JSON without external dependencies"""
     
@@ -26,18 +28,8 @@ class UniversalDataParser:
             #  ENHANCED: Handle bytes content (from SFTP/file uploads) 
             if isinstance(content, bytes):
                 if format_type == 'bak':
-                    # Use app.py strategy: try multiple encodings for .bak files
-                    print(" Received bytes content, trying multiple encodings for .bak file...")
-                    for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-                        try:
-                            content = content.decode(encoding)
-                            print(f" Successfully decoded .bak file using {encoding} encoding")
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    else:
-                        print(" Could not decode .bak file with any encoding")
-                        return []
+                    # Scan the raw bytes directly - no need to decode the whole backup
+                    return self._parse_bak(content)
                 else:
                     # For other formats, try UTF-8 first, then latin-1
                     try:
@@ -610,8 +602,26 @@ class UniversalDataParser:
             # Fallback to CSV parsing
             return self._parse_csv(content)
     
-    def _parse_bak(self, content: str) -> List[Dict[str, Any]]:
-        """Parse .bak files with intelligent business data extraction"""
+    def parse_bak_file(self, source) -> List[Dict[str, Any]]:
+        """
+        Parse a .bak file from a path or file object (e.g. an upload's spool file)
+        The file is memory-mapped and scanned in a single pass, so it is never
+        read into memory as a whole
+        """
+        try:
+            print(" Parsing .bak file with memory-mapped single-pass scanner...")
+            records = bak_scanner.scan_file(source)
+            if records:
+                print(f" BAK scan successful: {len(records)} sampled records")
+                return records
+            print(" All BAK parsing methods failed, returning error record")
+            return self._create_bak_error_record('', Exception("All BAK parsing methods failed to extract meaningful data"))
+        except Exception as e:
+            print(f" .bak file parsing failed with unexpected error: {e}")
+            return self._create_bak_error_record('', e)
+
+    def _parse_bak(self, content) -> List[Dict[str, Any]]:
+        """Parse .bak content (str or bytes) with intelligent business data extraction"""
         try:
             print(" Parsing .bak file with intelligent business data extraction...")
             print(f" Original content length: {len(content)} characters")
@@ -621,50 +631,13 @@ class UniversalDataParser:
                 print(" .bak file content is empty or too small to parse")
                 return self._create_bak_error_record(content, Exception("BAK file content is empty or too small"))
             
-            # STEP 1: Try to extract actual business data patterns
-            try:
-                print(" Step 1: Searching for real business data patterns...")
-                business_records = self._extract_business_data_from_bak(content)
-                if business_records and len(business_records) > 0:
-                    total_lines = len(business_records)
-                    sample_size = int(total_lines * 0.06)  # 6% sampling
-                    print(f" SAMPLING: Taking 6% sample = {sample_size}/{total_lines} lines")
-                    sampled_records = business_records[:sample_size] if sample_size > 0 else business_records[:1]
-                    print(f" Business data extraction successful: {len(sampled_records)} records")
-                    return sampled_records
-                print(" No business data patterns found")
-            except Exception as e:
-                print(f" Business data extraction failed: {e}")
-            
-            # STEP 2: Try to extract readable text data with intelligent filtering
-            try:
-                print(" Step 2: Attempting intelligent text extraction...")
-                text_records = self._extract_intelligent_text_from_bak(content)
-                if text_records and len(text_records) > 0:
-                    total_lines = len(text_records)
-                    sample_size = int(total_lines * 0.06)  # 6% sampling
-                    print(f" SAMPLING: Taking 6% sample = {sample_size}/{total_lines} lines")
-                    sampled_records = text_records[:sample_size] if sample_size > 0 else text_records[:1]
-                    print(f" Intelligent text extraction successful: {len(sampled_records)} records")
-                    return sampled_records
-                print(" No meaningful text data found")
-            except Exception as e:
-                print(f" Intelligent text extraction failed: {e}")
-            
-            # STEP 3: Last resort - try to find ANY meaningful patterns
-            try:
-                print(" Step 3: Final attempt - extracting any meaningful patterns...")
-                fallback_records = self._extract_fallback_patterns_from_bak(content)
-                if fallback_records and len(fallback_records) > 0:
-                    total_lines = len(fallback_records)
-                    sample_size = int(total_lines * 0.06)  # 6% sampling
-                    print(f" SAMPLING: Taking 6% sample = {sample_size}/{total_lines} lines")
-                    sampled_records = fallback_records[:sample_size] if sample_size > 0 else fallback_records[:1]
-                    print(f" Fallback pattern extraction successful: {len(sampled_records)} records")
-                    return sampled_records
-                print(" No meaningful patterns found")
-            except Exception as e:
-                print(f" Fallback pattern extraction failed: {e}")
+            # Business, text and fallback patterns all run in one pass over the
+            # bytes, with 6% reservoir sampling done during the scan
+            buffer = content.encode('utf-8', errors='ignore') if isinstance(content, str) else content
+            records = bak_scanner.scan_buffer(buffer)
+            if records:
+                print(f" BAK scan successful: {len(records)} sampled records")
+                return records
             
             # If all methods fail, return a helpful error record
             print(" All BAK parsing methods failed, returning error record")
@@ -676,170 +649,6 @@ class UniversalDataParser:
             print(f"Full traceback: {traceback.format_exc()}")
             return self._create_bak_error_record(content, e)
     
-    def _extract_business_data_from_bak(self, content: str) -> List[Dict[str, Any]]:
-        """Extract actual business data patterns from BAK file content"""
-        try:
-            import re
-            
-            print(f" Analyzing content for business data patterns...")
-            records = []
-            
-            # Look for common business data patterns
-            patterns = {
-                'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-                'phone': r'\b(?:\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b',
-                'date': r'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b|\b\d{1,2}[-/]\d{1,2}[-/]\d{4}\b',
-                'price': r'\$\d+(?:\.\d{2})?|\b\d+\.\d{2}\b',
-                'id_number': r'\b[A-Z]{2,}\d{3,}\b|\b\d{6,}\b',
-                'name': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',
-                'address': r'\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd)\b',
-                'zipcode': r'\b\d{5}(?:-\d{4})?\b',
-                'state': r'\b(?:AL|AK|AZ|AR|CA|CO|CT|DE|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY)\b',
-                'product_code': r'\b[A-Z]{2,4}-?\d{3,6}\b',
-                'text_data': r'\b[A-Za-z]{3,}(?:\s+[A-Za-z]{3,})*\b'
-            }
-            
-            business_data = {}
-            for pattern_name, pattern in patterns.items():
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                if matches:
-                    # Filter out obvious binary garbage
-                    clean_matches = []
-                    for match in matches:
-                        if self._is_meaningful_text(match):
-                            clean_matches.append(match)
-                    
-                    if clean_matches:
-                        business_data[pattern_name] = list(set(clean_matches))  # Remove duplicates
-                        print(f" Found {len(clean_matches)} {pattern_name} patterns")
-            
-            # Create structured records from business data
-            record_id = 1
-            for data_type, values in business_data.items():
-                for value in values:  # NO LIMITS - Process all values
-                    record = {
-                        'id': record_id,
-                        'data_type': data_type,
-                        'value': str(value),
-                        'category': 'business_data',
-                        '_source_format': 'bak_business_extraction'
-                    }
-                    records.append(record)
-                    record_id += 1
-            
-            if records:
-                print(f" Extracted {len(records)} business data records")
-                return records
-            
-                return []
-            
-        except Exception as e:
-            print(f" Business data extraction failed: {e}")
-            return []
-    
-    def _extract_intelligent_text_from_bak(self, content: str) -> List[Dict[str, Any]]:
-        """Extract meaningful text data with intelligent filtering"""
-        try:
-            print(f" Processing content for meaningful text patterns...")
-            
-            lines = content.split('\n')
-            records = []
-            processed_lines = 0
-            
-            for line_num, line in enumerate(lines):
-                # NO LIMITS - Process all lines
-                
-                # Extract only meaningful text
-                clean_text = self._extract_meaningful_text(line)
-                
-                if clean_text and len(clean_text) > 3:  # Must have meaningful content
-                    # Check if line contains useful data patterns
-                    if self._contains_useful_data(clean_text):
-                        record = {
-                            'id': line_num + 1,
-                            'line_number': line_num + 1,
-                            'content': clean_text,
-                            'category': 'meaningful_text',
-                            '_source_format': 'bak_intelligent_text'
-                        }
-                        records.append(record)
-                        processed_lines += 1
-            
-            if records:
-                print(f" Extracted {len(records)} meaningful text records")
-                return records
-            
-            return []
-            
-        except Exception as e:
-            print(f" Intelligent text extraction failed: {e}")
-            return []
-    
-    def _extract_fallback_patterns_from_bak(self, content: str) -> List[Dict[str, Any]]:
-        """Last resort: extract any recognizable patterns"""
-        try:
-            import re
-            
-            print(f" Final attempt: searching for any recognizable patterns...")
-            
-            # Look for simple patterns that might indicate structured data
-            patterns = [
-                (r'(\w+):\s*([^\n\r]+)', 'key_value'),
-                (r'(\w+)\s*=\s*([^\n\r]+)', 'assignment'),
-                (r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})', 'date_pattern'),
-                (r'(\d+\.\d+)', 'decimal_number'),
-                (r'([A-Za-z]{5,})', 'long_word')
-            ]
-            
-            records = []
-            record_id = 1
-            
-            for pattern, pattern_type in patterns:
-                matches = re.findall(pattern, content, re.MULTILINE)
-                useful_matches = 0
-                
-                for match in matches:
-                    # NO LIMITS - Process all matches
-                    
-                    if isinstance(match, tuple):
-                        if len(match) >= 2 and self._is_meaningful_text(match[0]) and self._is_meaningful_text(match[1]):
-                            record = {
-                                'id': record_id,
-                                'pattern_type': pattern_type,
-                                'key': str(match[0]).strip(),
-                                'value': str(match[1]).strip(),
-                                'category': 'fallback_pattern',
-                                '_source_format': 'bak_fallback_extraction'
-                            }
-                            records.append(record)
-                            record_id += 1
-                            useful_matches += 1
-            else:
-                        if self._is_meaningful_text(match):
-                            record = {
-                                'id': record_id,
-                                'pattern_type': pattern_type,
-                                'value': str(match).strip(),
-                                'category': 'fallback_pattern',
-                                '_source_format': 'bak_fallback_extraction'
-                            }
-                            records.append(record)
-                            record_id += 1
-                            useful_matches += 1
-                
-            if useful_matches > 0:
-                    print(f" Found {useful_matches} useful {pattern_type} patterns")
-            
-            if records:
-                print(f" Extracted {len(records)} fallback pattern records")
-                return records
-            
-            return []
-            
-        except Exception as e:
-            print(f" Fallback pattern extraction failed: {e}")
-            return []
-    
     def _is_meaningful_text(self, text: str) -> bool:
         """Check if text contains meaningful content (not binary garbage)"""
         if not text or len(text) < 2:
@@ -1132,10 +941,14 @@ class UniversalDataParser:
     def _create_bak_error_record(self, content: str, error: Exception) -> List[Dict[str, Any]]:
         """Create error record when BAK parsing fails"""
         error_type = "unicode_error" if "unicode" in str(error).lower() else "parsing_error"
+        content_length = len(content) if content else 0
+        if isinstance(content, (bytes, bytearray)):
+            # Raw backup bytes: a bounded prefix is enough for the stats below
+            content = bytes(content[:1024 * 1024]).decode('latin-1')
         
         # Try to extract at least some basic info even on failure
         basic_stats = {
-                            'content_length': len(content) if content else 0,
+                            'content_length': content_length,
             'line_count': len(content.split('\n')) if content else 0,
             'has_sql_keywords': any(keyword in content.upper() for keyword in ['CREATE', 'INSERT', 'SELECT', 'TABLE']) if content else False,
             'has_database_patterns': any(pattern in content.upper() for pattern in ['DATABASE', 'SCHEMA', 'INDEX']) if content else False